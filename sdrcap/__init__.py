@@ -7,5 +7,4 @@
     Each hardware interface has its own private setup functions and parameters.
 """
 __version__ = "0.0.1"
-AVAILABLE_FILETYPES = ("csv", "hdf5")
 AVAILABLE_SDR_DEVICES = ("rtl")
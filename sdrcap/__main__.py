@@ -0,0 +1,6 @@
+"""Runs the sdrcap command line interface with `python -m sdrcap`."""
+
+import sys
+from sdrcap.cli import main
+
+sys.exit(main())
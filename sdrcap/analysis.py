@@ -0,0 +1,638 @@
+"""
+Module for out-of-core analytics over recordings.
+
+Queries run over one or many recordings of any type `open_recording`
+reads (HDF5, cu8, sdrz, ...), using the `center_freq`, `sample_rate` and
+start time stored with each of them. Recordings are read `chunk_size`
+samples at a time, so memory is bounded by the chunk size however long
+they are. Every chunk is cut into `fft_size` sample frames whose Hann
+windowed power spectra (dBFS: a full scale tone peaks at 0 dB) are placed
+at the absolute frequencies of the recording, then reduced with vectorized
+NumPy:
+
+    - BandPower: total power in a band, averaged per time interval.
+    - Occupancy: fraction of frames per time interval whose band power
+      exceeds a threshold.
+    - AveragePSD: power spectrum averaged over every frame.
+    - PeakDetector: strongest bin in a band per time interval, kept when it
+      exceeds a threshold.
+
+Chunks are grouped into tasks of `chunks_per_task` chunks, aligned to the
+start of each recording, and spread over a process pool. The partial
+result of every task and reduction is cached as a .npz file keyed by the
+recording (path, size and modification time), the chunks, the frame
+parameters and the reduction, so repeating a query, or widening its time
+range, only reads the chunks it has not seen before: only the first and
+last task of a time range are cut at its ends, the others keep their
+alignment. A recording that changed is read again.
+
+Usage:
+    files = glob.glob("outputs/*.hdf5")
+    occupied = occupancy(files, 462.55e6, 462.575e6, threshold_db=-50)
+    peaks = detect_peaks(
+        files, -30, low=461.9e6, high=462.1e6, interval=3600,
+        start_time=time.time() - 7 * 86400,
+    )
+"""
+
+import hashlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sdrcap.readers import open_recording
+
+DEFAULT_FFT_SIZE = 1024
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_CHUNKS_PER_TASK = 16
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "sdrcap",
+    "analysis",
+)
+# bump when partial results change meaning, to ignore older cache files
+CACHE_VERSION = 1
+
+
+def _db(power):
+    """Converts linear power to dB, flooring silence at -200 dB."""
+    return 10 * np.log10(np.maximum(power, 1e-20))
+
+
+def _group(bins, *values):
+    """Sums `values` per unique bin.
+
+    Returns:
+        tuple: (unique bins, one summed array per value)
+    """
+    unique, inverse = np.unique(bins, return_inverse=True)
+    return unique, [
+        np.bincount(inverse, weights=value, minlength=len(unique)) for value in values
+    ]
+
+
+def _band_mask(frequencies, low, high):
+    """Returns the bins of a spectrum overlapping [low, high] Hz."""
+    half_bin = (frequencies[1] - frequencies[0]) / 2 if len(frequencies) > 1 else 0.0
+    return (frequencies + half_bin > low) & (frequencies - half_bin < high)
+
+
+def _band_power(power, frequencies, low, high):
+    """Returns the power of every frame in a band, None when not covered.
+
+    A recording only answers for a band it covers entirely. The bins are
+    summed and divided by the noise bandwidth of the window in bins, so a
+    tone of amplitude 1 in the band adds 0 dB however it spreads over bins.
+    """
+    half_bin = (frequencies[1] - frequencies[0]) / 2 if len(frequencies) > 1 else 0.0
+    if low < frequencies[0] - half_bin or high > frequencies[-1] + half_bin:
+        return None
+    window = np.hanning(len(frequencies))
+    noise_bins = len(window) * np.sum(window**2) / np.sum(window) ** 2
+    band = power[:, _band_mask(frequencies, low, high)].sum(axis=1, dtype=np.float64)
+    return band / noise_bins
+
+
+class Reduction(ABC):
+    """Abstract class defining each reduction computed chunk by chunk
+
+    A reduction turns the frames of a chunk into a partial result (a dict of
+    arrays), merges partial results and finally turns the merged partial
+    result into the answer.
+    """
+
+    name = None
+
+    def spec(self):
+        """dict: name and parameters, identifying cached partial results."""
+        return {"name": self.name, **vars(self)}
+
+    @abstractmethod
+    def reduce(self, power, frequencies, times):
+        """Computes the partial result of a chunk.
+
+        Args:
+            power (numpy.ndarray): linear power of every frame and bin,
+              shape (frames, fft_size), bins from the lowest frequency.
+            frequencies (numpy.ndarray): absolute frequency of every bin (Hz).
+            times (numpy.ndarray): epoch time of the first sample of every
+              frame.
+
+        Returns:
+            dict: partial result arrays.
+        """
+
+    @abstractmethod
+    def merge(self, partials):
+        """Merges partial results in any order.
+
+        Returns:
+            dict: partial result arrays.
+        """
+
+    @abstractmethod
+    def finalize(self, partial):
+        """Turns the merged partial result into the answer.
+
+        Returns:
+            dict: result arrays.
+        """
+
+
+class _IntervalReduction(Reduction):
+    """Reduction summing per frame values per time interval."""
+
+    fields = ()
+
+    def _empty(self):
+        return {"bin": np.zeros(0, np.int64), **{f: np.zeros(0) for f in self.fields}}
+
+    def _partial(self, times, *values):
+        bins, sums = _group(np.floor(times / self.interval).astype(np.int64), *values)
+        return {"bin": bins, **dict(zip(self.fields, sums))}
+
+    def merge(self, partials):
+        partials = list(partials)
+        if not partials:
+            return self._empty()
+        bins = np.concatenate([partial["bin"] for partial in partials])
+        values = [
+            np.concatenate([partial[field] for partial in partials])
+            for field in self.fields
+        ]
+        bins, sums = _group(bins, *values)
+        return {"bin": bins, **dict(zip(self.fields, sums))}
+
+
+class BandPower(_IntervalReduction):
+    """Average total power in a frequency band per time interval."""
+
+    name = "band_power"
+    fields = ("sum", "count")
+
+    def __init__(self, low, high, interval=60.0):
+        """Initialize the BandPower reduction.
+
+        Args:
+            low (float): lowest frequency of the band in Hz.
+            high (float): highest frequency of the band in Hz.
+            interval (float, optional): seconds per result row. Defaults to 60.
+        """
+        if high <= low:
+            raise ValueError(f"Invalid band: {low} to {high}. Must have low < high.")
+        self.low = float(low)
+        self.high = float(high)
+        self.interval = float(interval)
+
+    def reduce(self, power, frequencies, times):
+        band = _band_power(power, frequencies, self.low, self.high)
+        if band is None:
+            return self._empty()
+        return self._partial(times, band, np.ones(len(band)))
+
+    def finalize(self, partial):
+        """Returns `time` (interval start), `power_db` and `frames` arrays."""
+        return {
+            "time": partial["bin"] * self.interval,
+            "power_db": _db(partial["sum"] / np.maximum(partial["count"], 1)),
+            "frames": partial["count"].astype(np.int64),
+        }
+
+
+class Occupancy(_IntervalReduction):
+    """Fraction of frames per time interval with band power above a threshold."""
+
+    name = "occupancy"
+    fields = ("busy", "count")
+
+    def __init__(self, low, high, threshold_db, interval=60.0):
+        """Initialize the Occupancy reduction.
+
+        Args:
+            low (float): lowest frequency of the band in Hz.
+            high (float): highest frequency of the band in Hz.
+            threshold_db (float): band power in dBFS above which a frame
+              counts as occupied.
+            interval (float, optional): seconds per result row. Defaults to 60.
+        """
+        if high <= low:
+            raise ValueError(f"Invalid band: {low} to {high}. Must have low < high.")
+        self.low = float(low)
+        self.high = float(high)
+        self.threshold_db = float(threshold_db)
+        self.interval = float(interval)
+
+    def reduce(self, power, frequencies, times):
+        band = _band_power(power, frequencies, self.low, self.high)
+        if band is None:
+            return self._empty()
+        busy = (_db(band) > self.threshold_db).astype(np.float64)
+        return self._partial(times, busy, np.ones(len(band)))
+
+    def finalize(self, partial):
+        """Returns `time` (interval start), `occupancy` and `frames` arrays."""
+        return {
+            "time": partial["bin"] * self.interval,
+            "occupancy": partial["busy"] / np.maximum(partial["count"], 1),
+            "frames": partial["count"].astype(np.int64),
+        }
+
+
+class AveragePSD(Reduction):
+    """Power spectrum averaged over every frame.
+
+    All recordings must share one center frequency, sample rate and
+    `fft_size`.
+    """
+
+    name = "average_psd"
+
+    def reduce(self, power, frequencies, times):
+        return {
+            "frequencies": frequencies,
+            "sum": power.sum(axis=0, dtype=np.float64),
+            "count": np.array(len(power)),
+        }
+
+    def merge(self, partials):
+        partials = [partial for partial in partials if int(partial["count"])]
+        if not partials:
+            return {
+                "frequencies": np.zeros(0),
+                "sum": np.zeros(0),
+                "count": np.array(0),
+            }
+        frequencies = partials[0]["frequencies"]
+        for partial in partials[1:]:
+            if not np.array_equal(partial["frequencies"], frequencies):
+                raise ValueError(
+                    "Invalid recordings: they cover different frequencies. "
+                    "Must share one center frequency and sample rate."
+                )
+        return {
+            "frequencies": frequencies,
+            "sum": np.sum([partial["sum"] for partial in partials], axis=0),
+            "count": np.array(sum(int(partial["count"]) for partial in partials)),
+        }
+
+    def finalize(self, partial):
+        """Returns `frequencies`, `power_db` arrays and the `frames` count."""
+        return {
+            "frequencies": partial["frequencies"],
+            "power_db": _db(partial["sum"] / max(int(partial["count"]), 1)),
+            "frames": int(partial["count"]),
+        }
+
+
+class PeakDetector(Reduction):
+    """Strongest bin per time interval, kept when above a threshold."""
+
+    name = "peaks"
+
+    def __init__(self, threshold_db, low=None, high=None, interval=60.0):
+        """Initialize the PeakDetector reduction.
+
+        Args:
+            threshold_db (float): bin power in dBFS a peak must exceed.
+            low (float, optional): lowest frequency searched in Hz.
+            high (float, optional): highest frequency searched in Hz.
+            interval (float, optional): seconds per detected peak at most.
+              Defaults to 60.
+        """
+        self.threshold_db = float(threshold_db)
+        self.low = -np.inf if low is None else float(low)
+        self.high = np.inf if high is None else float(high)
+        self.interval = float(interval)
+
+    def spec(self):
+        # infinities are not valid JSON
+        return {**super().spec(), "low": str(self.low), "high": str(self.high)}
+
+    @staticmethod
+    def _strongest(partial):
+        """Keeps the strongest peak of every interval."""
+        order = np.lexsort((-partial["power"], partial["bin"]))
+        _, first = np.unique(partial["bin"][order], return_index=True)
+        keep = order[first]
+        return {field: values[keep] for field, values in partial.items()}
+
+    def reduce(self, power, frequencies, times):
+        mask = _band_mask(frequencies, self.low, self.high)
+        if not mask.any() or not len(power):
+            return self.merge([])
+        band = power[:, mask]
+        strongest = band.argmax(axis=1)
+        peak_power = band[np.arange(len(band)), strongest].astype(np.float64)
+        found = _db(peak_power) > self.threshold_db
+        return self._strongest(
+            {
+                "bin": np.floor(times[found] / self.interval).astype(np.int64),
+                "time": times[found],
+                "frequency": frequencies[mask][strongest[found]],
+                "power": peak_power[found],
+            }
+        )
+
+    def merge(self, partials):
+        partials = list(partials)
+        fields = ("bin", "time", "frequency", "power")
+        if not partials:
+            return {
+                field: np.zeros(0, np.int64 if field == "bin" else np.float64)
+                for field in fields
+            }
+        return self._strongest(
+            {
+                field: np.concatenate([partial[field] for partial in partials])
+                for field in fields
+            }
+        )
+
+    def finalize(self, partial):
+        """Returns `time`, `frequency` and `power_db` arrays of the peaks."""
+        order = np.argsort(partial["time"], kind="stable")
+        return {
+            "time": partial["time"][order],
+            "frequency": partial["frequency"][order],
+            "power_db": _db(partial["power"][order]),
+        }
+
+
+def frame_spectra(samples, fft_size):
+    """Computes the power spectrum of every whole `fft_size` sample frame.
+
+    Args:
+        samples (numpy.ndarray): complex samples.
+        fft_size (int): samples per frame and bins per spectrum.
+
+    Returns:
+        numpy.ndarray: float32 linear power, shape (frames, fft_size), bins
+        from the lowest to the highest frequency, a full scale tone at 1.
+    """
+    window = np.hanning(fft_size).astype(np.float32)
+    frames = samples[: len(samples) // fft_size * fft_size].reshape(-1, fft_size)
+    spectra = np.fft.fft(frames * window, axis=-1)
+    power = (spectra.real**2 + spectra.imag**2).astype(np.float32)
+    power *= np.float32(1 / window.sum(dtype=np.float64) ** 2)
+    return np.fft.fftshift(power, axes=-1)
+
+
+def _cache_path(cache_dir, task, reduction):
+    """Returns the cache file of one task and reduction."""
+    key = json.dumps(
+        {
+            "version": CACHE_VERSION,
+            "recording": task["identity"],
+            "samples": task["samples"],
+            "chunk_size": task["chunk_size"],
+            "fft_size": task["fft_size"],
+            "reduction": reduction.spec(),
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+    return os.path.join(cache_dir, digest[:2], f"{digest}.npz")
+
+
+def _load_partial(path):
+    """Returns a cached partial result, None when missing or unreadable."""
+    try:
+        with np.load(path) as cached:
+            return {field: cached[field] for field in cached.files}
+    except (OSError, ValueError):
+        return None
+
+
+def _save_partial(path, partial):
+    """Writes a partial result atomically, so readers never see half a file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial_path = f"{path}.{os.getpid()}.tmp"
+    with open(partial_path, "wb") as cache_file:
+        np.savez(cache_file, **partial)
+    os.replace(partial_path, path)
+
+
+def _run_task(task, reductions, cache_paths):
+    """Reads the chunks of one task and computes its partial results.
+
+    Runs in the worker processes.
+
+    Returns:
+        list: one merged partial result per reduction.
+    """
+    chunk_size = task["chunk_size"]
+    begin, end = task["samples"]
+    partials = [[] for _ in reductions]
+    with open_recording(task["filename"]) as reader:
+        center_freq = reader.center_freq or 0.0
+        frequencies = center_freq + np.fft.fftshift(
+            np.fft.fftfreq(task["fft_size"], 1 / reader.sample_rate)
+        )
+        for offset, samples in reader.iter_chunks(chunk_size, begin, end):
+            power = frame_spectra(samples, task["fft_size"])
+            times = reader.sample_time(
+                offset + np.arange(len(power)) * task["fft_size"]
+            ).astype(np.float64)
+            for index, reduction in enumerate(reductions):
+                partials[index].append(reduction.reduce(power, frequencies, times))
+    merged = [
+        reduction.merge(chunk_partials)
+        for reduction, chunk_partials in zip(reductions, partials)
+    ]
+    for path, partial in zip(cache_paths, merged):
+        if path is not None:
+            _save_partial(path, partial)
+    return merged
+
+
+def _plan_tasks(
+    filename, fft_size, chunk_size, chunks_per_task, start_time, stop_time
+):
+    """Splits the selected chunks of a recording into aligned tasks."""
+    stat = os.stat(filename)
+    with open_recording(filename) as reader:
+        start = 0 if start_time is None else reader.sample_index(start_time)
+        stop = reader.num_samples
+        if stop_time is not None:
+            stop = reader.sample_index(stop_time)
+    identity = [os.path.abspath(filename), stat.st_size, stat.st_mtime_ns]
+    task_size = chunk_size * chunks_per_task
+    tasks = []
+    # only the first and last task of a time range are cut short
+    for begin in range(start - start % task_size, stop, task_size):
+        tasks.append(
+            {
+                "filename": filename,
+                "identity": identity,
+                "samples": [max(begin, start), min(begin + task_size, stop)],
+                "chunk_size": chunk_size,
+                "fft_size": fft_size,
+            }
+        )
+    return tasks
+
+
+def analyze(
+    filenames,
+    reductions,
+    fft_size=DEFAULT_FFT_SIZE,
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    start_time=None,
+    stop_time=None,
+    workers=None,
+    cache_dir=DEFAULT_CACHE_DIR,
+    chunks_per_task=DEFAULT_CHUNKS_PER_TASK,
+):
+    """Runs reductions over recordings in one pass, on a process pool.
+
+    Args:
+        filenames (iterable): paths of the recordings.
+        reductions (iterable): `Reduction` instances.
+        fft_size (int, optional): samples per frame. Defaults to 1024.
+        chunk_size (int, optional): samples read at a time, a multiple of
+          `fft_size`. Defaults to 1048576.
+        start_time (float, optional): epoch time of the first sample
+          analyzed. Defaults to the start of every recording.
+        stop_time (float, optional): epoch time after the last sample
+          analyzed. Defaults to the end of every recording.
+        workers (int, optional): worker processes, 1 runs in this process.
+          Defaults to the CPU count.
+        cache_dir (str, optional): directory of the cached partial results,
+          None disables the cache. Defaults to `DEFAULT_CACHE_DIR`.
+        chunks_per_task (int, optional): chunks per task and cache file.
+          Defaults to 16.
+
+    Returns:
+        dict: `results`, one finalized result per reduction, and the
+        `tasks`, `cached` (tasks answered from the cache only) and `seconds`
+        of the query.
+    """
+    start = time.perf_counter()
+    reductions = list(reductions)
+    if fft_size < 1 or chunk_size % fft_size:
+        raise ValueError(
+            f"Invalid chunk_size: {chunk_size}. "
+            f"Must be a multiple of fft_size {fft_size}."
+        )
+    if chunks_per_task < 1:
+        raise ValueError(f"Invalid chunks_per_task: {chunks_per_task}. Must be >= 1.")
+    tasks = [
+        task
+        for filename in filenames
+        for task in _plan_tasks(
+            filename, fft_size, chunk_size, chunks_per_task, start_time, stop_time
+        )
+    ]
+    partials = [[] for _ in reductions]
+    pending = []
+    for task in tasks:
+        missing = []
+        for index, reduction in enumerate(reductions):
+            path = None
+            if cache_dir is not None:
+                path = _cache_path(cache_dir, task, reduction)
+            partial = None if path is None else _load_partial(path)
+            if partial is None:
+                missing.append((index, path))
+            else:
+                partials[index].append(partial)
+        if missing:
+            pending.append((task, missing))
+
+    jobs = [
+        (
+            task,
+            [reductions[index] for index, _ in missing],
+            [path for _, path in missing],
+        )
+        for task, missing in pending
+    ]
+    workers = min(workers or os.cpu_count() or 1, max(len(jobs), 1))
+    if workers == 1:
+        computed = [_run_task(*job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            futures = [executor.submit(_run_task, *job) for job in jobs]
+            computed = [future.result() for future in futures]
+    for (_, missing), merged in zip(pending, computed):
+        for (index, _), partial in zip(missing, merged):
+            partials[index].append(partial)
+    return {
+        "results": [
+            reduction.finalize(reduction.merge(reduction_partials))
+            for reduction, reduction_partials in zip(reductions, partials)
+        ],
+        "tasks": len(tasks),
+        "cached": len(tasks) - len(pending),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def band_power(filenames, low, high, interval=60.0, **options):
+    """Average power in a band per time interval, see `BandPower`.
+
+    Args:
+        filenames (iterable): paths of the recordings.
+        low (float): lowest frequency of the band in Hz.
+        high (float): highest frequency of the band in Hz.
+        interval (float, optional): seconds per result row. Defaults to 60.
+        **options: `analyze` options.
+
+    Returns:
+        dict: `time`, `power_db` and `frames` arrays.
+    """
+    return analyze(filenames, [BandPower(low, high, interval)], **options)["results"][0]
+
+
+def occupancy(filenames, low, high, threshold_db, interval=60.0, **options):
+    """Occupied fraction of a band per time interval, see `Occupancy`.
+
+    Args:
+        filenames (iterable): paths of the recordings.
+        low (float): lowest frequency of the band in Hz.
+        high (float): highest frequency of the band in Hz.
+        threshold_db (float): band power in dBFS of an occupied frame.
+        interval (float, optional): seconds per result row. Defaults to 60.
+        **options: `analyze` options.
+
+    Returns:
+        dict: `time`, `occupancy` and `frames` arrays.
+    """
+    reduction = Occupancy(low, high, threshold_db, interval)
+    return analyze(filenames, [reduction], **options)["results"][0]
+
+
+def average_psd(filenames, **options):
+    """Power spectrum averaged over recordings, see `AveragePSD`.
+
+    Args:
+        filenames (iterable): paths of the recordings.
+        **options: `analyze` options.
+
+    Returns:
+        dict: `frequencies` and `power_db` arrays and the `frames` count.
+    """
+    return analyze(filenames, [AveragePSD()], **options)["results"][0]
+
+
+def detect_peaks(
+    filenames, threshold_db, low=None, high=None, interval=60.0, **options
+):
+    """Strongest peak above a threshold per time interval, see `PeakDetector`.
+
+    Args:
+        filenames (iterable): paths of the recordings.
+        threshold_db (float): bin power in dBFS a peak must exceed.
+        low (float, optional): lowest frequency searched in Hz.
+        high (float, optional): highest frequency searched in Hz.
+        interval (float, optional): seconds per detected peak at most.
+          Defaults to 60.
+        **options: `analyze` options.
+
+    Returns:
+        dict: `time`, `frequency` and `power_db` arrays.
+    """
+    reduction = PeakDetector(threshold_db, low, high, interval)
+    return analyze(filenames, [reduction], **options)["results"][0]
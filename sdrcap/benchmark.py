@@ -0,0 +1,538 @@
+"""
+Module for benchmarking the recorders and the capture loop.
+
+Every case drives one recorder, or the `RTLSDRInterface` capture loop on an
+unthrottled `SimulatedRtlSdr`, for a number of batches and reports:
+
+    - samples_per_sec: samples saved per second of wall time.
+    - bytes_per_sec: bytes written to disk per second of wall time.
+    - peak_rss_mb: peak resident set size of the process running the case.
+    - latency_ms: p50, p90, p99 and max per batch latency (one `save`, or one
+      `record_single_sample` for the capture loop).
+
+By default each case runs in a fresh process so its peak RSS is its own.
+Results can be saved as a baseline and later runs compared against it; a
+case regresses when its throughput drops, or its p99 latency or peak RSS
+grows, by more than the tolerance. The command line exits non-zero on
+regressions, so it can gate upgrades:
+
+    python -m sdrcap.benchmark --save-baseline benchmarks/baseline.json
+    python -m sdrcap.benchmark --baseline benchmarks/baseline.json
+
+`--startup` instead measures the import time of the `sdrcap` command and of
+the record path of each file type, against importing every optional
+dependency up front as sdrcap did before the registry made them lazy.
+
+`--allocations` profiles the Python heap (numpy arrays included) allocated
+by every `record_single_sample` batch once the capture loop is warmed up,
+on a device handing out the same bytes. The buffer pool and table lookup
+conversion keep it to Python objects, independent of the batch size:
+measured at about 5 KiB peak and 170 bytes retained per batch for cu8, and
+about 15 KiB peak and 0.9 to 1.2 KiB retained per batch for the streaming
+HDF5 layouts, whose per batch time and index rows go through h5py.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import numpy as np
+from sdrcap import __version__
+from sdrcap.codecs import compare_codecs
+from sdrcap.iq import complex_to_cu8
+from sdrcap.recorders.recorder import Recorder
+from sdrcap.rtl_interface import DEFAULT_OPTIONS, RTLSDRInterface, create_recorder
+from sdrcap.sim_interface import SimulatedSDRInterface
+
+DEFAULT_WINDOWS = (16384, 262144)
+# (case name, create_recorder options)
+RECORDER_CASES = (
+    ("csv", {"filetype": "csv"}),
+    ("hdf5", {"filetype": "hdf5"}),
+    ("hdf5-stream-complex64", {"filetype": "hdf5", "hdf5_streaming": True}),
+    (
+        "hdf5-stream-uint8",
+        {"filetype": "hdf5", "hdf5_streaming": True, "hdf5_dtype": "uint8"},
+    ),
+    ("cu8", {"filetype": "cu8"}),
+    ("sdrz-zlib", {"filetype": "sdrz", "codec": "zlib"}),
+    ("sdrz-zlib-int8", {"filetype": "sdrz", "codec": "zlib", "sample_format": "int8"}),
+)
+CAPTURE_FILETYPES = ("hdf5", "cu8")
+LATENCY_PERCENTILES = (50, 90, 99)
+# (case name, modules a cold start imports)
+STARTUP_CASES = (
+    ("cli", ("sdrcap.cli",)),
+    (
+        "record-cu8",
+        ("sdrcap.cli", "sdrcap.rtl_interface", "sdrcap.recorders.raw_recorder"),
+    ),
+    (
+        "record-hdf5",
+        ("sdrcap.cli", "sdrcap.rtl_interface", "sdrcap.recorders.hdf5_recorder"),
+    ),
+    ("eager", ("sdrcap.cli", "sdrcap.rtl_interface", "h5py", "rtlsdr", "asyncio")),
+)
+
+# (case name, recording options) of the allocation profile
+ALLOCATION_CASES = (
+    ("cu8", {"filetype": "cu8"}),
+    ("hdf5-stream-complex64", {"filetype": "hdf5", "hdf5_streaming": True}),
+    (
+        "hdf5-stream-uint8",
+        {"filetype": "hdf5", "hdf5_streaming": True, "hdf5_dtype": "uint8"},
+    ),
+)
+
+
+class _LoopbackSdr:
+    """Device copying the same bytes into every read, allocating nothing."""
+
+    def __init__(self, data):
+        self.data = data
+
+    def read_bytes_into(self, out):
+        """Fills `out` with the first `len(out)` bytes of `data`."""
+        out[:] = self.data[: len(out)]
+        return out
+
+
+class _TimedRecorder(Recorder):
+    """Recorder proxy timing every `save` of the wrapped recorder."""
+
+    def __init__(self, recorder):
+        super().__init__()
+        self.recorder = recorder
+        self.latencies = []
+
+    @property
+    def raw_input(self):
+        """bool: raw input flag of the wrapped recorder."""
+        return self.recorder.raw_input
+
+    def start_recording(self, start_recording_time):
+        self.recorder.start_recording(start_recording_time)
+
+    def stop_recording(self, stop_recording_time):
+        self.recorder.stop_recording(stop_recording_time)
+
+    def save(self, samples, filename):
+        start = time.perf_counter()
+        self.recorder.save(samples=samples, filename=filename)
+        self.latencies.append(time.perf_counter() - start)
+
+
+def peak_rss_mb():
+    """Returns the peak resident set size of this process in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kibibytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def _directory_bytes(path):
+    """Returns the total size of the files below `path`."""
+    return sum(
+        os.path.getsize(os.path.join(root, name))
+        for root, _, names in os.walk(path)
+        for name in names
+    )
+
+
+def _summarize(case, latencies, num_samples, elapsed, output_dir):
+    """Builds the result record of a finished case."""
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        **case,
+        "samples_per_sec": num_samples / elapsed,
+        "bytes_per_sec": _directory_bytes(output_dir) / elapsed,
+        "peak_rss_mb": peak_rss_mb(),
+        "latency_ms": {
+            **{
+                f"p{percentile}": float(np.percentile(latencies_ms, percentile))
+                for percentile in LATENCY_PERCENTILES
+            },
+            "max": float(latencies_ms.max()),
+        },
+    }
+
+
+def _test_batch(sample_window, raw):
+    """Returns a noisy batch as complex64 samples or interleaved uint8 bytes."""
+    rng = np.random.default_rng(0)
+    samples = (
+        0.3 * (rng.standard_normal(sample_window) + 1j * rng.standard_normal(sample_window))
+    ).astype(np.complex64)
+    return complex_to_cu8(samples) if raw else samples
+
+
+def run_case(case):
+    """Runs one benchmark case.
+
+    Args:
+        case (dict): `name`, `kind` ("recorder" or "capture"),
+          `sample_window`, `num_batches` and the recording `options`.
+
+    Returns:
+        dict: the case with its measurements.
+    """
+    output_dir = tempfile.mkdtemp(prefix="sdrcap-benchmark-")
+    options = {
+        **DEFAULT_OPTIONS,
+        **case["options"],
+        "sample_window": case["sample_window"],
+        "output_dir": output_dir,
+    }
+    window = case["sample_window"]
+    try:
+        if case["kind"] == "recorder":
+            recorder = _TimedRecorder(create_recorder(options))
+            batch = _test_batch(window, recorder.raw_input)
+            filename = os.path.join(output_dir, f"benchmark.{options['filetype']}")
+            start = time.perf_counter()
+            recorder.start_recording(time.time())
+            for _ in range(case["num_batches"]):
+                recorder.save(samples=batch, filename=filename)
+            recorder.stop_recording(time.time())
+            elapsed = time.perf_counter() - start
+            latencies = recorder.latencies
+        else:
+            iface = SimulatedSDRInterface(realtime=False, **options)
+            iface.options["recorder"].start_recording(time.time())
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(case["num_batches"]):
+                batch_start = time.perf_counter()
+                iface.record_single_sample(recording_name="benchmark")
+                latencies.append(time.perf_counter() - batch_start)
+            iface.options["recorder"].stop_recording(time.time())
+            elapsed = time.perf_counter() - start
+        return _summarize(
+            case, latencies, window * case["num_batches"], elapsed, output_dir
+        )
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def build_cases(windows=DEFAULT_WINDOWS, num_batches=20, filetypes=None):
+    """Builds the benchmark cases for every recorder and the capture loop.
+
+    Args:
+        windows (iterable, optional): sample_window sizes to run.
+        num_batches (int, optional): batches per case. Defaults to 20.
+        filetypes (iterable, optional): recorder case names and capture
+          filetypes to keep. Defaults to all.
+
+    Returns:
+        list: case dicts for `run_case`.
+    """
+    cases = []
+    for window in windows:
+        for name, options in RECORDER_CASES:
+            cases.append(
+                {
+                    "name": f"recorder/{name}/{window}",
+                    "kind": "recorder",
+                    "filetype": name,
+                    "sample_window": window,
+                    "num_batches": num_batches,
+                    "options": options,
+                }
+            )
+        for filetype in CAPTURE_FILETYPES:
+            cases.append(
+                {
+                    "name": f"capture/{filetype}/{window}",
+                    "kind": "capture",
+                    "filetype": filetype,
+                    "sample_window": window,
+                    "num_batches": num_batches,
+                    "options": {"filetype": filetype, "hdf5_streaming": True},
+                }
+            )
+    if filetypes is not None:
+        cases = [case for case in cases if case["filetype"] in filetypes]
+    return cases
+
+
+def run_benchmarks(cases, isolate=True):
+    """Runs benchmark cases, each in its own process when `isolate` is set.
+
+    Args:
+        cases (list): case dicts from `build_cases`.
+        isolate (bool, optional): run every case in a fresh process so peak
+          RSS is measured per case. Defaults to True.
+
+    Returns:
+        dict: `environment` description and per case `results`.
+    """
+    results = []
+    for case in cases:
+        if isolate:
+            with ProcessPoolExecutor(
+                1, mp_context=multiprocessing.get_context("spawn")
+            ) as pool:
+                results.append(pool.submit(run_case, case).result())
+        else:
+            results.append(run_case(case))
+    return {
+        "environment": {
+            "sdrcap_version": __version__,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance=0.2, latency_floor_ms=1.0):
+    """Compares a benchmark report against a baseline report.
+
+    Args:
+        report (dict): report from `run_benchmarks`.
+        baseline (dict): earlier report to compare against.
+        tolerance (float, optional): allowed relative change. Defaults to 0.2.
+        latency_floor_ms (float, optional): latency increases below this are
+          scheduling jitter rather than regressions. Defaults to 1 ms.
+
+    Returns:
+        list: one message per regression, empty when there is none.
+    """
+    previous = {result["name"]: result for result in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        before = previous.get(result["name"])
+        if before is None:
+            continue
+        checks = (
+            ("samples_per_sec", result["samples_per_sec"], before["samples_per_sec"], -1, 0),
+            (
+                "p99 latency_ms",
+                result["latency_ms"]["p99"],
+                before["latency_ms"]["p99"],
+                1,
+                latency_floor_ms,
+            ),
+            ("peak_rss_mb", result["peak_rss_mb"], before["peak_rss_mb"], 1, 0),
+        )
+        for metric, value, reference, worse, floor in checks:
+            if worse * (value - reference) > max(tolerance * reference, floor):
+                regressions.append(
+                    f"{result['name']}: {metric} {value:.4g} vs baseline {reference:.4g}"
+                )
+    return regressions
+
+
+def format_report(report):
+    """Formats the results of a report as a text table."""
+    lines = [
+        f"{'case':<40} {'MS/s':>8} {'MB/s':>8} {'RSS MB':>8} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    ]
+    for result in report["results"]:
+        latency = result["latency_ms"]
+        lines.append(
+            f"{result['name']:<40} {result['samples_per_sec'] / 1e6:>8.2f} "
+            f"{result['bytes_per_sec'] / 1e6:>8.1f} {result['peak_rss_mb']:>8.1f} "
+            f"{latency['p50']:>8.2f} {latency['p99']:>8.2f} {latency['max']:>8.2f}"
+        )
+    return "\n".join(lines)
+
+
+def startup_time(modules, repeats=5):
+    """Measures the cold import time of modules in fresh interpreters.
+
+    Args:
+        modules (iterable): module names imported in order.
+        repeats (int, optional): interpreters started. Defaults to 5.
+
+    Returns:
+        float or None: median import seconds, None when a module is missing.
+    """
+    imports = "; ".join(f"import {module}" for module in modules)
+    code = (
+        "import time; start = time.perf_counter(); "
+        f"{imports}; print(time.perf_counter() - start)"
+    )
+    times = []
+    for _ in range(repeats):
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=False
+        )
+        if result.returncode:
+            return None
+        times.append(float(result.stdout))
+    return statistics.median(times)
+
+
+def run_startup(cases=STARTUP_CASES, repeats=5):
+    """Measures every startup case.
+
+    Returns:
+        dict: median import milliseconds per case name, None when skipped.
+    """
+    results = {}
+    for name, modules in cases:
+        seconds = startup_time(modules, repeats)
+        results[name] = None if seconds is None else round(seconds * 1000, 1)
+    return results
+
+
+def allocation_profile(options, sample_window=262144, num_batches=20, warmup=3):
+    """Measures the heap allocated per batch by the synchronous capture loop.
+
+    Args:
+        options (dict): recording options, see `DEFAULT_OPTIONS`.
+        sample_window (int, optional): samples per batch. Defaults to 262144.
+        num_batches (int, optional): measured batches. Defaults to 20.
+        warmup (int, optional): batches run first, opening files and sizing
+          buffers. Defaults to 3.
+
+    Returns:
+        dict: `batch_bytes` read per batch, the most bytes allocated at once
+        during one batch (`peak_bytes`) and the bytes left allocated per
+        batch (`retained_bytes`).
+    """
+    output_dir = tempfile.mkdtemp(prefix="sdrcap-allocations-")
+    try:
+        iface = RTLSDRInterface(
+            sdr=_LoopbackSdr(_test_batch(sample_window, raw=True)),
+            **{
+                **options,
+                "sample_window": sample_window,
+                "output_dir": output_dir,
+            },
+        )
+        recorder = iface.options["recorder"]
+        recorder.start_recording(time.time())
+        for _ in range(warmup):
+            iface.record_single_sample("allocations")
+        peaks = []
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            for _ in range(num_batches):
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                iface.record_single_sample("allocations")
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+            retained = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+        recorder.stop_recording(time.time())
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return {
+        "batch_bytes": 2 * sample_window,
+        "peak_bytes": max(peaks),
+        "retained_bytes": max(retained, 0) / num_batches,
+    }
+
+
+def run_allocations(cases=ALLOCATION_CASES, sample_window=262144):
+    """Profiles the allocations of every allocation case.
+
+    Returns:
+        dict: `allocation_profile` per case name.
+    """
+    return {
+        name: allocation_profile({**DEFAULT_OPTIONS, **options}, sample_window)
+        for name, options in cases
+    }
+
+
+def main(argv=None):
+    """Command line entry point, returns the process exit code."""
+    parser = argparse.ArgumentParser(
+        prog="python -m sdrcap.benchmark", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument(
+        "--windows", type=int, nargs="+", default=list(DEFAULT_WINDOWS),
+        help="sample_window sizes to benchmark",
+    )
+    parser.add_argument("--batches", type=int, default=20, help="batches per case")
+    parser.add_argument(
+        "--filetypes", nargs="+", help="recorder case names / capture filetypes to run"
+    )
+    parser.add_argument("--baseline", help="baseline report to compare against")
+    parser.add_argument("--save-baseline", help="write the report as a new baseline")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed relative regression"
+    )
+    parser.add_argument(
+        "--no-isolate", action="store_true", help="run every case in this process"
+    )
+    parser.add_argument(
+        "--codecs", action="store_true",
+        help="only compare the ratio and MB/s of the available codecs",
+    )
+    parser.add_argument(
+        "--startup", action="store_true",
+        help="only measure the import time of the command line and record paths",
+    )
+    parser.add_argument(
+        "--allocations", action="store_true",
+        help="only profile the bytes allocated per batch of the capture loop",
+    )
+    args = parser.parse_args(argv)
+
+    if args.allocations:
+        for name, profile in run_allocations(sample_window=max(args.windows)).items():
+            print(
+                f"{name:<22} batch {profile['batch_bytes']:>9} B "
+                f"peak {profile['peak_bytes']:>8} B/batch "
+                f"retained {profile['retained_bytes']:>8.1f} B/batch"
+            )
+        return 0
+
+    if args.startup:
+        for name, milliseconds in run_startup().items():
+            timing = "skipped" if milliseconds is None else f"{milliseconds:>8.1f} ms"
+            print(f"{name:<12} {timing}")
+        return 0
+
+    if args.codecs:
+        batch = _test_batch(max(args.windows), raw=False)
+        for sample_format in ("cu8", "int16", "int8"):
+            for result in compare_codecs(batch, sample_format=sample_format):
+                print(
+                    f"{result['codec']:<8} {sample_format:<8} ratio {result['ratio']:>6.2f} "
+                    f"compress {result['compress_mb_per_sec']:>8.1f} MB/s "
+                    f"decompress {result['decompress_mb_per_sec']:>8.1f} MB/s"
+                )
+        return 0
+
+    report = run_benchmarks(
+        build_cases(args.windows, args.batches, args.filetypes),
+        isolate=not args.no_isolate,
+    )
+    print(format_report(report))
+    for path in (args.json, args.save_baseline):
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w", encoding="utf-8") as report_file:
+                json.dump(report, report_file, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as baseline_file:
+            regressions = compare(report, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
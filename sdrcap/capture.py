@@ -0,0 +1,486 @@
+"""
+Module for threaded producer/consumer capture of SDR data.
+
+The synchronous capture loop reads a batch, saves it and sleeps on a single
+thread, so the device buffer overflows whenever a write takes longer than a
+batch period. This module decouples the two sides: a reader thread drains the
+device through the pyrtlsdr async callback API into a bounded ring of
+preallocated buffers, while a writer thread feeds filled buffers to the
+recorder.
+
+Attributes:
+    BACKPRESSURE_POLICIES (tuple): What the reader does when every buffer is
+    full. "block" waits for the writer, "drop-oldest" overwrites the oldest
+    unwritten batch and "drop-newest" discards the incoming batch.
+
+Classes:
+    BufferRing: Bounded ring of preallocated sample buffers.
+    BufferPool: Preallocated byte buffers and complex64 sample arrays leased
+    per batch by the synchronous capture loop.
+    ThreadedCapture: Reader and writer threads around a device and recorder.
+
+Both capture paths read the device as interleaved uint8 bytes into
+preallocated buffers and convert them to complex64 through the `CU8_LUT`
+lookup table into preallocated arrays, so once running they allocate no
+sample memory per batch. Recorders receive views of these buffers, which
+are reused as soon as `save` returns: a recorder keeping samples past
+`save` must copy them. The reader stamps every batch with its sample index
+on a `sdrcap.clock.CaptureClock`, so batches dropped by the ring are
+recorded as discontinuities.
+
+Usage:
+    capture = ThreadedCapture(sdr, recorder, "outputs/capture.hdf5")
+    capture.start()
+    ...
+    capture.stop()
+    print(capture.stats)
+"""
+
+import threading
+import time
+from collections import deque
+import numpy as np
+from sdrcap.iq import cu8_scratch, cu8_to_complex64
+from sdrcap.clock import CaptureClock
+
+BACKPRESSURE_POLICIES = ("block", "drop-oldest", "drop-newest")
+
+
+class BufferRing:
+    """Bounded ring of preallocated buffers shared by one reader and one writer.
+
+    Buffers cycle between three states: free, ready (filled and waiting for
+    the writer) and held by the writer. The reader `acquire`s a free buffer,
+    fills it and `commit`s it; the writer `get`s ready buffers in order and
+    `release`s them once saved.
+    """
+
+    def __init__(self, num_buffers, buffer_length, dtype=np.complex64, policy="block"):
+        """Initialize the BufferRing.
+
+        Args:
+            num_buffers (int): number of preallocated buffers, at least 2.
+            buffer_length (int): number of elements per buffer.
+            dtype (numpy.dtype, optional): element type. Defaults to complex64.
+            policy (str, optional): one of `BACKPRESSURE_POLICIES`.
+              Defaults to "block".
+        """
+        if policy not in BACKPRESSURE_POLICIES:
+            raise ValueError(
+                f"Invalid backpressure policy: {policy}. "
+                f"Must be one of {BACKPRESSURE_POLICIES}."
+            )
+        if num_buffers < 2:
+            raise ValueError(f"Invalid num_buffers: {num_buffers}. Must be >= 2.")
+        self.buffers = np.empty((num_buffers, buffer_length), dtype=dtype)
+        self.policy = policy
+        self.dropped = 0
+        self._free = deque(range(num_buffers))
+        self._ready = deque()
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def acquire(self, timeout=None):
+        """Returns the index of a free buffer for the reader to fill.
+
+        Args:
+            timeout (float, optional): seconds to wait under the "block"
+              policy. Defaults to waiting until a buffer frees up.
+
+        Returns:
+            int or None: buffer index, or None when the batch must be dropped
+            or the ring is closed.
+        """
+        with self._cond:
+            if not self._free and not self._closed:
+                if self.policy == "drop-newest":
+                    self.dropped += 1
+                    return None
+                if self.policy == "drop-oldest" and self._ready:
+                    index, _ = self._ready.popleft()
+                    self.dropped += 1
+                    return index
+                self._cond.wait_for(lambda: self._free or self._closed, timeout)
+            if self._closed or not self._free:
+                return None
+            return self._free.popleft()
+
+    def commit(self, index, info):
+        """Hands a filled buffer to the writer.
+
+        Args:
+            index (int): buffer index returned by `acquire`.
+            info (dict): batch information passed along to the writer.
+        """
+        with self._cond:
+            self._ready.append((index, info))
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """Returns the oldest ready buffer for the writer.
+
+        Args:
+            timeout (float, optional): seconds to wait for a batch.
+
+        Returns:
+            tuple or None: (index, info), or None when nothing arrived in time
+            or the ring is closed and drained.
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._ready or self._closed, timeout)
+            if not self._ready:
+                return None
+            return self._ready.popleft()
+
+    def release(self, index):
+        """Returns a buffer to the free pool once the writer is done with it.
+
+        Args:
+            index (int): buffer index returned by `get`.
+        """
+        with self._cond:
+            self._free.append(index)
+            self._cond.notify_all()
+
+    def close(self):
+        """Wakes up all waiters; ready buffers can still be drained by `get`."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def depth(self):
+        """int: number of filled buffers waiting for the writer."""
+        return len(self._ready)
+
+
+def read_into(sdr, out):
+    """Reads interleaved uint8 IQ bytes from a device into a buffer.
+
+    Devices with `read_bytes_into` receive straight into `out`. pyrtlsdr
+    reuses one ctypes buffer across equally sized `read_bytes` calls, so
+    for other devices the bytes are copied without allocating.
+
+    Args:
+        sdr: pyrtlsdr style device object.
+        out (numpy.ndarray): uint8 buffer, filled completely.
+
+    Returns:
+        numpy.ndarray: `out`.
+    """
+    if hasattr(sdr, "read_bytes_into"):
+        sdr.read_bytes_into(out)
+    else:
+        out[:] = np.frombuffer(sdr.read_bytes(len(out)), dtype=np.uint8)
+    return out
+
+
+class BufferPool:
+    """Preallocated byte buffers and complex64 sample arrays leased per batch.
+
+    A leased buffer index owns one row of `raw` (interleaved uint8 IQ bytes)
+    and of `samples` (complex64) until it is released.
+    """
+
+    def __init__(self, num_buffers, num_samples):
+        """Initialize the BufferPool.
+
+        Args:
+            num_buffers (int): number of buffers, at least 1.
+            num_samples (int): IQ samples per buffer.
+        """
+        if num_buffers < 1:
+            raise ValueError(f"Invalid num_buffers: {num_buffers}. Must be >= 1.")
+        self.raw = np.empty((num_buffers, 2 * num_samples), dtype=np.uint8)
+        self.samples = np.empty((num_buffers, num_samples), dtype=np.complex64)
+        self._scratch = [cu8_scratch() for _ in range(num_buffers)]
+        self._free = deque(range(num_buffers))
+        self._cond = threading.Condition()
+
+    @property
+    def num_samples(self):
+        """int: IQ samples per buffer."""
+        return self.samples.shape[1]
+
+    def acquire(self, timeout=None):
+        """Leases a buffer, waiting for one to be released if none is free.
+
+        Args:
+            timeout (float, optional): seconds to wait. Defaults to no limit.
+
+        Returns:
+            int or None: buffer index, None when nothing was released in time.
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._free, timeout):
+                return None
+            return self._free.popleft()
+
+    def release(self, index):
+        """Returns a leased buffer to the pool.
+
+        Args:
+            index (int): buffer index returned by `acquire`.
+        """
+        with self._cond:
+            self._free.append(index)
+            self._cond.notify()
+
+    def read(self, index, sdr):
+        """Reads one batch of bytes from a device into a leased buffer.
+
+        Returns:
+            numpy.ndarray: the filled `raw` row.
+        """
+        return read_into(sdr, self.raw[index])
+
+    def convert(self, index, length=None):
+        """Converts the bytes of a leased buffer into its complex64 samples.
+
+        Args:
+            index (int): buffer index returned by `acquire`.
+            length (int, optional): bytes to convert. Defaults to all.
+
+        Returns:
+            numpy.ndarray: view of the converted samples.
+        """
+        length = self.raw.shape[1] if length is None else length
+        return cu8_to_complex64(
+            self.raw[index, :length],
+            out=self.samples[index, : length // 2],
+            scratch=self._scratch[index],
+        )
+
+
+class ThreadedCapture:
+    """Captures from a device on a reader thread and records on a writer thread.
+
+    Batches are counted as captured when the device hands them over, written
+    once the recorder saved them, dropped when the backpressure policy
+    discarded them and late when the writer picked them up more than one batch
+    period after they were captured.
+    """
+
+    def __init__(self, sdr, recorder, filename, **options):
+        """Initialize the ThreadedCapture.
+
+        Args:
+            sdr: pyrtlsdr style device object.
+            recorder (Recorder): recorder the writer thread saves batches to.
+            filename (str): file the recorder saves to.
+            **options: `sample_window` (int, default 262144) samples per
+              batch, `sample_rate` (float, default 2.4e6), `num_buffers`
+              (int, default 8), `backpressure` (str, default "block") and
+              `raw` (bool, default False) to capture interleaved uint8 bytes
+              with `read_bytes_async` instead of complex samples and
+              `pipeline` (sdrcap.dsp.Pipeline, default None) run by the
+              writer thread on every batch before it is saved and `metrics`
+              (sdrcap.metrics.CaptureMetrics, default None) recording read and
+              save latencies, sample counters and queue depth and `clock`
+              (sdrcap.clock.CaptureClock, default: a new one) stamping every
+              batch with its sample index as it is captured.
+        """
+        self.sdr = sdr
+        self.recorder = recorder
+        self.filename = filename
+        self.sample_window = options.get("sample_window", 1024 * 256)
+        self.sample_rate = options.get("sample_rate", 2.4e6)
+        self.raw = options.get("raw", False)
+        self.pipeline = options.get("pipeline")
+        self.metrics = options.get("metrics")
+        self.clock = options.get("clock") or CaptureClock(self.sample_rate)
+        # complex batches are read as bytes too and converted by the writer,
+        # sparing the per batch complex128 arrays of pyrtlsdr read_samples
+        self.convert = not self.raw and hasattr(sdr, "read_bytes_async")
+        self.num_buffers = options.get("num_buffers", 8)
+        self.backpressure = options.get("backpressure", "block")
+        self._samples = None
+        self.ring = self._new_ring()
+        if self.convert:
+            self._samples = np.empty(self.sample_window, dtype=np.complex64)
+            self._scratch = cu8_scratch()
+        self.captured = 0
+        self.written = 0
+        self.late = 0
+        self.errors = []
+        self._stopping = threading.Event()
+        self._reader = None
+        self._writer = None
+        self._last_batch = None
+
+    def _new_ring(self):
+        """Returns an open ring of `num_buffers` batch buffers."""
+        if self.raw or self.convert:
+            return BufferRing(
+                self.num_buffers,
+                2 * self.sample_window,
+                dtype=np.uint8,
+                policy=self.backpressure,
+            )
+        return BufferRing(self.num_buffers, self.sample_window, policy=self.backpressure)
+
+    @property
+    def batch_period(self):
+        """float: seconds of signal covered by one batch."""
+        return self.sample_window / self.sample_rate
+
+    @property
+    def stats(self):
+        """dict: captured, written, dropped and late batch counters."""
+        return {
+            "captured": self.captured,
+            "written": self.written,
+            "dropped": self.ring.dropped,
+            "late": self.late,
+            "queue_depth": self.ring.depth,
+        }
+
+    @property
+    def running(self):
+        """bool: whether the reader or writer thread is still alive."""
+        return any(
+            thread is not None and thread.is_alive()
+            for thread in (self._reader, self._writer)
+        )
+
+    def start(self):
+        """Starts the reader and writer threads. Establishes recording start time.
+
+        A stopped capture can be started again; it gets a new ring and its
+        batch counters restart from zero. The clock is reset, so sample
+        indexes count from the first batch of this run.
+        """
+        if self.running:
+            raise RuntimeError("Capture is already running.")
+        if self._writer is not None:
+            # the ring of the previous run was closed by `stop`
+            self.ring = self._new_ring()
+            self.captured = 0
+            self.written = 0
+            self.late = 0
+        self.clock.reset()
+        self.recorder.start_recording(time.time())
+        self._stopping.clear()
+        self._last_batch = time.perf_counter()
+        self._writer = threading.Thread(
+            target=self._write_loop, name="sdrcap-writer", daemon=True
+        )
+        self._reader = threading.Thread(
+            target=self._read_loop, name="sdrcap-reader", daemon=True
+        )
+        self._writer.start()
+        self._reader.start()
+
+    def stop(self, timeout=None):
+        """Stops reading, drains queued batches to the recorder and stops it.
+
+        Args:
+            timeout (float, optional): seconds to wait for each thread.
+
+        Raises:
+            RuntimeError: if the writer is still saving after `timeout`. The
+              recorder is left open for the writer; call `stop` again to
+              finish draining it.
+        """
+        self._stopping.set()
+        if self._reader is not None and self._reader.is_alive():
+            if hasattr(self.sdr, "cancel_read_async"):
+                self.sdr.cancel_read_async()
+            self._reader.join(timeout)
+        self.ring.close()
+        if self._writer is not None:
+            self._writer.join(timeout)
+            if self._writer.is_alive():
+                raise RuntimeError(
+                    f"Writer thread still saving after {timeout} s; "
+                    "recorder left open."
+                )
+        self.recorder.stop_recording(time.time())
+
+    def _read_loop(self):
+        """Drains the device until stopped, async when the device supports it."""
+        try:
+            raw = self.raw or self.convert
+            if raw and hasattr(self.sdr, "read_bytes_async"):
+                self.sdr.read_bytes_async(self._on_batch, 2 * self.sample_window)
+            elif not raw and hasattr(self.sdr, "read_samples_async"):
+                self.sdr.read_samples_async(self._on_batch, self.sample_window)
+            else:
+                while not self._stopping.is_set():
+                    if raw:
+                        batch = self.sdr.read_bytes(2 * self.sample_window)
+                    else:
+                        batch = self.sdr.read_samples(self.sample_window)
+                    self._on_batch(batch, None)
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.errors.append(exc)
+        finally:
+            self.ring.close()
+
+    def _on_batch(self, batch, _context):
+        """Device callback copying one batch into a free ring buffer."""
+        if self._stopping.is_set():
+            return
+        captured_at = time.time()
+        self.captured += 1
+        raw = self.raw or self.convert
+        batch = np.frombuffer(batch, dtype=np.uint8) if raw else batch
+        # stamped before the ring, so dropped batches leave a gap in the index
+        stamp = self.clock.capture(len(batch) // 2 if raw else len(batch), captured_at)
+        if self.metrics is not None:
+            now = time.perf_counter()
+            # the time since the previous batch is how long the device took
+            self.metrics.observe_read(
+                now - self._last_batch, len(batch) // 2 if raw else len(batch)
+            )
+            self._last_batch = now
+            dropped = self.ring.dropped
+        index = self.ring.acquire()
+        if self.metrics is not None and self.ring.dropped > dropped:
+            self.metrics.observe_drop(
+                (self.ring.dropped - dropped) * self.sample_window
+            )
+        if index is None:
+            return
+        length = min(len(batch), self.ring.buffers.shape[1])
+        self.ring.buffers[index, :length] = batch[:length]
+        self.ring.commit(
+            index, {"length": length, "captured_at": captured_at, "stamp": stamp}
+        )
+
+    def _write_loop(self):
+        """Saves ready buffers until the ring is closed and drained."""
+        while True:
+            item = self.ring.get()
+            if item is None:
+                return
+            index, info = item
+            try:
+                if time.time() - info["captured_at"] > self.batch_period:
+                    self.late += 1
+                self.clock.begin_batch(info["stamp"])
+                samples = self.ring.buffers[index, : info["length"]]
+                if self.convert:
+                    samples = cu8_to_complex64(
+                        samples,
+                        out=self._samples[: info["length"] // 2],
+                        scratch=self._scratch,
+                    )
+                if self.pipeline is not None:
+                    samples = self.pipeline.process(samples)
+                if self.metrics is None:
+                    self.recorder.save(samples=samples, filename=self.filename)
+                else:
+                    self.metrics.set_queue_depth(self.ring.depth)
+                    start = time.perf_counter()
+                    self.recorder.save(samples=samples, filename=self.filename)
+                    self.metrics.observe_save(
+                        time.perf_counter() - start,
+                        len(samples) // 2 if samples.dtype == np.uint8 else len(samples),
+                        samples.nbytes,
+                    )
+                self.written += 1
+            except Exception as exc:  # pylint: disable=broad-exception-caught
+                self.errors.append(exc)
+            finally:
+                self.ring.release(index)
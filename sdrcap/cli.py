@@ -0,0 +1,177 @@
+"""
+Command line interface of sdrcap.
+
+Commands:
+    - record: records from a device backend of `sdrcap.registry.BACKENDS`
+      with a recorder of `sdrcap.registry.RECORDERS`.
+    - convert: converts recordings between file types, see `sdrcap.convert`.
+
+Backends, recorders and `sdrcap.convert` are imported only once the command
+runs, so the command starts without loading numpy, librtlsdr, h5py or
+anything else the chosen command, backend and file type do not use.
+
+Usage:
+    sdrcap record --filetype cu8 --center-freq 462.6e6 --duration 60
+    sdrcap record --device rtl_tcp --option host=10.0.0.5 --batches 10
+    sdrcap convert capture.csv --to hdf5 --sample-rate 2.4e6
+    sdrcap convert recordings/*.cu8 --to sdrz --output-dir compressed --workers 4
+"""
+
+import argparse
+import datetime
+import json
+import sys
+import time
+from sdrcap.registry import BACKENDS
+
+
+def _gain(value):
+    """Parses a gain argument, "auto" or dB."""
+    return value if value == "auto" else float(value)
+
+
+def _option(value):
+    """Parses a KEY=VALUE argument, the value as JSON when it is valid JSON."""
+    key, separator, raw = value.partition("=")
+    if not separator or not key:
+        raise argparse.ArgumentTypeError(f"Invalid option: {value}. Must be KEY=VALUE.")
+    try:
+        return key, json.loads(raw)
+    except json.JSONDecodeError:
+        return key, raw
+
+
+def _record(args):
+    """Runs the record command, returns the process exit code."""
+    options = dict(args.option)
+    for name in (
+        "filetype",
+        "center_freq",
+        "sample_rate",
+        "gain",
+        "freq_correction",
+        "sample_window",
+        "output_dir",
+        "device_index",
+        "serial_number",
+    ):
+        if getattr(args, name) is not None:
+            options[name] = getattr(args, name)
+    interface = BACKENDS.get(args.device)(**options)
+    recording_name = args.name or datetime.datetime.now().timestamp()
+    filename = interface.recording_filename(recording_name)
+    if args.batches is not None:
+        recorder = interface.options["recorder"]
+        interface.clock.reset()
+        recorder.start_recording(time.time())
+        for _ in range(args.batches):
+            interface.record_single_sample(recording_name)
+        recorder.stop_recording(time.time())
+        print(f"{filename}: {args.batches} batches")
+        return 0
+    interface.start_recording_threaded(recording_name)
+    try:
+        time.sleep(args.duration)
+    except KeyboardInterrupt:
+        pass
+    stats = interface.stop_recording_threaded()
+    print(
+        f"{filename}: {stats['written']} batches written, "
+        f"{stats['dropped']} dropped"
+    )
+    return 0
+
+
+def _convert(args):
+    """Runs the convert command, returns the process exit code."""
+    from sdrcap.convert import convert_files  # pylint: disable=import-outside-toplevel
+
+    options = {}
+    for name in ("sample_rate", "chunk_size", "hdf5_layout", "codec"):
+        if getattr(args, name) is not None:
+            options[name] = getattr(args, name)
+    results = convert_files(
+        args.sources,
+        args.to,
+        output_dir=args.output_dir,
+        workers=args.workers,
+        **options,
+    )
+    for result in results:
+        print(
+            f"{result['source']} -> {result['destination']}: "
+            f"{result['samples_out']} samples in {result['seconds']:.2f} s"
+        )
+    return 0
+
+
+def main(argv=None):
+    """Command line entry point, returns the process exit code."""
+    parser = argparse.ArgumentParser(
+        prog="sdrcap", description=__doc__.split("\n\n")[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="record from a device")
+    record.add_argument(
+        "--device", default="rtl", help="device backend: rtl, rtl_tcp, sim or a plugin"
+    )
+    record.add_argument("--filetype", help="recorder: csv, hdf5, cu8, sdrz, parquet")
+    record.add_argument("--center-freq", type=float, help="center frequency in Hz")
+    record.add_argument("--sample-rate", type=float, help="sample rate in Hz")
+    record.add_argument("--gain", type=_gain, help='gain in dB or "auto"')
+    record.add_argument(
+        "--freq-correction", type=int, help="frequency correction in ppm"
+    )
+    record.add_argument("--sample-window", type=int, help="samples per batch")
+    record.add_argument("--output-dir", help="directory of the recording")
+    record.add_argument("--device-index", type=int, help="index of the RTL-SDR")
+    record.add_argument("--serial-number", help="serial number of the RTL-SDR")
+    record.add_argument("--name", help="recording name, defaults to the start time")
+    record.add_argument(
+        "--option", type=_option, action="append", default=[], metavar="KEY=VALUE",
+        help="any other backend or recording option, e.g. host=10.0.0.5",
+    )
+    length = record.add_mutually_exclusive_group(required=True)
+    length.add_argument(
+        "--duration", type=float, help="seconds to record on the threaded capture"
+    )
+    length.add_argument("--batches", type=int, help="batches to record one by one")
+    record.set_defaults(handler=_record)
+
+    convert = commands.add_parser(
+        "convert", help="convert recordings between file types"
+    )
+    convert.add_argument("sources", nargs="+", help="recordings to convert")
+    convert.add_argument(
+        "--to", required=True,
+        help="destination file type: csv, hdf5, cu8, sdrz or parquet",
+    )
+    convert.add_argument(
+        "--output-dir", help="directory of the outputs, defaults to beside the sources"
+    )
+    convert.add_argument(
+        "--workers", type=int, help="worker processes, defaults to the CPU count"
+    )
+    convert.add_argument(
+        "--sample-rate", type=float, help="sample rate of CSV sources, which carry none"
+    )
+    convert.add_argument(
+        "--chunk-size", type=int, help="samples per chunk, defaults to 1048576"
+    )
+    convert.add_argument(
+        "--hdf5-layout", help="layout of HDF5 outputs: stream (default) or split"
+    )
+    convert.add_argument("--codec", help="codec of sdrz outputs, see sdrcap.codecs")
+    convert.set_defaults(handler=_convert)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except (ValueError, RuntimeError, OSError, ImportError) as exc:
+        print(f"sdrcap {args.command}: {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
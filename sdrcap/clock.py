@@ -0,0 +1,193 @@
+"""
+Module for sample-accurate capture timestamps.
+
+A `CaptureClock` counts the samples of a capture from a single anchored
+start time instead of reading the wall clock for every batch, so the time of
+a sample is `start_time + sample_index / sample_rate` and batch times never
+jitter with USB or scheduling latency.
+
+    - `capture` stamps every batch the device hands over with its sample
+      index. The device keeps no sample counter, so lost samples are found
+      by comparing the elapsed wall time against the samples counted: a batch
+      arriving more than `tolerance` seconds after its last sample could have
+      been taken means the device overflowed, and the missing time is added
+      to the sample count.
+    - `begin_batch` is called right before a stamped batch is saved. Batches
+      captured but never saved, such as those dropped by a full
+      `sdrcap.capture.BufferRing`, also leave a jump in the sample index,
+      which is recorded as a discontinuity.
+
+Installed as the `clock` of a recorder, the clock returns the time of the
+batch being saved and exposes its stamp as `batch`; recorders keeping
+metadata store the per batch sample index and the discontinuity markers
+(see `Recorder.discontinuity`), and readers use the markers to map sample
+indexes to times across the gaps.
+
+Recorders that pass batches on to a wrapped recorder at other times than
+they were captured, such as `sdrcap.trigger.BurstRecorder`, stamp them
+with a `BatchClock` instead, which exposes the same `batch`.
+
+Gap sizes are estimated from arrival times, so they are only accurate to the
+latency of the device buffers; the count of gaps and their position in the
+recording are exact.
+
+Usage:
+    clock = CaptureClock(sample_rate=2.4e6)
+    recorder.clock = clock
+    stamp = clock.capture(len(samples))
+    clock.begin_batch(stamp)
+    recorder.save(samples, filename)
+"""
+
+import time
+
+
+class CaptureClock:
+    """Counts the samples of a capture from one anchored start time.
+
+    Attributes:
+        sample_rate (float): device sample rate in Hz.
+        tolerance (float): seconds a batch may arrive late before the delay
+            counts as lost samples. None uses half the batch period.
+        start_time (float): epoch time of the first sample, set by the first
+            `capture`.
+        captured (int): samples counted so far, lost ones included.
+        lost_samples (int): samples found missing by `capture`.
+        batch (dict): stamp of the batch being saved, see `begin_batch`.
+        discontinuities (list): stamps of the saved batches that follow lost
+            samples.
+    """
+
+    def __init__(self, sample_rate, tolerance=None):
+        """Initialize the CaptureClock.
+
+        Args:
+            sample_rate (float): device sample rate in Hz.
+            tolerance (float, optional): late arrival tolerance in seconds.
+              Defaults to half the period of the batch being stamped.
+        """
+        if sample_rate <= 0:
+            raise ValueError(f"Invalid sample_rate: {sample_rate}. Must be > 0.")
+        if tolerance is not None and tolerance < 0:
+            raise ValueError(f"Invalid tolerance: {tolerance}. Must be >= 0.")
+        self.sample_rate = sample_rate
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self, start_time=None):
+        """Restarts the count, anchoring it at the next `capture`.
+
+        Args:
+            start_time (float, optional): epoch time of the next sample.
+              Defaults to the arrival of the first batch minus its duration.
+        """
+        self.start_time = start_time
+        self.captured = 0
+        self.lost_samples = 0
+        self.batch = None
+        self.discontinuities = []
+        self._saved_until = None
+
+    def sample_time(self, sample_index):
+        """Returns the epoch time of a sample index of the capture."""
+        return self.start_time + sample_index / self.sample_rate
+
+    def capture(self, num_samples, arrival_time=None):
+        """Stamps a batch the device just handed over.
+
+        Args:
+            num_samples (int): samples in the batch.
+            arrival_time (float, optional): epoch time the batch arrived.
+              Defaults to now.
+
+        Returns:
+            dict: `sample_index` of the first sample, `num_samples` and
+            `gap`, the samples found missing right before the batch.
+        """
+        if arrival_time is None:
+            arrival_time = time.time()
+        duration = num_samples / self.sample_rate
+        if self.start_time is None:
+            self.start_time = arrival_time - duration
+        gap = 0
+        lag = arrival_time - self.sample_time(self.captured + num_samples)
+        tolerance = duration / 2 if self.tolerance is None else self.tolerance
+        if lag > tolerance:
+            gap = int(round(lag * self.sample_rate))
+            self.captured += gap
+            self.lost_samples += gap
+        stamp = {"sample_index": self.captured, "num_samples": num_samples, "gap": gap}
+        self.captured += num_samples
+        return stamp
+
+    def begin_batch(self, stamp):
+        """Makes a stamped batch the one being saved.
+
+        Args:
+            stamp (dict): stamp returned by `capture`.
+
+        Returns:
+            dict: the `batch` stamp, with the `time` of its first sample and
+            `lost_samples` since the previously saved batch.
+        """
+        index = stamp["sample_index"]
+        lost = 0 if self._saved_until is None else index - self._saved_until
+        self.batch = {**stamp, "time": self.sample_time(index), "lost_samples": lost}
+        self._saved_until = index + stamp["num_samples"]
+        if lost > 0:
+            self.discontinuities.append(self.batch)
+        return self.batch
+
+    def __call__(self):
+        """Returns the time of the batch being saved, the wall clock without one."""
+        if self.batch is None:
+            return time.time()
+        return self.batch["time"]
+
+
+class BatchClock:
+    """Clock replaying batch stamps known in advance.
+
+    Attributes:
+        sample_rate (float): sample rate of the stamped batches in Hz.
+        batch (dict): stamp of the batch being saved, see `stamp`.
+    """
+
+    def __init__(self, sample_rate):
+        """Initialize the BatchClock.
+
+        Args:
+            sample_rate (float): sample rate of the stamped batches in Hz.
+        """
+        if sample_rate <= 0:
+            raise ValueError(f"Invalid sample_rate: {sample_rate}. Must be > 0.")
+        self.sample_rate = sample_rate
+        self.batch = None
+
+    def stamp(self, sample_index, num_samples, batch_time, lost_samples=0):
+        """Makes the next batch saved the one starting at `batch_time`.
+
+        Args:
+            sample_index (int): capture sample index of the first sample.
+            num_samples (int): samples in the batch.
+            batch_time (float): epoch time of the first sample.
+            lost_samples (int, optional): samples lost right before the
+              batch. Defaults to 0.
+
+        Returns:
+            dict: the `batch` stamp, as `CaptureClock.begin_batch` returns it.
+        """
+        self.batch = {
+            "sample_index": sample_index,
+            "num_samples": num_samples,
+            "gap": lost_samples,
+            "time": batch_time,
+            "lost_samples": lost_samples,
+        }
+        return self.batch
+
+    def __call__(self):
+        """Returns the time of the batch being saved, the wall clock without one."""
+        if self.batch is None:
+            return time.time()
+        return self.batch["time"]
@@ -0,0 +1,377 @@
+"""
+Module for compressing sample data.
+
+Codecs:
+    - "none": stores bytes as they are.
+    - "zlib": standard library deflate, always available.
+    - "zstd": Zstandard, needs the `zstandard` package.
+    - "lz4": LZ4 frames, needs the `lz4` package.
+    - "blosc": Blosc with byte shuffling, needs the `blosc` package.
+
+The optional packages are only imported when their codec is created, and a
+missing one raises ImportError naming the package. All of them release the
+GIL while compressing, so `ChunkCompressor` spreads independent chunks over
+a thread pool and scales across cores.
+
+Sample formats are how samples are turned into bytes before compression:
+
+    - "cu8": interleaved uint8 I/Q as delivered by the RTL-SDR (lossless).
+    - "complex64": float32 I/Q pairs (lossless).
+    - "int16", "int8": lossy interleaved integers scaled by the batch peak;
+      the scale is stored with every chunk to restore the amplitude.
+
+`compare_codecs` measures the ratio and MB/s of every available codec on
+sample data, to choose one for a deployment.
+"""
+
+import os
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from sdrcap.iq import complex_to_cu8, cu8_to_complex64
+
+SAMPLE_FORMATS = {"cu8": 2, "complex64": 8, "int16": 4, "int8": 2}
+QUANTIZED_DTYPES = {"int16": np.int16, "int8": np.int8}
+
+
+class Codec(ABC):
+    """Abstract class defining the byte compression of each codec
+
+    Attributes:
+        name (str): codec name as used by `get_codec`.
+        level (int): compression level.
+    """
+
+    name = None
+    default_level = None
+
+    def __init__(self, level=None):
+        self.level = self.default_level if level is None else level
+
+    @abstractmethod
+    def compress(self, data):
+        """Compresses a bytes-like object. Must be thread safe.
+
+        Returns:
+            bytes: compressed data.
+        """
+
+    @abstractmethod
+    def decompress(self, data, raw_length):
+        """Decompresses data compressed by `compress`.
+
+        Args:
+            data (bytes): compressed data.
+            raw_length (int): length of the decompressed data.
+
+        Returns:
+            bytes: decompressed data.
+        """
+
+
+class NoneCodec(Codec):
+    """Codec storing data uncompressed."""
+
+    name = "none"
+    default_level = 0
+
+    def compress(self, data):
+        return bytes(data)
+
+    def decompress(self, data, raw_length):
+        return data
+
+
+class ZlibCodec(Codec):
+    """Deflate codec from the standard library."""
+
+    name = "zlib"
+    default_level = 1
+
+    def compress(self, data):
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data, raw_length):
+        return zlib.decompress(data, bufsize=raw_length)
+
+
+class ZstdCodec(Codec):
+    """Zstandard codec, one compressor per thread."""
+
+    name = "zstd"
+    default_level = 3
+
+    def __init__(self, level=None):
+        super().__init__(level)
+        self._zstd = _import("zstandard", self.name)
+        self._local = threading.local()
+
+    def _compressors(self):
+        local = self._local
+        if not hasattr(local, "compressor"):
+            local.compressor = self._zstd.ZstdCompressor(level=self.level)
+            local.decompressor = self._zstd.ZstdDecompressor()
+        return local.compressor, local.decompressor
+
+    def compress(self, data):
+        return self._compressors()[0].compress(data)
+
+    def decompress(self, data, raw_length):
+        return self._compressors()[1].decompress(data, max_output_size=raw_length)
+
+
+class LZ4Codec(Codec):
+    """LZ4 frame codec."""
+
+    name = "lz4"
+    default_level = 0
+
+    def __init__(self, level=None):
+        super().__init__(level)
+        self._frame = _import("lz4.frame", self.name)
+
+    def compress(self, data):
+        return self._frame.compress(data, compression_level=self.level)
+
+    def decompress(self, data, raw_length):
+        return self._frame.decompress(data)
+
+
+class BloscCodec(Codec):
+    """Blosc codec with byte shuffling, single threaded per chunk."""
+
+    name = "blosc"
+    default_level = 5
+
+    def __init__(self, level=None, typesize=1):
+        super().__init__(level)
+        self._blosc = _import("blosc", self.name)
+        # chunks are already compressed in parallel
+        self._blosc.set_nthreads(1)
+        self.typesize = typesize
+
+    def compress(self, data):
+        return self._blosc.compress(
+            bytes(data),
+            typesize=self.typesize,
+            clevel=self.level,
+            shuffle=self._blosc.SHUFFLE,
+            cname="lz4",
+        )
+
+    def decompress(self, data, raw_length):
+        return self._blosc.decompress(data)
+
+
+CODECS = {
+    codec.name: codec for codec in (NoneCodec, ZlibCodec, ZstdCodec, LZ4Codec, BloscCodec)
+}
+
+
+def _import(module, codec):
+    """Imports the optional package of a codec."""
+    try:
+        return __import__(module, fromlist=["_"])
+    except ImportError as exc:
+        package = module.split(".")[0]
+        raise ImportError(
+            f"Codec {codec} needs the {package} package: pip install {package}"
+        ) from exc
+
+
+def get_codec(name, level=None):
+    """Creates a codec by name.
+
+    Args:
+        name (str): one of `CODECS`.
+        level (int, optional): compression level. Defaults to the codec's.
+
+    Returns:
+        Codec: the codec.
+    """
+    if name not in CODECS:
+        raise ValueError(f"Invalid codec: {name}. Must be one of {tuple(CODECS)}.")
+    return CODECS[name](level)
+
+
+def available_codecs():
+    """Returns the names of the codecs whose packages are installed."""
+    names = []
+    for name in CODECS:
+        try:
+            get_codec(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def encode_samples(samples, sample_format):
+    """Turns a batch into the bytes of a sample format.
+
+    The result never shares memory with `samples`, so the caller may reuse
+    its buffer while the bytes are still being compressed.
+
+    Args:
+        samples (numpy.ndarray): complex IQ values or interleaved uint8 IQ bytes.
+        sample_format (str): one of `SAMPLE_FORMATS`.
+
+    Returns:
+        tuple: (numpy.ndarray uint8 bytes, float scale of quantized formats)
+    """
+    if sample_format not in SAMPLE_FORMATS:
+        raise ValueError(
+            f"Invalid sample format: {sample_format}. "
+            f"Must be one of {tuple(SAMPLE_FORMATS)}."
+        )
+    samples = np.asarray(samples)
+    if sample_format == "cu8":
+        if samples.dtype == np.uint8:
+            return samples.copy(), 1.0
+        return complex_to_cu8(samples), 1.0
+    if samples.dtype == np.uint8:
+        samples = cu8_to_complex64(samples)
+    if sample_format == "complex64":
+        return samples.astype(np.complex64).view(np.uint8), 1.0
+    interleaved = samples.astype(np.complex64, copy=False).view(np.float32)
+    limit = np.iinfo(QUANTIZED_DTYPES[sample_format]).max
+    peak = float(np.abs(interleaved).max()) if len(interleaved) else 0.0
+    scale = peak / limit if peak > 0 else 1.0
+    quantized = np.rint(interleaved / scale).astype(QUANTIZED_DTYPES[sample_format])
+    return quantized.view(np.uint8), scale
+
+
+def decode_samples(data, sample_format, scale=1.0):
+    """Turns the bytes of a sample format back into complex64 samples.
+
+    Args:
+        data (bytes-like): bytes from `encode_samples`.
+        sample_format (str): one of `SAMPLE_FORMATS`.
+        scale (float, optional): scale of quantized formats. Defaults to 1.
+
+    Returns:
+        numpy.ndarray: complex64 samples.
+    """
+    if sample_format == "cu8":
+        return cu8_to_complex64(np.frombuffer(data, dtype=np.uint8))
+    if sample_format == "complex64":
+        return np.frombuffer(data, dtype=np.complex64).copy()
+    quantized = np.frombuffer(data, dtype=QUANTIZED_DTYPES[sample_format])
+    return (quantized.astype(np.float32) * np.float32(scale)).view(np.complex64)
+
+
+class ChunkCompressor:
+    """Compresses independent chunks on a thread pool and tracks throughput.
+
+    Attributes:
+        bytes_in (int): bytes handed to the codec.
+        bytes_out (int): compressed bytes produced.
+        seconds (float): codec time summed over all chunks.
+    """
+
+    def __init__(self, codec, workers=None):
+        """Initialize the ChunkCompressor.
+
+        Args:
+            codec (Codec): codec compressing every chunk.
+            workers (int, optional): compression threads. Defaults to the
+              number of CPUs.
+        """
+        self.codec = codec
+        self.workers = workers or os.cpu_count() or 1
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.seconds = 0.0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            self.workers, thread_name_prefix="sdrcap-compress"
+        )
+
+    def _compress(self, data, cipher, index, associated_data):
+        start = time.perf_counter()
+        compressed = self.codec.compress(data)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.bytes_in += len(data)
+            self.bytes_out += len(compressed)
+            self.seconds += elapsed
+        if cipher is not None:
+            return cipher.encrypt(index, compressed, associated_data)
+        return compressed
+
+    def submit(self, data, cipher=None, index=0, associated_data=b""):
+        """Starts compressing, and optionally encrypting, one chunk.
+
+        Args:
+            data (bytes-like): chunk that is not modified until compressed.
+            cipher (sdrcap.encryption.ChunkCipher, optional): cipher that
+              encrypts the compressed chunk in the same worker thread.
+            index (int, optional): chunk number the cipher encrypts under.
+            associated_data (bytes, optional): cleartext the cipher
+              authenticates with the chunk.
+
+        Returns:
+            concurrent.futures.Future: future of the compressed bytes.
+        """
+        return self._executor.submit(
+            self._compress, data, cipher, index, associated_data
+        )
+
+    @property
+    def stats(self):
+        """dict: bytes in and out, ratio and per core compression MB/s."""
+        return {
+            "codec": self.codec.name,
+            "level": self.codec.level,
+            "workers": self.workers,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "ratio": self.bytes_in / self.bytes_out if self.bytes_out else None,
+            "compress_mb_per_sec": (
+                self.bytes_in / 1e6 / self.seconds if self.seconds else None
+            ),
+        }
+
+    def shutdown(self):
+        """Waits for the submitted chunks and stops the threads."""
+        self._executor.shutdown(wait=True)
+
+
+def compare_codecs(samples, codecs=None, sample_format="cu8", levels=None):
+    """Measures every codec on a batch of samples.
+
+    Args:
+        samples (numpy.ndarray): representative complex samples or uint8 bytes.
+        codecs (iterable, optional): codec names. Defaults to the available ones.
+        sample_format (str, optional): one of `SAMPLE_FORMATS`. Defaults to "cu8".
+        levels (dict, optional): compression level per codec name.
+
+    Returns:
+        list: per codec dicts with ratio and single core compress and
+        decompress MB/s.
+    """
+    data, _ = encode_samples(samples, sample_format)
+    data = data.tobytes()
+    results = []
+    for name in codecs or available_codecs():
+        codec = get_codec(name, (levels or {}).get(name))
+        start = time.perf_counter()
+        compressed = codec.compress(data)
+        compress_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        codec.decompress(compressed, len(data))
+        decompress_seconds = time.perf_counter() - start
+        results.append(
+            {
+                "codec": name,
+                "level": codec.level,
+                "sample_format": sample_format,
+                "ratio": len(data) / max(len(compressed), 1),
+                "compress_mb_per_sec": len(data) / 1e6 / max(compress_seconds, 1e-9),
+                "decompress_mb_per_sec": len(data) / 1e6 / max(decompress_seconds, 1e-9),
+            }
+        )
+    return results
@@ -0,0 +1,231 @@
+"""
+Module for converting recordings between file types.
+
+Recordings are converted offline, outside of a capture session: the source
+is opened with `sdrcap.readers.open_recording` and streamed chunk by chunk
+into the recorder of the destination type, so memory use is bounded by the
+chunk size however large the recording is. The destination keeps the
+recording parameters and sample times of the source; chunks are cut at the
+source's discontinuity markers and stamped with a `BatchClock`, so the
+markers of lost samples carry over too. Every output is reopened
+afterwards and its sample count checked against the source.
+
+Destination recorders come from `sdrcap.registry.RECORDERS`:
+    - "csv": `CSVRecorder` rows.
+    - "hdf5": `HDF5Recorder` streaming layout (complex64), or the split
+      layout with `hdf5_layout="split"`.
+    - "cu8": `RawIQRecorder` raw IQ bytes (quantized from complex sources).
+    - "sdrz": `CompressedRecorder` chunks, see `sdrcap.codecs`.
+    - "parquet": `ParquetRecorder` table, needs the `pyarrow` package.
+
+`convert_files` spreads a list of recordings over a process pool, one file
+per worker, since parsing and encoding are CPU bound.
+
+Usage:
+    convert_file("capture.csv", "capture.hdf5", sample_rate=2.4e6)
+    convert_files(glob.glob("*.cu8"), "sdrz", output_dir="compressed")
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from sdrcap.clock import BatchClock
+from sdrcap.registry import new_recorder
+from sdrcap.rtl_interface import DEFAULT_OPTIONS
+
+CONVERT_FILETYPES = ("csv", "hdf5", "cu8", "sdrz", "parquet")
+HDF5_LAYOUTS = ("stream", "split")
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+def _filetype(filename):
+    """Returns the file type of a recording from its extension."""
+    extension = os.path.splitext(filename)[1].lower().lstrip(".")
+    return "hdf5" if extension == "h5" else extension
+
+
+def _reader_options(filename, sample_rate):
+    """Returns the `open_recording` options of a recording."""
+    return {"sample_rate": sample_rate} if _filetype(filename) == "csv" else {}
+
+
+def _plain_values(metadata):
+    """Converts the NumPy scalars of HDF5 attributes to JSON serializable values."""
+    return {
+        key: value.item() if isinstance(value, np.generic) else value
+        for key, value in metadata.items()
+    }
+
+
+def _chunk_bounds(reader, chunk_size):
+    """Yields (start, stop, lost_samples) chunks of `reader`, cut at every marker.
+
+    `lost_samples` are the source samples lost right before the chunk.
+    """
+    lost = {
+        marker["offset"]: marker["lost_samples"] for marker in reader.discontinuities
+    }
+    start = 0
+    for cut in sorted(set(lost) | {reader.num_samples}):
+        for offset in range(start, cut, chunk_size):
+            yield offset, min(offset + chunk_size, cut), lost.get(offset, 0)
+        start = cut
+
+
+def _new_writer(filetype, reader, **options):
+    """Instantiates the recorder writing a conversion of `reader`."""
+    layout = options.get("hdf5_layout", "stream")
+    if layout not in HDF5_LAYOUTS:
+        raise ValueError(
+            f"Invalid HDF5 layout: {layout}. Must be one of {HDF5_LAYOUTS}."
+        )
+    # CSV recordings carry no device settings, HDF5 attributes cannot be None
+    metadata = _plain_values(reader.metadata)
+    center_freq = reader.center_freq if reader.center_freq is not None else 0.0
+    return new_recorder(
+        {
+            **DEFAULT_OPTIONS,
+            "filetype": filetype,
+            "center_freq": float(center_freq),
+            "sample_rate": float(reader.sample_rate),
+            "freq_correction": metadata.get("freq_correction", 0),
+            "gain": metadata.get("gain", "unknown"),
+            "sample_window": options.get("chunk_size"),
+            "hdf5_streaming": layout == "stream",
+            "hdf5_compression": options.get("hdf5_compression"),
+            "codec": options.get("codec", "zlib"),
+            "codec_level": options.get("codec_level"),
+            "sample_format": options.get("sample_format", "complex64"),
+        }
+    )
+
+
+def destination_filename(source, filetype, output_dir=None):
+    """Builds the destination path of a conversion.
+
+    Args:
+        source (str): path of the source recording.
+        filetype (str): one of `CONVERT_FILETYPES`.
+        output_dir (str, optional): directory of the output. Defaults to the
+          directory of the source.
+
+    Returns:
+        str: source path with the extension of `filetype`.
+    """
+    base = os.path.splitext(source)[0]
+    if output_dir is not None:
+        base = os.path.join(output_dir, os.path.basename(base))
+    return f"{base}.{filetype}"
+
+
+def convert_file(
+    source, destination, chunk_size=DEFAULT_CHUNK_SIZE, sample_rate=None, **options
+):
+    """Converts one recording, streaming it in chunks.
+
+    Args:
+        source (str): path of the source recording, any `sdrcap.readers`
+          extension.
+        destination (str): path of the output, its extension selects one of
+          `CONVERT_FILETYPES`.
+        chunk_size (int, optional): samples per chunk. Defaults to 1 MiS.
+        sample_rate (float, optional): sample rate of the source, required
+          for CSV recordings which carry no metadata.
+        **options: destination options, `hdf5_layout` (one of
+          `HDF5_LAYOUTS`), `hdf5_compression`, `codec`, `codec_level` and
+          `sample_format` (sdrz, default "complex64").
+
+    Returns:
+        dict: source, destination, samples_in, samples_out and seconds.
+    """
+    filetype = _filetype(destination)
+    if filetype not in CONVERT_FILETYPES:
+        raise ValueError(
+            f"Invalid file type: {filetype}. Must be one of {CONVERT_FILETYPES}."
+        )
+    if os.path.abspath(source) == os.path.abspath(destination):
+        raise ValueError(
+            f"Invalid destination: {destination}. Must differ from the source."
+        )
+    if chunk_size < 1:
+        raise ValueError(f"Invalid chunk_size: {chunk_size}. Must be >= 1.")
+    if os.path.exists(destination):
+        raise FileExistsError(f"Destination {destination} already exists.")
+    # readers import h5py, keep it out of the CLI startup
+    from sdrcap.readers import open_recording  # pylint: disable=import-outside-toplevel
+
+    start = time.perf_counter()
+    with open_recording(source, **_reader_options(source, sample_rate)) as reader:
+        samples_in = reader.num_samples
+        writer = _new_writer(filetype, reader, chunk_size=chunk_size, **options)
+        writer.attributes["converted_from"] = os.path.basename(source)
+        # chunks are stamped like capture batches, see `sdrcap.clock`
+        writer.clock = BatchClock(reader.sample_rate)
+        writer.start_recording(reader.start_time)
+        sample_index = int(reader.metadata.get("sample_index") or 0)
+        for start, stop, lost_samples in _chunk_bounds(reader, chunk_size):
+            sample_index += lost_samples
+            writer.clock.stamp(
+                sample_index + start,
+                stop - start,
+                float(reader.sample_time(start)),
+                lost_samples,
+            )
+            writer.save(reader.read(start, stop), destination)
+        writer.stop_recording(float(reader.sample_time(samples_in)))
+    # CSV outputs carry no sample rate either, reopen them at the source's
+    output_options = _reader_options(destination, sample_rate or reader.sample_rate)
+    with open_recording(destination, **output_options) as output:
+        samples_out = output.num_samples
+    if samples_out != samples_in:
+        raise RuntimeError(
+            f"Converted {destination} holds {samples_out} samples, "
+            f"expected {samples_in} from {source}."
+        )
+    return {
+        "source": source,
+        "destination": destination,
+        "samples_in": samples_in,
+        "samples_out": samples_out,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def convert_files(sources, filetype, output_dir=None, workers=None, **options):
+    """Converts recordings on a process pool, one file per worker.
+
+    Args:
+        sources (iterable): paths of the source recordings.
+        filetype (str): one of `CONVERT_FILETYPES`.
+        output_dir (str, optional): directory of the outputs. Defaults to the
+          directory of every source.
+        workers (int, optional): worker processes, 1 converts in this
+          process. Defaults to the CPU count.
+        **options: `convert_file` options.
+
+    Returns:
+        list: `convert_file` results in the order of `sources`.
+    """
+    if filetype not in CONVERT_FILETYPES:
+        raise ValueError(
+            f"Invalid file type: {filetype}. Must be one of {CONVERT_FILETYPES}."
+        )
+    sources = list(sources)
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    destinations = [
+        destination_filename(source, filetype, output_dir) for source in sources
+    ]
+    workers = min(workers or os.cpu_count() or 1, max(len(sources), 1))
+    if workers == 1:
+        return [
+            convert_file(source, destination, **options)
+            for source, destination in zip(sources, destinations)
+        ]
+    with ProcessPoolExecutor(workers) as executor:
+        futures = [
+            executor.submit(convert_file, source, destination, **options)
+            for source, destination in zip(sources, destinations)
+        ]
+        return [future.result() for future in futures]
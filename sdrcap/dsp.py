@@ -0,0 +1,365 @@
+"""
+Module for streaming DSP stages applied between capture and recording.
+
+A `Pipeline` chains stages that each turn one batch of samples into the next,
+writing into buffers preallocated for the largest batch seen so far. Stages
+keep their state (oscillator phase, DC estimate, filter history, decimation
+phase) across batches, so consecutive batches are processed exactly as one
+continuous stream without edge artifacts.
+
+Decimating before the recorder cuts the data written, and the CPU time the
+recorders spend formatting it, by the decimation factor. The recorder created
+for a pipeline records the output sample rate, see
+`sdrcap.rtl_interface.create_recorder`.
+
+Classes:
+    Stage: Base class of every pipeline stage.
+    FrequencyShift: Phase continuous complex mixer.
+    DCBlocker: Removes the DC offset with a running mean.
+    FIRDecimator: Windowed-sinc low-pass filter computed only at kept outputs.
+    NarrowDtype: Narrows samples to complex64 or interleaved uint8 (cu8).
+    Pipeline: Chain of stages with its own input conversion.
+
+Usage:
+    pipeline = Pipeline(
+        [FrequencyShift(-200e3, 2.4e6), FIRDecimator(10), DCBlocker()],
+        sample_rate=2.4e6,
+    )
+    interface = RTLSDRInterface(pipeline=pipeline, filetype="hdf5")
+"""
+
+from abc import ABC, abstractmethod
+import numpy as np
+from sdrcap.iq import cu8_to_complex64
+
+
+def _grow(buffer, length, dtype):
+    """Returns `buffer` when it holds `length` elements, else a larger one."""
+    if buffer is None or len(buffer) < length:
+        return np.empty(length, dtype=dtype)
+    return buffer
+
+
+class Stage(ABC):
+    """Abstract class defining methods for each pipeline stage to implement"""
+
+    def output_rate(self, input_rate):
+        """Returns the sample rate after the stage."""
+        return input_rate
+
+    def output_center_freq(self, input_center_freq):
+        """Returns the center frequency represented after the stage."""
+        return input_center_freq
+
+    def output_length(self, input_length):
+        """Returns the maximum output length for an input batch length."""
+        return input_length
+
+    def reset(self):
+        """Clears the state carried across batches."""
+
+    def describe(self):
+        """Returns a short description of the stage for recording metadata."""
+        return type(self).__name__
+
+    @abstractmethod
+    def process(self, samples, out):
+        """Processes one batch into a preallocated buffer.
+
+        Args:
+            samples (numpy.ndarray): input batch.
+            out (numpy.ndarray): buffer of at least `output_length` elements.
+
+        Returns:
+            numpy.ndarray: the filled leading view of `out`.
+        """
+
+
+class FrequencyShift(Stage):
+    """Multiplies samples by a complex oscillator, continuing its phase."""
+
+    def __init__(self, shift, sample_rate):
+        """Initialize the FrequencyShift.
+
+        Args:
+            shift (float): frequency the spectrum moves by in Hz, a signal at
+              `-shift` ends up at 0 Hz.
+            sample_rate (float): input sample rate in Hz.
+        """
+        self.shift = shift
+        self.sample_rate = sample_rate
+        self._step = 2 * np.pi * shift / sample_rate
+        self._phase = 0.0
+        self._ramp = None
+        self._angle = None
+        self._oscillator = None
+
+    def output_center_freq(self, input_center_freq):
+        return input_center_freq - self.shift
+
+    def reset(self):
+        self._phase = 0.0
+
+    def describe(self):
+        return f"FrequencyShift({self.shift:g})"
+
+    def process(self, samples, out):
+        length = len(samples)
+        if self._ramp is None or len(self._ramp) < length:
+            self._ramp = np.arange(length, dtype=np.float64) * self._step
+            self._angle = np.empty(length, dtype=np.float64)
+            self._oscillator = np.empty(length, dtype=np.complex64)
+        angle = self._angle[:length]
+        oscillator = self._oscillator[:length]
+        np.add(self._ramp[:length], self._phase, out=angle)
+        np.cos(angle, out=oscillator.real)
+        np.sin(angle, out=oscillator.imag)
+        self._phase = (self._phase + length * self._step) % (2 * np.pi)
+        return np.multiply(samples, oscillator, out=out[:length])
+
+
+class DCBlocker(Stage):
+    """Subtracts a running mean of the batch means from every sample."""
+
+    def __init__(self, alpha=0.1):
+        """Initialize the DCBlocker.
+
+        Args:
+            alpha (float, optional): weight of the newest batch mean in the
+              running mean, 1 subtracts each batch's own mean. Defaults to 0.1.
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError(f"Invalid alpha: {alpha}. Must be in (0, 1].")
+        self.alpha = alpha
+        self._mean = None
+
+    def reset(self):
+        self._mean = None
+
+    def describe(self):
+        return f"DCBlocker({self.alpha:g})"
+
+    def process(self, samples, out):
+        batch_mean = samples.mean()
+        if self._mean is None:
+            self._mean = batch_mean
+        else:
+            self._mean += self.alpha * (batch_mean - self._mean)
+        return np.subtract(samples, self._mean, out=out[: len(samples)])
+
+
+def lowpass_taps(num_taps, cutoff):
+    """Designs Hamming windowed-sinc low-pass taps with unity DC gain.
+
+    Args:
+        num_taps (int): number of taps.
+        cutoff (float): cutoff frequency in cycles per sample, below 0.5.
+
+    Returns:
+        numpy.ndarray: float32 taps.
+    """
+    position = np.arange(num_taps) - (num_taps - 1) / 2
+    taps = np.sinc(2 * cutoff * position) * np.hamming(num_taps)
+    return (taps / taps.sum()).astype(np.float32)
+
+
+class FIRDecimator(Stage):
+    """Low-pass filters and keeps every `decimation`-th sample.
+
+    Only the kept outputs are computed: each tap multiplies a stride
+    `decimation` view of the input, the polyphase decomposition of the
+    filter, so the cost per input sample is `num_taps / decimation`
+    multiply-adds. The last `num_taps - 1` inputs and the decimation phase
+    carry over to the next batch.
+    """
+
+    def __init__(self, decimation, num_taps=None, cutoff=None):
+        """Initialize the FIRDecimator.
+
+        Args:
+            decimation (int): decimation factor, at least 1.
+            num_taps (int, optional): filter length. Defaults to
+              `8 * decimation + 1`.
+            cutoff (float, optional): cutoff in cycles per input sample.
+              Defaults to 80% of the output Nyquist frequency.
+        """
+        if decimation < 1:
+            raise ValueError(f"Invalid decimation: {decimation}. Must be >= 1.")
+        self.decimation = int(decimation)
+        self.num_taps = num_taps or 8 * self.decimation + 1
+        self.cutoff = cutoff or 0.8 * 0.5 / self.decimation
+        self.taps = lowpass_taps(self.num_taps, self.cutoff)
+        self._work = None
+        self._product = None
+        self.reset()
+
+    def output_rate(self, input_rate):
+        return input_rate / self.decimation
+
+    def output_length(self, input_length):
+        return input_length // self.decimation + 1
+
+    def reset(self):
+        self._history = np.zeros(self.num_taps - 1, dtype=np.complex64)
+        self._skip = 0
+
+    def describe(self):
+        return f"FIRDecimator({self.decimation}, num_taps={self.num_taps})"
+
+    def process(self, samples, out):
+        history = len(self._history)
+        total = history + len(samples)
+        self._work = _grow(self._work, total, np.complex64)
+        work = self._work[:total]
+        work[:history] = self._history
+        work[history:] = samples
+
+        span = total - self.num_taps - self._skip
+        count = span // self.decimation + 1 if span >= 0 else 0
+        result = out[:count]
+        if count:
+            self._product = _grow(self._product, count, np.complex64)
+            product = self._product[:count]
+            # taps are symmetric, so convolution equals correlation here
+            result[:] = 0
+            stop = self._skip + (count - 1) * self.decimation + 1
+            for tap, weight in enumerate(self.taps):
+                np.multiply(
+                    work[self._skip + tap : stop + tap : self.decimation],
+                    weight,
+                    out=product,
+                )
+                result += product
+
+        # next output starts `decimation` after the last computed one
+        next_start = self._skip + count * self.decimation
+        self._skip = next_start - (total - history)
+        self._history[:] = work[total - history :]
+        return result
+
+
+class NarrowDtype(Stage):
+    """Narrows samples to complex64, or to interleaved uint8 (cu8) bytes."""
+
+    DTYPES = ("complex64", "cu8")
+
+    def __init__(self, dtype="complex64"):
+        """Initialize the NarrowDtype.
+
+        Args:
+            dtype (str, optional): one of `DTYPES`. Defaults to "complex64".
+        """
+        if dtype not in self.DTYPES:
+            raise ValueError(f"Invalid dtype: {dtype}. Must be one of {self.DTYPES}.")
+        self.dtype = dtype
+        self._scaled = None
+
+    @property
+    def out_dtype(self):
+        """numpy.dtype: element type of the output buffer."""
+        return np.dtype(np.uint8 if self.dtype == "cu8" else np.complex64)
+
+    def output_length(self, input_length):
+        return 2 * input_length if self.dtype == "cu8" else input_length
+
+    def describe(self):
+        return f"NarrowDtype({self.dtype})"
+
+    def process(self, samples, out):
+        if self.dtype == "complex64":
+            out = out[: len(samples)]
+            out[:] = samples
+            return out
+        length = 2 * len(samples)
+        self._scaled = _grow(self._scaled, length, np.float32)
+        scaled = self._scaled[:length]
+        scaled[0::2] = samples.real
+        scaled[1::2] = samples.imag
+        scaled *= 127.5
+        scaled += 127.5
+        np.rint(scaled, out=scaled)
+        np.clip(scaled, 0, 255, out=scaled)
+        out = out[:length]
+        out[:] = scaled
+        return out
+
+
+class Pipeline:
+    """Chain of stages run on every captured batch.
+
+    Raw interleaved uint8 batches (as returned by `read_bytes`) are first
+    converted to complex64 through the `sdrcap.iq` lookup table; complex
+    batches enter the chain as they are.
+    """
+
+    def __init__(self, stages, sample_rate):
+        """Initialize the Pipeline.
+
+        Args:
+            stages (list of Stage): stages in processing order.
+            sample_rate (float): sample rate of the captured batches in Hz.
+        """
+        self.stages = list(stages)
+        self.sample_rate = sample_rate
+        self._input = None
+        self._buffers = [None] * len(self.stages)
+
+    @property
+    def output_rate(self):
+        """float: sample rate of the pipeline output in Hz."""
+        rate = self.sample_rate
+        for stage in self.stages:
+            rate = stage.output_rate(rate)
+        return rate
+
+    def output_center_freq(self, center_freq):
+        """Returns the center frequency represented by the pipeline output."""
+        for stage in self.stages:
+            center_freq = stage.output_center_freq(center_freq)
+        return center_freq
+
+    @property
+    def output_dtype(self):
+        """numpy.dtype: element type of the pipeline output."""
+        for stage in reversed(self.stages):
+            if isinstance(stage, NarrowDtype):
+                return stage.out_dtype
+        return np.dtype(np.complex64)
+
+    def metadata(self):
+        """Returns the pipeline description written to recording metadata."""
+        return {
+            "input_sample_rate": self.sample_rate,
+            "pipeline": " -> ".join(stage.describe() for stage in self.stages),
+        }
+
+    def reset(self):
+        """Clears the state every stage carries across batches."""
+        for stage in self.stages:
+            stage.reset()
+
+    def process(self, samples):
+        """Runs one batch through every stage.
+
+        The result is a view of a buffer reused by the next call, so it must
+        be saved or copied before processing the next batch.
+
+        Args:
+            samples (numpy.ndarray or buffer): complex samples or interleaved
+              uint8 IQ bytes.
+
+        Returns:
+            numpy.ndarray: processed batch.
+        """
+        if not isinstance(samples, np.ndarray):
+            samples = np.frombuffer(samples, dtype=np.uint8)
+        if samples.dtype == np.uint8:
+            self._input = _grow(self._input, len(samples) // 2, np.complex64)
+            samples = cu8_to_complex64(samples, out=self._input[: len(samples) // 2])
+        for index, stage in enumerate(self.stages):
+            dtype = stage.out_dtype if isinstance(stage, NarrowDtype) else np.complex64
+            self._buffers[index] = _grow(
+                self._buffers[index], stage.output_length(len(samples)), dtype
+            )
+            samples = stage.process(samples, self._buffers[index])
+        return samples
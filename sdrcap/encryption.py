@@ -0,0 +1,162 @@
+"""
+Module for authenticated encryption of recording chunks.
+
+`ChunkCipher` encrypts every chunk of a recording independently with
+AES-GCM, so chunks stay randomly accessible and are encrypted on the same
+thread pool that compresses them (see `sdrcap.codecs.ChunkCompressor`).
+
+    - A per-file key is derived from the user key and a random salt with
+      HKDF-SHA256, so the 96 bit nonces can simply number the chunks of a
+      file without ever repeating under one key.
+    - The chunk number is the nonce and the chunk header is authenticated
+      data, so a chunk that was modified, moved or swapped with another
+      fails to decrypt.
+    - A key check value lets readers reject a wrong key before decrypting.
+
+Only the salt and key check value are stored in the recording metadata,
+never the key. Dropped trailing chunks are detected by the reader, which
+rejects a finished recording whose frames hold fewer samples than the
+`num_samples` of its metadata. Needs the optional `cryptography` package.
+
+Usage:
+    key = generate_key()
+    interface = RTLSDRInterface(filetype="sdrz", encryption_key=key)
+    reader = open_recording("outputs/capture.sdrz", key=key)
+"""
+
+import hmac
+import os
+import struct
+
+KEY_SIZES = (16, 24, 32)
+TAG_SIZE = 16
+SALT_SIZE = 16
+CIPHER_NAME = "AES-GCM"
+KDF_NAME = "HKDF-SHA256"
+_NONCE = struct.Struct(">4xQ")
+
+
+def _import_cryptography():
+    """Imports the AES-GCM and HKDF primitives, naming the package when missing."""
+    try:
+        # pylint: disable=import-outside-toplevel
+        from cryptography.hazmat.primitives import hashes
+        from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+        from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+    except ImportError as exc:
+        raise ImportError(
+            "Encrypted recordings need the cryptography package: "
+            "pip install cryptography"
+        ) from exc
+    return AESGCM, HKDF, hashes
+
+
+def generate_key(size=32):
+    """Returns a new random key.
+
+    Args:
+        size (int, optional): key bytes, one of `KEY_SIZES`. Defaults to 32
+          (AES-256).
+
+    Returns:
+        bytes: the key.
+    """
+    if size not in KEY_SIZES:
+        raise ValueError(f"Invalid key size: {size}. Must be one of {KEY_SIZES}.")
+    return os.urandom(size)
+
+
+def _key_bytes(key):
+    """Accepts keys as bytes or hex strings."""
+    key = bytes.fromhex(key) if isinstance(key, str) else bytes(key)
+    if len(key) not in KEY_SIZES:
+        raise ValueError(
+            f"Invalid key size: {len(key)} bytes. Must be one of {KEY_SIZES}."
+        )
+    return key
+
+
+def hkdf_sha256(key, salt, info, length):
+    """Derives `length` bytes from `key` with HKDF-SHA256 (RFC 5869)."""
+    _, hkdf, hashes = _import_cryptography()
+    return hkdf(
+        algorithm=hashes.SHA256(), length=length, salt=salt or None, info=info
+    ).derive(key)
+
+
+class ChunkCipher:
+    """AES-GCM cipher of the numbered chunks of one file.
+
+    Attributes:
+        salt (bytes): random salt the file key is derived with.
+        key_check (str): hex digest identifying the file key.
+    """
+
+    def __init__(self, key, salt=None):
+        """Initialize the ChunkCipher.
+
+        Args:
+            key (bytes or str): user key of `KEY_SIZES` bytes, or its hex.
+            salt (bytes, optional): salt of an existing file. Defaults to a
+              new random salt.
+        """
+        key = _key_bytes(key)
+        self.salt = os.urandom(SALT_SIZE) if salt is None else bytes(salt)
+        file_key = hkdf_sha256(key, self.salt, b"sdrcap chunk key", len(key))
+        self.key_check = hkdf_sha256(file_key, b"", b"sdrcap key check", 8).hex()
+        self._aead = _import_cryptography()[0](file_key)
+
+    def metadata(self):
+        """dict: parameters stored with the recording to decrypt it."""
+        return {
+            "cipher": CIPHER_NAME,
+            "kdf": KDF_NAME,
+            "salt": self.salt.hex(),
+            "key_check": self.key_check,
+        }
+
+    @classmethod
+    def from_metadata(cls, key, metadata):
+        """Recreates the cipher of a recording, checking the key.
+
+        Args:
+            key (bytes or str): user key.
+            metadata (dict): `metadata()` stored with the recording.
+
+        Returns:
+            ChunkCipher: the cipher.
+        """
+        if metadata.get("cipher") != CIPHER_NAME or metadata.get("kdf") != KDF_NAME:
+            raise ValueError(
+                f"Invalid encryption: {metadata.get('cipher')}/{metadata.get('kdf')}. "
+                f"Must be {CIPHER_NAME}/{KDF_NAME}."
+            )
+        cipher = cls(key, bytes.fromhex(metadata["salt"]))
+        if not hmac.compare_digest(cipher.key_check, metadata["key_check"]):
+            raise ValueError("Invalid key: it does not match the recording's key.")
+        return cipher
+
+    def encrypt(self, index, data, associated_data=b""):
+        """Encrypts chunk `index`. Thread safe.
+
+        Args:
+            index (int): chunk number within the file.
+            data (bytes-like): chunk to encrypt.
+            associated_data (bytes, optional): authenticated cleartext, e.g.
+              the chunk header.
+
+        Returns:
+            bytes: ciphertext followed by the `TAG_SIZE` byte tag.
+        """
+        return self._aead.encrypt(_NONCE.pack(index), bytes(data), associated_data)
+
+    def decrypt(self, index, data, associated_data=b""):
+        """Decrypts and authenticates chunk `index`.
+
+        Raises:
+            ValueError: the chunk was modified, moved or belongs elsewhere.
+        """
+        try:
+            return self._aead.decrypt(_NONCE.pack(index), bytes(data), associated_data)
+        except Exception as exc:  # cryptography raises InvalidTag
+            raise ValueError(f"Chunk {index} failed authentication.") from exc
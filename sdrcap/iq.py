@@ -0,0 +1,77 @@
+"""
+    IQ sample format helpers shared by the hardware interfaces, recorders
+    and readers.
+
+    The RTL-SDR delivers interleaved unsigned 8 bit I/Q pairs (cu8) centered
+    on 127.5. Converting them through a 256 entry lookup table avoids the
+    float64/complex128 intermediate arrays of `RtlSdr.packed_bytes_to_iq`.
+"""
+
+import numpy as np
+
+CU8_LUT = ((np.arange(256, dtype=np.float32) - 127.5) / 127.5).astype(np.float32)
+
+
+def cu8_to_complex64(raw, out=None, scratch=None):
+    """Converts interleaved uint8 I/Q bytes to complex64 samples.
+
+    `np.take` casts its indices to intp, which for a whole batch is a
+    temporary four (32 bit) or eight times the size of the bytes. With a
+    `scratch` index array the batch is converted block by block through it
+    instead, so converting into `out` allocates nothing.
+
+    Args:
+        raw (numpy.ndarray or buffer): interleaved I/Q bytes, even length.
+        out (numpy.ndarray, optional): complex64 array of `len(raw) // 2`
+          samples to convert into. Defaults to a new array.
+        scratch (numpy.ndarray, optional): intp array the bytes are cast
+          into, `len(scratch)` at a time. See `cu8_scratch`.
+
+    Returns:
+        numpy.ndarray: complex64 samples.
+    """
+    raw = np.frombuffer(raw, dtype=np.uint8) if not isinstance(raw, np.ndarray) else raw
+    if len(raw) % 2:
+        raise ValueError(f"Invalid cu8 length: {len(raw)}. Must be even.")
+    if out is None:
+        out = np.empty(len(raw) // 2, dtype=np.complex64)
+    interleaved = out.view(np.float32)
+    if scratch is None:
+        np.take(CU8_LUT, raw, out=interleaved)
+        return out
+    block = len(scratch)
+    for begin in range(0, len(raw), block):
+        end = min(begin + block, len(raw))
+        index = scratch[: end - begin]
+        np.copyto(index, raw[begin:end], casting="unsafe")
+        # uint8 indices are always in range, "wrap" skips the bounds check
+        np.take(CU8_LUT, index, out=interleaved[begin:end], mode="wrap")
+    return out
+
+
+def cu8_scratch(block_size=16384):
+    """Returns a scratch index array for `cu8_to_complex64`.
+
+    Args:
+        block_size (int, optional): bytes converted per block. Defaults to
+          16384, 128 KiB of indices that stay in cache.
+
+    Returns:
+        numpy.ndarray: uninitialized intp array.
+    """
+    return np.empty(block_size, dtype=np.intp)
+
+
+def complex_to_cu8(samples):
+    """Quantizes complex samples in [-1, 1] to interleaved uint8 I/Q bytes.
+
+    Args:
+        samples (numpy.ndarray): complex IQ values.
+
+    Returns:
+        numpy.ndarray: interleaved uint8 bytes, two per sample.
+    """
+    interleaved = np.empty(2 * len(samples), dtype=np.float32)
+    interleaved[0::2] = samples.real
+    interleaved[1::2] = samples.imag
+    return np.clip(np.rint(interleaved * 127.5 + 127.5), 0, 255).astype(np.uint8)
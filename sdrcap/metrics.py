@@ -0,0 +1,344 @@
+"""
+Module for capture session metrics.
+
+`CaptureMetrics` collects the hot-path numbers of a capture session:
+
+    - read_latency_seconds: histogram of the time the device took to hand
+      over each batch.
+    - save_latency_seconds: histogram of the time each recorder `save` took.
+    - samples_captured_total, samples_written_total, samples_dropped_total
+      and bytes_written_total counters.
+    - queue_depth: batches waiting for the writer of a threaded capture.
+
+Pass it as the `metrics` option of `RTLSDRInterface` (or `ThreadedCapture`)
+and read it through any of:
+
+    - `snapshot()`, a JSON serializable dict, written periodically to a file
+      by `JSONSnapshotWriter`.
+    - `to_prometheus()`, the Prometheus text format, served over HTTP by
+      `MetricsServer` at /metrics (and the snapshot at /metrics.json).
+    - hooks added with `add_hook`, called with every observation.
+
+Recording an observation is a bisect and a few integer additions without
+locks: every metric is updated by a single thread (the reader or the
+writer), and readers of a snapshot tolerate it being a batch behind.
+
+Usage:
+    metrics = CaptureMetrics(labels={"device": "roof"})
+    server = MetricsServer(metrics, port=9464).start()
+    interface = RTLSDRInterface(metrics=metrics, filetype="cu8")
+    interface.start_recording_threaded()
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 100 us to ~17.8 s, four buckets per decade
+DEFAULT_LATENCY_BUCKETS = tuple(
+    round(10 ** (exponent / 4), 10) for exponent in range(-16, 6)
+)
+
+
+def _escape_label(value):
+    """Escapes a Prometheus label value."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Histogram:
+    """Cumulative-bucket histogram with fixed upper bounds."""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        """Initialize the Histogram.
+
+        Args:
+            buckets (iterable, optional): increasing bucket upper bounds.
+              Defaults to `DEFAULT_LATENCY_BUCKETS` (seconds).
+        """
+        self.buckets = tuple(buckets)
+        if list(self.buckets) != sorted(set(self.buckets)):
+            raise ValueError(
+                f"Invalid buckets: {self.buckets}. Must be strictly increasing."
+            )
+        # the last count is the +Inf bucket
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        """Records one value."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        """Returns the upper bound of the bucket holding quantile `q`.
+
+        Args:
+            q (float): quantile between 0 and 1.
+
+        Returns:
+            float or None: bucket upper bound, inf past the last bucket and
+            None without observations.
+        """
+        if not self.count:
+            return None
+        rank = q * self.count
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            if total >= rank:
+                return bound
+        return float("inf")
+
+    def snapshot(self):
+        """dict: count, sum, p50/p90/p99 bucket bounds and bucket counts."""
+        quantiles = {
+            f"p{round(q * 100)}": self.quantile(q) for q in (0.5, 0.9, 0.99)
+        }
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            # strict JSON has no infinity
+            **{
+                name: "+Inf" if bound == float("inf") else bound
+                for name, bound in quantiles.items()
+            },
+            "buckets": dict(zip(map(str, self.buckets + ("+Inf",)), self.counts)),
+        }
+
+
+class CaptureMetrics:
+    """Counters, gauges and latency histograms of one capture session.
+
+    Attributes:
+        read_latency (Histogram): seconds per device batch.
+        save_latency (Histogram): seconds per recorder save.
+        counters (dict): samples_captured, samples_written, samples_dropped
+          and bytes_written totals.
+        queue_depth (int): batches waiting for the writer.
+        labels (dict): Prometheus labels added to every sample.
+    """
+
+    COUNTERS = ("samples_captured", "samples_written", "samples_dropped", "bytes_written")
+
+    def __init__(self, labels=None, buckets=DEFAULT_LATENCY_BUCKETS):
+        """Initialize the CaptureMetrics.
+
+        Args:
+            labels (dict, optional): Prometheus labels, e.g. {"device": "roof"}.
+            buckets (iterable, optional): latency histogram bucket bounds.
+        """
+        self.labels = dict(labels or {})
+        self.read_latency = Histogram(buckets)
+        self.save_latency = Histogram(buckets)
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self.queue_depth = 0
+        self.started = time.time()
+        self._hooks = []
+
+    def add_hook(self, hook):
+        """Adds a callable called as `hook(name, value)` on every observation.
+
+        Names are "read_latency", "save_latency", "queue_depth" and the
+        counter names; counter values are the increments. Hooks run on the
+        capture threads, so they must be fast and must not raise.
+        """
+        self._hooks.append(hook)
+
+    def remove_hook(self, hook):
+        """Removes a hook added with `add_hook`."""
+        self._hooks.remove(hook)
+
+    def _notify(self, name, value):
+        for hook in self._hooks:
+            hook(name, value)
+
+    def observe_read(self, seconds, num_samples):
+        """Records a device batch of `num_samples` that took `seconds`."""
+        self.read_latency.observe(seconds)
+        self.counters["samples_captured"] += num_samples
+        if self._hooks:
+            self._notify("read_latency", seconds)
+            self._notify("samples_captured", num_samples)
+
+    def observe_save(self, seconds, num_samples, num_bytes):
+        """Records a recorder save of `num_samples` (`num_bytes`) that took `seconds`."""
+        self.save_latency.observe(seconds)
+        self.counters["samples_written"] += num_samples
+        self.counters["bytes_written"] += num_bytes
+        if self._hooks:
+            self._notify("save_latency", seconds)
+            self._notify("samples_written", num_samples)
+            self._notify("bytes_written", num_bytes)
+
+    def observe_drop(self, num_samples):
+        """Records `num_samples` lost to backpressure."""
+        self.counters["samples_dropped"] += num_samples
+        if self._hooks:
+            self._notify("samples_dropped", num_samples)
+
+    def set_queue_depth(self, depth):
+        """Records the number of batches waiting for the writer."""
+        self.queue_depth = depth
+        if self._hooks:
+            self._notify("queue_depth", depth)
+
+    def snapshot(self):
+        """Returns the current metrics as a JSON serializable dict."""
+        return {
+            "time": time.time(),
+            "uptime": time.time() - self.started,
+            "labels": self.labels,
+            **self.counters,
+            "queue_depth": self.queue_depth,
+            "read_latency_seconds": self.read_latency.snapshot(),
+            "save_latency_seconds": self.save_latency.snapshot(),
+        }
+
+    def _label_text(self, extra=None):
+        labels = {**self.labels, **(extra or {})}
+        if not labels:
+            return ""
+        pairs = ",".join(
+            f'{name}="{_escape_label(value)}"' for name, value in labels.items()
+        )
+        return "{" + pairs + "}"
+
+    def to_prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        lines = []
+        for name in self.COUNTERS:
+            lines.append(f"# TYPE sdrcap_{name}_total counter")
+            lines.append(f"sdrcap_{name}_total{self._label_text()} {self.counters[name]}")
+        lines.append("# TYPE sdrcap_queue_depth gauge")
+        lines.append(f"sdrcap_queue_depth{self._label_text()} {self.queue_depth}")
+        for name, histogram in (
+            ("read_latency_seconds", self.read_latency),
+            ("save_latency_seconds", self.save_latency),
+        ):
+            lines.append(f"# TYPE sdrcap_{name} histogram")
+            total = 0
+            for bound, count in zip(histogram.buckets + ("+Inf",), histogram.counts):
+                total += count
+                labels = self._label_text({"le": bound})
+                lines.append(f"sdrcap_{name}_bucket{labels} {total}")
+            lines.append(f"sdrcap_{name}_sum{self._label_text()} {histogram.sum}")
+            lines.append(f"sdrcap_{name}_count{self._label_text()} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """HTTP server exposing metrics at /metrics (Prometheus) and /metrics.json."""
+
+    def __init__(self, metrics, host="127.0.0.1", port=9464):
+        """Initialize the MetricsServer.
+
+        Args:
+            metrics (CaptureMetrics): metrics to serve.
+            host (str, optional): address to bind. Defaults to localhost.
+            port (int, optional): port to bind, 0 for any free port.
+              Defaults to 9464.
+        """
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Starts serving on a background thread. Returns the server."""
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            """Serves the metrics of the enclosing server."""
+
+            def do_GET(self):  # pylint: disable=invalid-name
+                """Answers a scrape."""
+                if self.path == "/metrics":
+                    body = metrics.to_prometheus().encode()
+                    content_type = "text/plain; version=0.0.4; charset=utf-8"
+                elif self.path == "/metrics.json":
+                    body = json.dumps(metrics.snapshot()).encode()
+                    content_type = "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                """Keeps scrapes out of stderr."""
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="sdrcap-metrics", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops serving and closes the socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+
+class JSONSnapshotWriter:
+    """Writes a metrics snapshot to a JSON file every `interval` seconds.
+
+    The file is replaced atomically so readers never see a partial snapshot.
+    """
+
+    def __init__(self, metrics, filename, interval=10.0):
+        """Initialize the JSONSnapshotWriter.
+
+        Args:
+            metrics (CaptureMetrics): metrics to write.
+            filename (str): JSON file to keep up to date.
+            interval (float, optional): seconds between snapshots. Defaults to 10.
+        """
+        if interval <= 0:
+            raise ValueError(f"Invalid interval: {interval}. Must be > 0.")
+        self.metrics = metrics
+        self.filename = filename
+        self.interval = interval
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def write(self):
+        """Writes one snapshot now."""
+        partial = f"{self.filename}.partial"
+        with open(partial, "w", encoding="utf-8") as snapshot_file:
+            json.dump(self.metrics.snapshot(), snapshot_file)
+        os.replace(partial, self.filename)
+
+    def start(self):
+        """Starts writing snapshots on a background thread. Returns the writer."""
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sdrcap-metrics-snapshot", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the thread after writing a final snapshot."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            self.write()
+        self.write()
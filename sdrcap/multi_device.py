@@ -0,0 +1,278 @@
+"""
+Module for capturing from several SDR devices in parallel.
+
+Each device gets a capture process that only reads raw interleaved uint8 IQ
+bytes from the hardware and a writer process that feeds them to its
+recorder, so neither side of any device competes for the GIL. Batches move
+between the two processes through a ring of slots in
+`multiprocessing.shared_memory`; only slot numbers travel through the
+queues, never the sample arrays themselves.
+
+Classes:
+    SharedBufferRing: Shared memory slots plus free/ready slot queues.
+    CaptureManager: Starts, stops and monitors the processes of every device.
+
+Usage:
+    manager = CaptureManager(output_dir="outputs", filetype="cu8")
+    manager.add_device("roof", serial_number="00000001", center_freq=462e6)
+    manager.add_device("mast", device_index=1, center_freq=915e6)
+    manager.start()
+    print(manager.status())
+    manager.stop()
+"""
+
+import os
+import queue
+import time
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from sdrcap.clock import CaptureClock
+from sdrcap.iq import cu8_to_complex64
+from sdrcap.rtl_interface import DEFAULT_OPTIONS, create_recorder, open_rtl_sdr
+
+# indexes into the per device shared counter array
+CAPTURED, WRITTEN, DROPPED, ERRORS = range(4)
+COUNTER_NAMES = ("captured", "written", "dropped", "errors")
+
+
+class SharedBufferRing:
+    """Ring of equally sized byte slots in shared memory.
+
+    The capture process takes a slot number from `free`, fills the slot and
+    puts `(slot, nbytes, captured_at)` on `ready`; the writer process saves
+    the slot and hands its number back to `free`. A `None` on `ready` marks
+    the end of the capture.
+    """
+
+    def __init__(self, context, num_slots, slot_bytes):
+        """Initialize the SharedBufferRing.
+
+        Args:
+            context: multiprocessing context creating the queues.
+            num_slots (int): number of slots, at least 2.
+            slot_bytes (int): size of each slot in bytes.
+        """
+        if num_slots < 2:
+            raise ValueError(f"Invalid num_buffers: {num_slots}. Must be >= 2.")
+        self.num_slots = num_slots
+        self.slot_bytes = slot_bytes
+        self.shm = shared_memory.SharedMemory(create=True, size=num_slots * slot_bytes)
+        self.free = context.Queue()
+        self.ready = context.Queue()
+        for slot in range(num_slots):
+            self.free.put(slot)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["shm"] = self.shm.name
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.shm = shared_memory.SharedMemory(name=state["shm"])
+
+    def slots(self):
+        """Returns a (num_slots, slot_bytes) uint8 view of the shared memory."""
+        return np.ndarray(
+            (self.num_slots, self.slot_bytes), dtype=np.uint8, buffer=self.shm.buf
+        )
+
+    def close(self, unlink=False):
+        """Detaches from the shared memory, removing it when `unlink` is set."""
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+
+
+def _capture_worker(device_factory, options, ring, counters, stop_event):
+    """Capture process: reads raw bytes from the device into free slots."""
+    slots = ring.slots()
+    sdr = None
+    try:
+        sdr = device_factory(options)
+        num_bytes = 2 * options["sample_window"]
+        while not stop_event.is_set():
+            raw = np.frombuffer(sdr.read_bytes(num_bytes), dtype=np.uint8)
+            captured_at = time.time()
+            counters[CAPTURED] += 1
+            try:
+                slot = ring.free.get_nowait()
+            except queue.Empty:
+                counters[DROPPED] += 1
+                continue
+            slots[slot, : len(raw)] = raw
+            ring.ready.put((slot, len(raw), captured_at))
+    except Exception:  # pylint: disable=broad-exception-caught
+        # both processes count errors; the others have a single writer
+        with counters.get_lock():
+            counters[ERRORS] += 1
+    finally:
+        ring.ready.put(None)
+        if sdr is not None and hasattr(sdr, "close"):
+            sdr.close()
+        del slots
+        ring.close()
+
+
+def _writer_worker(options, filename, ring, counters):
+    """Writer process: saves ready slots with the device recorder.
+
+    Batches are stamped by a `CaptureClock` from their capture time, so
+    batches the capture process dropped leave discontinuity markers.
+    """
+    slots = ring.slots()
+    pipeline = options.get("pipeline")
+    clock = CaptureClock(options["sample_rate"], tolerance=options["clock_tolerance"])
+    recorder = create_recorder(options)
+    recorder.clock = clock
+    recorder.start_recording(time.time())
+    try:
+        while True:
+            item = ring.ready.get()
+            if item is None:
+                break
+            slot, nbytes, captured_at = item
+            clock.begin_batch(clock.capture(nbytes // 2, captured_at))
+            try:
+                raw = slots[slot, :nbytes]
+                if pipeline is not None:
+                    samples = pipeline.process(raw)
+                else:
+                    samples = raw if recorder.raw_input else cu8_to_complex64(raw)
+                recorder.save(samples=samples, filename=filename)
+                counters[WRITTEN] += 1
+            except Exception:  # pylint: disable=broad-exception-caught
+                with counters.get_lock():
+                    counters[ERRORS] += 1
+            finally:
+                ring.free.put(slot)
+    finally:
+        recorder.stop_recording(time.time())
+        del slots
+        ring.close()
+
+
+class CaptureManager:
+    """Class running one capture and one writer process per SDR device."""
+
+    def __init__(self, device_factory=None, context="spawn", **options):
+        """Initialize the CaptureManager.
+
+        Args:
+            device_factory (callable, optional): picklable function called in
+              the capture process with the device options, returning a
+              pyrtlsdr style device. Defaults to opening an RTL SDR.
+            context (str, optional): multiprocessing start method.
+              Defaults to "spawn".
+            **options: recording options shared by every device, see
+              `sdrcap.rtl_interface.DEFAULT_OPTIONS`, plus `num_buffers`.
+        """
+        self.device_factory = device_factory or open_rtl_sdr
+        self.context = multiprocessing.get_context(context)
+        self.options = {**DEFAULT_OPTIONS, **options}
+        self.devices = {}
+
+    def add_device(self, name, **options):
+        """Registers a device selected by `serial_number` or `device_index`.
+
+        Args:
+            name (str): unique device name, used in the recording filename.
+            **options: per device overrides of the shared recording options.
+        """
+        if name in self.devices:
+            raise ValueError(f"Device {name} is already registered.")
+        self.devices[name] = {"options": {**self.options, **options}}
+
+    def _filename(self, name, options, start_time):
+        """Builds the recording filename of a device."""
+        return (
+            f"{options["output_dir"]}/{name}-{start_time}"
+            f"-sample_window{options["sample_window"]}.{options["filetype"]}"
+        )
+
+    def start(self):
+        """Starts the capture and writer processes of every registered device."""
+        if not self.devices:
+            raise ValueError("No devices registered.")
+        if self.running:
+            raise RuntimeError("Capture is already running.")
+        start_time = time.time()
+        for name, device in self.devices.items():
+            options = device["options"]
+            os.makedirs(options["output_dir"], exist_ok=True)
+            ring = SharedBufferRing(
+                self.context, options["num_buffers"], 2 * options["sample_window"]
+            )
+            counters = self.context.Array("q", len(COUNTER_NAMES))
+            stop_event = self.context.Event()
+            filename = self._filename(name, options, start_time)
+            writer = self.context.Process(
+                target=_writer_worker,
+                args=(options, filename, ring, counters),
+                name=f"sdrcap-writer-{name}",
+                daemon=True,
+            )
+            capture = self.context.Process(
+                target=_capture_worker,
+                args=(self.device_factory, options, ring, counters, stop_event),
+                name=f"sdrcap-capture-{name}",
+                daemon=True,
+            )
+            device.update(
+                ring=ring,
+                counters=counters,
+                stop_event=stop_event,
+                filename=filename,
+                processes=(capture, writer),
+            )
+            writer.start()
+            capture.start()
+
+    @property
+    def running(self):
+        """bool: whether any capture or writer process is alive."""
+        return any(
+            process.is_alive()
+            for device in self.devices.values()
+            for process in device.get("processes", ())
+        )
+
+    def stop(self, timeout=10):
+        """Stops every capture, lets the writers drain and frees shared memory.
+
+        Args:
+            timeout (float, optional): seconds to wait for each process.
+        """
+        for device in self.devices.values():
+            if "stop_event" in device:
+                device["stop_event"].set()
+        for device in self.devices.values():
+            for process in device.get("processes", ()):
+                process.join(timeout)
+                if process.is_alive():
+                    process.terminate()
+            if "ring" in device:
+                device["ring"].close(unlink=True)
+                del device["ring"]
+
+    def status(self):
+        """Returns the counters and process state of every device.
+
+        Returns:
+            dict: per device name, the captured, written, dropped and errors
+            batch counters, `alive`, `queue_depth` and `filename`.
+        """
+        status = {}
+        for name, device in self.devices.items():
+            if "counters" not in device:
+                status[name] = {"alive": False}
+                continue
+            counters = dict(zip(COUNTER_NAMES, device["counters"][:]))
+            counters["alive"] = any(p.is_alive() for p in device["processes"])
+            counters["queue_depth"] = counters["captured"] - (
+                counters["written"] + counters["dropped"]
+            )
+            counters["filename"] = device["filename"]
+            status[name] = counters
+        return status
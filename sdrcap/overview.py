@@ -0,0 +1,366 @@
+"""
+Module for multi-resolution overviews of IQ recordings.
+
+An overview summarizes a recording at several decimation levels so it can be
+drawn as an envelope or waterfall without reading the samples. Level 0 has
+one row per `block_size` samples, every further level one row per `factor`
+rows of the level below. A row holds:
+
+    - time: epoch time of its first sample.
+    - min, max, mean: magnitude of its samples.
+    - power: coarse power spectrum in dBFS, `fft_size` bins from the lowest
+      to the highest frequency, averaged over up to `fft_averages` windows
+      spread across the block.
+
+Overviews are built incrementally with vectorized NumPy as batches arrive:
+samples of an unfinished block and rows of an unfinished group are carried
+over to the next batch, and only finished rows are written. Each level is
+an appendable file of fixed size records next to the recording
+(`<recording>.overview<level>`), described by a JSON sidecar
+(`<recording>.overview.json`), so overviews are readable while recording
+and memory-map in milliseconds. The last unfinished block and groups are
+not written; the tail they cover is shorter than a row of each level.
+
+Usage:
+    interface = RTLSDRInterface(filetype="cu8", overview=True)
+    with open_recording("outputs/capture.cu8") as reader:
+        envelope = reader.overview(max_rows=2000)
+"""
+
+import json
+import os
+import numpy as np
+from sdrcap import __version__
+from sdrcap.recorders.recorder import Recorder
+
+DEFAULT_MAX_ROWS = 4096
+_CU8_SCALE = np.float32(1 / 127.5)
+
+
+def overview_record_dtype(fft_size):
+    """Returns the numpy record type of one overview row.
+
+    Args:
+        fft_size (int): bins of the power spectrum.
+    """
+    return np.dtype(
+        [
+            ("time", "<f8"),
+            ("min", "<f4"),
+            ("max", "<f4"),
+            ("mean", "<f4"),
+            ("power", "<f4", (fft_size,)),
+        ]
+    )
+
+
+def overview_filename(filename, level):
+    """Returns the path of one overview level of a recording."""
+    return f"{filename}.overview{level}"
+
+
+def overview_metadata_filename(filename):
+    """Returns the path of the overview JSON sidecar of a recording."""
+    return f"{filename}.overview.json"
+
+
+class OverviewBuilder:
+    """Builds overview rows of every level from consecutive batches.
+
+    Rows are returned with linear power; `OverviewRecorder` converts them to
+    dB when writing.
+    """
+
+    def __init__(
+        self,
+        sample_rate,
+        block_size=65536,
+        levels=4,
+        factor=8,
+        fft_size=128,
+        fft_averages=8,
+    ):
+        """Initialize the OverviewBuilder.
+
+        Args:
+            sample_rate (float): sample rate of the batches in Hz.
+            block_size (int, optional): samples per level 0 row, a multiple
+              of `fft_size`. Defaults to 65536.
+            levels (int, optional): decimation levels. Defaults to 4.
+            factor (int, optional): rows of a level per row of the next.
+              Defaults to 8.
+            fft_size (int, optional): bins of the power spectrum. Defaults
+              to 128.
+            fft_averages (int, optional): most FFT windows averaged per
+              block. Defaults to 8.
+        """
+        if fft_size < 1 or block_size % fft_size:
+            raise ValueError(
+                f"Invalid block_size: {block_size}. "
+                f"Must be a multiple of fft_size {fft_size}."
+            )
+        if levels < 1:
+            raise ValueError(f"Invalid levels: {levels}. Must be >= 1.")
+        if factor < 2:
+            raise ValueError(f"Invalid factor: {factor}. Must be >= 2.")
+        self.sample_rate = sample_rate
+        self.block_size = block_size
+        self.levels = levels
+        self.factor = factor
+        self.fft_size = fft_size
+        self.dtype = overview_record_dtype(fft_size)
+        self.num_samples = 0
+        windows = block_size // fft_size
+        self._fft_step = max(1, windows // max(1, fft_averages))
+        self._window = np.hanning(fft_size).astype(np.float32)
+        # full scale tone in one bin -> 0 dBFS
+        self._power_scale = np.float32(1 / self._window.sum() ** 2)
+        self._pending = np.empty(0, dtype=np.complex64)
+        self._pending_time = None
+        self._carry = [np.empty(0, dtype=self.dtype) for _ in range(levels)]
+
+    def samples_per_row(self, level):
+        """int: samples covered by one row of `level`."""
+        return self.block_size * self.factor**level
+
+    def update(self, samples, batch_time):
+        """Adds a batch and returns the rows it finished.
+
+        Args:
+            samples (numpy.ndarray): complex samples or interleaved uint8 IQ
+              bytes.
+            batch_time (float): epoch time of the first sample of the batch,
+              used when no unfinished block is carried over.
+
+        Returns:
+            list: numpy record arrays of the new rows of every level.
+        """
+        samples = np.asarray(samples)
+        if samples.dtype == np.uint8:
+            # arithmetic is ~15x faster than the `cu8_to_complex64` table
+            # lookup and within a float32 rounding of it
+            samples = (samples * _CU8_SCALE - np.float32(1)).view(np.complex64)
+        self.num_samples += len(samples)
+        if len(self._pending):
+            samples = np.concatenate((self._pending, samples))
+        else:
+            self._pending_time = batch_time
+        num_blocks = len(samples) // self.block_size
+        rows = self._blocks(samples[: num_blocks * self.block_size], num_blocks)
+        self._pending = samples[num_blocks * self.block_size :].copy()
+        self._pending_time += num_blocks * self.block_size / self.sample_rate
+        new_rows = [rows]
+        for level in range(1, self.levels):
+            rows = self._aggregate(level, rows)
+            new_rows.append(rows)
+        return new_rows
+
+    def _blocks(self, samples, num_blocks):
+        """Summarizes whole blocks into level 0 rows."""
+        rows = np.zeros(num_blocks, dtype=self.dtype)
+        if not num_blocks:
+            return rows
+        blocks = samples.reshape(num_blocks, self.block_size)
+        magnitude = np.abs(blocks)
+        rows["time"] = (
+            self._pending_time
+            + np.arange(num_blocks) * (self.block_size / self.sample_rate)
+        )
+        rows["min"] = magnitude.min(axis=1)
+        rows["max"] = magnitude.max(axis=1)
+        rows["mean"] = magnitude.mean(axis=1)
+        windows = blocks.reshape(num_blocks, -1, self.fft_size)[:, :: self._fft_step]
+        spectra = np.fft.fft(windows * self._window, axis=-1)
+        power = (spectra.real**2 + spectra.imag**2).mean(axis=1) * self._power_scale
+        rows["power"] = np.fft.fftshift(power, axes=-1)
+        return rows
+
+    def _aggregate(self, level, rows):
+        """Groups rows of `level - 1` into finished rows of `level`."""
+        if len(self._carry[level]):
+            rows = np.concatenate((self._carry[level], rows))
+        num_groups = len(rows) // self.factor
+        self._carry[level] = rows[num_groups * self.factor :].copy()
+        groups = rows[: num_groups * self.factor].reshape(num_groups, self.factor)
+        aggregated = np.zeros(num_groups, dtype=self.dtype)
+        aggregated["time"] = groups["time"][:, 0]
+        aggregated["min"] = groups["min"].min(axis=1)
+        aggregated["max"] = groups["max"].max(axis=1)
+        aggregated["mean"] = groups["mean"].mean(axis=1)
+        aggregated["power"] = groups["power"].mean(axis=1)
+        return aggregated
+
+
+class OverviewRecorder(Recorder):
+    """Class writing an overview alongside the recordings of a wrapped recorder.
+
+    Args:
+        Recorder (ABC): inherited Recording class API.
+    """
+
+    def __init__(self, recorder, sample_rate, center_freq=None, **overview_options):
+        """Initialize the OverviewRecorder.
+
+        Args:
+            recorder (Recorder): recorder saving the samples.
+            sample_rate (float): sample rate of the saved batches in Hz.
+            center_freq (float, optional): center frequency of the batches,
+              used for the spectrum bin frequencies.
+            **overview_options: `OverviewBuilder` options.
+        """
+        super().__init__()
+        self.recorder = recorder
+        # shared, so metadata added to either ends up in the recording
+        self.attributes = recorder.attributes
+        self.sample_rate = sample_rate
+        self.center_freq = center_freq
+        self.overview_options = overview_options
+        self.builder = None
+        self._files = []
+        self._filename = None
+        OverviewBuilder(sample_rate, **overview_options)  # validate early
+
+    @property
+    def raw_input(self):
+        """bool: raw input flag of the wrapped recorder."""
+        return self.recorder.raw_input
+
+    @property
+    def clock(self):
+        """callable: clock of the wrapped recorder, shared like the attributes."""
+        return self.recorder.clock
+
+    @clock.setter
+    def clock(self, clock):
+        self.recorder.clock = clock
+
+    def start_recording(self, start_recording_time):
+        """Capture the recording start time.
+
+        Args:
+            start_recording_time (float): time that the hardware interface
+            started the recording.
+        """
+        self.start_recording_time = start_recording_time
+        self.recorder.start_recording(start_recording_time)
+
+    def stop_recording(self, stop_recording_time):
+        """Closes the overview and stops the wrapped recorder.
+
+        Args:
+            stop_recording_time (float): time that the hardware interface
+            stopped the recording.
+        """
+        self.stop_recording_time = stop_recording_time
+        self.close()
+        self.recorder.stop_recording(stop_recording_time)
+
+    def close(self):
+        """Closes the overview files and completes the JSON sidecar."""
+        if self._filename is None:
+            return
+        for level_file in self._files:
+            level_file.close()
+        self._files = []
+        self._write_metadata()
+        self._filename = None
+
+    def _write_metadata(self):
+        builder = self.builder
+        metadata = {
+            "sample_rate": self.sample_rate,
+            "center_freq": self.center_freq,
+            "block_size": builder.block_size,
+            "levels": builder.levels,
+            "factor": builder.factor,
+            "fft_size": builder.fft_size,
+            "num_samples": builder.num_samples,
+            "sdrcap_version": __version__,
+        }
+        partial = f"{overview_metadata_filename(self._filename)}.tmp"
+        with open(partial, "w", encoding="utf-8") as meta_file:
+            json.dump(metadata, meta_file, indent=2)
+        os.replace(partial, overview_metadata_filename(self._filename))
+
+    def _open(self, filename):
+        """Starts the overview of a new recording."""
+        self.close()
+        self._filename = filename
+        self.builder = OverviewBuilder(self.sample_rate, **self.overview_options)
+        # pylint: disable-next=consider-using-with
+        self._files = [
+            open(overview_filename(filename, level), "ab")
+            for level in range(self.builder.levels)
+        ]
+        self._write_metadata()
+
+    def save(self, samples, filename):
+        """Saves a batch with the wrapped recorder and extends the overview.
+
+        Args:
+            samples (numpy.ndarray): samples in the wrapped recorder's input.
+            filename (str): path of the recording.
+        """
+        batch_time = self.clock()
+        self.recorder.save(samples=samples, filename=filename)
+        if filename != self._filename:
+            self._open(filename)
+        new_rows = self.builder.update(samples, batch_time)
+        for level_file, rows in zip(self._files, new_rows):
+            if len(rows):
+                rows["power"] = 10 * np.log10(np.maximum(rows["power"], 1e-20))
+                level_file.write(rows.tobytes())
+                level_file.flush()
+
+
+def read_overview(filename, level=None, max_rows=DEFAULT_MAX_ROWS):
+    """Reads one level of the overview of a recording.
+
+    Args:
+        filename (str): path of the recording.
+        level (int, optional): level to read. Defaults to the finest level
+          with at most `max_rows` rows.
+        max_rows (int, optional): row budget used to pick the level.
+          Defaults to 4096.
+
+    Returns:
+        dict: `level`, `samples_per_row`, `frequencies` (Hz) of the power
+        bins and the `time`, `min`, `max`, `mean` and `power` (rows, bins,
+        dBFS) arrays, memory-mapped from the file.
+    """
+    with open(overview_metadata_filename(filename), "r", encoding="utf-8") as meta_file:
+        metadata = json.load(meta_file)
+    dtype = overview_record_dtype(metadata["fft_size"])
+    num_rows = [
+        os.path.getsize(overview_filename(filename, index)) // dtype.itemsize
+        for index in range(metadata["levels"])
+    ]
+    if level is None:
+        fitting = [index for index, rows in enumerate(num_rows) if rows <= max_rows]
+        level = fitting[0] if fitting else metadata["levels"] - 1
+    if not 0 <= level < metadata["levels"]:
+        raise ValueError(
+            f"Invalid level: {level}. Must be between 0 and {metadata['levels'] - 1}."
+        )
+    if num_rows[level]:
+        rows = np.memmap(
+            overview_filename(filename, level),
+            dtype=dtype,
+            mode="r",
+            shape=num_rows[level],
+        )
+    else:
+        rows = np.zeros(0, dtype=dtype)
+    frequencies = np.fft.fftshift(
+        np.fft.fftfreq(metadata["fft_size"], 1 / metadata["sample_rate"])
+    ) + (metadata["center_freq"] or 0.0)
+    return {
+        "level": level,
+        "samples_per_row": metadata["block_size"] * metadata["factor"] ** level,
+        "frequencies": frequencies,
+        "time": rows["time"],
+        "min": rows["min"],
+        "max": rows["max"],
+        "mean": rows["mean"],
+        "power": rows["power"],
+    }
@@ -0,0 +1,44 @@
+"""
+    This module contains the reader files for the recordings written by
+    sdrcap recorders.
+
+    Each file type is its own class that inherits from reader and exposes
+    the recording as lazily sliced, memory-mapped complex64 samples that can
+    be indexed by sample range or wall clock time range, or iterated in
+    fixed size chunks for out-of-core processing.
+"""
+
+import os
+from .raw_reader import RawIQReader
+from .hdf5_reader import HDF5Reader
+from .compressed_reader import CompressedReader
+from .csv_reader import CSVReader
+from .parquet_reader import ParquetReader
+
+READERS = {
+    ".cu8": RawIQReader,
+    ".hdf5": HDF5Reader,
+    ".h5": HDF5Reader,
+    ".sdrz": CompressedReader,
+    ".csv": CSVReader,
+    ".parquet": ParquetReader,
+}
+
+
+def open_recording(filename, **options):
+    """Opens an sdrcap recording with the reader matching its extension.
+
+    Args:
+        filename (str): path of the recording.
+        **options: reader options, e.g. the `sample_rate` CSV recordings
+          need.
+
+    Returns:
+        Reader: the opened reader.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in READERS:
+        raise ValueError(
+            f"Invalid recording type: {extension}. Must be one of {tuple(READERS)}."
+        )
+    return READERS[extension](filename, **options)
@@ -0,0 +1,99 @@
+"""
+Module for reading compressed (.sdrz) recordings.
+
+Opening a recording only scans the frame headers to index where every
+chunk starts; reading a sample range decompresses just the frames it
+covers. The codec, sample format and recording parameters come from the
+JSON metadata sidecar written by `CompressedRecorder`. Encrypted
+recordings need the key they were written with; every frame is decrypted
+and authenticated on its own, so random access stays as cheap. A finished
+recording whose frames hold fewer samples than its metadata counts lost
+trailing frames and is rejected.
+"""
+
+import numpy as np
+from sdrcap.codecs import SAMPLE_FORMATS, decode_samples, get_codec
+from sdrcap.encryption import ChunkCipher
+from sdrcap.recorders.compressed_recorder import frame_associated_data, iter_frames
+from sdrcap.recorders.raw_recorder import read_metadata
+from .reader import Reader
+
+
+class CompressedReader(Reader):
+    """Class to read compressed sample chunks frame by frame.
+
+    Args:
+        Reader (ABC): inherited Reading class API.
+    """
+
+    def __init__(self, filename, key=None):
+        """Initialize the CompressedReader.
+
+        Args:
+            filename (str): path of the .sdrz recording.
+            key (bytes or str, optional): key of an encrypted recording.
+        """
+        super().__init__(filename)
+        self.metadata = read_metadata(filename)
+        self.sample_rate = self.metadata["sample_rate"]
+        self.center_freq = self.metadata.get("center_freq")
+        self.start_time = self.metadata.get("start_time", 0.0)
+        self.discontinuities = self.metadata.get("discontinuities", [])
+        self.sample_format = self.metadata["sample_format"]
+        self.codec = get_codec(self.metadata["codec"], self.metadata.get("codec_level"))
+        self._cipher = None
+        if "encryption" in self.metadata:
+            if key is None:
+                raise ValueError(f"Invalid key: None. {filename} is encrypted.")
+            self._cipher = ChunkCipher.from_metadata(key, self.metadata["encryption"])
+        frames = list(iter_frames(filename))
+        bytes_per_sample = SAMPLE_FORMATS[self.sample_format]
+        self._frames = frames
+        # sample index of the first sample of every frame, plus the end
+        self._starts = np.concatenate(
+            ([0], np.cumsum([raw // bytes_per_sample for _, _, raw, _ in frames]))
+        ).astype(np.int64)
+        expected = self.metadata.get("num_samples")
+        finished = self.metadata.get("stop_time") is not None
+        if finished and expected is not None and expected > self.num_samples:
+            raise ValueError(
+                f"Invalid recording: {filename} holds {self.num_samples} "
+                f"samples. Must hold the {expected} of its metadata; trailing "
+                "frames are missing."
+            )
+        self._file = open(filename, "rb")  # pylint: disable=consider-using-with
+        self._cache = (None, None)
+
+    @property
+    def num_samples(self):
+        """int: number of samples in the recording."""
+        return int(self._starts[-1])
+
+    def _frame(self, index):
+        """Decompresses one frame, keeping the last one for sequential reads."""
+        if self._cache[0] == index:
+            return self._cache[1]
+        offset, compressed_length, raw_length, scale = self._frames[index]
+        self._file.seek(offset)
+        data = self._file.read(compressed_length)
+        if self._cipher is not None:
+            data = self._cipher.decrypt(
+                index, data, frame_associated_data(raw_length, scale)
+            )
+        raw = self.codec.decompress(data, raw_length)
+        samples = decode_samples(raw, self.sample_format, scale)
+        self._cache = (index, samples)
+        return samples
+
+    def _read(self, start, stop):
+        first = int(np.searchsorted(self._starts, start, side="right")) - 1
+        last = int(np.searchsorted(self._starts, stop, side="left"))
+        parts = [self._frame(index) for index in range(first, last)]
+        samples = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        offset = start - self._starts[first]
+        return samples[offset : offset + stop - start]
+
+    def close(self):
+        """Closes the file."""
+        self._file.close()
+        self._cache = (None, None)
@@ -0,0 +1,143 @@
+"""
+Module for reading CSV recordings written by `CSVRecorder`.
+
+Both the current recorder output and older captures are supported: older
+recordings repeat the header line before every batch and write values with
+Python float formatting. Opening a recording scans it once, block by block
+on a memory map, counting the data rows of every block with vectorized
+newline searches; reading a sample range parses only the blocks it covers,
+converting the value columns with a single NumPy string to float cast
+instead of a per line parser.
+
+CSV recordings carry no metadata, so the sample rate must be given; the
+start time is taken from the first timestamp.
+"""
+
+import os
+from datetime import datetime, timezone
+import numpy as np
+from sdrcap.recorders.csv_recorder import CSV_HEADER
+from .reader import Reader
+
+BLOCK_SIZE = 16 * 1024 * 1024
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def parse_csv_rows(data):
+    """Parses CSV recording rows to complex64 samples.
+
+    Args:
+        data (bytes): whole lines, header lines allowed anywhere.
+
+    Returns:
+        numpy.ndarray: complex64 samples.
+    """
+    data = data.replace(CSV_HEADER, b"").replace(b"\r", b"")
+    if not data.strip():
+        return np.empty(0, dtype=np.complex64)
+    if not data.endswith(b"\n"):
+        data += b"\n"
+    fields = data.replace(b"\n", b",").split(b",")
+    num_rows = len(fields) // 3
+    samples = np.empty(num_rows, dtype=np.complex64)
+    samples.real = np.array(fields[0 : 3 * num_rows : 3]).astype(np.float32)
+    samples.imag = np.array(fields[1 : 3 * num_rows : 3]).astype(np.float32)
+    return samples
+
+
+class CSVReader(Reader):
+    """Class to read CSV recordings through a block index.
+
+    Args:
+        Reader (ABC): inherited Reading class API.
+    """
+
+    def __init__(self, filename, sample_rate=None, center_freq=None, start_time=None):
+        """Initialize the CSVReader.
+
+        Args:
+            filename (str): path of the .csv recording.
+            sample_rate (float): sample rate of the recording.
+            center_freq (float, optional): center frequency of the recording.
+            start_time (float, optional): overrides the first timestamp.
+        """
+        super().__init__(filename)
+        if sample_rate is None:
+            raise ValueError(
+                f"No sample_rate for {filename}: CSV recordings carry no metadata."
+            )
+        self.sample_rate = sample_rate
+        self.center_freq = center_freq
+        size = os.path.getsize(filename)
+        self._mmap = (
+            np.memmap(filename, dtype=np.uint8, mode="r")
+            if size
+            else np.empty(0, dtype=np.uint8)
+        )
+        # byte offset and first sample index of every block, plus the end
+        self._offsets, self._starts = self._index()
+        self.start_time = start_time if start_time is not None else self._first_time()
+        self.metadata = {"sample_rate": sample_rate, "center_freq": center_freq}
+        self._cache = (None, None)
+
+    def _index(self):
+        """Splits the file into line aligned blocks and counts their rows."""
+        data = self._mmap
+        offsets = [0]
+        starts = [0]
+        while offsets[-1] < len(data):
+            begin = offsets[-1]
+            end = min(begin + BLOCK_SIZE, len(data))
+            if end < len(data):
+                newline = np.flatnonzero(data[end : end + 1024 * 1024] == ord("\n"))
+                while not len(newline) and end < len(data):
+                    end += 1024 * 1024
+                    newline = np.flatnonzero(data[end : end + 1024 * 1024] == ord("\n"))
+                if len(newline):
+                    end = min(end + int(newline[0]) + 1, len(data))
+                else:
+                    end = len(data)
+            block = data[begin:end]
+            line_ends = np.flatnonzero(block == ord("\n"))
+            line_starts = np.concatenate(([0], line_ends + 1))
+            line_starts = line_starts[line_starts < len(block)]
+            headers = np.count_nonzero(block[line_starts] == CSV_HEADER[0])
+            blank = np.count_nonzero(block[line_starts] == ord("\n"))
+            offsets.append(end)
+            starts.append(starts[-1] + len(line_starts) - headers - blank)
+        return np.array(offsets, dtype=np.int64), np.array(starts, dtype=np.int64)
+
+    def _first_time(self):
+        """Parses the timestamp of the first data row."""
+        head = bytes(self._mmap[: 64 * 1024]).replace(CSV_HEADER, b"")
+        for line in head.split(b"\n"):
+            fields = line.strip().split(b",")
+            if len(fields) == 3:
+                parsed = datetime.strptime(fields[2].decode(), _TIMESTAMP_FORMAT)
+                return parsed.replace(tzinfo=timezone.utc).timestamp()
+        return 0.0
+
+    @property
+    def num_samples(self):
+        """int: number of samples in the recording."""
+        return int(self._starts[-1])
+
+    def _block(self, index):
+        """Parses one block, keeping the last one for sequential reads."""
+        if self._cache[0] != index:
+            data = bytes(self._mmap[self._offsets[index] : self._offsets[index + 1]])
+            self._cache = (index, parse_csv_rows(data))
+        return self._cache[1]
+
+    def _read(self, start, stop):
+        first = int(np.searchsorted(self._starts, start, side="right")) - 1
+        last = int(np.searchsorted(self._starts, stop, side="left"))
+        parts = [self._block(index) for index in range(first, last)]
+        samples = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        offset = start - self._starts[first]
+        return samples[offset : offset + stop - start]
+
+    def close(self):
+        """Releases the memory map."""
+        self._mmap = np.empty(0, dtype=np.uint8)
+        self._cache = (None, None)
@@ -0,0 +1,256 @@
+"""
+Module for reading HDF5 recordings written by `HDF5Recorder`.
+
+Both recorder layouts are supported. For the streaming layout the byte offset
+of every chunk of the `iq` dataset is looked up once and the file is
+memory-mapped, so slices inside a chunk are zero-copy views and slices
+spanning chunks only copy the requested samples. Compressed or filtered
+datasets, and the split real/imag layout, are sliced through h5py instead,
+which still only reads the requested range.
+
+Wall clock times are mapped to sample indexes through the per batch
+`batch_start_time` / `batch_offset` tables of the streaming layout, or through
+the per sample timestamp strings of the split layout, which are binary
+searched and sliced in the file instead of loaded. The `discontinuities`
+table of the streaming layout is loaded as the reader's markers.
+"""
+
+import bisect
+from datetime import datetime, timezone
+import h5py
+import numpy as np
+from sdrcap.iq import cu8_to_complex64
+from sdrcap.recorders.hdf5_recorder import GROUP_NAME
+from .reader import Reader, _floor_index
+
+_TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def _parse_timestamp(value):
+    """Converts a split layout timestamp string to epoch seconds."""
+    if isinstance(value, bytes):
+        value = value.decode()
+    parsed = datetime.strptime(value, _TIMESTAMP_FORMAT)
+    return parsed.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _parse_timestamps(values):
+    """Converts an array of split layout timestamp strings to epoch seconds."""
+    text = np.char.replace(np.asarray(values).astype("U26"), " ", "T")
+    return text.astype("datetime64[us]").astype(np.int64) / 1_000_000
+
+
+def _format_timestamp(timestamp):
+    """Converts epoch seconds to a split layout timestamp string."""
+    formatted = datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        _TIMESTAMP_FORMAT
+    )
+    return formatted.encode()
+
+
+def _chunk_offsets(dataset):
+    """Looks up the file offset of every chunk of an unfiltered dataset.
+
+    Args:
+        dataset (h5py.Dataset): 1D dataset.
+
+    Returns:
+        tuple or None: (int elements per chunk, numpy.ndarray byte offsets),
+        or None when the dataset can not be memory-mapped.
+    """
+    if dataset.compression is not None or dataset.shape[0] == 0:
+        return None
+    if dataset.chunks is None:
+        offset = dataset.id.get_offset()
+        if offset is None:
+            return None
+        return dataset.shape[0], np.array([offset], dtype=np.int64)
+
+    chunk_len = dataset.chunks[0]
+    num_chunks = -(-dataset.shape[0] // chunk_len)
+    if dataset.id.get_num_chunks() != num_chunks:
+        return None
+    offsets = np.empty(num_chunks, dtype=np.int64)
+    for index in range(num_chunks):
+        info = dataset.id.get_chunk_info(index)
+        if info.filter_mask:
+            return None
+        offsets[info.chunk_offset[0] // chunk_len] = info.byte_offset
+    return chunk_len, offsets
+
+
+class HDF5Reader(Reader):
+    """Class to read HDF5 recordings of either `HDF5Recorder` layout.
+
+    Args:
+        Reader (ABC): inherited Reading class API.
+    """
+
+    def __init__(self, filename):
+        """Initialize the HDF5Reader.
+
+        Args:
+            filename (str): path of the HDF5 recording.
+        """
+        super().__init__(filename)
+        self._file = h5py.File(filename, "r")
+        group = self._file[GROUP_NAME]
+        self.metadata = dict(group.attrs)
+        self.sample_rate = self.metadata.get("sample_rate")
+        self.center_freq = self.metadata.get("center_freq")
+        self.streaming = self.metadata.get("layout") == "stream"
+        self._mmap = None
+        self._chunks = None
+
+        if self.streaming:
+            self._iq = group["iq"]
+            self._batch_start = group["batch_start_time"][:]
+            self._batch_offset = group["batch_offset"][:]
+            self.start_time = (
+                float(self._batch_start[0])
+                if len(self._batch_start)
+                else self.metadata.get("start_recording_time", 0.0)
+            )
+            if "discontinuities" in group:
+                self.discontinuities = [
+                    {
+                        "offset": int(offset),
+                        "time": float(self.sample_time(offset)),
+                        "lost_samples": int(lost),
+                    }
+                    for offset, lost in group["discontinuities"][:]
+                ]
+            self._chunks = _chunk_offsets(self._iq)
+            if self._chunks is not None:
+                self._mmap = np.memmap(filename, dtype=np.uint8, mode="r")
+        else:
+            self._real = group["real"]
+            self._imag = group["imag"]
+            self._timestamp_data = group["timestamps"]
+            self.start_time = (
+                _parse_timestamp(self._timestamp_data[0])
+                if len(self._timestamp_data)
+                else 0.0
+            )
+
+    @property
+    def num_samples(self):
+        """int: number of samples in the recording."""
+        if not self.streaming:
+            return self._real.shape[0]
+        if self._iq.dtype == np.uint8:
+            return self._iq.shape[0] // 2
+        return self._iq.shape[0]
+
+    def stored(self, start=0, stop=None):
+        """Returns a sample range of the streaming layout in its storage type.
+
+        Ranges inside one chunk are zero-copy views of the memory-mapped file.
+
+        Args:
+            start (int, optional): index of the first sample. Defaults to 0.
+            stop (int, optional): index after the last sample. Defaults to the
+              end of the recording.
+
+        Returns:
+            numpy.ndarray: complex64 samples, or uint8 bytes (two per sample)
+            for raw recordings.
+        """
+        if not self.streaming:
+            raise ValueError("Stored samples are only available in the stream layout.")
+        start, stop, _ = slice(start, stop).indices(self.num_samples)
+        stop = max(start, stop)
+        if self._iq.dtype == np.uint8:
+            start, stop = 2 * start, 2 * stop
+        if self._chunks is None or stop == start:
+            return self._iq[start:stop]
+
+        chunk_len, offsets = self._chunks
+        itemsize = self._iq.dtype.itemsize
+        parts = []
+        for chunk in range(start // chunk_len, (stop - 1) // chunk_len + 1):
+            low = max(start, chunk * chunk_len) - chunk * chunk_len
+            high = min(stop, (chunk + 1) * chunk_len) - chunk * chunk_len
+            base = offsets[chunk]
+            part = self._mmap[base + low * itemsize : base + high * itemsize]
+            parts.append(part.view(self._iq.dtype))
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def _read(self, start, stop):
+        if not self.streaming:
+            samples = np.empty(stop - start, dtype=np.complex64)
+            samples.real = self._real[start:stop]
+            samples.imag = self._imag[start:stop]
+            return samples
+        stored = self.stored(start, stop)
+        if stored.dtype == np.uint8:
+            return cu8_to_complex64(stored)
+        return stored
+
+
+    def sample_index(self, timestamp):
+        """Maps a wall clock time to the index of the sample taken at that time.
+
+        Args:
+            timestamp (float): epoch time in seconds.
+
+        Returns:
+            int: sample index clipped to [0, num_samples].
+        """
+        if not self.streaming:
+            # binary search reading single stamps, never the whole dataset
+            return bisect.bisect_left(
+                self._timestamp_data, _format_timestamp(timestamp)
+            )
+        batch = int(np.searchsorted(self._batch_start, timestamp, side="right")) - 1
+        if batch < 0:
+            return 0
+        batch_offset = int(self._batch_offset[batch])
+        next_offset = (
+            int(self._batch_offset[batch + 1])
+            if batch + 1 < len(self._batch_offset)
+            else self.num_samples
+        )
+        index = batch_offset + _floor_index(
+            (timestamp - self._batch_start[batch]) * self.sample_rate
+        )
+        return min(max(index, batch_offset), next_offset)
+
+    def sample_time(self, index):
+        """Maps sample indexes to wall clock times.
+
+        Args:
+            index (int or numpy.ndarray): sample indexes.
+
+        Returns:
+            float or numpy.ndarray: epoch times in seconds.
+        """
+        if not self.streaming:
+            # indexes past the last stamp, like the stop of a range, extrapolate
+            index = np.asarray(index)
+            last = self.num_samples - 1
+            clipped = np.minimum(index, last)
+            after = np.maximum(index - last, 0) / self.sample_rate
+            if np.ndim(index) == 0:
+                stamp = self._timestamp_data[int(clipped)]
+                return _parse_timestamp(stamp) + float(after)
+            if index.size == 0:
+                return np.empty(index.shape)
+            # only the stamps spanned by the requested indexes are read
+            low = int(clipped.min())
+            stamps = self._timestamp_data[low : int(clipped.max()) + 1][clipped - low]
+            return _parse_timestamps(stamps) + after
+        index = np.asarray(index)
+        batch = np.searchsorted(self._batch_offset, index, side="right") - 1
+        batch = np.clip(batch, 0, len(self._batch_offset) - 1)
+        return (
+            self._batch_start[batch]
+            + (index - self._batch_offset[batch]) / self.sample_rate
+        )
+
+    def close(self):
+        """Releases the memory map and closes the HDF5 file."""
+        self._mmap = None
+        self._chunks = None
+        if self._file:
+            self._file.close()
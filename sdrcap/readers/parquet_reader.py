@@ -0,0 +1,65 @@
+"""
+Module for reading Parquet recordings written by `ParquetRecorder`.
+
+Sample ranges are read row group by row group, so only the covered groups
+are decoded. Needs the optional `pyarrow` package.
+"""
+
+import json
+import numpy as np
+from sdrcap.recorders.parquet_recorder import METADATA_KEY, import_pyarrow
+from .reader import Reader
+
+
+class ParquetReader(Reader):
+    """Class to read Parquet recordings through their row groups.
+
+    Args:
+        Reader (ABC): inherited Reading class API.
+    """
+
+    def __init__(self, filename, sample_rate=None):
+        """Initialize the ParquetReader.
+
+        Args:
+            filename (str): path of the .parquet recording.
+            sample_rate (float, optional): overrides the stored sample rate.
+        """
+        super().__init__(filename)
+        _, pq = import_pyarrow()
+        self._file = pq.ParquetFile(filename)
+        stored = (self._file.schema_arrow.metadata or {}).get(METADATA_KEY)
+        self.metadata = json.loads(stored) if stored else {}
+        self.sample_rate = sample_rate or self.metadata.get("sample_rate")
+        self.center_freq = self.metadata.get("center_freq")
+        self.start_time = self.metadata.get("start_time", 0.0)
+        if self.sample_rate is None:
+            raise ValueError(f"No sample_rate for {filename}: missing sdrcap metadata.")
+        row_groups = self._file.metadata
+        rows = [
+            row_groups.row_group(index).num_rows
+            for index in range(row_groups.num_row_groups)
+        ]
+        # first sample index of every row group, plus the end
+        self._starts = np.concatenate(([0], np.cumsum(rows))).astype(np.int64)
+
+    @property
+    def num_samples(self):
+        """int: number of samples in the recording."""
+        return int(self._starts[-1])
+
+    def _read(self, start, stop):
+        first = int(np.searchsorted(self._starts, start, side="right")) - 1
+        last = int(np.searchsorted(self._starts, stop, side="left"))
+        table = self._file.read_row_groups(
+            list(range(first, last)), columns=["real", "imag"]
+        )
+        samples = np.empty(table.num_rows, dtype=np.complex64)
+        samples.real = table.column("real").to_numpy()
+        samples.imag = table.column("imag").to_numpy()
+        offset = start - self._starts[first]
+        return samples[offset : offset + stop - start]
+
+    def close(self):
+        """Closes the file."""
+        self._file.close()
@@ -0,0 +1,76 @@
+"""
+Module for reading raw 8-bit IQ (.cu8) recordings.
+
+The recording is memory-mapped as interleaved uint8 bytes, so opening a
+multi-GB capture costs nothing and only the requested samples are paged in
+and converted to complex64 through the `sdrcap.iq` lookup table. Recording
+parameters come from the JSON metadata sidecar written by `RawIQRecorder`.
+"""
+
+import os
+import numpy as np
+from sdrcap.iq import cu8_to_complex64
+from sdrcap.recorders.raw_recorder import metadata_filename, read_metadata
+from .reader import Reader
+
+
+class RawIQReader(Reader):
+    """Class to read raw interleaved uint8 IQ recordings through a memory map.
+
+    Args:
+        Reader (ABC): inherited Reading class API.
+    """
+
+    def __init__(self, filename, sample_rate=None, center_freq=None, start_time=None):
+        """Initialize the RawIQReader.
+
+        Args:
+            filename (str): path of the .cu8 recording.
+            sample_rate (float, optional): overrides the sidecar sample rate,
+              required when the recording has no sidecar.
+            center_freq (float, optional): overrides the sidecar center frequency.
+            start_time (float, optional): overrides the sidecar start time.
+        """
+        super().__init__(filename)
+        if os.path.isfile(metadata_filename(filename)):
+            self.metadata = read_metadata(filename)
+        self.sample_rate = sample_rate or self.metadata.get("sample_rate")
+        self.center_freq = center_freq or self.metadata.get("center_freq")
+        self.start_time = start_time or self.metadata.get("start_time", 0.0)
+        self.discontinuities = self.metadata.get("discontinuities", [])
+        if self.sample_rate is None:
+            raise ValueError(
+                f"No sample_rate for {filename}: missing metadata sidecar."
+            )
+        size = os.path.getsize(filename) // 2 * 2
+        self._raw = (
+            np.memmap(filename, dtype=np.uint8, mode="r", shape=(size,))
+            if size
+            else np.empty(0, dtype=np.uint8)
+        )
+
+    @property
+    def num_samples(self):
+        """int: number of samples in the recording."""
+        return len(self._raw) // 2
+
+    def raw(self, start=0, stop=None):
+        """Returns a zero-copy memory-mapped view of the interleaved IQ bytes.
+
+        Args:
+            start (int, optional): index of the first sample. Defaults to 0.
+            stop (int, optional): index after the last sample. Defaults to the
+              end of the recording.
+
+        Returns:
+            numpy.memmap: uint8 bytes, two per sample.
+        """
+        start, stop, _ = slice(start, stop).indices(self.num_samples)
+        return self._raw[2 * start : 2 * max(start, stop)]
+
+    def _read(self, start, stop):
+        return cu8_to_complex64(self._raw[2 * start : 2 * stop])
+
+    def close(self):
+        """Releases the memory map."""
+        self._raw = np.empty(0, dtype=np.uint8)
@@ -0,0 +1,183 @@
+""" Reading interface for each sdrcap recording
+    regardless of filetype
+"""
+
+from abc import ABC, abstractmethod
+import numpy as np
+from sdrcap.overview import DEFAULT_MAX_ROWS, read_overview
+
+
+def _floor_index(position):
+    """Floors a fractional sample position, tolerating float rounding error."""
+    return int(np.floor(position + 1e-3))
+
+
+class Reader(ABC):
+    """Abstract class defining methods for each file reader to implement
+
+    Readers never load a whole recording. Slicing with `reader[start:stop]`,
+    `read`, `time_slice` and `iter_chunks` only touch the requested part of
+    the file and return complex64 samples.
+
+    Attributes:
+        filename (str): path of the recording.
+        sample_rate (float): sample rate of the recording.
+        center_freq (float): center frequency of the recording.
+        start_time (float): epoch time of the first sample.
+        metadata (dict): every recording parameter found in the file.
+        discontinuities (list): markers of the samples lost while recording,
+            each with the `offset` and `time` of the first sample after the
+            gap, see `sdrcap.clock.CaptureClock`.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.metadata = {}
+        self.sample_rate = None
+        self.center_freq = None
+        self.start_time = None
+        self.discontinuities = []
+
+    @property
+    @abstractmethod
+    def num_samples(self):
+        """int: number of samples in the recording."""
+
+    @abstractmethod
+    def _read(self, start, stop):
+        """Reads samples `start` to `stop`, both already clipped to the recording.
+
+        Returns:
+            numpy.ndarray: complex64 samples.
+        """
+
+    def close(self):
+        """Releases the file handles held by the reader."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.num_samples
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.num_samples)
+            if step != 1:
+                if step < 0:
+                    return self.read(stop + 1, start + 1)[::step]
+                return self.read(start, stop)[::step]
+            return self.read(start, stop)
+        if index < 0:
+            index += self.num_samples
+        if not 0 <= index < self.num_samples:
+            raise IndexError(f"Sample index {index} out of range.")
+        return self.read(index, index + 1)[0]
+
+    def read(self, start=0, stop=None):
+        """Reads a sample range of the recording.
+
+        Args:
+            start (int, optional): index of the first sample. Defaults to 0.
+            stop (int, optional): index after the last sample. Defaults to the
+              end of the recording.
+
+        Returns:
+            numpy.ndarray: complex64 samples.
+        """
+        start, stop, _ = slice(start, stop).indices(self.num_samples)
+        if stop <= start:
+            return np.empty(0, dtype=np.complex64)
+        return self._read(start, stop)
+
+    def _anchors(self):
+        """Returns the offsets and times every gap free stretch starts at."""
+        offsets = [0] + [marker["offset"] for marker in self.discontinuities]
+        times = [self.start_time] + [marker["time"] for marker in self.discontinuities]
+        return np.array(offsets, dtype=np.int64), np.array(times, dtype=np.float64)
+
+    def sample_index(self, timestamp):
+        """Maps a wall clock time to the index of the sample taken at that time.
+
+        Times inside a gap map to the first sample after it.
+
+        Args:
+            timestamp (float): epoch time in seconds.
+
+        Returns:
+            int: sample index clipped to [0, num_samples].
+        """
+        if not self.discontinuities:
+            index = _floor_index((timestamp - self.start_time) * self.sample_rate)
+            return min(max(index, 0), self.num_samples)
+        offsets, times = self._anchors()
+        stretch = int(np.searchsorted(times, timestamp, side="right")) - 1
+        if stretch < 0:
+            return 0
+        stop = offsets[stretch + 1] if stretch + 1 < len(offsets) else self.num_samples
+        index = offsets[stretch] + _floor_index(
+            (timestamp - times[stretch]) * self.sample_rate
+        )
+        return int(min(max(index, offsets[stretch]), stop))
+
+    def sample_time(self, index):
+        """Maps sample indexes to wall clock times.
+
+        Args:
+            index (int or numpy.ndarray): sample indexes.
+
+        Returns:
+            float or numpy.ndarray: epoch times in seconds.
+        """
+        if not self.discontinuities:
+            return self.start_time + np.asarray(index) / self.sample_rate
+        offsets, times = self._anchors()
+        index = np.asarray(index)
+        stretch = np.maximum(np.searchsorted(offsets, index, side="right") - 1, 0)
+        return times[stretch] + (index - offsets[stretch]) / self.sample_rate
+
+    def time_slice(self, start_time, stop_time):
+        """Reads the samples taken between two wall clock times.
+
+        Args:
+            start_time (float): epoch time of the first sample in seconds.
+            stop_time (float): epoch time after the last sample in seconds.
+
+        Returns:
+            numpy.ndarray: complex64 samples.
+        """
+        return self.read(self.sample_index(start_time), self.sample_index(stop_time))
+
+    def overview(self, level=None, max_rows=DEFAULT_MAX_ROWS):
+        """Reads the overview written alongside the recording.
+
+        Args:
+            level (int, optional): level to read. Defaults to the finest
+              level with at most `max_rows` rows.
+            max_rows (int, optional): row budget used to pick the level.
+
+        Returns:
+            dict: see `sdrcap.overview.read_overview`.
+        """
+        return read_overview(self.filename, level, max_rows)
+
+    def iter_chunks(self, chunk_size, start=0, stop=None):
+        """Iterates over a sample range in fixed size chunks.
+
+        Args:
+            chunk_size (int): samples per chunk, the last chunk may be shorter.
+            start (int, optional): index of the first sample. Defaults to 0.
+            stop (int, optional): index after the last sample. Defaults to the
+              end of the recording.
+
+        Yields:
+            tuple: (int offset of the chunk, numpy.ndarray complex64 samples)
+        """
+        if chunk_size < 1:
+            raise ValueError(f"Invalid chunk_size: {chunk_size}. Must be >= 1.")
+        start, stop, _ = slice(start, stop).indices(self.num_samples)
+        for offset in range(start, stop, chunk_size):
+            yield offset, self._read(offset, min(offset + chunk_size, stop))
@@ -0,0 +1,357 @@
+"""
+Module for recording compressed sample chunks (.sdrz).
+
+Every batch is encoded to a sample format (see `sdrcap.codecs`), split into
+chunks and compressed on a thread pool, so `save` returns as soon as the
+chunks are queued and compression scales across cores instead of stalling
+the capture loop. Finished chunks are appended in order as frames:
+
+    >IIf header: compressed length, raw length in bytes, sample scale
+    compressed bytes
+
+A JSON sidecar (`<file>.sdrz.json`) holds the codec, sample format and the
+recording parameters, plus the compression stats once the recording stops.
+Frames are independent, so `sdrcap.readers.CompressedReader` reads any
+sample range by decompressing only the frames it covers, and a crash only
+loses the chunks still being compressed. Saving to an existing file appends
+to it: the frame and sample counts and the start time carry on from the
+file and its sidecar, and a discontinuity marker records the gap between
+the two recordings.
+
+With an `encryption_key` every compressed chunk is also encrypted with
+AES-GCM on the compression threads (see `sdrcap.encryption`). The chunk
+number is the nonce and the raw length and scale of the header are
+authenticated, so frames stay randomly readable but cannot be modified or
+reordered unnoticed. The header length is then the encrypted length and
+the sidecar holds the salt and key check value under "encryption". Appending
+to an encrypted file needs its key and keeps its salt and frame numbering.
+"""
+
+import json
+import os
+import struct
+from collections import deque
+from datetime import datetime, timezone
+import numpy as np
+from sdrcap import __version__
+from sdrcap.codecs import ChunkCompressor, SAMPLE_FORMATS, encode_samples, get_codec
+from sdrcap.encryption import ChunkCipher
+from .raw_recorder import _clock_timing, metadata_filename, read_metadata
+from .recorder import Recorder
+
+FRAME_HEADER = struct.Struct(">IIf")
+# header fields authenticated with encrypted frames
+FRAME_AAD = struct.Struct(">If")
+
+
+def frame_associated_data(raw_length, scale):
+    """Returns the cleartext authenticated with an encrypted frame."""
+    return FRAME_AAD.pack(raw_length, scale)
+
+
+class CompressedRecorder(Recorder):
+    """Class to record compressed sample chunks with a metadata sidecar.
+
+    Args:
+        Recorder (ABC): inherited Recording class API.
+    """
+
+    def __init__(self, center_freq, sample_rate, freq_correction, gain, **codec_options):
+        """Initialize the CompressedRecorder.
+
+        Args:
+            center_freq (float): center frequency used for recording.
+            sample_rate (float): sample rate at which data is recorded.
+            freq_correction (float): frequency correction in ppm.
+            gain (float or str): gain setting used for recording.
+            **codec_options: `codec` (str, default "zlib"), `level` (int,
+              default: the codec's), `sample_format` (str, default "cu8"),
+              `chunk_size` (int, default 262144) samples per compressed
+              chunk, `workers` (int, default: CPU count) compression threads
+              and `max_pending` (int, default 4 per worker) chunks queued
+              before `save` waits for the oldest. `encryption_key` (bytes or
+              hex str, default None) encrypts every chunk, see
+              `sdrcap.encryption`.
+        """
+        super().__init__()
+        self.center_freq = center_freq
+        self.sample_rate = sample_rate
+        self.freq_correction = freq_correction
+        self.gain = gain
+        self.sample_format = codec_options.get("sample_format", "cu8")
+        if self.sample_format not in SAMPLE_FORMATS:
+            raise ValueError(
+                f"Invalid sample format: {self.sample_format}. "
+                f"Must be one of {tuple(SAMPLE_FORMATS)}."
+            )
+        self.chunk_size = codec_options.get("chunk_size", 1024 * 256)
+        if self.chunk_size < 1:
+            raise ValueError(f"Invalid chunk_size: {self.chunk_size}. Must be >= 1.")
+        self.codec = get_codec(codec_options.get("codec", "zlib"), codec_options.get("level"))
+        self.compressor = ChunkCompressor(self.codec, codec_options.get("workers"))
+        self.max_pending = codec_options.get("max_pending") or 4 * self.compressor.workers
+        self.encryption_key = codec_options.get("encryption_key")
+        if self.encryption_key is not None:
+            ChunkCipher(self.encryption_key)  # validate early
+        self._cipher = None
+        self._pending = deque()
+        self._file = None
+        self._filename = None
+        self._num_samples = 0
+        self._num_frames = 0
+        self._timings = {}
+
+    @classmethod
+    def from_options(cls, options):
+        """Creates the recorder from recording options, see `Recorder.from_options`."""
+        return cls(
+            center_freq=options["center_freq"],
+            sample_rate=options["sample_rate"],
+            freq_correction=options["freq_correction"],
+            gain=options["gain"],
+            codec=options["codec"],
+            level=options["codec_level"],
+            sample_format=options["sample_format"],
+            chunk_size=options["sample_window"],
+            workers=options["compression_workers"],
+            encryption_key=options.get("encryption_key"),
+        )
+
+    @property
+    def raw_input(self):
+        """bool: whether batches are stored as the raw uint8 IQ bytes."""
+        return self.sample_format == "cu8"
+
+    def start_recording(self, start_recording_time):
+        """Capture the recording start time.
+
+        Args:
+            start_recording_time (float): time that the hardware interface
+            started the recording.
+        """
+        self.start_recording_time = start_recording_time
+
+    def stop_recording(self, stop_recording_time):
+        """Writes the queued chunks, finalizes the sidecar and closes the file.
+
+        Args:
+            stop_recording_time (float): time that the hardware interface
+            stopped the recording.
+        """
+        self.stop_recording_time = stop_recording_time
+        self.close()
+
+    def close(self):
+        """Writes the queued chunks and closes the open file."""
+        if self._file is None:
+            return
+        self._write_ready(wait=True)
+        self._file.close()
+        self._file = None
+        self._write_metadata()
+
+    @property
+    def stats(self):
+        """dict: compression stats, see `sdrcap.codecs.ChunkCompressor.stats`."""
+        return {**self.compressor.stats, "pending": len(self._pending)}
+
+    def metadata(self):
+        """Builds the metadata sidecar content of the open recording.
+
+        Returns:
+            dict: recording metadata.
+        """
+        timing = self._timings.get(self._filename, {})
+        start_time = timing.get("start_time", self.start_recording_time)
+        if start_time is None:
+            start_time = os.path.getmtime(self._filename)
+        metadata = {
+            **self.attributes,
+            **timing,
+            "datatype": "sdrz",
+            "codec": self.codec.name,
+            "codec_level": self.codec.level,
+            "sample_format": self.sample_format,
+            "center_freq": self.center_freq,
+            "sample_rate": self.sample_rate,
+            "gain": self.gain,
+            "freq_correction": self.freq_correction,
+            "start_time": start_time,
+            "start_time_iso": datetime.fromtimestamp(start_time, timezone.utc).isoformat(),
+            "stop_time": self.stop_recording_time,
+            "num_samples": self._num_samples,
+            "compression": self.compressor.stats,
+            "sdrcap_version": __version__,
+        }
+        if self._cipher is not None:
+            metadata["encryption"] = self._cipher.metadata()
+        return metadata
+
+    def _write_metadata(self):
+        with open(metadata_filename(self._filename), "w", encoding="utf-8") as meta_file:
+            json.dump(self.metadata(), meta_file, indent=2)
+
+    def save(self, samples, filename):
+        """Queues a batch for compression and appends the finished chunks.
+
+        Args:
+            samples (numpy.ndarray): interleaved uint8 IQ bytes or complex IQ
+              values.
+            filename (str): path of the .sdrz file.
+        """
+        resumed = False
+        if filename != self._filename:
+            self.close()
+            self._filename = filename
+            self._num_samples = 0
+            self._num_frames = 0
+            if self.encryption_key is not None:
+                # a new salt, and so file key, per file keeps nonces unique
+                self._cipher = ChunkCipher(self.encryption_key)
+            resumed = self._resume(filename)
+        if resumed:
+            self._timings[filename]["discontinuities"].append(
+                self._resume_marker(self._timings[filename])
+            )
+        else:
+            _clock_timing(self, self._timings, filename, self._num_samples)
+        if self._file is None:
+            self._file = open(filename, "ab")  # pylint: disable=consider-using-with
+            self._write_metadata()
+        data, scale = encode_samples(samples, self.sample_format)
+        chunk_bytes = self.chunk_size * SAMPLE_FORMATS[self.sample_format]
+        for begin in range(0, len(data), chunk_bytes):
+            chunk = data[begin : begin + chunk_bytes]
+            future = self.compressor.submit(
+                chunk,
+                self._cipher,
+                self._num_frames,
+                frame_associated_data(len(chunk), scale),
+            )
+            self._pending.append((future, len(chunk), scale))
+            self._num_frames += 1
+        self._num_samples += len(data) // SAMPLE_FORMATS[self.sample_format]
+        self._write_ready(wait=False)
+
+    def _resume(self, filename):
+        """Continues the frame and sample count of an existing recording.
+
+        The file is cut back to its last complete frame, and the start time,
+        markers and encryption salt of its sidecar are kept.
+
+        Args:
+            filename (str): path of the .sdrz file.
+
+        Returns:
+            bool: whether the file already held frames.
+        """
+        if not os.path.exists(filename):
+            return False
+        frames = list(iter_frames(filename))
+        end = frames[-1][0] + frames[-1][1] if frames else 0
+        if os.path.getsize(filename) > end:
+            os.truncate(filename, end)
+        if not frames:
+            return False
+        metadata = {}
+        if os.path.exists(metadata_filename(filename)):
+            metadata = read_metadata(filename)
+        for key, value in (
+            ("sample_format", self.sample_format),
+            ("codec", self.codec.name),
+        ):
+            if metadata.get(key, value) != value:
+                raise ValueError(
+                    f"Invalid {key}: {value}. Must be {metadata[key]} to append "
+                    f"to {filename}."
+                )
+        if "encryption" in metadata:
+            if self.encryption_key is None:
+                raise ValueError(f"Invalid key: None. {filename} is encrypted.")
+            # the file key of the earlier frames, their numbering carries on
+            self._cipher = ChunkCipher.from_metadata(
+                self.encryption_key, metadata["encryption"]
+            )
+        elif self.encryption_key is not None:
+            raise ValueError(
+                f"Invalid encryption_key: {filename} is not encrypted, "
+                "its frames cannot be appended to encrypted."
+            )
+        self._num_frames = len(frames)
+        self._num_samples = sum(frame[2] for frame in frames) // SAMPLE_FORMATS[
+            self.sample_format
+        ]
+        start_time = metadata.get("start_time", self.start_recording_time)
+        if start_time is None:
+            start_time = os.path.getmtime(filename)
+        self._timings[filename] = {
+            "start_time": start_time,
+            "discontinuities": metadata.get("discontinuities", []),
+        }
+        return True
+
+    def _resume_marker(self, timing):
+        """Returns the marker of the gap between an earlier recording and this one.
+
+        Args:
+            timing (dict): start time and markers of the resumed recording.
+
+        Returns:
+            dict: see `Recorder.discontinuity`.
+        """
+        offset = self._num_samples
+        anchor_offset, anchor_time = 0, timing["start_time"]
+        if timing["discontinuities"]:
+            anchor_offset = timing["discontinuities"][-1]["offset"]
+            anchor_time = timing["discontinuities"][-1]["time"]
+        batch_time = self.clock()
+        expected = anchor_time + (offset - anchor_offset) / self.sample_rate
+        batch = getattr(self.clock, "batch", None)
+        return {
+            "offset": offset,
+            "sample_index": None if batch is None else batch["sample_index"],
+            "time": batch_time,
+            "lost_samples": max(round((batch_time - expected) * self.sample_rate), 0),
+        }
+
+    def _write_ready(self, wait):
+        """Appends finished chunks in order.
+
+        Args:
+            wait (bool): wait for every queued chunk, else only for those
+              beyond `max_pending`.
+        """
+        while self._pending and (
+            wait or self._pending[0][0].done() or len(self._pending) > self.max_pending
+        ):
+            future, raw_length, scale = self._pending.popleft()
+            compressed = future.result()
+            self._file.write(FRAME_HEADER.pack(len(compressed), raw_length, scale))
+            self._file.write(compressed)
+
+
+def iter_frames(filename):
+    """Iterates over the frame headers of a .sdrz file.
+
+    A truncated last frame, e.g. after a crash, is skipped.
+
+    Args:
+        filename (str): path of the .sdrz file.
+
+    Yields:
+        tuple: (payload file offset, compressed length, raw length, scale),
+        the compressed length including the tag of encrypted frames.
+    """
+    size = os.path.getsize(filename)
+    with open(filename, "rb") as in_file:
+        offset = 0
+        while offset + FRAME_HEADER.size <= size:
+            in_file.seek(offset)
+            compressed_length, raw_length, scale = FRAME_HEADER.unpack(
+                in_file.read(FRAME_HEADER.size)
+            )
+            payload = offset + FRAME_HEADER.size
+            if payload + compressed_length > size:
+                return
+            yield payload, compressed_length, raw_length, float(np.float32(scale))
+            offset = payload + compressed_length
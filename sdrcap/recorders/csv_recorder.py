@@ -2,31 +2,187 @@
 Module for handling CSV file operations for recording SDR data.
 
 This module provides an implementation of the `Recorder` base class specifically
-for saving SDR (Software-Defined Radio) data to CSV files. It includes methods 
-for starting and stopping recordings as well as saving recorded samples in CSV 
-format. The `CSVRecorder` class handles file creation, appending data, and 
+for saving SDR (Software-Defined Radio) data to CSV files. It includes methods
+for starting and stopping recordings as well as saving recorded samples in CSV
+format. The `CSVRecorder` class handles file creation, appending data, and
 formatting data appropriately for CSV storage.
 
+Batches are formatted as a whole with NumPy: each value is converted to fixed
+point ASCII digits in a padded byte matrix, the padding is stripped and the
+resulting buffer is written to the file in a single call. Per sample timestamps
+are derived from the batch start time plus `index / sample_rate`.
+
 Attributes:
-    - None: The class does not have additional attributes specific to CSV recording.
+    - sample_rate (float): Sample rate used to space the sample timestamps.
+    - precision (int): Number of digits written after the decimal point.
 
 Methods:
     - start_recording(start_recording_time): Captures the start time of the recording.
     - stop_recording(stop_recording_time): Captures the stop time of the recording.
-    - save(samples, filename): Saves the recorded samples to a CSV file, appending 
-      data to the file. The CSV file will contain columns for real and imaginary 
+    - save(samples, filename): Saves the recorded samples to a CSV file, appending
+      data to the file. The CSV file will contain columns for real and imaginary
       values along with timestamps.
 
 Usage:
-    This module is intended for use with SDR applications where recorded data 
-    needs to be saved in the CSV format for easy inspection and processing using 
+    This module is intended for use with SDR applications where recorded data
+    needs to be saved in the CSV format for easy inspection and processing using
     tools that handle CSV files.
 """
 
-import time
-from datetime import datetime
+import numpy as np
 from .recorder import Recorder
 
+CSV_HEADER = b"Real Value,Imaginary Value,TimeStamp\n"
+_PAD = 0  # filler byte removed from the formatted matrix before writing
+_TIMESTAMP_WIDTH = 26
+
+
+# ASCII digits of 0000-9999 packed as one little endian word per value, so a
+# single 1D gather emits four output bytes
+_DIGITS4 = np.array(
+    [int.from_bytes(f"{value:04d}".encode(), "little") for value in range(10_000)],
+    dtype="<u4",
+)
+
+
+def _put_digits(out, column, values, ndigits):
+    """Writes zero padded decimal digits of `values` into `out` columns.
+
+    Args:
+        out (numpy.ndarray): uint8 row matrix to fill in place.
+        column (int): first column of the digit field.
+        values (numpy.ndarray): non negative integers below 10**ndigits.
+        ndigits (int): width of the digit field.
+    """
+    while ndigits:
+        width = ndigits % 4 or 4
+        ndigits -= width
+        group = values // 10**ndigits if ndigits else values
+        if ndigits:
+            values = values - group * 10**ndigits
+        chars = _DIGITS4[group].view(np.uint8).reshape(-1, 4)
+        out[:, column : column + width] = chars[:, 4 - width :]
+        column += width
+
+
+def _fixed_width(values, precision):
+    """Scales `values` to integers and measures their integer digit count.
+
+    Args:
+        values (numpy.ndarray): 1D array of finite float values.
+        precision (int): number of digits after the decimal point.
+
+    Returns:
+        tuple: (numpy.ndarray of scaled magnitudes, int integer part width)
+    """
+    scaled = np.abs(values).astype(np.float64) * 10**precision
+    if scaled.max() >= 2**63:
+        raise ValueError(f"Sample values too large for precision {precision}.")
+    scaled = np.rint(scaled).astype(np.int64)
+    return scaled, len(str(int(scaled.max()) // 10**precision))
+
+
+def _put_fixed(out, column, values, scaled, int_width, precision):
+    """Writes `values` as fixed point ASCII into `out` columns.
+
+    The field is `1 + int_width (+ 1 + precision)` bytes wide. Unused sign and
+    leading zero positions are filled with `_PAD` so they can be stripped.
+    """
+    int_part, frac_part = np.divmod(scaled, 10**precision)
+    out[:, column] = np.where((values < 0) & (scaled != 0), ord("-"), _PAD)
+    _put_digits(out, column + 1, int_part, int_width)
+    for col in range(int_width - 1):
+        # blank leading zeros but always keep the units digit
+        blank = int_part < 10 ** (int_width - 1 - col)
+        out[blank, column + 1 + col] = _PAD
+    if precision:
+        out[:, column + 1 + int_width] = ord(".")
+        _put_digits(out, column + 2 + int_width, frac_part, precision)
+
+
+def _put_timestamps(out, column, batch_start_time, sample_rate):
+    """Writes UTC timestamps spaced `1 / sample_rate` apart into `out`.
+
+    Only the distinct whole seconds of the batch go through datetime
+    formatting, the microsecond digits are filled in arithmetically. The
+    field is "%Y-%m-%d %H:%M:%S.%f", `_TIMESTAMP_WIDTH` bytes wide.
+
+    Args:
+        out (numpy.ndarray): uint8 row matrix to fill in place.
+        column (int): first column of the timestamp field.
+        batch_start_time (float): epoch time of the first sample in seconds.
+        sample_rate (float): sample rate in samples per second.
+    """
+    start_us = round(batch_start_time * 1_000_000)
+    stamps_us = start_us + np.rint(
+        np.arange(len(out)) * (1_000_000 / sample_rate)
+    ).astype(np.int64)
+    seconds, micros = np.divmod(stamps_us, 1_000_000)
+    first_second = int(seconds[0])
+    prefixes = np.datetime_as_string(
+        np.arange(first_second, int(seconds[-1]) + 1).astype("datetime64[s]"),
+        unit="s",
+    )
+    prefixes = prefixes.astype("S19").view(np.uint8).reshape(-1, 19)
+    prefixes[:, 10] = ord(" ")
+
+    bounds = np.searchsorted(seconds, np.arange(first_second, int(seconds[-1]) + 2))
+    for prefix, begin, end in zip(prefixes, bounds[:-1], bounds[1:]):
+        out[begin:end, column : column + 19] = prefix
+    out[:, column + 19] = ord(".")
+    _put_digits(out, column + 20, micros, 6)
+
+
+def format_csv_rows(samples, batch_start_time, sample_rate, precision=6):
+    """Formats a batch of IQ samples as CSV rows in one vectorized pass.
+
+    Args:
+        samples (numpy.ndarray): array of In-phase and Quadrature raw values.
+        batch_start_time (float): epoch time of the first sample in seconds.
+        sample_rate (float): sample rate in samples per second.
+        precision (int, optional): digits after the decimal point. Defaults to 6.
+
+    Returns:
+        bytes: the encoded rows, newline terminated.
+    """
+    samples = np.asarray(samples)
+    if len(samples) == 0:
+        return b""
+    if not np.all(np.isfinite(samples)):
+        raise ValueError("CSVRecorder can only format finite sample values.")
+
+    real_scaled, real_width = _fixed_width(samples.real, precision)
+    imag_scaled, imag_width = _fixed_width(samples.imag, precision)
+    frac_width = precision + 1 if precision else 0
+    imag_column = 1 + real_width + frac_width + 1
+    time_column = imag_column + 1 + imag_width + frac_width + 1
+
+    rows = np.empty((len(samples), time_column + _TIMESTAMP_WIDTH + 1), np.uint8)
+    _put_fixed(rows, 0, samples.real, real_scaled, real_width, precision)
+    rows[:, imag_column - 1] = ord(",")
+    _put_fixed(rows, imag_column, samples.imag, imag_scaled, imag_width, precision)
+    rows[:, time_column - 1] = ord(",")
+    _put_timestamps(rows, time_column, batch_start_time, sample_rate)
+    rows[:, -1] = ord("\n")
+    return rows[rows != _PAD].tobytes()
+
+
+def format_timestamps(batch_start_time, num_samples, sample_rate):
+    """Formats UTC sample timestamps spaced `1 / sample_rate` apart.
+
+    Args:
+        batch_start_time (float): epoch time of the first sample in seconds.
+        num_samples (int): number of samples in the batch.
+        sample_rate (float): sample rate in samples per second.
+
+    Returns:
+        numpy.ndarray: "%Y-%m-%d %H:%M:%S.%f" timestamps as "S26" bytes.
+    """
+    stamps = np.empty((num_samples, _TIMESTAMP_WIDTH), np.uint8)
+    if num_samples:
+        _put_timestamps(stamps, 0, batch_start_time, sample_rate)
+    return stamps.view(f"S{_TIMESTAMP_WIDTH}").ravel()
+
 
 class CSVRecorder(Recorder):
     """Class to record cleartext amount of data into CSV files without
@@ -36,47 +192,62 @@ class CSVRecorder(Recorder):
         Recorder (ABC): inherited Recording class API.
     """
 
-    def __init__(self):
+    def __init__(self, sample_rate=2.4e6, precision=6):
         """
         Initialize the CSVRecorder.
+
+        Args:
+            sample_rate (float, optional): sample rate used to space the
+            sample timestamps. Defaults to 2.4e6.
+            precision (int, optional): digits written after the decimal
+            point of each value. Defaults to 6.
         """
         super().__init__()
+        if precision < 0:
+            raise ValueError(f"Invalid precision: {precision}. Must be >= 0.")
         self.start_recording_time = None
         self.stop_recording_time = None
+        self.sample_rate = sample_rate
+        self.precision = precision
+
+    @classmethod
+    def from_options(cls, options):
+        """Creates the recorder from recording options, see `Recorder.from_options`."""
+        return cls(sample_rate=options["sample_rate"])
 
     def start_recording(self, start_recording_time):
-        """Capture the recording stop time.
+        """Capture the recording start time.
 
         Args:
-            stop_recording_time (float): time that the hardware interface
-            stopped the recording.
+            start_recording_time (float): time that the hardware interface
+            started the recording.
         """
         self.start_recording_time = start_recording_time
 
     def stop_recording(self, stop_recording_time):
-        """Capture the recording start time.
+        """Capture the recording stop time.
 
         Args:
-            start_recording_time (float): time that the hardware interface
-            started the recording.
+            stop_recording_time (float): time that the hardware interface
+            stopped the recording.
         """
         self.stop_recording_time = stop_recording_time
 
     def save(self, samples, filename):
         """CSV saving implementation for file.
 
+        The header is only written when the file is created, so consecutive
+        batches append to a single well formed table.
+
         Args:
             samples (numpy.ndarray): array of In-phase and Quadrature raw values.
             filename (str): name of the file without extension to save as
         """
-        batch_start_time = time.time()
-        with open(filename, "a", encoding="utf-8") as out_file:
-            out_file.write("Real Value,Imaginary Value,TimeStamp\n")
-            for _, sample in enumerate(samples):
-                current_time = time.time()
-                timestamp_seconds = current_time - batch_start_time
-                timestamp = datetime.utcfromtimestamp(current_time).strftime(
-                    "%Y-%m-%d %H:%M:%S."
-                )
-                timestamp += f"{int((timestamp_seconds % 1) * 1_000_000):06d}"
-                out_file.write(f"{sample.real},{sample.imag},{timestamp}\n")
+        batch_start_time = self.clock()
+        rows = format_csv_rows(
+            samples, batch_start_time, self.sample_rate, self.precision
+        )
+        with open(filename, "ab") as out_file:
+            if out_file.tell() == 0:
+                rows = CSV_HEADER + rows
+            out_file.write(rows)
@@ -7,11 +7,31 @@ for starting and stopping recordings as well as saving recorded samples in HDF5
 format. The `HDF5Recorder` class handles file creation, appending data, and 
 managing metadata related to the recording process.
 
+Two layouts are supported. The default layout stores split float64 `real` and
+`imag` datasets with a string timestamp per sample, spaced `1 / sample_rate`
+apart, reopening the file for every batch. The streaming layout keeps the
+file open from the first `save` until `stop_recording` and appends to a
+single chunked `iq` dataset of complex64 (or raw interleaved uint8) samples.
+Instead of per sample timestamp strings it records one `batch_start_time` and
+`batch_offset` (index of the first sample) per batch, which together with the
+`sample_rate` attribute locate every sample in time. With a
+`sdrcap.clock.CaptureClock` as clock the batch times are sample accurate,
+`batch_sample_index` holds the capture sample index of every batch and
+`discontinuities` an `offset`, `lost_samples` row for every batch saved after
+lost samples.
+
 Attributes:
     - center_freq (float): The center frequency used for recording.
     - sample_rate (float): The sample rate at which data is recorded.
     - freq_correction (float): Frequency correction applied to the recorded data.
     - gain (float): Gain setting used for recording.
+    - streaming (bool): Whether the streaming layout is used.
+    - dtype (str): Sample storage type of the streaming layout, one of
+      `STREAM_DTYPES`.
+    - chunk_size (int): Samples per HDF5 chunk of the streaming layout.
+    - compression (str): HDF5 filter compressing the sample datasets of
+      either layout, one of `HDF5_COMPRESSIONS` or None. "gzip" and "lzf"
+      are built into h5py, the others need the `hdf5plugin` package.
 
 Methods:
     - start_recording(start_recording_time): Captures the start time of the recording.
@@ -24,12 +44,16 @@ Usage:
     needs to be saved in the HDF5 format for further analysis or processing.
 """
 
-import time
-from datetime import datetime
 import h5py
 import numpy as np
+from sdrcap.iq import complex_to_cu8, cu8_to_complex64
+from .csv_recorder import format_timestamps
 from .recorder import Recorder
 
+STREAM_DTYPES = ("complex64", "uint8")
+HDF5_COMPRESSIONS = ("gzip", "lzf", "zstd", "lz4", "blosc")
+GROUP_NAME = "recording_data"
+
 
 class HDF5Recorder(Recorder):
     """Class to record large volumes of data into hdf5 datasets with appropriate
@@ -39,7 +63,28 @@ class HDF5Recorder(Recorder):
         Recorder (ABC): inherited Recording class API.
     """
 
-    def __init__(self, center_freq, sample_rate, freq_correction, gain):
+    def __init__(
+        self,
+        center_freq,
+        sample_rate,
+        freq_correction,
+        gain,
+        **stream_options,
+    ):
+        """Initialize the HDF5Recorder.
+
+        Args:
+            center_freq (float): center frequency used for recording.
+            sample_rate (float): sample rate at which data is recorded.
+            freq_correction (float): frequency correction in ppm.
+            gain (float or str): gain setting used for recording.
+            **stream_options: `streaming` (bool, default False) selects the
+              streaming layout, `dtype` ("complex64" or "uint8") its sample
+              storage type and `chunk_size` (int, default: first batch
+              length) its HDF5 chunk length in samples and `compression`
+              (str, default None) one of `HDF5_COMPRESSIONS`, applied to the
+              datasets of either layout.
+        """
         super().__init__()
         self.start_recording_time = None
         self.stop_recording_time = None
@@ -47,6 +92,39 @@ class HDF5Recorder(Recorder):
         self.sample_rate = sample_rate
         self.freq_correction = freq_correction
         self.gain = gain
+        self.streaming = stream_options.get("streaming", False)
+        self.dtype = stream_options.get("dtype", "complex64")
+        self.chunk_size = stream_options.get("chunk_size")
+        self.compression = stream_options.get("compression")
+        if self.dtype not in STREAM_DTYPES:
+            raise ValueError(
+                f"Invalid HDF5 dtype: {self.dtype}. Must be one of {STREAM_DTYPES}."
+            )
+        if self.compression is not None and self.compression not in HDF5_COMPRESSIONS:
+            raise ValueError(
+                f"Invalid HDF5 compression: {self.compression}. "
+                f"Must be one of {HDF5_COMPRESSIONS}."
+            )
+        self._file = None
+
+    @classmethod
+    def from_options(cls, options):
+        """Creates the recorder from recording options, see `Recorder.from_options`."""
+        return cls(
+            center_freq=options["center_freq"],
+            sample_rate=options["sample_rate"],
+            freq_correction=options["freq_correction"],
+            gain=options["gain"],
+            streaming=options["hdf5_streaming"],
+            dtype=options["hdf5_dtype"],
+            chunk_size=options["sample_window"],
+            compression=options.get("hdf5_compression"),
+        )
+
+    @property
+    def raw_input(self):
+        """bool: whether the streaming layout stores raw uint8 IQ bytes."""
+        return self.streaming and self.dtype == "uint8"
 
     def start_recording(self, start_recording_time):
         """Capture the recording start time.
@@ -58,13 +136,22 @@ class HDF5Recorder(Recorder):
         self.start_recording_time = start_recording_time
 
     def stop_recording(self, stop_recording_time):
-        """Capture the recording stop time.
+        """Capture the recording stop time and close a streaming file.
 
         Args:
             stop_recording_time (float): time that the hardware interface
             stopped the recording.
         """
         self.stop_recording_time = stop_recording_time
+        if self._file is not None:
+            self._file[GROUP_NAME].attrs["stop_recording_time"] = stop_recording_time
+        self.close()
+
+    def close(self):
+        """Flushes and closes the file held open by the streaming layout."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
 
     def save(self, samples, filename):
         """HDF5 saving implementation for file.
@@ -73,19 +160,13 @@ class HDF5Recorder(Recorder):
             samples (numpy.ndarray): array of In-phase and Quadrature raw values.
             filename (str): name of the file without extension to save as
         """
-        current_time = time.time()
-        batch_timestamps = [
-            datetime.utcfromtimestamp(current_time + (i / len(samples))).strftime(
-                "%Y-%m-%d %H:%M:%S."
-            )
-            + f"{int(((current_time +
-                                    (i / len(samples))) % 1) *
-                                    1_000_000):06d}"
-            for i in range(len(samples))
-        ]
-        batch_timestamps = np.array(
-            batch_timestamps, dtype="S26"
-        )  # Store as bytes with max length of 26
+        if self.streaming:
+            self._save_stream(samples, filename)
+            return
+
+        batch_timestamps = format_timestamps(
+            self.clock(), len(samples), self.sample_rate
+        )
 
         with h5py.File(filename, "a") as f:
             group_name = "recording_data"
@@ -111,10 +192,16 @@ class HDF5Recorder(Recorder):
                 timestamp_data[-len(samples) :] = batch_timestamps
 
             else:
-                group.create_dataset("real", data=samples.real, maxshape=(None,))
-                group.create_dataset("imag", data=samples.imag, maxshape=(None,))
+                # resizable datasets are chunked, so the filters apply too
+                filters = _compression_options(self.compression)
+                group.create_dataset(
+                    "real", data=samples.real, maxshape=(None,), **filters
+                )
+                group.create_dataset(
+                    "imag", data=samples.imag, maxshape=(None,), **filters
+                )
                 group.create_dataset(
-                    "timestamps", data=batch_timestamps, maxshape=(None,)
+                    "timestamps", data=batch_timestamps, maxshape=(None,), **filters
                 )
 
             if "center_freq" not in group.attrs:
@@ -125,3 +212,147 @@ class HDF5Recorder(Recorder):
                 group.attrs["freq_correction"] = self.freq_correction
             if "gain" not in group.attrs:
                 group.attrs["gain"] = self.gain
+            for key, value in self.attributes.items():
+                if key not in group.attrs:
+                    group.attrs[key] = value
+
+    def _open_stream(self, filename, batch_length):
+        """Opens (or reopens on a new filename) the streaming file.
+
+        Args:
+            filename (str): path of the HDF5 file.
+            batch_length (int): number of stored elements in the first batch,
+              used as chunk length when `chunk_size` is not set.
+
+        Returns:
+            h5py.Group: the recording group holding the stream datasets.
+        """
+        if self._file is not None and self._file.filename != filename:
+            self.close()
+        if self._file is None:
+            self._file = h5py.File(filename, "a")
+        group = self._file.require_group(GROUP_NAME)
+        if "iq" in group:
+            if "batch_sample_index" not in group:
+                # streams written before the capture clock, indexed by offset
+                _create_clock_datasets(group, group["batch_offset"][:])
+            return group
+
+        chunk = batch_length
+        if self.chunk_size is not None:
+            # interleaved uint8 stores two elements per sample
+            chunk = self.chunk_size * (2 if self.dtype == "uint8" else 1)
+        group.create_dataset(
+            "iq",
+            shape=(0,),
+            maxshape=(None,),
+            dtype=self.dtype,
+            chunks=(chunk,),
+            **_compression_options(self.compression),
+        )
+        group.create_dataset(
+            "batch_start_time", shape=(0,), maxshape=(None,), dtype="f8", chunks=True
+        )
+        group.create_dataset(
+            "batch_offset", shape=(0,), maxshape=(None,), dtype="i8", chunks=True
+        )
+        _create_clock_datasets(group, np.empty(0, dtype=np.int64))
+        group.attrs["layout"] = "stream"
+        group.attrs["center_freq"] = self.center_freq
+        group.attrs["sample_rate"] = self.sample_rate
+        group.attrs["freq_correction"] = self.freq_correction
+        group.attrs["gain"] = self.gain
+        for key, value in self.attributes.items():
+            group.attrs[key] = value
+        if self.start_recording_time is not None:
+            group.attrs["start_recording_time"] = self.start_recording_time
+        return group
+
+    def _save_stream(self, samples, filename):
+        """Appends one batch to the streaming layout.
+
+        Args:
+            samples (numpy.ndarray): complex IQ values, or interleaved uint8
+              IQ bytes as returned by `read_bytes` when `dtype` is "uint8".
+            filename (str): path of the HDF5 file.
+        """
+        batch_start_time = self.clock()
+        data = _as_stream_dtype(np.asarray(samples), self.dtype)
+        group = self._open_stream(filename, len(data))
+
+        iq = group["iq"]
+        offset = iq.shape[0]
+        iq.resize((offset + len(data),))
+        iq[offset:] = data
+
+        starts = group["batch_start_time"]
+        offsets = group["batch_offset"]
+        batch = starts.shape[0]
+        starts.resize((batch + 1,))
+        offsets.resize((batch + 1,))
+        starts[batch] = batch_start_time
+        offset = offset // 2 if self.dtype == "uint8" else offset
+        offsets[batch] = offset
+
+        stamp = getattr(self.clock, "batch", None)
+        indexes = group["batch_sample_index"]
+        indexes.resize((batch + 1,))
+        indexes[batch] = offset if stamp is None else stamp["sample_index"]
+        marker = self.discontinuity(offset)
+        if marker is not None:
+            markers = group["discontinuities"]
+            markers.resize((len(markers) + 1, 2))
+            markers[-1] = (offset, marker["lost_samples"])
+
+
+def _create_clock_datasets(group, batch_sample_index):
+    """Creates the `batch_sample_index` and `discontinuities` stream datasets."""
+    group.create_dataset(
+        "batch_sample_index",
+        data=batch_sample_index,
+        maxshape=(None,),
+        dtype="i8",
+        chunks=True,
+    )
+    group.create_dataset(
+        "discontinuities", shape=(0, 2), maxshape=(None, 2), dtype="i8", chunks=True
+    )
+
+
+def _compression_options(compression):
+    """Returns the `create_dataset` filter arguments of a compression name."""
+    if compression is None:
+        return {}
+    if compression in ("gzip", "lzf"):
+        return {"compression": compression}
+    try:
+        import hdf5plugin  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError(
+            f"HDF5 compression {compression} needs the hdf5plugin package: "
+            "pip install hdf5plugin"
+        ) from exc
+    if compression == "zstd":
+        return dict(hdf5plugin.Zstd())
+    if compression == "lz4":
+        return dict(hdf5plugin.LZ4())
+    return dict(hdf5plugin.Blosc(cname="lz4", shuffle=hdf5plugin.Blosc.SHUFFLE))
+
+
+def _as_stream_dtype(samples, dtype):
+    """Converts a batch to the storage type of the streaming layout.
+
+    Args:
+        samples (numpy.ndarray): complex IQ values or raw uint8 IQ bytes.
+        dtype (str): one of `STREAM_DTYPES`.
+
+    Returns:
+        numpy.ndarray: 1D array ready to append to the `iq` dataset.
+    """
+    if dtype == "complex64":
+        if samples.dtype == np.uint8:
+            return cu8_to_complex64(samples)
+        return samples.astype(np.complex64, copy=False)
+    if samples.dtype == np.uint8:
+        return samples
+    return complex_to_cu8(samples)
@@ -0,0 +1,122 @@
+"""
+Module for writing recordings as Apache Parquet tables.
+
+Every batch becomes a row group of float32 `real` and `imag` columns, so
+analytics tools can read recordings directly. The recording parameters are
+stored as JSON under the `sdrcap` key of the schema metadata. Needs the
+optional `pyarrow` package.
+
+A Parquet file cannot be appended to once its footer is written, so saving
+to a file that already exists, e.g. again after `close`, raises
+FileExistsError instead of overwriting it.
+"""
+
+import json
+import os
+import numpy as np
+from sdrcap import __version__
+from sdrcap.iq import cu8_to_complex64
+from .recorder import Recorder
+
+METADATA_KEY = b"sdrcap"
+
+
+def import_pyarrow():
+    """Imports pyarrow and pyarrow.parquet, naming the package when missing."""
+    try:
+        import pyarrow  # pylint: disable=import-outside-toplevel
+        import pyarrow.parquet  # pylint: disable=import-outside-toplevel
+    except ImportError as exc:
+        raise ImportError(
+            "Parquet recordings need the pyarrow package: pip install pyarrow"
+        ) from exc
+    return pyarrow, pyarrow.parquet
+
+
+class ParquetRecorder(Recorder):
+    """Class to record samples into a Parquet table.
+
+    Args:
+        Recorder (ABC): inherited Recording class API.
+    """
+
+    def __init__(self, center_freq, sample_rate, freq_correction, gain):
+        super().__init__()
+        self.pa, self.pq = import_pyarrow()
+        self.center_freq = center_freq
+        self.sample_rate = sample_rate
+        self.freq_correction = freq_correction
+        self.gain = gain
+        self._writer = None
+        self._filename = None
+
+    def start_recording(self, start_recording_time):
+        """Capture the recording start time.
+
+        Args:
+            start_recording_time (float): time that the hardware interface
+            started the recording.
+        """
+        self.start_recording_time = start_recording_time
+
+    def stop_recording(self, stop_recording_time):
+        """Capture the recording stop time and close the table.
+
+        Args:
+            stop_recording_time (float): time that the hardware interface
+            stopped the recording.
+        """
+        self.stop_recording_time = stop_recording_time
+        self.close()
+
+    def close(self):
+        """Writes the footer and closes the open table."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def save(self, samples, filename):
+        """Appends a batch as one row group.
+
+        Args:
+            samples (numpy.ndarray): complex IQ values or interleaved uint8 IQ bytes.
+            filename (str): path of the .parquet file.
+        """
+        samples = np.asarray(samples)
+        if samples.dtype == np.uint8:
+            samples = cu8_to_complex64(samples)
+        if filename != self._filename:
+            self.close()
+            self._filename = filename
+        if self._writer is None:
+            if os.path.exists(filename):
+                raise FileExistsError(
+                    f"Parquet recording {filename} already exists and cannot be "
+                    "appended to."
+                )
+            metadata = {
+                **self.attributes,
+                "center_freq": self.center_freq,
+                "sample_rate": self.sample_rate,
+                "freq_correction": self.freq_correction,
+                "gain": self.gain,
+                "start_time": (
+                    self.start_recording_time
+                    if self.start_recording_time is not None
+                    else self.clock()
+                ),
+                "sdrcap_version": __version__,
+            }
+            schema = self.pa.schema(
+                [("real", self.pa.float32()), ("imag", self.pa.float32())],
+                metadata={METADATA_KEY: json.dumps(metadata).encode()},
+            )
+            self._writer = self.pq.ParquetWriter(filename, schema)
+        table = self.pa.table(
+            {
+                "real": samples.real.astype(np.float32),
+                "imag": samples.imag.astype(np.float32),
+            },
+            schema=self._writer.schema,
+        )
+        self._writer.write_table(table)
@@ -0,0 +1,218 @@
+"""
+Module for recording raw 8-bit IQ (.cu8) SDR data.
+
+This module provides an implementation of the `Recorder` base class that writes
+the RTL-SDR's interleaved unsigned 8 bit I/Q bytes verbatim, two bytes per
+sample, instead of expanding them to complex128 first. Recording parameters
+are kept in a small JSON metadata sidecar (`<filename>.json`), similar in
+spirit to a SigMF meta file. Conversion to complex64 only happens on read,
+through the lookup table in `sdrcap.iq`.
+
+Attributes:
+    - center_freq (float): The center frequency used for recording.
+    - sample_rate (float): The sample rate at which data is recorded.
+    - freq_correction (float): Frequency correction applied to the recorded data.
+    - gain (float): Gain setting used for recording.
+
+Methods:
+    - start_recording(start_recording_time): Captures the start time of the recording.
+    - stop_recording(stop_recording_time): Captures the stop time of the recording
+      and finalizes the metadata sidecar.
+    - save(samples, filename): Appends raw IQ bytes to the file, writing the
+      metadata sidecar alongside it when the file is created.
+    - read_cu8(filename, start, count): Loads samples of a .cu8 file as complex64.
+
+Usage:
+    This module is intended for long unattended captures where disk space and
+    write bandwidth matter more than immediate readability of the data.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+import numpy as np
+from sdrcap import __version__
+from sdrcap.iq import complex_to_cu8, cu8_to_complex64
+from .recorder import Recorder
+
+METADATA_SUFFIX = ".json"
+
+
+def metadata_filename(filename):
+    """Returns the metadata sidecar path of a raw IQ recording.
+
+    Args:
+        filename (str): path of the .cu8 recording.
+    """
+    return filename + METADATA_SUFFIX
+
+
+def read_metadata(filename):
+    """Loads the metadata sidecar of a raw IQ recording.
+
+    Args:
+        filename (str): path of the .cu8 recording.
+
+    Returns:
+        dict: recording metadata.
+    """
+    with open(metadata_filename(filename), "r", encoding="utf-8") as meta_file:
+        return json.load(meta_file)
+
+
+def read_cu8(filename, start=0, count=-1):
+    """Loads samples of a raw IQ recording as complex64.
+
+    Args:
+        filename (str): path of the .cu8 recording.
+        start (int, optional): index of the first sample. Defaults to 0.
+        count (int, optional): number of samples, -1 reads to the end.
+
+    Returns:
+        numpy.ndarray: complex64 samples.
+    """
+    raw = np.fromfile(
+        filename,
+        dtype=np.uint8,
+        count=-1 if count < 0 else 2 * count,
+        offset=2 * start,
+    )
+    return cu8_to_complex64(raw[: len(raw) - len(raw) % 2])
+
+
+def _clock_timing(recorder, timings, filename, offset):
+    """Tracks the capture clock timing of a recording's sidecar.
+
+    With a `sdrcap.clock.CaptureClock` the sidecar gets the sample accurate
+    `start_time` and capture `sample_index` of the first sample and a list of
+    `discontinuities` markers, see `Recorder.discontinuity`.
+
+    Args:
+        recorder (Recorder): recorder saving the batch.
+        timings (dict): timing of every recording, updated in place.
+        filename (str): path of the recording.
+        offset (int): index of the batch's first sample in the recording.
+
+    Returns:
+        dict: the marker added for the batch, or None.
+    """
+    batch = getattr(recorder.clock, "batch", None)
+    if batch is None:
+        return None
+    if offset == 0:
+        timings[filename] = {
+            "start_time": batch["time"],
+            "sample_index": batch["sample_index"],
+            "discontinuities": [],
+        }
+        return None
+    if filename not in timings:
+        # appending to a recording of an earlier capture
+        return None
+    marker = recorder.discontinuity(offset)
+    if marker is not None:
+        timings[filename]["discontinuities"].append(marker)
+    return marker
+
+
+class RawIQRecorder(Recorder):
+    """Class to record raw interleaved uint8 IQ bytes with a JSON metadata sidecar.
+
+    Args:
+        Recorder (ABC): inherited Recording class API.
+    """
+
+    raw_input = True
+
+    def __init__(self, center_freq, sample_rate, freq_correction, gain):
+        super().__init__()
+        self.start_recording_time = None
+        self.stop_recording_time = None
+        self.center_freq = center_freq
+        self.sample_rate = sample_rate
+        self.freq_correction = freq_correction
+        self.gain = gain
+        # attributes of every recording as they were when it was created
+        self._filenames = {}
+        # capture clock timing of every recording, see `_clock_timing`
+        self._timings = {}
+
+    def start_recording(self, start_recording_time):
+        """Capture the recording start time.
+
+        Args:
+            start_recording_time (float): time that the hardware interface
+            started the recording.
+        """
+        self.start_recording_time = start_recording_time
+
+    def stop_recording(self, stop_recording_time):
+        """Capture the recording stop time and finalize the metadata sidecars.
+
+        Args:
+            stop_recording_time (float): time that the hardware interface
+            stopped the recording.
+        """
+        self.stop_recording_time = stop_recording_time
+        for filename in self._filenames:
+            self._write_metadata(filename)
+
+    def metadata(self, filename):
+        """Builds the metadata sidecar content of a recording.
+
+        Args:
+            filename (str): path of the .cu8 recording.
+
+        Returns:
+            dict: recording metadata.
+        """
+        timing = self._timings.get(filename, {})
+        start_time = timing.get("start_time", self.start_recording_time)
+        if start_time is None:
+            start_time = os.path.getmtime(filename)
+        return {
+            **self._filenames.get(filename, self.attributes),
+            **timing,
+            "datatype": "cu8",
+            "center_freq": self.center_freq,
+            "sample_rate": self.sample_rate,
+            "gain": self.gain,
+            "freq_correction": self.freq_correction,
+            "start_time": start_time,
+            "start_time_iso": datetime.fromtimestamp(
+                start_time, timezone.utc
+            ).isoformat(),
+            "stop_time": self.stop_recording_time,
+            "num_samples": os.path.getsize(filename) // 2,
+            "sdrcap_version": __version__,
+        }
+
+    def _write_metadata(self, filename):
+        """Writes the metadata sidecar of a recording.
+
+        Args:
+            filename (str): path of the .cu8 recording.
+        """
+        with open(metadata_filename(filename), "w", encoding="utf-8") as meta_file:
+            json.dump(self.metadata(filename), meta_file, indent=2)
+
+    def save(self, samples, filename):
+        """Raw IQ saving implementation for file.
+
+        Args:
+            samples (numpy.ndarray or buffer): interleaved uint8 IQ bytes as
+              returned by `read_bytes`. Complex samples are quantized to cu8.
+            filename (str): name of the file without extension to save as
+        """
+        if isinstance(samples, np.ndarray) and np.iscomplexobj(samples):
+            samples = complex_to_cu8(samples)
+        with open(filename, "ab") as out_file:
+            offset = out_file.tell() // 2
+            out_file.write(samples)
+        marker = _clock_timing(self, self._timings, filename, offset)
+        if filename not in self._filenames:
+            self._filenames[filename] = dict(self.attributes)
+            self._write_metadata(filename)
+        elif marker is not None:
+            # markers reach the sidecar right away, not only on stop
+            self._write_metadata(filename)
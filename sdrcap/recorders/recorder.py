@@ -2,15 +2,110 @@
     interface regardless of filetype 
 """
 
+import functools
+import time
 from abc import ABC, abstractmethod
 
 
+async def _run_blocking(executor, func, *args):
+    """Runs blocking recorder I/O in an executor without abandoning it.
+
+    When the awaiting task is cancelled, the call already handed to the
+    executor is waited for before the cancellation propagates, so a batch is
+    never half written while the caller goes on to stop the recorder.
+    """
+    # only coroutines use asyncio, its import is left to the event loop
+    import asyncio  # pylint: disable=import-outside-toplevel
+
+    future = asyncio.get_running_loop().run_in_executor(
+        executor, functools.partial(func, *args)
+    )
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        await asyncio.wait([future])
+        raise
+
+
 class Recorder(ABC):
-    """Abstract class defining methods for each file logic to implement"""
+    """Abstract class defining methods for each file logic to implement
+
+    Attributes:
+        raw_input (bool): when True the hardware interface hands `save` the
+            raw interleaved uint8 I/Q bytes instead of complex samples.
+        attributes (dict): extra recording metadata, such as the DSP pipeline
+            applied before `save`, written alongside the recorder's own
+            metadata by recorders that keep any.
+        clock (callable): returns the epoch time stamped on the batch being
+            saved by recorders that keep batch times. Defaults to
+            `time.time`; the converter replaces it to keep source times and
+            the hardware interface with its `sdrcap.clock.CaptureClock`.
+    """
+
+    raw_input = False
 
     def __init__(self):
         self.start_recording_time = None
         self.stop_recording_time = None
+        self.attributes = {}
+        self._clock = time.time
+
+    @property
+    def clock(self):
+        """callable: clock stamping the batch being saved."""
+        return self._clock
+
+    @clock.setter
+    def clock(self, clock):
+        self._clock = clock
+
+    def discontinuity(self, offset):
+        """Returns the marker of samples lost right before the batch being saved.
+
+        Only a `sdrcap.clock.CaptureClock` knows about lost samples, with
+        other clocks there are never any.
+
+        Args:
+            offset (int): index of the batch's first sample in the recording.
+
+        Returns:
+            dict: `offset`, capture `sample_index` and `time` of the batch and
+            `lost_samples` at the recorder's sample rate, or None.
+        """
+        batch = getattr(self.clock, "batch", None)
+        if batch is None or offset == 0 or batch["lost_samples"] <= 0:
+            return None
+        sample_rate = getattr(self, "sample_rate", None) or self.clock.sample_rate
+        return {
+            "offset": offset,
+            "sample_index": batch["sample_index"],
+            "time": batch["time"],
+            "lost_samples": round(
+                batch["lost_samples"] * sample_rate / self.clock.sample_rate
+            ),
+        }
+
+    @classmethod
+    def from_options(cls, options):
+        """Creates the recorder from recording options.
+
+        Recorders registered in `sdrcap.registry.RECORDERS` are created
+        through this method; recorders taking more than the radio
+        parameters override it.
+
+        Args:
+            options (dict): recording options, see
+              `sdrcap.rtl_interface.DEFAULT_OPTIONS`.
+
+        Returns:
+            Recorder: the recorder.
+        """
+        return cls(
+            center_freq=options["center_freq"],
+            sample_rate=options["sample_rate"],
+            freq_correction=options["freq_correction"],
+            gain=options["gain"],
+        )
 
     @abstractmethod
     def start_recording(self, start_recording_time):
@@ -26,7 +121,34 @@ class Recorder(ABC):
         """Saves the samples to the filename specified in append mode
            where file creation occurs in file not created yet.
 
+        `samples` may be a view of a capture buffer that is reused once
+        `save` returns; samples kept for later must be copied.
+
+        Args:
+            samples (numpy.ndarray): array of In-phase and Quadrature raw values.
+            filename (str): name of the file without extension to save as
+        """
+
+    async def save_async(self, samples, filename, executor=None):
+        """Awaitable `save` running the blocking file I/O in an executor.
+
+        Calls must not overlap for one recorder: await each save before the
+        next one, as `RTLSDRInterface.record_stream` does.
+
         Args:
             samples (numpy.ndarray): array of In-phase and Quadrature raw values.
             filename (str): name of the file without extension to save as
+            executor (concurrent.futures.Executor, optional): executor running
+              the write. Defaults to the event loop's default executor.
+        """
+        await _run_blocking(executor, self.save, samples, filename)
+
+    async def stop_recording_async(self, stop_recording_time, executor=None):
+        """Awaitable `stop_recording`, which may flush and close files.
+
+        Args:
+            stop_recording_time (float): time the recording stopped.
+            executor (concurrent.futures.Executor, optional): executor running
+              the call. Defaults to the event loop's default executor.
         """
+        await _run_blocking(executor, self.stop_recording, stop_recording_time)
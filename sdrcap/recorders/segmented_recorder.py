@@ -0,0 +1,392 @@
+"""
+Module for rolling a long recording over into bounded segment files.
+
+`SegmentedRecorder` wraps the recorder of a filetype and starts a new
+segment file whenever the open one reaches `max_bytes` or has been recorded
+for `max_seconds`. Every segment gets a fresh inner recorder, so its
+metadata covers exactly the segment's own time span.
+
+A segment is written as `<name>-seg00000.<ext>.partial` and renamed to its
+final name with `os.replace` once its recorder is stopped, so a file with
+a final name is always complete and can be shipped off the box, and a
+crash only leaves the open segment behind as `.partial`. Finalized
+segments are appended to `<name>.manifest.jsonl`, one JSON event per line:
+
+    {"event": "segment", "index": 0, "filename": "x-seg00000.cu8",
+     "start_time": ..., "stop_time": ..., "num_samples": ..., "bytes": ...}
+    {"event": "compressed", "filename": "x-seg00000.cu8",
+     "compressed_filename": "x-seg00000.cu8.gz", "bytes": ...}
+    {"event": "deleted", "filename": "x-seg00000.cu8"}
+
+`read_manifest` replays the events into the list of segments on disk.
+`RetentionWorker` keeps the segments of a manifest within a disk budget
+from a background thread: it gzips segments older than `compress_after`
+and, while the budget is exceeded, compresses and then deletes the oldest.
+"""
+
+import glob
+import gzip
+import json
+import os
+import shutil
+import threading
+import time
+import numpy as np
+from .recorder import Recorder
+
+PARTIAL_SUFFIX = ".partial"
+MANIFEST_SUFFIX = ".manifest.jsonl"
+COMPRESSED_SUFFIX = ".gz"
+# the recorder writer thread and retention workers append to manifests
+_MANIFEST_LOCK = threading.Lock()
+
+
+def segment_filename(filename, index):
+    """Returns the final filename of the `index`-th segment of a recording."""
+    root, extension = os.path.splitext(filename)
+    return f"{root}-seg{index:05d}{extension}"
+
+
+def manifest_filename(filename):
+    """Returns the segment manifest filename of a recording."""
+    return os.path.splitext(filename)[0] + MANIFEST_SUFFIX
+
+
+def _append_event(manifest, event):
+    """Appends one event line to a manifest."""
+    with _MANIFEST_LOCK:
+        with open(manifest, "a", encoding="utf-8") as manifest_file:
+            manifest_file.write(json.dumps(event) + "\n")
+
+
+def read_manifest(manifest):
+    """Loads the segments of a manifest as they currently are on disk.
+
+    Args:
+        manifest (str): path of the .manifest.jsonl file.
+
+    Returns:
+        list: segment dicts in recording order, with `compressed_filename`
+        set for compressed segments; deleted segments are left out.
+    """
+    segments = {}
+    with open(manifest, "r", encoding="utf-8") as manifest_file:
+        for line in manifest_file:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            name = event["filename"]
+            if event["event"] == "segment":
+                segments[name] = {
+                    key: value for key, value in event.items() if key != "event"
+                }
+            elif event["event"] == "compressed" and name in segments:
+                segments[name]["compressed_filename"] = event["compressed_filename"]
+                segments[name]["bytes"] = event["bytes"]
+            elif event["event"] == "deleted":
+                segments.pop(name, None)
+    return list(segments.values())
+
+
+def _companion_files(path):
+    """Returns `path` and its sidecars, e.g. the .json of a cu8 recording."""
+    return [path] + [
+        companion
+        for companion in glob.glob(glob.escape(path) + ".*")
+        if not companion.endswith(PARTIAL_SUFFIX)
+    ]
+
+
+class SegmentedRecorder(Recorder):
+    """Class rotating recordings of a wrapped recorder type into segments.
+
+    Args:
+        Recorder (ABC): inherited Recording class API.
+    """
+
+    def __init__(self, recorder_factory, max_bytes=None, max_seconds=None, **options):
+        """Initialize the SegmentedRecorder.
+
+        Args:
+            recorder_factory (callable): returns a new recorder for every
+              segment.
+            max_bytes (int, optional): segment size that triggers rotation.
+            max_seconds (float, optional): segment duration that triggers
+              rotation.
+            **options: `disk_budget` (int, default None) bytes the finalized
+              segments may take, `compress_after` (float, default None)
+              seconds after which segments are gzipped and
+              `retention_interval` (float, default 10) seconds between
+              retention passes. Setting either of the first two starts a
+              `RetentionWorker` for the manifest of every recording.
+        """
+        super().__init__()
+        if max_bytes is None and max_seconds is None:
+            raise ValueError("Invalid segment limits: set max_bytes and/or max_seconds.")
+        if max_bytes is not None and max_bytes <= 0:
+            raise ValueError(f"Invalid max_bytes: {max_bytes}. Must be > 0.")
+        if max_seconds is not None and max_seconds <= 0:
+            raise ValueError(f"Invalid max_seconds: {max_seconds}. Must be > 0.")
+        self.recorder_factory = recorder_factory
+        self.max_bytes = max_bytes
+        self.max_seconds = max_seconds
+        self.disk_budget = options.get("disk_budget")
+        self.compress_after = options.get("compress_after")
+        self.retention_interval = options.get("retention_interval", 10.0)
+        self.segments = []
+        self.workers = {}
+        # the first segment's recorder doubles as the raw input probe
+        self._next_recorder = recorder_factory()
+        # `_next_recorder` is None while a segment is open
+        self._raw_input = self._next_recorder.raw_input
+        self._recorder = None
+        self._segment = None
+        self._filename = None
+        self._indexes = {}
+
+    @property
+    def raw_input(self):
+        """bool: raw input flag of the wrapped recorder type."""
+        return self._raw_input
+
+    def start_recording(self, start_recording_time):
+        """Capture the recording start time.
+
+        Args:
+            start_recording_time (float): time that the hardware interface
+            started the recording.
+        """
+        self.start_recording_time = start_recording_time
+
+    def stop_recording(self, stop_recording_time):
+        """Finalizes the open segment and stops the retention workers.
+
+        Args:
+            stop_recording_time (float): time that the hardware interface
+            stopped the recording.
+        """
+        self.stop_recording_time = stop_recording_time
+        self.close()
+        for worker in self.workers.values():
+            worker.stop()
+        self.workers = {}
+
+    def close(self):
+        """Finalizes the open segment, if any."""
+        if self._segment is not None:
+            self._finalize(time.time())
+
+    def save(self, samples, filename):
+        """Saves a batch to the open segment, rotating it when it is full.
+
+        Args:
+            samples (numpy.ndarray): samples in the wrapped recorder's input.
+            filename (str): base name of the segment files.
+        """
+        now = time.time()
+        if self._segment is not None and (
+            filename != self._filename or self._segment_full(now)
+        ):
+            self._finalize(now)
+        if self._segment is None:
+            self._open(filename, now)
+        self._recorder.save(samples=samples, filename=self._segment["partial"])
+        samples = np.asarray(samples)
+        self._segment["num_samples"] += (
+            len(samples) // 2 if samples.dtype == np.uint8 else len(samples)
+        )
+
+    def _segment_full(self, now):
+        """Whether the open segment reached its size or duration limit."""
+        segment = self._segment
+        if self.max_seconds is not None and now - segment["start_time"] >= self.max_seconds:
+            return True
+        return (
+            self.max_bytes is not None
+            and os.path.exists(segment["partial"])
+            and os.path.getsize(segment["partial"]) >= self.max_bytes
+        )
+
+    def _open(self, filename, now):
+        """Starts the next segment of `filename` with a fresh recorder."""
+        if filename != self._filename:
+            self._filename = filename
+            self._start_worker(manifest_filename(filename))
+        index = self._indexes.get(filename, 0)
+        self._indexes[filename] = index + 1
+        final = segment_filename(filename, index)
+        self._recorder = self._next_recorder or self.recorder_factory()
+        self._next_recorder = None
+        self._recorder.attributes.update(self.attributes)
+        self._recorder.clock = self.clock
+        self._recorder.attributes["segment_index"] = index
+        self._recorder.start_recording(now)
+        self._segment = {
+            "index": index,
+            "final": final,
+            "partial": final + PARTIAL_SUFFIX,
+            "start_time": now,
+            "num_samples": 0,
+        }
+
+    def _finalize(self, now):
+        """Stops the segment recorder, renames its files and logs the segment."""
+        segment = self._segment
+        self._segment = None
+        self._recorder.stop_recording(now)
+        self._next_recorder = self.recorder_factory()
+        partial, final = segment["partial"], segment["final"]
+        # sidecars first: the data file appearing is the commit point
+        for companion in _companion_files(partial)[1:]:
+            os.replace(companion, final + companion[len(partial) :])
+        if os.path.exists(partial):
+            os.replace(partial, final)
+        event = {
+            "event": "segment",
+            "index": segment["index"],
+            "filename": os.path.basename(final),
+            "start_time": segment["start_time"],
+            "stop_time": now,
+            "num_samples": segment["num_samples"],
+            "bytes": os.path.getsize(final) if os.path.exists(final) else 0,
+        }
+        _append_event(manifest_filename(self._filename), event)
+        self.segments.append(event)
+
+    def _start_worker(self, manifest):
+        """Starts the retention worker of a manifest when retention is set."""
+        if (self.disk_budget is None and self.compress_after is None) or (
+            manifest in self.workers
+        ):
+            return
+        self.workers[manifest] = RetentionWorker(
+            manifest,
+            disk_budget=self.disk_budget,
+            compress_after=self.compress_after,
+            interval=self.retention_interval,
+        ).start()
+
+
+class RetentionWorker:
+    """Background worker keeping the segments of a manifest within a budget."""
+
+    def __init__(self, manifest, disk_budget=None, compress_after=None, interval=10.0):
+        """Initialize the RetentionWorker.
+
+        Args:
+            manifest (str): path of the .manifest.jsonl file.
+            disk_budget (int, optional): bytes the segments may take. When
+              exceeded, the oldest segments are compressed, then deleted.
+            compress_after (float, optional): seconds after its stop time a
+              segment is gzipped. Defaults to compressing only for the budget.
+            interval (float, optional): seconds between passes. Defaults to 10.
+        """
+        if disk_budget is not None and disk_budget < 0:
+            raise ValueError(f"Invalid disk_budget: {disk_budget}. Must be >= 0.")
+        if interval <= 0:
+            raise ValueError(f"Invalid interval: {interval}. Must be > 0.")
+        self.manifest = manifest
+        self.disk_budget = disk_budget
+        self.compress_after = compress_after
+        self.interval = interval
+        self.errors = []
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def _path(self, name):
+        return os.path.join(os.path.dirname(self.manifest), name)
+
+    def compress(self, segment):
+        """Gzips a segment's data file, keeping its sidecars.
+
+        Returns:
+            int: size of the compressed file.
+        """
+        source = self._path(segment["filename"])
+        target = source + COMPRESSED_SUFFIX
+        partial = target + PARTIAL_SUFFIX
+        with open(source, "rb") as in_file, gzip.open(partial, "wb", compresslevel=6) as out_file:
+            shutil.copyfileobj(in_file, out_file, 1024 * 1024)
+        os.replace(partial, target)
+        os.remove(source)
+        size = os.path.getsize(target)
+        _append_event(
+            self.manifest,
+            {
+                "event": "compressed",
+                "filename": segment["filename"],
+                "compressed_filename": os.path.basename(target),
+                "bytes": size,
+            },
+        )
+        return size
+
+    def delete(self, segment):
+        """Deletes a segment's data file and sidecars."""
+        source = self._path(segment["filename"])
+        for path in _companion_files(source):
+            if os.path.exists(path):
+                os.remove(path)
+        _append_event(self.manifest, {"event": "deleted", "filename": segment["filename"]})
+
+    def run_once(self):
+        """Runs one retention pass.
+
+        Returns:
+            int: bytes the remaining segments take.
+        """
+        if not os.path.exists(self.manifest):
+            return 0
+        segments = read_manifest(self.manifest)
+        now = time.time()
+        if self.compress_after is not None:
+            for segment in segments:
+                if (
+                    "compressed_filename" not in segment
+                    and now - segment["stop_time"] >= self.compress_after
+                ):
+                    segment["bytes"] = self.compress(segment)
+                    segment["compressed_filename"] = segment["filename"] + COMPRESSED_SUFFIX
+        total = sum(segment["bytes"] for segment in segments)
+        if self.disk_budget is None:
+            return total
+        # compressing the oldest first may be enough to fit
+        for segment in segments:
+            if total <= self.disk_budget:
+                break
+            if "compressed_filename" not in segment:
+                size = self.compress(segment)
+                total -= segment["bytes"] - size
+                segment["bytes"] = size
+        for segment in segments:
+            if total <= self.disk_budget:
+                break
+            self.delete(segment)
+            total -= segment["bytes"]
+        return total
+
+    def start(self):
+        """Starts the retention passes on a background thread. Returns the worker."""
+        self._stopping.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="sdrcap-retention", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stops the thread after a last retention pass."""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        while True:
+            stopping = self._stopping.wait(self.interval)
+            try:
+                self.run_once()
+            except OSError as exc:
+                self.errors.append(exc)
+            if stopping:
+                return
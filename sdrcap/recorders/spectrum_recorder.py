@@ -0,0 +1,225 @@
+"""
+Module for recording stitched wideband power spectra of a frequency sweep.
+
+This module provides an implementation of the `Recorder` base class that
+stores one float32 power spectrum (dB per Hz) per sweep instead of raw IQ
+samples, orders of magnitude less data than recording every hop.
+
+Two formats are supported:
+    - "hdf5": a `spectrum_data` group with a (sweeps, bins) float32 `power`
+      dataset, a `sweep_time` dataset and the bin `frequencies`.
+    - "bin": fixed size records of a float64 sweep time followed by the
+      float32 bins, with a JSON metadata sidecar (`<filename>.json`)
+      describing the bin layout, readable with `numpy.fromfile`.
+
+Methods:
+    - start_recording(start_recording_time): Captures the start time of the recording.
+    - stop_recording(stop_recording_time): Captures the stop time of the recording.
+    - save(samples, filename, sweep_time): Appends one spectrum.
+    - read_spectrum(filename): Loads frequencies, sweep times and spectra.
+"""
+
+import json
+import os
+import time
+import h5py
+import numpy as np
+from sdrcap import __version__
+from .raw_recorder import metadata_filename
+from .recorder import Recorder
+
+SPECTRUM_FORMATS = ("hdf5", "bin")
+SPECTRUM_GROUP_NAME = "spectrum_data"
+
+
+def spectrum_record_dtype(num_bins):
+    """Returns the numpy record type of one "bin" format spectrum.
+
+    Args:
+        num_bins (int): bins per spectrum.
+    """
+    return np.dtype([("sweep_time", "<f8"), ("power", "<f4", (num_bins,))])
+
+
+def read_spectrum(filename):
+    """Loads a spectrum recording of either format.
+
+    Args:
+        filename (str): path of the .hdf5/.h5 or .bin recording.
+
+    Returns:
+        tuple: (numpy.ndarray bin frequencies in Hz, numpy.ndarray sweep
+        times, numpy.ndarray (sweeps, bins) float32 power in dB per Hz)
+    """
+    if os.path.splitext(filename)[1].lower() in (".hdf5", ".h5"):
+        with h5py.File(filename, "r") as h5_file:
+            group = h5_file[SPECTRUM_GROUP_NAME]
+            return group["frequencies"][:], group["sweep_time"][:], group["power"][:]
+    with open(metadata_filename(filename), "r", encoding="utf-8") as meta_file:
+        metadata = json.load(meta_file)
+    records = np.fromfile(filename, dtype=spectrum_record_dtype(metadata["num_bins"]))
+    frequencies = metadata["start_freq"] + metadata["bin_width"] * np.arange(
+        metadata["num_bins"]
+    )
+    return frequencies, records["sweep_time"], records["power"]
+
+
+class SpectrumRecorder(Recorder):
+    """Class to record one stitched power spectrum per sweep.
+
+    Args:
+        Recorder (ABC): inherited Recording class API.
+    """
+
+    def __init__(self, plan, gain, freq_correction, spectrum_format="hdf5"):
+        """Initialize the SpectrumRecorder.
+
+        Args:
+            plan (sdrcap.sweep.SweepPlan): plan the spectra are swept with.
+            gain (float or str): gain setting used for recording.
+            freq_correction (float): frequency correction in ppm.
+            spectrum_format (str, optional): one of `SPECTRUM_FORMATS`.
+              Defaults to "hdf5".
+        """
+        super().__init__()
+        if spectrum_format not in SPECTRUM_FORMATS:
+            raise ValueError(
+                f"Invalid spectrum format: {spectrum_format}. "
+                f"Must be one of {SPECTRUM_FORMATS}."
+            )
+        self.plan = plan
+        self.gain = gain
+        self.freq_correction = freq_correction
+        self.spectrum_format = spectrum_format
+        self._record = np.zeros(1, dtype=spectrum_record_dtype(plan.num_bins))
+        self._file = None
+
+    def start_recording(self, start_recording_time):
+        """Capture the recording start time.
+
+        Args:
+            start_recording_time (float): time that the sweep started.
+        """
+        self.start_recording_time = start_recording_time
+
+    def stop_recording(self, stop_recording_time):
+        """Capture the recording stop time and close the recording.
+
+        Args:
+            stop_recording_time (float): time that the sweep stopped.
+        """
+        self.stop_recording_time = stop_recording_time
+        if self._file is not None and self.spectrum_format == "hdf5":
+            self._file[SPECTRUM_GROUP_NAME].attrs["stop_recording_time"] = (
+                stop_recording_time
+            )
+        self.close()
+
+    def close(self):
+        """Closes the recording file, finalizing the "bin" metadata sidecar."""
+        if self._file is None:
+            return
+        if self.spectrum_format == "bin":
+            self._write_metadata(self._file.name)
+        self._file.close()
+        self._file = None
+
+    def metadata(self):
+        """Builds the recording metadata.
+
+        Returns:
+            dict: sweep plan and radio parameters.
+        """
+        plan = self.plan
+        return {
+            **self.attributes,
+            "datatype": "spectrum_f32_db",
+            "start_freq": plan.start_freq,
+            "stop_freq": plan.stop_freq,
+            "bin_width": plan.bin_width,
+            "num_bins": plan.num_bins,
+            "num_hops": plan.num_hops,
+            "sample_rate": plan.sample_rate,
+            "fft_size": plan.fft_size,
+            "overlap": plan.overlap,
+            "num_averages": plan.num_averages,
+            "settle_time": plan.settle_time,
+            "gain": self.gain,
+            "freq_correction": self.freq_correction,
+            "start_time": self.start_recording_time,
+            "stop_time": self.stop_recording_time,
+            "sdrcap_version": __version__,
+        }
+
+    def _write_metadata(self, filename):
+        """Writes the metadata sidecar of a "bin" recording."""
+        with open(metadata_filename(filename), "w", encoding="utf-8") as meta_file:
+            json.dump(self.metadata(), meta_file, indent=2)
+
+    def _open(self, filename):
+        """Opens (or reopens on a new filename) the recording file."""
+        if self._file is not None:
+            current = (
+                self._file.filename if self.spectrum_format == "hdf5" else self._file.name
+            )
+            if current == filename:
+                return
+            self.close()
+
+        if self.spectrum_format == "bin":
+            self._file = open(filename, "ab")  # pylint: disable=consider-using-with
+            self._write_metadata(filename)
+            return
+
+        self._file = h5py.File(filename, "a")
+        if SPECTRUM_GROUP_NAME in self._file:
+            return
+        group = self._file.create_group(SPECTRUM_GROUP_NAME)
+        num_bins = self.plan.num_bins
+        group.create_dataset(
+            "power",
+            shape=(0, num_bins),
+            maxshape=(None, num_bins),
+            dtype="f4",
+            chunks=(max(1, 65536 // num_bins), num_bins),
+        )
+        group.create_dataset(
+            "sweep_time", shape=(0,), maxshape=(None,), dtype="f8", chunks=True
+        )
+        group.create_dataset("frequencies", data=self.plan.frequencies())
+        for key, value in self.metadata().items():
+            if value is not None:
+                group.attrs[key] = value
+
+    def save(self, samples, filename, sweep_time=None):
+        """Spectrum saving implementation for file.
+
+        Args:
+            samples (numpy.ndarray): stitched power spectrum of `plan.num_bins`.
+            filename (str): path of the spectrum recording.
+            sweep_time (float, optional): epoch time the sweep started.
+              Defaults to now.
+        """
+        if len(samples) != self.plan.num_bins:
+            raise ValueError(
+                f"Invalid spectrum length: {len(samples)}. "
+                f"Must be {self.plan.num_bins}."
+            )
+        if sweep_time is None:
+            sweep_time = time.time()
+        self._open(filename)
+
+        if self.spectrum_format == "bin":
+            self._record["sweep_time"] = sweep_time
+            self._record["power"] = samples
+            self._file.write(self._record.tobytes())
+            return
+
+        group = self._file[SPECTRUM_GROUP_NAME]
+        power = group["power"]
+        times = group["sweep_time"]
+        row = power.shape[0]
+        power.resize((row + 1, power.shape[1]))
+        times.resize((row + 1,))
+        power[row] = samples
+        times[row] = sweep_time
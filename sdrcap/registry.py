@@ -0,0 +1,146 @@
+"""
+Module for the registries of device backends and recorders.
+
+Entries are registered as "module:attribute" paths and only imported when
+first used, so a capture only pays the import cost (librtlsdr, h5py, ...)
+of the backend and recorder it actually runs with.
+
+Registries:
+    - BACKENDS: `RTLSDRInterface` subclasses by device name, "rtl",
+      "rtl_tcp" and "sim" built in.
+    - RECORDERS: `Recorder` subclasses by file type, "csv", "hdf5", "cu8",
+      "sdrz" and "parquet" built in. Recorders are created from the
+      recording options with their `from_options` class method.
+
+Third-party packages add entries through the "sdrcap.backends" and
+"sdrcap.recorders" entry point groups, e.g. in their pyproject.toml:
+
+    [tool.poetry.plugins."sdrcap.recorders"]
+    sigmf = "sdrcap_sigmf:SigMFRecorder"
+
+Entry points are only looked up when a name is not built in or when every
+name is listed.
+"""
+
+import importlib
+
+
+class Registry:
+    """Name to lazily imported object mapping, extended by entry points.
+
+    Attributes:
+        kind (str): what the registry holds, used in error messages.
+        group (str): entry point group of third-party entries.
+    """
+
+    def __init__(self, kind, group, entries=None):
+        """Initialize the Registry.
+
+        Args:
+            kind (str): what the registry holds, e.g. "recorder".
+            group (str): entry point group of third-party entries.
+            entries (dict, optional): built-in names to "module:attribute"
+              paths.
+        """
+        self.kind = kind
+        self.group = group
+        self._entries = dict(entries or {})
+        self._loaded = {}
+        self._discovered = False
+
+    def register(self, name, target):
+        """Adds or replaces an entry.
+
+        Args:
+            name (str): name the entry is looked up by.
+            target (str or object): "module:attribute" path imported on first
+              use, or the object itself.
+        """
+        self._entries[name] = target
+        self._loaded.pop(name, None)
+
+    def _discover(self):
+        """Adds the entry points of `group` that are not registered yet."""
+        if self._discovered:
+            return
+        self._discovered = True
+        # importlib.metadata alone takes longer to import than most backends
+        from importlib import metadata  # pylint: disable=import-outside-toplevel
+
+        for entry_point in metadata.entry_points(group=self.group):
+            self._entries.setdefault(entry_point.name, entry_point.value)
+
+    def names(self):
+        """Returns the registered and discovered names, without importing them.
+
+        Returns:
+            tuple: names in registration order.
+        """
+        self._discover()
+        return tuple(self._entries)
+
+    def __contains__(self, name):
+        if name not in self._entries:
+            self._discover()
+        return name in self._entries
+
+    def get(self, name):
+        """Returns the object of an entry, importing it on first use.
+
+        Args:
+            name (str): registered name.
+
+        Returns:
+            object: the registered object.
+        """
+        if name in self._loaded:
+            return self._loaded[name]
+        if name not in self:
+            raise ValueError(
+                f"Invalid {self.kind}: {name}. Must be one of {self.names()}."
+            )
+        target = self._entries[name]
+        if isinstance(target, str):
+            module, _, attribute = target.partition(":")
+            target = importlib.import_module(module)
+            for part in attribute.split(".") if attribute else ():
+                target = getattr(target, part)
+        self._loaded[name] = target
+        return target
+
+
+BACKENDS = Registry(
+    "device backend",
+    "sdrcap.backends",
+    {
+        "rtl": "sdrcap.rtl_interface:RTLSDRInterface",
+        "rtl_tcp": "sdrcap.rtl_tcp:RtlTcpInterface",
+        "sim": "sdrcap.sim_interface:SimulatedSDRInterface",
+    },
+)
+
+RECORDERS = Registry(
+    "file type",
+    "sdrcap.recorders",
+    {
+        "csv": "sdrcap.recorders.csv_recorder:CSVRecorder",
+        "hdf5": "sdrcap.recorders.hdf5_recorder:HDF5Recorder",
+        "cu8": "sdrcap.recorders.raw_recorder:RawIQRecorder",
+        "sdrz": "sdrcap.recorders.compressed_recorder:CompressedRecorder",
+        "parquet": "sdrcap.recorders.parquet_recorder:ParquetRecorder",
+    },
+)
+
+
+def new_recorder(options):
+    """Creates the recorder of the `filetype` recording option.
+
+    Args:
+        options (dict): recording options, see
+          `sdrcap.rtl_interface.DEFAULT_OPTIONS`.
+
+    Returns:
+        Recorder: the recorder, without the pipeline, segment or trigger
+        wrappers `sdrcap.rtl_interface.create_recorder` adds.
+    """
+    return RECORDERS.get(options["filetype"]).from_options(options)
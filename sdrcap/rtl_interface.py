@@ -7,8 +7,13 @@ in various formats, including CSV and HDF5. The class allows for both single sam
 recording and continuous recording modes.
 
 Attributes:
-    AVAILABLE_FILETYPES (tuple): A tuple of supported file types for recording. 
-    Options include "csv" and "hdf5".
+    DEFAULT_OPTIONS (dict): default recording options. The `filetype` option
+    selects a recorder of `sdrcap.registry.RECORDERS`: "csv", "hdf5", "cu8"
+    (raw 8-bit IQ), "sdrz" (compressed chunks), "parquet" or a plugin.
+    Batches are timed by the interface's `sdrcap.clock.CaptureClock`, which
+    counts samples from the first batch of each recording and flags lost
+    samples once a batch arrives more than `clock_tolerance` seconds
+    (default: half a batch) late.
 
 Methods:
     __init__(sdr=None, center_freq=100700000.0, sample_rate=2.4e6, 
@@ -31,6 +36,26 @@ Methods:
                                 record delay. Recording continues indefinitely 
                                 until manually stopped.
 
+    start_recording_threaded(recording_name=None): Starts a threaded capture where
+                                a reader thread drains the device into a ring of
+                                preallocated buffers and a writer thread feeds the
+                                recorder. Returns the `ThreadedCapture`.
+
+    stop_recording_threaded(): Stops the threaded capture, drains queued batches
+                               and stops the recorder. Returns the capture stats.
+
+    stream(duration=None, raw=None): Async generator yielding captured batches
+                                     from the pyrtlsdr asyncio `stream()`.
+
+    record_stream(duration=None, recording_name=None): Coroutine recording the
+                                     stream with executor backed recorder writes.
+                                     Returns the number of batches written.
+
+    sweep(start_freq, stop_freq, num_sweeps=None, duration=None,
+          recording_name=None): Hops the device across a band wider than the
+                                sample rate and records one stitched power
+                                spectrum per sweep. Returns the sweep stats.
+
 Exceptions:
     ValueError: Raised when an invalid file type is provided during initialization.
 
@@ -40,19 +65,170 @@ Usage:
     file formats, and manage both single and continuous recording sessions.
 
 Dependencies:
-    - rtlsdr: The `pyrtlsdr` library for interacting with RTL-SDR hardware.
-    - sdrcap.recorders.hdf5_recorder: Provides functionality for HDF5 file operations.
-    - sdrcap.recorders.csv_recorder: Provides functionality for CSV file operations.
+    - rtlsdr: The `pyrtlsdr` library for interacting with RTL-SDR hardware,
+      imported when a device is opened.
+    - sdrcap.registry: Imports the recorder of the selected file type.
 """
 
+import contextlib
 import os
 import datetime
 import time
-from rtlsdr import RtlSdr
-from sdrcap.recorders.hdf5_recorder import HDF5Recorder
-from sdrcap.recorders.csv_recorder import CSVRecorder
+import numpy as np
 from .hardware_interface import HardwareInterface
-from sdrcap import AVAILABLE_FILETYPES
+from .overview import OverviewRecorder
+from .capture import BufferPool, ThreadedCapture
+from .clock import CaptureClock
+from .recorders.segmented_recorder import SegmentedRecorder
+from .registry import RECORDERS, new_recorder
+from .sweep import FrequencySweeper, SweepPlan
+from .trigger import BurstRecorder, EnergyTrigger
+
+DEFAULT_OPTIONS = {
+    "center_freq": 100700000.0,
+    "sample_rate": 2.4e6,  # type: ignore
+    "freq_correction": 60,
+    "gain": "auto",
+    "record_delay": 2,
+    "sample_window": 1024 * 256,
+    "filetype": "csv",
+    "output_dir": "outputs",
+    "hdf5_streaming": False,
+    "hdf5_dtype": "complex64",
+    "num_buffers": 8,
+    "backpressure": "block",
+    "device_index": 0,
+    "serial_number": None,
+    "fft_size": 1024,
+    "sweep_overlap": 0.25,
+    "settle_time": 0.005,
+    "num_averages": 16,
+    "pipeline": None,
+    "trigger_threshold_db": None,
+    "trigger_hysteresis_db": 3.0,
+    "trigger_block_size": 1024,
+    "pre_trigger": 0.01,
+    "post_trigger": 0.05,
+    "metrics": None,
+    "segment_bytes": None,
+    "segment_seconds": None,
+    "disk_budget": None,
+    "compress_after": None,
+    "codec": "zlib",
+    "codec_level": None,
+    "sample_format": "cu8",
+    "compression_workers": None,
+    "encryption_key": None,
+    "clock_tolerance": None,
+    "hdf5_compression": None,
+    "overview": False,
+    "overview_block_size": 65536,
+    "overview_levels": 4,
+    "overview_factor": 8,
+    "overview_fft_size": 128,
+}
+
+
+def open_rtl_sdr(options):
+    """Opens the RTL SDR selected by serial number or index with radio parameters.
+
+    Args:
+        options (dict): radio options, see `DEFAULT_OPTIONS`. `serial_number`
+          takes precedence over `device_index` when set.
+
+    Returns:
+        RtlSdr: the configured device.
+    """
+    from rtlsdr import RtlSdr  # pylint: disable=import-outside-toplevel
+
+    if options.get("serial_number") is not None:
+        sdr = RtlSdr(serial_number=options["serial_number"])
+    else:
+        sdr = RtlSdr(device_index=options.get("device_index", 0))
+    sdr.sample_rate = options["sample_rate"]
+    sdr.center_freq = options["center_freq"]
+    sdr.freq_correction = options["freq_correction"]
+    sdr.gain = options["gain"]
+    return sdr
+
+
+def create_recorder(options):
+    """Creates the recorder selected by the `filetype` recording option.
+
+    With a DSP `pipeline` option the recorder is set up for the pipeline
+    output: its sample rate and center frequency are the decimated and
+    shifted ones and the pipeline description is added to its attributes.
+    With the `overview` option every recording gets a multi-resolution
+    overview, see `sdrcap.overview`.
+    With a `segment_bytes` or `segment_seconds` option recordings roll over
+    into segment files managed by a `SegmentedRecorder`, which also applies
+    the `disk_budget` and `compress_after` retention options.
+    With a `trigger_threshold_db` option the recorder is wrapped in a
+    `BurstRecorder` that only saves energy triggered bursts.
+
+    Args:
+        options (dict): recording options, see `DEFAULT_OPTIONS`.
+
+    Returns:
+        Recorder: the configured recorder.
+    """
+    pipeline = options.get("pipeline")
+    if pipeline is not None:
+        options = {
+            **options,
+            "sample_rate": pipeline.output_rate,
+            "center_freq": pipeline.output_center_freq(options["center_freq"]),
+        }
+    if (
+        options.get("segment_bytes") is not None
+        or options.get("segment_seconds") is not None
+    ):
+        recorder = SegmentedRecorder(
+            lambda: _new_overview_recorder(options),
+            max_bytes=options["segment_bytes"],
+            max_seconds=options["segment_seconds"],
+            disk_budget=options.get("disk_budget"),
+            compress_after=options.get("compress_after"),
+        )
+    else:
+        recorder = _new_overview_recorder(options)
+    if pipeline is not None:
+        recorder.attributes.update(pipeline.metadata())
+    if options.get("trigger_threshold_db") is not None:
+        recorder = BurstRecorder(
+            recorder,
+            EnergyTrigger(
+                options["trigger_threshold_db"],
+                hysteresis_db=options["trigger_hysteresis_db"],
+                block_size=options["trigger_block_size"],
+            ),
+            sample_rate=options["sample_rate"],
+            pre_trigger=options["pre_trigger"],
+            post_trigger=options["post_trigger"],
+        )
+    return recorder
+
+
+def _new_overview_recorder(options):
+    """Creates the `filetype` recorder, wrapped when `overview` is set."""
+    recorder = new_recorder(options)
+    if not options.get("overview"):
+        return recorder
+    return OverviewRecorder(
+        recorder,
+        sample_rate=options["sample_rate"],
+        center_freq=options["center_freq"],
+        block_size=options["overview_block_size"],
+        levels=options["overview_levels"],
+        factor=options["overview_factor"],
+        fft_size=options["overview_fft_size"],
+    )
+
+
+def _num_samples(samples):
+    """Returns the number of IQ samples in complex samples or interleaved bytes."""
+    samples = np.asarray(samples)
+    return len(samples) // 2 if samples.dtype == np.uint8 else len(samples)
 
 
 class RTLSDRInterface(HardwareInterface):
@@ -65,81 +241,341 @@ class RTLSDRInterface(HardwareInterface):
             sdr: Optional RTL-SDR object.
             **options: Configuration options for the RTL-SDR and recording.
         """
-        defaults = {
-            "center_freq": 100700000.0,
-            "sample_rate": 2.4e6,  # type: ignore
-            "freq_correction": 60,
-            "gain": "auto",
-            "record_delay": 2,
-            "sample_window": 1024 * 256,
-            "filetype": "csv",
-            "output_dir": "outputs",
-        }
-        self.options = {**defaults, **options}
+        self.options = {**DEFAULT_OPTIONS, **options}
 
-        if self.options["filetype"] not in AVAILABLE_FILETYPES:
+        if self.options["filetype"] not in RECORDERS:
             raise ValueError(
                 f"Invalid file type: {self.options["filetype"]}."
-                f"Must be one of {AVAILABLE_FILETYPES}."
+                f"Must be one of {RECORDERS.names()}."
+            )
+        if (
+            self.options["encryption_key"] is not None
+            and self.options["filetype"] != "sdrz"
+        ):
+            raise ValueError(
+                f"Invalid file type: {self.options["filetype"]}. "
+                "Encryption needs the sdrz file type."
             )
 
         if sdr is None:
             self.sdr = self._setup_rtl_sdr()
         else:
             self.sdr = sdr
+        self.capture = None
+        self._buffer_pool = None
 
         os.makedirs(self.options["output_dir"], exist_ok=True)
 
-        if self.options["filetype"] == "hdf5":
-            self.options["recorder"] = HDF5Recorder(
-                center_freq=self.options["center_freq"],
-                sample_rate=self.options["sample_rate"],
-                freq_correction=self.options["freq_correction"],
-                gain=self.options["gain"],
-            )
-        elif self.options["filetype"] == "csv":
-            self.options["recorder"] = CSVRecorder()
-        else:
-            raise ValueError(
-                f"Invalid file type: {self.options["filetype"]}."
-                f"Must be one of {AVAILABLE_FILETYPES}."
-            )
+        self.clock = CaptureClock(
+            self.options["sample_rate"], tolerance=self.options["clock_tolerance"]
+        )
+        self.options["recorder"] = create_recorder(self.options)
+        self.options["recorder"].clock = self.clock
 
     def _setup_rtl_sdr(self):
         """Initializes the RTL SDR with radio parameters."""
-        sdr = RtlSdr()
-        sdr.center_freq = self.options["center_freq"]
-        sdr.freq_correction = self.options["freq_correction"]
-        sdr.gain = self.options["gain"]
-        return sdr
+        return open_rtl_sdr(self.options)
 
-    def record_single_sample(self, recording_name=None):
-        """Records a single sample, based off the SDR sample size and calls recorder.
+    def recording_filename(self, recording_name=None):
+        """Builds the output filename of a recording.
 
         Args:
             recording_name (string for filename addition, optional):
               Specifies filename alongside recording information. Defaults to None.
+
+        Returns:
+            str: the path the recorder writes the recording to.
         """
         if recording_name is not None:
-            filename = (f"{self.options["output_dir"]}/{recording_name}"
+            return (f"{self.options["output_dir"]}/{recording_name}"
             f"-sample_window{self.options["sample_window"]}.{self.options["filetype"]}")
-        else:
-            filename = (
-                f"{self.options["output_dir"]}/"
-                f"sample_window{self.options["sample_window"]}.{self.options["filetype"]}"
-            )
+        return (
+            f"{self.options["output_dir"]}/"
+            f"sample_window{self.options["sample_window"]}.{self.options["filetype"]}"
+        )
+
+    @property
+    def buffer_pool(self):
+        """BufferPool: buffers of `record_single_sample`, sized on first use."""
+        window = self.options["sample_window"]
+        if self._buffer_pool is None or self._buffer_pool.num_samples != window:
+            self._buffer_pool = BufferPool(1, window)
+        return self._buffer_pool
+
+    def record_single_sample(self, recording_name=None):
+        """Records a single sample, based off the SDR sample size and calls recorder.
+
+        Args:
+            recording_name (string for filename addition, optional):
+              Specifies filename alongside recording information. Defaults to None.
+        """
+        filename = self.recording_filename(recording_name)
         if self.sdr is None:
             self.sdr = self._setup_rtl_sdr()
-        else:
-            samples = self.sdr.read_samples(self.options["sample_window"])
+            return
+        metrics = self.options["metrics"]
+        pool = self.buffer_pool
+        index = pool.acquire()
+        try:
+            start = time.perf_counter()
+            raw = pool.read(index, self.sdr)
+            read_end = time.perf_counter()
+            self.clock.begin_batch(self.clock.capture(len(raw) // 2))
+            if self.options["pipeline"] is not None:
+                samples = self.options["pipeline"].process(raw)
+            elif self.options["recorder"].raw_input:
+                samples = raw
+            else:
+                samples = pool.convert(index)
+            save_start = time.perf_counter()
             self.options["recorder"].save(samples=samples, filename=filename)
+        finally:
+            pool.release(index)
+        if metrics is not None:
+            metrics.observe_read(read_end - start, self.options["sample_window"])
+            metrics.observe_save(
+                time.perf_counter() - save_start,
+                _num_samples(samples),
+                np.asarray(samples).nbytes,
+            )
 
     def start_recording_continuous_samples(self):
         """Starts a continuous, synchronous, stream of samples. Establishes recording start time."""
         start_record_time = datetime.datetime.now().timestamp()
+        self.clock.reset()
         self.options["recorder"].start_recording(start_record_time)
         if self.sdr is None:
             self.sdr = self._setup_rtl_sdr()
         while True:
             self.record_single_sample(recording_name=start_record_time)
             time.sleep(int(self.options["record_delay"]))
+
+    def start_recording_threaded(self, recording_name=None):
+        """Starts a threaded capture with separate device reader and recorder writer.
+
+        The reader uses the pyrtlsdr async callback API and never waits on disk
+        I/O; what happens when the writer falls behind by `num_buffers` batches
+        is set by the `backpressure` option ("block", "drop-oldest" or
+        "drop-newest").
+
+        Args:
+            recording_name (string for filename addition, optional):
+              Specifies filename alongside recording information. Defaults to
+              the recording start time.
+
+        Returns:
+            ThreadedCapture: the running capture.
+        """
+        if self.capture is not None and self.capture.running:
+            raise RuntimeError("A threaded capture is already running.")
+        if self.sdr is None:
+            self.sdr = self._setup_rtl_sdr()
+        if recording_name is None:
+            recording_name = datetime.datetime.now().timestamp()
+        self.capture = ThreadedCapture(
+            self.sdr,
+            self.options["recorder"],
+            self.recording_filename(recording_name),
+            sample_window=self.options["sample_window"],
+            sample_rate=self.options["sample_rate"],
+            num_buffers=self.options["num_buffers"],
+            backpressure=self.options["backpressure"],
+            raw=self.options["recorder"].raw_input
+            or self.options["pipeline"] is not None,
+            pipeline=self.options["pipeline"],
+            metrics=self.options["metrics"],
+            clock=self.clock,
+        )
+        self.capture.start()
+        return self.capture
+
+    def stop_recording_threaded(self, timeout=None):
+        """Stops the threaded capture and the recorder.
+
+        Args:
+            timeout (float, optional): seconds to wait for each capture thread.
+
+        Returns:
+            dict: captured, written, dropped and late batch counters.
+
+        Raises:
+            RuntimeError: if no capture was started, or its writer is still
+              saving after `timeout` (see `ThreadedCapture.stop`).
+        """
+        if self.capture is None:
+            raise RuntimeError("No threaded capture has been started.")
+        self.capture.stop(timeout)
+        return self.capture.stats
+
+    async def stream(self, duration=None, raw=None):
+        """Yields captured batches without blocking the event loop.
+
+        Built on the pyrtlsdr asyncio `stream()` when the device has it,
+        otherwise every blocking read runs in the default executor. Stop
+        early by breaking out of the loop, cancelling the consuming task or
+        wrapping it in `asyncio.timeout`; use `contextlib.aclosing` so the
+        device stream is stopped right away:
+
+            async with contextlib.aclosing(interface.stream()) as batches:
+                async for samples in batches:
+                    ...
+
+        Args:
+            duration (float, optional): seconds to stream. Defaults to no limit.
+            raw (bool, optional): yield interleaved uint8 IQ bytes instead of
+              complex samples. Defaults to raw when the recorder takes raw
+              input or a DSP pipeline is set.
+
+        Yields:
+            numpy.ndarray: complex samples or uint8 bytes of one batch.
+        """
+        # only coroutines use asyncio, its import is left to the event loop
+        import asyncio  # pylint: disable=import-outside-toplevel
+
+        if self.sdr is None:
+            self.sdr = self._setup_rtl_sdr()
+        if raw is None:
+            raw = (
+                self.options["recorder"].raw_input
+                or self.options["pipeline"] is not None
+            )
+        window = self.options["sample_window"]
+        loop = asyncio.get_running_loop()
+        deadline = None if duration is None else loop.time() + duration
+
+        if hasattr(self.sdr, "stream"):
+            batches = self.sdr.stream(
+                2 * window if raw else window, format="bytes" if raw else "samples"
+            )
+            read = batches.__anext__
+        else:
+            batches = None
+            blocking_read = self.sdr.read_bytes if raw else self.sdr.read_samples
+            size = 2 * window if raw else window
+
+            async def read():
+                return await loop.run_in_executor(None, blocking_read, size)
+
+        try:
+            while True:
+                timeout = None if deadline is None else deadline - loop.time()
+                if timeout is not None and timeout <= 0:
+                    return
+                read_start = time.perf_counter()
+                try:
+                    batch = await asyncio.wait_for(read(), timeout)
+                except (StopAsyncIteration, TimeoutError):
+                    return
+                if self.options["metrics"] is not None:
+                    self.options["metrics"].observe_read(
+                        time.perf_counter() - read_start, window
+                    )
+                if raw:
+                    # async byte buffers belong to librtlsdr and get reused
+                    batch = np.frombuffer(batch, dtype=np.uint8).copy()
+                yield batch
+        finally:
+            if batches is not None:
+                await asyncio.shield(self.sdr.stop())
+
+    async def record_stream(self, duration=None, recording_name=None):
+        """Records the asyncio stream, writing batches through an executor.
+
+        Cancelling the task, or a timeout around it, finishes the batch being
+        written, stops the device stream and stops the recorder before the
+        cancellation propagates.
+
+        Args:
+            duration (float, optional): seconds to record. Defaults to no limit.
+            recording_name (string for filename addition, optional):
+              Specifies filename alongside recording information. Defaults to
+              the recording start time.
+
+        Returns:
+            int: number of batches written.
+        """
+        recorder = self.options["recorder"]
+        pipeline = self.options["pipeline"]
+        metrics = self.options["metrics"]
+        start_record_time = datetime.datetime.now().timestamp()
+        if recording_name is None:
+            recording_name = start_record_time
+        filename = self.recording_filename(recording_name)
+        self.clock.reset()
+        recorder.start_recording(start_record_time)
+        written = 0
+        try:
+            async with contextlib.aclosing(self.stream(duration=duration)) as batches:
+                async for samples in batches:
+                    self.clock.begin_batch(self.clock.capture(_num_samples(samples)))
+                    if pipeline is not None:
+                        samples = pipeline.process(samples)
+                    save_start = time.perf_counter()
+                    await recorder.save_async(samples, filename)
+                    if metrics is not None:
+                        metrics.observe_save(
+                            time.perf_counter() - save_start,
+                            _num_samples(samples),
+                            samples.nbytes,
+                        )
+                    written += 1
+        finally:
+            await recorder.stop_recording_async(time.time())
+        return written
+
+    def sweep(
+        self,
+        start_freq,
+        stop_freq,
+        num_sweeps=None,
+        duration=None,
+        recording_name=None,
+    ):
+        """Sweeps a band and records its stitched wideband power spectrum.
+
+        The hop layout comes from the `fft_size`, `sweep_overlap`,
+        `settle_time` and `num_averages` options. Spectra are recorded to
+        HDF5 when `filetype` is "hdf5" and to the compact "bin" format
+        otherwise.
+
+        Args:
+            start_freq (float): lowest frequency of the band in Hz.
+            stop_freq (float): highest frequency of the band in Hz.
+            num_sweeps (int, optional): sweeps to run. Defaults to no limit.
+            duration (float, optional): seconds to sweep. Defaults to no limit.
+            recording_name (string for filename addition, optional):
+              Specifies filename alongside recording information. Defaults to
+              the recording start time.
+
+        Returns:
+            dict: sweeps, hops, elapsed seconds and hops_per_second.
+        """
+        if self.sdr is None:
+            self.sdr = self._setup_rtl_sdr()
+        if recording_name is None:
+            recording_name = datetime.datetime.now().timestamp()
+        plan = SweepPlan(
+            start_freq,
+            stop_freq,
+            sample_rate=self.options["sample_rate"],
+            fft_size=self.options["fft_size"],
+            overlap=self.options["sweep_overlap"],
+            settle_time=self.options["settle_time"],
+            num_averages=self.options["num_averages"],
+        )
+        # pylint: disable=import-outside-toplevel
+        from sdrcap.recorders.spectrum_recorder import SpectrumRecorder
+
+        spectrum_format = "hdf5" if self.options["filetype"] == "hdf5" else "bin"
+        recorder = SpectrumRecorder(
+            plan,
+            gain=self.options["gain"],
+            freq_correction=self.options["freq_correction"],
+            spectrum_format=spectrum_format,
+        )
+        filename = (
+            f"{self.options["output_dir"]}/{recording_name}"
+            f"-sweep{int(start_freq)}-{int(stop_freq)}.{spectrum_format}"
+        )
+        sweeper = FrequencySweeper(self.sdr, plan)
+        return sweeper.run(recorder, filename, num_sweeps=num_sweeps, duration=duration)
@@ -0,0 +1,420 @@
+"""
+Module for capturing over the network with the rtl_tcp protocol.
+
+rtl_tcp serves the raw interleaved uint8 IQ stream of an RTL-SDR over TCP.
+On connect the server sends a 12 byte header ("RTL0", tuner type and gain
+count as big-endian uint32) and then streams samples; the client tunes the
+device with 5 byte commands (a command byte and a big-endian uint32).
+
+Classes:
+    RtlTcpClient: device with the pyrtlsdr read API reading from any rtl_tcp
+      server, so every recorder can capture from a remote dongle.
+    RtlTcpInterface: the `RTLSDRInterface` on top of an `RtlTcpClient`.
+    RtlTcpServer: rtl_tcp compatible server reading one local device once
+      and fanning the stream out to any number of subscribers.
+
+The server shares every batch between its subscribers as one read-only
+memoryview; each subscriber has its own bounded queue, so a slow client
+loses its oldest batches (counted in its stats) instead of stalling the
+device or the other clients.
+
+Usage:
+    server = RtlTcpServer(open_rtl_sdr(options), host="0.0.0.0").start()
+    ...
+    interface = RtlTcpInterface(host="mast.local", filetype="cu8")
+    interface.start_recording_threaded()
+"""
+
+import socket
+import struct
+import threading
+from collections import deque
+import numpy as np
+from sdrcap.iq import cu8_to_complex64
+from .rtl_interface import RTLSDRInterface
+
+DEFAULT_PORT = 1234
+HEADER_MAGIC = b"RTL0"
+HEADER = struct.Struct(">4sII")
+COMMAND = struct.Struct(">BI")
+# tuner type reported by the server, R820T
+TUNER_R820T = 5
+R820T_GAIN_COUNT = 29
+
+CMD_SET_FREQ = 0x01
+CMD_SET_SAMPLE_RATE = 0x02
+CMD_SET_GAIN_MODE = 0x03
+CMD_SET_GAIN = 0x04
+CMD_SET_FREQ_CORRECTION = 0x05
+
+
+def _recv_exact(sock, view):
+    """Fills `view` from the socket, raising ConnectionError on EOF."""
+    filled = 0
+    while filled < len(view):
+        received = sock.recv_into(view[filled:])
+        if not received:
+            raise ConnectionError("rtl_tcp connection closed.")
+        filled += received
+
+
+class RtlTcpClient:
+    """Device with the pyrtlsdr read API streaming from an rtl_tcp server."""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, timeout=10.0):
+        """Connects to the server and reads its header.
+
+        Args:
+            host (str, optional): server address. Defaults to localhost.
+            port (int, optional): server port. Defaults to 1234.
+            timeout (float, optional): socket timeout in seconds. Defaults to 10.
+        """
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        header = bytearray(HEADER.size)
+        _recv_exact(self.sock, memoryview(header))
+        magic, self.tuner_type, self.gain_count = HEADER.unpack(header)
+        if magic != HEADER_MAGIC:
+            self.sock.close()
+            raise ValueError(f"Invalid rtl_tcp header: {bytes(header)!r}.")
+        self._center_freq = None
+        self._sample_rate = None
+        self._gain = None
+        self._freq_correction = None
+        self._cancel = threading.Event()
+
+    def send_command(self, command, param):
+        """Sends one rtl_tcp command.
+
+        Args:
+            command (int): command byte, e.g. `CMD_SET_FREQ`.
+            param (int): unsigned 32 bit parameter.
+        """
+        self.sock.sendall(COMMAND.pack(command, int(param) & 0xFFFFFFFF))
+
+    @property
+    def center_freq(self):
+        """float: tuned frequency in Hz."""
+        return self._center_freq
+
+    @center_freq.setter
+    def center_freq(self, freq):
+        self.send_command(CMD_SET_FREQ, round(freq))
+        self._center_freq = freq
+
+    @property
+    def sample_rate(self):
+        """float: sample rate in Hz."""
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, rate):
+        self.send_command(CMD_SET_SAMPLE_RATE, round(rate))
+        self._sample_rate = rate
+
+    @property
+    def gain(self):
+        """float or str: tuner gain in dB, or "auto"."""
+        return self._gain
+
+    @gain.setter
+    def gain(self, gain):
+        if gain == "auto":
+            self.send_command(CMD_SET_GAIN_MODE, 0)
+        else:
+            self.send_command(CMD_SET_GAIN_MODE, 1)
+            self.send_command(CMD_SET_GAIN, round(gain * 10))
+        self._gain = gain
+
+    @property
+    def freq_correction(self):
+        """int: frequency correction in ppm."""
+        return self._freq_correction
+
+    @freq_correction.setter
+    def freq_correction(self, ppm):
+        self.send_command(CMD_SET_FREQ_CORRECTION, ppm)
+        self._freq_correction = ppm
+
+    def read_bytes(self, num_bytes):
+        """Returns the next `num_bytes` interleaved uint8 IQ bytes.
+
+        Bytes are received straight into the returned array.
+        """
+        return self.read_bytes_into(np.empty(num_bytes, dtype=np.uint8))
+
+    def read_bytes_into(self, out):
+        """Receives the next `len(out)` interleaved uint8 IQ bytes into `out`.
+
+        Returns:
+            numpy.ndarray: `out`.
+        """
+        _recv_exact(self.sock, memoryview(out))
+        return out
+
+    def read_samples(self, num_samples):
+        """Returns the next `num_samples` complex samples."""
+        return cu8_to_complex64(self.read_bytes(2 * num_samples))
+
+    def read_bytes_async(self, callback, num_bytes):
+        """Calls back with byte batches until `cancel_read_async`."""
+        self._cancel.clear()
+        while not self._cancel.is_set():
+            callback(self.read_bytes(num_bytes), self)
+
+    def read_samples_async(self, callback, num_samples):
+        """Calls back with sample batches until `cancel_read_async`."""
+        self._cancel.clear()
+        while not self._cancel.is_set():
+            callback(self.read_samples(num_samples), self)
+
+    def cancel_read_async(self):
+        """Stops the async read loop after the batch being received."""
+        self._cancel.set()
+
+    def close(self):
+        """Closes the connection."""
+        self._cancel.set()
+        self.sock.close()
+
+
+class RtlTcpInterface(RTLSDRInterface):
+    """Class running the RTL-SDR interface on a remote rtl_tcp device."""
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, **options):
+        """Initialize the RtlTcpInterface.
+
+        Args:
+            host (str, optional): rtl_tcp server address. Defaults to localhost.
+            port (int, optional): rtl_tcp server port. Defaults to 1234.
+            **options: Configuration options for the device and recording,
+              see `sdrcap.rtl_interface.DEFAULT_OPTIONS`.
+        """
+        self.host = host
+        self.port = port
+        super().__init__(sdr=None, **options)
+
+    def _setup_rtl_sdr(self):
+        """Connects to the server and sends the radio parameters."""
+        sdr = RtlTcpClient(self.host, self.port)
+        sdr.sample_rate = self.options["sample_rate"]
+        sdr.center_freq = self.options["center_freq"]
+        sdr.freq_correction = self.options["freq_correction"]
+        sdr.gain = self.options["gain"]
+        return sdr
+
+
+class _Subscriber:
+    """Connected client with its own bounded queue of shared batches."""
+
+    def __init__(self, sock, address, max_queue):
+        self.sock = sock
+        self.address = address
+        self.max_queue = max_queue
+        self.dropped = 0
+        self.sent_bytes = 0
+        self.closed = False
+        self._queue = deque()
+        self._cond = threading.Condition()
+
+    def publish(self, view):
+        """Queues a batch, dropping this client's oldest one when full."""
+        with self._cond:
+            if len(self._queue) >= self.max_queue:
+                self._queue.popleft()
+                self.dropped += 1
+            self._queue.append(view)
+            self._cond.notify()
+
+    def close(self):
+        """Disconnects the client and wakes up its sender."""
+        with self._cond:
+            self.closed = True
+            self._cond.notify()
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+    def send_loop(self):
+        """Sends queued batches until the client is closed or disconnects."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self.closed)
+                if self.closed:
+                    return
+                view = self._queue.popleft()
+            try:
+                self.sock.sendall(view)
+            except OSError:
+                self.close()
+                return
+            self.sent_bytes += len(view)
+
+    @property
+    def stats(self):
+        """dict: client address, bytes sent, batches dropped and queued."""
+        return {
+            "address": self.address,
+            "sent_bytes": self.sent_bytes,
+            "dropped": self.dropped,
+            "queued": len(self._queue),
+        }
+
+
+class RtlTcpServer:
+    """rtl_tcp compatible server fanning one local device out to many clients."""
+
+    def __init__(self, sdr, host="127.0.0.1", port=DEFAULT_PORT, **options):
+        """Initialize the RtlTcpServer.
+
+        Args:
+            sdr: pyrtlsdr style device to read from.
+            host (str, optional): address to bind. Defaults to localhost.
+            port (int, optional): port to bind, 0 for any free port.
+              Defaults to 1234.
+            **options: `buffer_size` (int, default 262144) bytes per batch,
+              `max_queue` (int, default 32) batches queued per client before
+              its oldest are dropped and `allow_control` (bool, default
+              False) to apply tuning commands from clients to the shared
+              device; otherwise they are ignored.
+        """
+        self.sdr = sdr
+        self.host = host
+        self.port = port
+        self.buffer_size = options.get("buffer_size", 1024 * 256)
+        self.max_queue = options.get("max_queue", 32)
+        self.allow_control = options.get("allow_control", False)
+        if self.buffer_size <= 0 or self.buffer_size % 2:
+            raise ValueError(
+                f"Invalid buffer_size: {self.buffer_size}. Must be a positive even number."
+            )
+        if self.max_queue < 1:
+            raise ValueError(f"Invalid max_queue: {self.max_queue}. Must be >= 1.")
+        self.subscribers = []
+        self.errors = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._listener = None
+        self._threads = []
+
+    def start(self):
+        """Binds the port and starts the accept and device reader threads.
+
+        Returns:
+            RtlTcpServer: the running server.
+        """
+        self._stopping.clear()
+        self._listener = socket.create_server((self.host, self.port))
+        self._listener.settimeout(0.2)
+        self.port = self._listener.getsockname()[1]
+        for target, name in (
+            (self._accept_loop, "sdrcap-rtl-tcp-accept"),
+            (self._read_loop, "sdrcap-rtl-tcp-reader"),
+        ):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        """Stops reading the device and disconnects every client.
+
+        Args:
+            timeout (float, optional): seconds to wait for each thread.
+        """
+        self._stopping.set()
+        if hasattr(self.sdr, "cancel_read_async"):
+            self.sdr.cancel_read_async()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self._listener.close()
+        with self._lock:
+            subscribers, self.subscribers = self.subscribers, []
+        for subscriber in subscribers:
+            subscriber.close()
+
+    @property
+    def stats(self):
+        """list: per client stats of the connected clients."""
+        with self._lock:
+            return [subscriber.stats for subscriber in self.subscribers]
+
+    def publish(self, batch):
+        """Shares one batch with every connected client.
+
+        Args:
+            batch (bytes-like): raw uint8 IQ bytes. It is referenced, not
+              copied, so it must not be modified afterwards.
+        """
+        view = memoryview(batch).cast("B").toreadonly()
+        with self._lock:
+            self.subscribers = [s for s in self.subscribers if not s.closed]
+            subscribers = tuple(self.subscribers)
+        for subscriber in subscribers:
+            subscriber.publish(view)
+
+    def _accept_loop(self):
+        """Accepts clients until stopped."""
+        while not self._stopping.is_set():
+            try:
+                sock, address = self._listener.accept()
+            except TimeoutError:
+                continue
+            except OSError:
+                return
+            sock.settimeout(None)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.sendall(HEADER.pack(HEADER_MAGIC, TUNER_R820T, R820T_GAIN_COUNT))
+            subscriber = _Subscriber(sock, address, self.max_queue)
+            with self._lock:
+                self.subscribers.append(subscriber)
+            for target in (subscriber.send_loop, lambda s=subscriber: self._command_loop(s)):
+                threading.Thread(target=target, daemon=True).start()
+
+    def _command_loop(self, subscriber):
+        """Receives the commands of one client until it disconnects."""
+        command = bytearray(COMMAND.size)
+        try:
+            while True:
+                _recv_exact(subscriber.sock, memoryview(command))
+                if self.allow_control:
+                    self._apply_command(*COMMAND.unpack(command))
+        except OSError:
+            subscriber.close()
+
+    def _apply_command(self, command, param):
+        """Applies a client tuning command to the shared device."""
+        if command == CMD_SET_FREQ:
+            self.sdr.center_freq = param
+        elif command == CMD_SET_SAMPLE_RATE:
+            self.sdr.sample_rate = param
+        elif command == CMD_SET_GAIN_MODE and param == 0:
+            self.sdr.gain = "auto"
+        elif command == CMD_SET_GAIN:
+            self.sdr.gain = param / 10
+        elif command == CMD_SET_FREQ_CORRECTION:
+            # ppm is a signed value sent as its two's complement
+            self.sdr.freq_correction = param - (1 << 32) if param >> 31 else param
+
+    def _on_batch(self, batch, _context):
+        """Device callback; async buffers get reused, so they are copied once."""
+        if not self._stopping.is_set():
+            self.publish(bytes(batch))
+
+    def _read_loop(self):
+        """Reads the device until stopped, async when the device supports it.
+
+        pyrtlsdr's `read_bytes` also reuses its buffer, so sync batches are
+        copied once too.
+        """
+        try:
+            if hasattr(self.sdr, "read_bytes_async"):
+                self.sdr.read_bytes_async(self._on_batch, self.buffer_size)
+            else:
+                while not self._stopping.is_set():
+                    self.publish(bytes(self.sdr.read_bytes(self.buffer_size)))
+        except Exception as exc:  # pylint: disable=broad-exception-caught
+            self.errors.append(exc)
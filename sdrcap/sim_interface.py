@@ -0,0 +1,247 @@
+"""
+Module for running the capture path without SDR hardware.
+
+`SimulatedRtlSdr` stands in for a pyrtlsdr `RtlSdr`: it offers the same
+blocking and async read calls, but its samples come from a signal source
+instead of a dongle. Two sources are available:
+
+    - `SyntheticSource`: tones, bursts and noise at absolute frequencies, so
+      retuning (e.g. by a frequency sweep) moves them through the band.
+    - `ReplaySource`: samples of a previous recording, read through
+      `sdrcap.readers` and optionally looped.
+
+Samples go through the same 8-bit quantization as the RTL-SDR. With
+`realtime` pacing the device delivers samples no faster than its sample rate
+and, like the hardware, loses samples when it is not read for longer than its
+internal buffers last; `dropped_samples` counts them. Unthrottled, it
+delivers samples as fast as they are read.
+
+`SimulatedSDRInterface` is the `RTLSDRInterface` on top of such a device, so
+every recording mode can be tested and benchmarked on any machine.
+
+Usage:
+    source = SyntheticSource(tones=((462.5625e6, 0.5),), noise_db=-40)
+    iface = SimulatedSDRInterface(source=source, center_freq=462.6e6,
+                                  filetype="cu8", realtime=False)
+    iface.start_recording_threaded()
+"""
+
+import threading
+import time
+import numpy as np
+from sdrcap.iq import complex_to_cu8, cu8_to_complex64
+from .rtl_interface import RTLSDRInterface
+
+
+def _tone(seconds, offset, amplitude):
+    """Returns a complex tone at baseband `offset` Hz sampled at `seconds`."""
+    return (amplitude * np.exp(2j * np.pi * offset * seconds)).astype(np.complex64)
+
+
+class SyntheticSource:
+    """Signal source of tones, periodic bursts and complex Gaussian noise."""
+
+    def __init__(self, tones=(), bursts=(), noise_db=-40.0, seed=None):
+        """Initialize the SyntheticSource.
+
+        Args:
+            tones (iterable, optional): (frequency Hz, amplitude) continuous tones.
+            bursts (iterable, optional): (frequency Hz, amplitude, period s,
+              duration s) tones switched on for `duration` every `period`.
+            noise_db (float, optional): noise power in dBFS, None for no noise.
+              Defaults to -40.
+            seed (int, optional): noise random seed.
+        """
+        self.tones = tuple(tones)
+        self.bursts = tuple(bursts)
+        self.noise_db = noise_db
+        self._rng = np.random.default_rng(seed)
+
+    def generate(self, index, count, center_freq, sample_rate):
+        """Returns the samples `index` to `index + count` of the stream.
+
+        Args:
+            index (int): absolute index of the first sample.
+            count (int): number of samples.
+            center_freq (float): frequency the device is tuned to in Hz.
+            sample_rate (float): device sample rate in Hz.
+
+        Returns:
+            numpy.ndarray: complex64 samples.
+        """
+        samples = np.zeros(count, dtype=np.complex64)
+        if self.noise_db is not None:
+            scale = np.sqrt(10 ** (self.noise_db / 10) / 2)
+            noise = self._rng.standard_normal(2 * count, dtype=np.float32)
+            samples.view(np.float32)[:] = noise * scale
+        indexes = index + np.arange(count)
+        seconds = indexes / sample_rate
+        for freq, amplitude in self.tones:
+            if abs(freq - center_freq) < sample_rate / 2:
+                samples += _tone(seconds, freq - center_freq, amplitude)
+        for freq, amplitude, period, duration in self.bursts:
+            on = indexes % round(period * sample_rate) < round(duration * sample_rate)
+            if on.any() and abs(freq - center_freq) < sample_rate / 2:
+                samples[on] += _tone(seconds[on], freq - center_freq, amplitude)
+        return samples
+
+
+class ReplaySource:
+    """Signal source replaying a recording readable by `sdrcap.readers`."""
+
+    def __init__(self, filename, loop=True):
+        """Initialize the ReplaySource.
+
+        Args:
+            filename (str): path of a .cu8 or .hdf5 recording.
+            loop (bool, optional): restart at the beginning when the
+              recording ends, else pad with zeros. Defaults to True.
+        """
+        from sdrcap.readers import open_recording  # pylint: disable=import-outside-toplevel
+
+        self.reader = open_recording(filename)
+        self.loop = loop
+        if not len(self.reader):
+            raise ValueError(f"Recording {filename} holds no samples.")
+
+    @property
+    def sample_rate(self):
+        """float: sample rate of the recording."""
+        return self.reader.sample_rate
+
+    @property
+    def center_freq(self):
+        """float: center frequency of the recording."""
+        return self.reader.center_freq
+
+    def generate(self, index, count, center_freq, sample_rate):
+        """Returns the samples `index` to `index + count` of the recording.
+
+        The tuning parameters are ignored: a replay always plays back what
+        was recorded.
+        """
+        del center_freq, sample_rate
+        length = len(self.reader)
+        samples = np.zeros(count, dtype=np.complex64)
+        filled = 0
+        while filled < count:
+            position = index + filled
+            if self.loop:
+                position %= length
+            elif position >= length:
+                break
+            part = self.reader.read(position, position + count - filled)
+            samples[filled : filled + len(part)] = part
+            filled += len(part)
+        return samples
+
+
+class SimulatedRtlSdr:
+    """Device with the pyrtlsdr read API producing samples from a source."""
+
+    def __init__(self, source=None, realtime=True, **options):
+        """Initialize the SimulatedRtlSdr.
+
+        Args:
+            source (SyntheticSource or ReplaySource, optional): signal source.
+              Defaults to a tone 100 kHz above the center frequency in noise.
+            realtime (bool, optional): pace reads at the sample rate.
+              Defaults to True.
+            **options: `center_freq`, `sample_rate`, `gain`,
+              `freq_correction` and `device_buffers` (int, default 15), the
+              number of `read_*_async` sized buffers the device holds before
+              it loses samples when paced.
+        """
+        self.center_freq = options.get("center_freq", 100700000.0)
+        self.sample_rate = options.get("sample_rate", 2.4e6)
+        self.gain = options.get("gain", "auto")
+        self.freq_correction = options.get("freq_correction", 60)
+        self.device_buffers = options.get("device_buffers", 15)
+        if source is None:
+            source = SyntheticSource(tones=((self.center_freq + 100e3, 0.5),))
+        self.source = source
+        self.realtime = realtime
+        self.sample_index = 0
+        self.dropped_samples = 0
+        self._clock_start = None
+        self._cancel = threading.Event()
+
+    def _next(self, count):
+        """Produces the next `count` samples, paced when running in real time."""
+        if self.realtime:
+            now = time.monotonic()
+            if self._clock_start is None:
+                self._clock_start = now - self.sample_index / self.sample_rate
+            # samples the hardware produced while nobody read them
+            produced = int((now - self._clock_start) * self.sample_rate)
+            overflow = produced - self.sample_index - self.device_buffers * count
+            if overflow > 0:
+                self.sample_index += overflow
+                self.dropped_samples += overflow
+            ready_at = (
+                self._clock_start + (self.sample_index + count) / self.sample_rate
+            )
+            if ready_at > now:
+                time.sleep(ready_at - now)
+        samples = self.source.generate(
+            self.sample_index, count, self.center_freq, self.sample_rate
+        )
+        self.sample_index += count
+        return samples
+
+    def read_bytes(self, num_bytes):
+        """Returns `num_bytes` interleaved uint8 IQ bytes."""
+        return complex_to_cu8(self._next(num_bytes // 2))
+
+    def read_samples(self, num_samples):
+        """Returns `num_samples` complex samples quantized like the hardware."""
+        return cu8_to_complex64(self.read_bytes(2 * num_samples))
+
+    def read_bytes_async(self, callback, num_bytes):
+        """Calls back with byte batches until `cancel_read_async`."""
+        self._cancel.clear()
+        while not self._cancel.is_set():
+            callback(self.read_bytes(num_bytes), self)
+
+    def read_samples_async(self, callback, num_samples):
+        """Calls back with sample batches until `cancel_read_async`."""
+        self._cancel.clear()
+        while not self._cancel.is_set():
+            callback(self.read_samples(num_samples), self)
+
+    def cancel_read_async(self):
+        """Stops the async read loop."""
+        self._cancel.set()
+
+    def close(self):
+        """Stops any async read; there is no device to release."""
+        self._cancel.set()
+
+
+class SimulatedSDRInterface(RTLSDRInterface):
+    """Class running the RTL-SDR interface on a `SimulatedRtlSdr`."""
+
+    def __init__(self, source=None, realtime=True, **options):
+        """Initialize the SimulatedSDRInterface.
+
+        Args:
+            source (SyntheticSource or ReplaySource, optional): signal source.
+              A replay source defaults the `sample_rate` and `center_freq`
+              options to those of the recording.
+            realtime (bool, optional): pace reads at the sample rate.
+              Defaults to True.
+            **options: Configuration options for the device and recording,
+              see `sdrcap.rtl_interface.DEFAULT_OPTIONS`.
+        """
+        if isinstance(source, ReplaySource):
+            options.setdefault("sample_rate", source.sample_rate)
+            options.setdefault("center_freq", source.center_freq)
+        self.source = source
+        self.realtime = realtime
+        super().__init__(sdr=None, **options)
+
+    def _setup_rtl_sdr(self):
+        """Creates the simulated device with the radio parameters."""
+        return SimulatedRtlSdr(
+            source=self.source, realtime=self.realtime, **self.options
+        )
@@ -0,0 +1,208 @@
+"""
+Module for sweeping an RTL-SDR across a band wider than its sample rate.
+
+A `SweepPlan` steps the center frequency through the band so that the kept
+part of every hop tiles it exactly. At each hop the `FrequencySweeper` waits
+for the tuner to settle, reads one block of raw IQ bytes and computes a Welch
+power spectral density over all averaging segments at once. The band edges
+of each hop, where the RTL-SDR anti-aliasing filter rolls off, are trimmed
+and the kept bins are written side by side into one wideband spectrum per
+sweep. Only that spectrum is recorded, see
+`sdrcap.recorders.spectrum_recorder.SpectrumRecorder`.
+
+Classes:
+    SweepPlan: Hop center frequencies and bin layout of a sweep.
+    FrequencySweeper: Tunes the device through a plan and stitches spectra.
+
+Usage:
+    plan = SweepPlan(88e6, 108e6, sample_rate=2.4e6, fft_size=1024)
+    sweeper = FrequencySweeper(sdr, plan)
+    sweeper.run(recorder, "outputs/fm.hdf5", num_sweeps=10)
+    print(sweeper.stats["hops_per_second"])
+"""
+
+import time
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sdrcap.iq import cu8_to_complex64
+
+
+def welch_psd(samples, fft_size, sample_rate, window=None):
+    """Welch power spectral density with 50% overlapping segments.
+
+    Every segment is windowed and transformed in one FFT call instead of a
+    Python loop over segments.
+
+    Args:
+        samples (numpy.ndarray): complex IQ samples, at least `fft_size`.
+        fft_size (int): samples per segment and number of frequency bins.
+        sample_rate (float): sample rate of `samples` in Hz.
+        window (numpy.ndarray, optional): segment window. Defaults to Hann.
+
+    Returns:
+        numpy.ndarray: float32 power density per Hz, ordered from the lowest
+        to the highest frequency (DC in the middle).
+    """
+    if len(samples) < fft_size:
+        raise ValueError(
+            f"Invalid sample count: {len(samples)}. Must be >= fft_size {fft_size}."
+        )
+    if window is None:
+        window = np.hanning(fft_size).astype(np.float32)
+    segments = sliding_window_view(samples, fft_size)[:: fft_size // 2]
+    spectra = np.fft.fft(segments * window, axis=1)
+    power = np.mean(spectra.real**2 + spectra.imag**2, axis=0)
+    power /= sample_rate * np.sum(window.astype(np.float64) ** 2)
+    return np.fft.fftshift(power).astype(np.float32)
+
+
+class SweepPlan:
+    """Center frequencies and spectrum bin layout of a band sweep.
+
+    Each hop keeps the central `(1 - overlap)` of its FFT bins and the next
+    hop is tuned exactly one kept bandwidth higher, so the stitched spectrum
+    has evenly spaced bins from `start_freq` to at least `stop_freq`.
+    """
+
+    def __init__(self, start_freq, stop_freq, sample_rate=2.4e6, **options):
+        """Initialize the SweepPlan.
+
+        Args:
+            start_freq (float): lowest frequency of the band in Hz.
+            stop_freq (float): highest frequency of the band in Hz.
+            sample_rate (float, optional): sample rate of every hop in Hz.
+            **options: `fft_size` (int, default 1024) bins per hop, `overlap`
+              (float, default 0.25) fraction of each hop trimmed as filter
+              roll-off, `settle_time` (float, default 0.005) seconds to wait
+              after retuning and `num_averages` (int, default 16) Welch
+              segments per hop.
+        """
+        self.start_freq = start_freq
+        self.stop_freq = stop_freq
+        self.sample_rate = sample_rate
+        self.fft_size = options.get("fft_size", 1024)
+        self.overlap = options.get("overlap", 0.25)
+        self.settle_time = options.get("settle_time", 0.005)
+        self.num_averages = options.get("num_averages", 16)
+        if stop_freq <= start_freq:
+            raise ValueError(
+                f"Invalid band: {start_freq} - {stop_freq}. stop_freq must be higher."
+            )
+        if not 0 <= self.overlap < 1:
+            raise ValueError(f"Invalid overlap: {self.overlap}. Must be in [0, 1).")
+
+        # an even number of kept bins keeps the hop centers on bin boundaries
+        self.keep_bins = max(2, int(round(self.fft_size * (1 - self.overlap))) // 2 * 2)
+        self.trim_bins = (self.fft_size - self.keep_bins) // 2
+        self.bin_width = sample_rate / self.fft_size
+        self.hop_step = self.keep_bins * self.bin_width
+        num_hops = int(np.ceil((stop_freq - start_freq) / self.hop_step))
+        self.centers = start_freq + self.hop_step * (np.arange(num_hops) + 0.5)
+
+    @property
+    def num_hops(self):
+        """int: number of hops per sweep."""
+        return len(self.centers)
+
+    @property
+    def num_bins(self):
+        """int: number of bins of the stitched spectrum."""
+        return self.num_hops * self.keep_bins
+
+    @property
+    def samples_per_hop(self):
+        """int: samples read at every hop for `num_averages` Welch segments."""
+        return self.fft_size * (self.num_averages + 1) // 2
+
+    def frequencies(self):
+        """Returns the center frequency of every stitched spectrum bin in Hz."""
+        return self.start_freq + self.bin_width * np.arange(self.num_bins)
+
+
+class FrequencySweeper:
+    """Class hopping a pyrtlsdr style device through a `SweepPlan`."""
+
+    def __init__(self, sdr, plan):
+        """Initialize the FrequencySweeper.
+
+        Args:
+            sdr: pyrtlsdr style device with `center_freq`, `sample_rate` and
+              `read_bytes`.
+            plan (SweepPlan): hops to sweep.
+        """
+        self.sdr = sdr
+        self.plan = plan
+        self.window = np.hanning(plan.fft_size).astype(np.float32)
+        self._samples = np.empty(plan.samples_per_hop, dtype=np.complex64)
+        self.sweeps = 0
+        self.hops = 0
+        self.elapsed = 0.0
+
+    def sweep(self, out=None):
+        """Runs one sweep over the whole band.
+
+        Args:
+            out (numpy.ndarray, optional): float32 array of `plan.num_bins`
+              to stitch into. Defaults to a new array.
+
+        Returns:
+            numpy.ndarray: stitched power spectrum in dB per Hz.
+        """
+        plan = self.plan
+        if out is None:
+            out = np.empty(plan.num_bins, dtype=np.float32)
+        self.sdr.sample_rate = plan.sample_rate
+        num_bytes = 2 * plan.samples_per_hop
+        keep = slice(plan.trim_bins, plan.trim_bins + plan.keep_bins)
+        start = time.perf_counter()
+        for hop, center in enumerate(plan.centers):
+            self.sdr.center_freq = center
+            if plan.settle_time:
+                time.sleep(plan.settle_time)
+            cu8_to_complex64(self.sdr.read_bytes(num_bytes), out=self._samples)
+            psd = welch_psd(self._samples, plan.fft_size, plan.sample_rate, self.window)
+            out[hop * plan.keep_bins : (hop + 1) * plan.keep_bins] = psd[keep]
+        self.elapsed += time.perf_counter() - start
+        self.hops += plan.num_hops
+        self.sweeps += 1
+        np.log10(np.maximum(out, np.finfo(np.float32).tiny), out=out)
+        out *= 10
+        return out
+
+    def run(self, recorder, filename, num_sweeps=None, duration=None):
+        """Sweeps repeatedly and records every stitched spectrum.
+
+        Args:
+            recorder (SpectrumRecorder): recorder saving one spectrum per sweep.
+            filename (str): path of the spectrum recording.
+            num_sweeps (int, optional): sweeps to run. Defaults to no limit.
+            duration (float, optional): seconds to sweep. Defaults to no limit.
+
+        Returns:
+            dict: sweep statistics, see `stats`.
+        """
+        recorder.start_recording(time.time())
+        deadline = None if duration is None else time.monotonic() + duration
+        spectrum = np.empty(self.plan.num_bins, dtype=np.float32)
+        try:
+            count = 0
+            while num_sweeps is None or count < num_sweeps:
+                if deadline is not None and time.monotonic() >= deadline:
+                    break
+                sweep_time = time.time()
+                self.sweep(out=spectrum)
+                recorder.save(spectrum, filename, sweep_time=sweep_time)
+                count += 1
+        finally:
+            recorder.stop_recording(time.time())
+        return self.stats
+
+    @property
+    def stats(self):
+        """dict: sweeps, hops, elapsed seconds and hops_per_second so far."""
+        return {
+            "sweeps": self.sweeps,
+            "hops": self.hops,
+            "elapsed": self.elapsed,
+            "hops_per_second": self.hops / self.elapsed if self.elapsed else 0.0,
+        }
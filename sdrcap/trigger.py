@@ -0,0 +1,350 @@
+"""
+Module for energy triggered burst recording.
+
+Continuous recording writes every batch whether anything is transmitting or
+not. The `BurstRecorder` wraps any `Recorder` and only passes on bursts: an
+`EnergyTrigger` measures the power of fixed size blocks of every batch in one
+vectorized pass, a pre-trigger buffer keeps the most recent samples so a
+burst starts slightly before its trigger, and recording continues for a post
+trigger padding after the power falls below the hysteresis threshold.
+
+Every burst is saved as its own segment, `<name>-burst00000<ext>`, through
+the wrapped recorder with the trigger metadata in its `attributes`, and the
+bursts are indexed in `<name>.bursts.json`. The wrapped recorder gets a
+`sdrcap.clock.BatchClock` stamping every saved part with the time of its
+first sample, so each segment starts at its burst's time, pre-trigger
+samples included.
+
+Classes:
+    EnergyTrigger: Block energy (or band power) detector with hysteresis.
+    BurstRecorder: Recorder writing only the bursts the trigger detects.
+
+Usage:
+    trigger = EnergyTrigger(threshold_db=-30, hysteresis_db=3)
+    recorder = BurstRecorder(HDF5Recorder(...), trigger, sample_rate=2.4e6)
+    recorder.save(samples, "outputs/capture.hdf5")
+    recorder.stop_recording(time.time())
+"""
+
+import json
+import os
+import numpy as np
+from sdrcap.clock import BatchClock
+from sdrcap.iq import cu8_to_complex64
+from sdrcap.recorders.recorder import Recorder
+
+
+class EnergyTrigger:
+    """Detects active blocks by their power with a hysteresis band.
+
+    A block turns the trigger on when its power reaches `threshold_db` and
+    off when it falls below `threshold_db - hysteresis_db`; blocks in between
+    keep the previous state, which carries over from batch to batch.
+    """
+
+    def __init__(self, threshold_db, hysteresis_db=3.0, block_size=1024, band=None):
+        """Initialize the EnergyTrigger.
+
+        Args:
+            threshold_db (float): block power in dBFS that starts a burst.
+            hysteresis_db (float, optional): how far below the threshold the
+              power must fall to end a burst. Defaults to 3.
+            block_size (int, optional): samples per detection block.
+              Defaults to 1024.
+            band (tuple, optional): (low, high) baseband frequency range in
+              cycles per sample to measure the power of, instead of the whole
+              block. Defaults to the whole band.
+        """
+        if hysteresis_db < 0:
+            raise ValueError(f"Invalid hysteresis_db: {hysteresis_db}. Must be >= 0.")
+        self.threshold_db = threshold_db
+        self.hysteresis_db = hysteresis_db
+        self.block_size = block_size
+        self.band = band
+        self._band_mask = None
+        if band is not None:
+            frequencies = np.fft.fftfreq(block_size)
+            self._band_mask = (frequencies >= band[0]) & (frequencies <= band[1])
+        self.active = False
+
+    def reset(self):
+        """Turns the trigger off."""
+        self.active = False
+
+    def block_power(self, samples):
+        """Returns the power of every block of a batch in dBFS.
+
+        The last block of a batch may be shorter than `block_size`.
+
+        Args:
+            samples (numpy.ndarray): complex samples.
+
+        Returns:
+            numpy.ndarray: float32 block power in dB.
+        """
+        num_full = len(samples) // self.block_size
+        full = samples[: num_full * self.block_size].reshape(num_full, self.block_size)
+        if self._band_mask is None:
+            power = np.empty(num_full + (len(samples) % self.block_size > 0))
+            power[:num_full] = np.mean(full.real**2 + full.imag**2, axis=1)
+            if len(power) > num_full:
+                tail = samples[num_full * self.block_size :]
+                power[num_full] = np.mean(tail.real**2 + tail.imag**2)
+        else:
+            # the tail block is zero padded up to a full FFT
+            num_blocks = -(-len(samples) // self.block_size)
+            padded = np.zeros((num_blocks, self.block_size), dtype=np.complex64)
+            padded.reshape(-1)[: len(samples)] = samples
+            spectra = np.fft.fft(padded, axis=1)[:, self._band_mask]
+            power = np.sum(spectra.real**2 + spectra.imag**2, axis=1)
+            power /= self.block_size**2
+        return (10 * np.log10(np.maximum(power, 1e-20))).astype(np.float32)
+
+    def detect(self, power_db):
+        """Applies the hysteresis to block powers, updating the trigger state.
+
+        Args:
+            power_db (numpy.ndarray): block powers from `block_power`.
+
+        Returns:
+            numpy.ndarray: bool activity of every block.
+        """
+        # 1 turns on, 0 turns off, -1 keeps the previous state
+        events = np.full(len(power_db), -1, dtype=np.int8)
+        events[power_db < self.threshold_db - self.hysteresis_db] = 0
+        events[power_db >= self.threshold_db] = 1
+        has_event = events >= 0
+        last_event = np.maximum.accumulate(
+            np.where(has_event, np.arange(len(events)), -1)
+        )
+        active = np.where(
+            last_event >= 0, events[np.maximum(last_event, 0)] == 1, self.active
+        )
+        if len(active):
+            self.active = bool(active[-1])
+        return active
+
+    def metadata(self):
+        """Returns the trigger settings written to burst metadata."""
+        metadata = {
+            "trigger_threshold_db": self.threshold_db,
+            "trigger_hysteresis_db": self.hysteresis_db,
+            "trigger_block_size": self.block_size,
+        }
+        if self.band is not None:
+            metadata["trigger_band"] = list(self.band)
+        return metadata
+
+
+class BurstRecorder(Recorder):
+    """Class passing only triggered bursts on to a wrapped recorder.
+
+    Args:
+        Recorder (ABC): inherited Recording class API.
+    """
+
+    def __init__(
+        self, recorder, trigger, sample_rate, pre_trigger=0.01, post_trigger=0.05
+    ):
+        """Initialize the BurstRecorder.
+
+        Args:
+            recorder (Recorder): recorder every burst segment is saved with.
+            trigger (EnergyTrigger): detector run on every batch.
+            sample_rate (float): sample rate of the saved batches in Hz.
+            pre_trigger (float, optional): seconds recorded before a burst.
+              Defaults to 0.01.
+            post_trigger (float, optional): seconds recorded after a burst,
+              also the longest gap that does not split a burst. Defaults to 0.05.
+        """
+        super().__init__()
+        self.recorder = recorder
+        self.trigger = trigger
+        self.sample_rate = sample_rate
+        self.pre_samples = int(round(pre_trigger * sample_rate))
+        self.post_samples = int(round(post_trigger * sample_rate))
+        self.bursts = []
+        self.recorder.clock = BatchClock(sample_rate)
+        self._history = np.zeros(self.pre_samples, dtype=np.complex64)
+        self._history_length = 0
+        self._position = 0
+        self._written_until = 0
+        self._burst = None
+        self._filename = None
+
+    def start_recording(self, start_recording_time):
+        """Capture the recording start time.
+
+        Args:
+            start_recording_time (float): time that the hardware interface
+            started the recording.
+        """
+        self.start_recording_time = start_recording_time
+        self.recorder.start_recording(start_recording_time)
+
+    def stop_recording(self, stop_recording_time):
+        """Closes the open burst, writes the burst index and stops the recorder.
+
+        Args:
+            stop_recording_time (float): time that the hardware interface
+            stopped the recording.
+        """
+        self.stop_recording_time = stop_recording_time
+        if self._burst is not None:
+            self._close_burst()
+        self.recorder.stop_recording(stop_recording_time)
+
+    @staticmethod
+    def segment_filename(filename, index):
+        """Returns the filename of the `index`-th burst of a recording."""
+        root, extension = os.path.splitext(filename)
+        return f"{root}-burst{index:05d}{extension}"
+
+    @staticmethod
+    def index_filename(filename):
+        """Returns the burst index filename of a recording."""
+        return os.path.splitext(filename)[0] + ".bursts.json"
+
+    def save(self, samples, filename):
+        """Detects bursts in a batch and saves the parts belonging to one.
+
+        Args:
+            samples (numpy.ndarray): complex IQ values, or interleaved uint8
+              IQ bytes.
+            filename (str): base name of the burst segment files.
+        """
+        batch_start_time = self.clock()
+        samples = np.asarray(samples)
+        if samples.dtype == np.uint8:
+            samples = cu8_to_complex64(samples)
+        if self._filename != filename:
+            if self._burst is not None:
+                self._close_burst()
+            self._filename = filename
+
+        start = self._position
+        stop = start + len(samples)
+        block = self.trigger.block_size
+        power = self.trigger.block_power(samples)
+        active = self.trigger.detect(power)
+
+        # runs of active blocks as [first, last + 1) block indexes
+        edges = np.diff(np.concatenate(([0], active.astype(np.int8), [0])))
+        run_starts = np.flatnonzero(edges == 1)
+        run_stops = np.flatnonzero(edges == -1)
+        for first, last in zip(run_starts, run_stops):
+            run_start = start + int(first) * block
+            run_stop = min(start + int(last) * block, stop)
+            peak = float(power[first:last].max())
+            burst = self._burst
+            if burst is not None:
+                post_stop = burst["active_until"] + self.post_samples
+                if run_start > post_stop:
+                    self._write(post_stop, samples, start)
+                    self._close_burst()
+            if self._burst is None:
+                self._open_burst(run_start, batch_start_time, start, peak)
+            self._burst["active_until"] = run_stop
+            self._burst["peak_power_db"] = max(self._burst["peak_power_db"], peak)
+            self._write(run_stop, samples, start)
+
+        if self._burst is not None:
+            post_stop = self._burst["active_until"] + self.post_samples
+            self._write(min(post_stop, stop), samples, start)
+            if post_stop <= stop:
+                self._close_burst()
+
+        self._remember(samples)
+        self._position = stop
+
+    def _open_burst(self, trigger_sample, batch_start_time, batch_offset, peak):
+        """Starts a burst segment at most `pre_samples` before the trigger."""
+        earliest = max(batch_offset - self._history_length, self._written_until)
+        segment_start = max(trigger_sample - self.pre_samples, earliest)
+        index = len(self.bursts)
+        trigger_time = (
+            batch_start_time + (trigger_sample - batch_offset) / self.sample_rate
+        )
+        self._burst = {
+            "index": index,
+            "filename": self.segment_filename(self._filename, index),
+            "start_sample": segment_start,
+            "trigger_sample": trigger_sample,
+            "start_time": batch_start_time
+            + (segment_start - batch_offset) / self.sample_rate,
+            "trigger_time": trigger_time,
+            "active_until": trigger_sample,
+            "peak_power_db": peak,
+        }
+        self._written_until = segment_start
+        self.recorder.attributes.update(
+            {
+                **self.trigger.metadata(),
+                "pre_trigger": self.pre_samples / self.sample_rate,
+                "post_trigger": self.post_samples / self.sample_rate,
+                "burst_index": index,
+                "trigger_time": trigger_time,
+                "burst_start_time": self._burst["start_time"],
+            }
+        )
+
+    def _write(self, until, samples, batch_offset):
+        """Saves the burst samples from the last written one up to `until`."""
+        begin = self._written_until
+        if until <= begin:
+            return
+        parts = []
+        if begin < batch_offset:
+            parts.append(self._history[self.pre_samples - (batch_offset - begin) :])
+        parts.append(samples[max(begin - batch_offset, 0) : until - batch_offset])
+        segment = parts[0] if len(parts) == 1 else np.concatenate(parts)
+        burst = self._burst
+        self.recorder.clock.stamp(
+            begin,
+            len(segment),
+            burst["start_time"] + (begin - burst["start_sample"]) / self.sample_rate,
+        )
+        self.recorder.save(samples=segment, filename=burst["filename"])
+        self._written_until = until
+
+    def _close_burst(self):
+        """Finishes the open burst and rewrites the burst index."""
+        burst = self._burst
+        self._burst = None
+        num_samples = self._written_until - burst["start_sample"]
+        self.bursts.append(
+            {
+                "index": burst["index"],
+                "filename": os.path.basename(burst["filename"]),
+                "start_sample": burst["start_sample"],
+                "trigger_sample": burst["trigger_sample"],
+                "num_samples": num_samples,
+                "start_time": burst["start_time"],
+                "trigger_time": burst["trigger_time"],
+                "stop_time": burst["start_time"] + num_samples / self.sample_rate,
+                "peak_power_db": burst["peak_power_db"],
+            }
+        )
+        if hasattr(self.recorder, "close"):
+            self.recorder.close()
+        index = {
+            **self.trigger.metadata(),
+            "sample_rate": self.sample_rate,
+            "pre_trigger": self.pre_samples / self.sample_rate,
+            "post_trigger": self.post_samples / self.sample_rate,
+            "bursts": self.bursts,
+        }
+        index_filename = self.index_filename(self._filename)
+        with open(index_filename, "w", encoding="utf-8") as index_file:
+            json.dump(index, index_file, indent=2)
+
+    def _remember(self, samples):
+        """Keeps the last `pre_samples` samples for the next pre-trigger."""
+        if not self.pre_samples:
+            return
+        count = min(len(samples), self.pre_samples)
+        self._history[: self.pre_samples - count] = self._history[count:]
+        self._history[self.pre_samples - count :] = samples[len(samples) - count :]
+        self._history_length = min(
+            self._history_length + len(samples), self.pre_samples
+        )
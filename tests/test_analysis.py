@@ -0,0 +1,129 @@
+""" Collection of tests for the out-of-core analytics """
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from sdrcap.analysis import (
+    AveragePSD,
+    BandPower,
+    analyze,
+    average_psd,
+    band_power,
+    detect_peaks,
+    occupancy,
+)
+from sdrcap.sim_interface import SimulatedSDRInterface, SyntheticSource
+
+SAMPLE_RATE = 250e3
+CENTER_FREQ = 100e6
+BURST_FREQ = CENTER_FREQ + 50e3
+OPTIONS = {"fft_size": 256, "chunk_size": 65536, "chunks_per_task": 4}
+
+
+class TestAnalysis(unittest.TestCase):
+    """Unit tests for the reductions, process pool and partial result cache"""
+
+    def setUp(self):
+        """Records four seconds of a burst on for a quarter of every second"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.temp_dir, "cache")
+        self.cu8 = self.record("cu8", {})
+        self.hdf5 = self.record("hdf5", {"hdf5_streaming": True})
+
+    def tearDown(self):
+        """Removes the temporary recordings and cache"""
+        shutil.rmtree(self.temp_dir)
+
+    def record(self, filetype, options):
+        """Records the burst source, returns the recording path"""
+        interface = SimulatedSDRInterface(
+            source=SyntheticSource(bursts=((BURST_FREQ, 0.5, 1.0, 0.25),), seed=2),
+            realtime=False,
+            filetype=filetype,
+            sample_rate=SAMPLE_RATE,
+            center_freq=CENTER_FREQ,
+            sample_window=50_000,
+            output_dir=self.temp_dir,
+            **options,
+        )
+        recorder = interface.options["recorder"]
+        batch_times = iter(1000.0 + np.arange(20) * 0.2)
+        recorder.clock = lambda: next(batch_times)
+        recorder.start_recording(1000.0)
+        for _ in range(20):
+            interface.record_single_sample(filetype)
+        recorder.stop_recording(1004.0)
+        return os.path.join(self.temp_dir, f"{filetype}-sample_window50000.{filetype}")
+
+    def test_band_power_and_occupancy(self):
+        """Test per second band power and occupancy of the burst"""
+        band = (BURST_FREQ - 5e3, BURST_FREQ + 5e3)
+        power = band_power([self.cu8], *band, interval=1.0, workers=1, **OPTIONS)
+        np.testing.assert_array_equal(power["time"], [1000.0, 1001.0, 1002.0, 1003.0])
+        # a quarter of the time at -6 dBFS
+        np.testing.assert_allclose(power["power_db"], -12.0, atol=0.3)
+        self.assertEqual(power["frames"].sum(), 1_000_000 // 256)
+
+        busy = occupancy(
+            [self.cu8], *band, threshold_db=-20, interval=1.0, workers=1, **OPTIONS
+        )
+        np.testing.assert_allclose(busy["occupancy"], 0.25, atol=0.01)
+        quiet = occupancy(
+            [self.cu8], *band, threshold_db=0, interval=1.0, workers=1, **OPTIONS
+        )
+        np.testing.assert_array_equal(quiet["occupancy"], 0.0)
+        uncovered = band_power([self.cu8], 200e6, 201e6, workers=1, **OPTIONS)
+        self.assertEqual(len(uncovered["time"]), 0)
+
+    def test_psd_and_peaks(self):
+        """Test the averaged spectrum and per second peaks find the burst"""
+        psd = average_psd([self.cu8, self.hdf5], workers=1, **OPTIONS)
+        self.assertEqual(len(psd["frequencies"]), 256)
+        peak = psd["frequencies"][psd["power_db"].argmax()]
+        self.assertAlmostEqual(peak, BURST_FREQ, delta=SAMPLE_RATE / 256)
+
+        peaks = detect_peaks(
+            [self.cu8], -20, low=CENTER_FREQ, interval=1.0, workers=1, **OPTIONS
+        )
+        self.assertEqual(len(peaks["time"]), 4)
+        np.testing.assert_allclose(
+            peaks["frequency"], BURST_FREQ, atol=SAMPLE_RATE / 256
+        )
+        np.testing.assert_allclose(peaks["power_db"], -6.0, atol=1.5)
+        self.assertTrue(np.all(np.diff(peaks["time"]) > 0.5))
+        loud = detect_peaks([self.cu8], 0, workers=1, **OPTIONS)
+        self.assertEqual(len(loud["time"]), 0)
+
+    def test_process_pool_and_cache(self):
+        """Test pooled, cached and time limited queries agree"""
+        band = (BURST_FREQ - 5e3, BURST_FREQ + 5e3)
+        reductions = [BandPower(*band, interval=1.0), AveragePSD()]
+        files = [self.cu8, self.hdf5]
+        direct = analyze(files, reductions, workers=1, cache_dir=None, **OPTIONS)
+        options = {**OPTIONS, "workers": 2, "cache_dir": self.cache_dir}
+        pooled = analyze(files, reductions, **options)
+        self.assertEqual(pooled["tasks"], 8)
+        self.assertEqual(pooled["cached"], 0)
+        cached = analyze(files, reductions, **options)
+        self.assertEqual(cached["cached"], 8)
+        for result in (pooled, cached):
+            for field in ("time", "power_db", "frames"):
+                np.testing.assert_allclose(
+                    result["results"][0][field], direct["results"][0][field]
+                )
+            np.testing.assert_allclose(
+                result["results"][1]["power_db"], direct["results"][1]["power_db"]
+            )
+
+        later = band_power(
+            [self.cu8], *band, interval=1.0, start_time=1002.0,
+            cache_dir=self.cache_dir, **OPTIONS,
+        )
+        np.testing.assert_array_equal(later["time"], [1002.0, 1003.0])
+        with self.assertRaises(ValueError):
+            analyze(files, reductions, fft_size=300, chunk_size=65536)
+
+
+if __name__ == "__main__":
+    unittest.main()
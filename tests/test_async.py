@@ -0,0 +1,113 @@
+""" Collection of tests for the asyncio streaming API """
+import unittest
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from sdrcap.recorders.raw_recorder import read_metadata
+from sdrcap.rtl_interface import RTLSDRInterface
+from tests.test_capture import ListRecorder
+
+
+class FakeStreamSdr:
+    """Stand-in device with the pyrtlsdr asyncio `stream()` API"""
+
+    def __init__(self):
+        self.stopped = False
+
+    async def _batches(self, num_samples):
+        batch = 0
+        while not self.stopped:
+            await asyncio.sleep(0.001)
+            yield np.full(num_samples, batch, dtype=np.complex128)
+            batch += 1
+
+    def stream(self, num_samples_or_bytes, format="samples"):  # pylint: disable=redefined-builtin
+        """Returns an async iterator of numbered batches"""
+        assert format == "samples"
+        return self._batches(num_samples_or_bytes)
+
+    async def stop(self):
+        """Stops the stream"""
+        self.stopped = True
+
+
+class FakeBlockingSdr:
+    """Stand-in device with only the blocking read API"""
+
+    def read_bytes(self, num_bytes):
+        """Returns zeroed raw bytes after a short blocking wait"""
+        time.sleep(0.002)
+        return bytes(num_bytes)
+
+
+class TestAsyncStreaming(unittest.TestCase):
+    """Unit tests for stream(), record_stream() and async recorder writes"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def interface(self, sdr, **options):
+        """Builds an interface around a fake device"""
+        return RTLSDRInterface(
+            sdr=sdr, output_dir=self.temp_dir, sample_window=16, **options
+        )
+
+    def test_stream_duration(self):
+        """Test the stream ends after its duration and stops the device"""
+        sdr = FakeStreamSdr()
+        iface = self.interface(sdr)
+
+        async def consume():
+            return [batch async for batch in iface.stream(duration=0.05)]
+
+        batches = asyncio.run(consume())
+        self.assertGreater(len(batches), 0)
+        self.assertEqual([int(b[0].real) for b in batches], list(range(len(batches))))
+        self.assertTrue(sdr.stopped)
+
+    def test_record_stream_cancel(self):
+        """Test cancelling a recording stops the stream and the recorder"""
+        sdr = FakeStreamSdr()
+        iface = self.interface(sdr)
+        recorder = ListRecorder()
+        iface.options["recorder"] = recorder
+
+        async def run():
+            task = asyncio.create_task(iface.record_stream())
+            while len(recorder.batches) < 5:
+                await asyncio.sleep(0.001)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        self.assertTrue(sdr.stopped)
+        self.assertIsNotNone(recorder.stop_recording_time)
+        self.assertGreaterEqual(len(recorder.batches), 5)
+
+    def test_record_stream_timeout(self):
+        """Test a timeout around a blocking device still finalizes the file"""
+        iface = self.interface(FakeBlockingSdr(), filetype="cu8")
+
+        async def run():
+            with self.assertRaises(TimeoutError):
+                async with asyncio.timeout(0.05):
+                    await iface.record_stream(recording_name="timeout")
+
+        asyncio.run(run())
+        filename = os.path.join(self.temp_dir, "timeout-sample_window16.cu8")
+        self.assertGreater(os.path.getsize(filename), 0)
+        self.assertEqual(os.path.getsize(filename) % 32, 0)
+        self.assertIsNotNone(read_metadata(filename)["stop_time"])
+
+
+if __name__ == "__main__":
+    unittest.main()
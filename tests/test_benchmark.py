@@ -0,0 +1,88 @@
+""" Collection of tests for the recorder and capture benchmarks """
+import unittest
+import copy
+import json
+import os
+import shutil
+import tempfile
+from sdrcap.benchmark import (
+    ALLOCATION_CASES,
+    allocation_profile,
+    build_cases,
+    compare,
+    main,
+    run_benchmarks,
+)
+from sdrcap.rtl_interface import DEFAULT_OPTIONS
+
+
+class TestBenchmark(unittest.TestCase):
+    """Unit tests for the benchmark cases, reports and baseline comparison"""
+
+    def setUp(self):
+        """Creates the temporary directory reports are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the temporary reports"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_build_cases(self):
+        """Test every recorder and capture case is built per window"""
+        cases = build_cases(windows=(1024, 2048))
+        self.assertEqual(len(cases), 18)
+        self.assertEqual(len(build_cases(windows=(1024,), filetypes=("cu8",))), 2)
+
+    def test_run_and_compare(self):
+        """Test a report carries the measurements and regressions are flagged"""
+        report = run_benchmarks(
+            build_cases(windows=(1024,), num_batches=3, filetypes=("cu8", "hdf5")),
+            isolate=False,
+        )
+        names = [result["name"] for result in report["results"]]
+        self.assertEqual(
+            names, ["recorder/hdf5/1024", "recorder/cu8/1024", "capture/hdf5/1024", "capture/cu8/1024"]
+        )
+        for result in report["results"]:
+            self.assertGreater(result["samples_per_sec"], 0)
+            self.assertGreater(result["bytes_per_sec"], 0)
+            self.assertGreater(result["peak_rss_mb"], 0)
+            self.assertLessEqual(result["latency_ms"]["p50"], result["latency_ms"]["max"])
+        self.assertEqual(compare(report, report), [])
+
+        baseline = copy.deepcopy(report)
+        baseline["results"][1]["samples_per_sec"] *= 2
+        baseline["results"][2]["latency_ms"]["p99"] = 0.001
+        baseline["results"][2]["peak_rss_mb"] /= 2
+        regressions = compare(report, baseline, latency_floor_ms=0)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(regressions[0].startswith("recorder/cu8/1024: samples_per_sec"))
+
+    def test_cli_baseline(self):
+        """Test the command line saves a baseline and exits 1 on regressions"""
+        baseline = os.path.join(self.temp_dir, "baseline.json")
+        args = ["--windows", "1024", "--batches", "2", "--filetypes", "cu8", "--no-isolate"]
+        self.assertEqual(main(args + ["--save-baseline", baseline]), 0)
+        with open(baseline, "r", encoding="utf-8") as baseline_file:
+            report = json.load(baseline_file)
+        for result in report["results"]:
+            result["samples_per_sec"] *= 1000
+        with open(baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(report, baseline_file)
+        self.assertEqual(main(args + ["--baseline", baseline]), 1)
+
+    def test_allocation_profile(self):
+        """Test the warmed up capture loop allocates no sample memory per batch"""
+        for name, options in ALLOCATION_CASES:
+            profile = allocation_profile(
+                {**DEFAULT_OPTIONS, **options}, sample_window=65536, num_batches=5
+            )
+            self.assertEqual(profile["batch_bytes"], 131072, name)
+            # about 15 KiB of Python objects at most, half the smallest array
+            # a batch could allocate (65536 int8 or uint8 values)
+            self.assertLess(profile["peak_bytes"], 32768, name)
+            self.assertLess(profile["retained_bytes"], 4096, name)
+
+
+if __name__ == "__main__":
+    unittest.main()
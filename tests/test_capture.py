@@ -0,0 +1,222 @@
+""" Collection of tests for the threaded capture loop """
+import unittest
+import threading
+import time
+import numpy as np
+from sdrcap.capture import BufferPool, BufferRing, ThreadedCapture, read_into
+from sdrcap.iq import CU8_LUT, cu8_scratch, cu8_to_complex64
+from sdrcap.recorders.recorder import Recorder
+from sdrcap.sim_interface import SimulatedRtlSdr
+
+
+class FakeAsyncSdr:
+    """Stand-in device producing numbered batches through the async API"""
+
+    def __init__(self, max_batches=None):
+        self.max_batches = max_batches
+        self._cancel = threading.Event()
+
+    def read_samples_async(self, callback, num_samples):
+        """Calls back with batches filled with the batch number until cancelled"""
+        self._cancel.clear()
+        batch = 0
+        while not self._cancel.is_set():
+            if self.max_batches is not None and batch == self.max_batches:
+                self._cancel.wait()
+                break
+            callback(np.full(num_samples, batch, dtype=np.complex128), self)
+            batch += 1
+            time.sleep(0.001)
+
+    def cancel_read_async(self):
+        """Stops the async read loop"""
+        self._cancel.set()
+
+
+class ListRecorder(Recorder):
+    """Recorder keeping copies of saved batches in memory"""
+
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+        self.batches = []
+
+    def start_recording(self, start_recording_time):
+        self.start_recording_time = start_recording_time
+
+    def stop_recording(self, stop_recording_time):
+        self.stop_recording_time = stop_recording_time
+
+    def save(self, samples, filename):
+        time.sleep(self.delay)
+        self.batches.append(samples.copy())
+
+
+class TestBufferRing(unittest.TestCase):
+    """Unit tests for the ring backpressure policies"""
+
+    def fill(self, ring):
+        """Acquires and commits every free buffer"""
+        for batch in range(len(ring.buffers)):
+            index = ring.acquire()
+            ring.buffers[index] = batch
+            ring.commit(index, {"batch": batch})
+
+    def test_drop_newest(self):
+        """Test a full ring discards the incoming batch"""
+        ring = BufferRing(2, 4, policy="drop-newest")
+        self.fill(ring)
+        self.assertIsNone(ring.acquire())
+        self.assertEqual(ring.dropped, 1)
+        self.assertEqual(ring.get()[1]["batch"], 0)
+
+    def test_drop_oldest(self):
+        """Test a full ring reuses the oldest unwritten buffer"""
+        ring = BufferRing(2, 4, policy="drop-oldest")
+        self.fill(ring)
+        index = ring.acquire()
+        self.assertIsNotNone(index)
+        ring.commit(index, {"batch": 2})
+        self.assertEqual(ring.dropped, 1)
+        self.assertEqual([ring.get()[1]["batch"] for _ in range(2)], [1, 2])
+
+    def test_block_until_release(self):
+        """Test a full ring blocks the reader until the writer releases"""
+        ring = BufferRing(2, 4, policy="block")
+        self.fill(ring)
+        self.assertIsNone(ring.acquire(timeout=0.01))
+        index, _ = ring.get()
+        ring.release(index)
+        self.assertEqual(ring.acquire(timeout=0.01), index)
+        self.assertEqual(ring.dropped, 0)
+
+    def test_invalid_policy(self):
+        """Test unknown policies are rejected"""
+        with self.assertRaises(ValueError):
+            BufferRing(2, 4, policy="spill")
+
+
+class TestBufferPool(unittest.TestCase):
+    """Unit tests for the leased capture buffers and table conversion"""
+
+    def test_scratch_conversion(self):
+        """Test block wise conversion matches the lookup table exactly"""
+        raw = np.random.default_rng(0).integers(0, 256, 10_002, dtype=np.uint8)
+        out = np.empty(5001, dtype=np.complex64)
+        converted = cu8_to_complex64(raw, out=out, scratch=cu8_scratch(64))
+        self.assertIs(converted, out)
+        np.testing.assert_array_equal(out.view(np.float32), CU8_LUT[raw])
+
+    def test_lease_and_reuse(self):
+        """Test buffers are read, converted in place and handed out again"""
+        pool = BufferPool(2, 1000)
+        sdr = SimulatedRtlSdr(realtime=False)
+        first = pool.acquire()
+        second = pool.acquire()
+        self.assertIsNone(pool.acquire(timeout=0.01))
+        raw = pool.read(first, sdr)
+        self.assertTrue(np.shares_memory(raw, pool.raw))
+        samples = pool.convert(first)
+        self.assertTrue(np.shares_memory(samples, pool.samples))
+        np.testing.assert_array_equal(samples, cu8_to_complex64(raw))
+        pool.release(first)
+        self.assertEqual(pool.acquire(), first)
+        pool.release(second)
+        with self.assertRaises(ValueError):
+            BufferPool(0, 1000)
+
+    def test_read_into(self):
+        """Test devices without `read_bytes_into` are copied into the buffer"""
+        out = np.zeros(4000, dtype=np.uint8)
+        self.assertIs(read_into(SimulatedRtlSdr(realtime=False), out), out)
+        self.assertGreater(len(np.unique(out)), 10)
+
+
+class TestThreadedCapture(unittest.TestCase):
+    """Unit tests for the reader/writer capture threads"""
+
+    def test_capture_in_order(self):
+        """Test every batch reaches the recorder in order and stop drains"""
+        recorder = ListRecorder()
+        capture = ThreadedCapture(
+            FakeAsyncSdr(max_batches=5), recorder, "unused", sample_window=16
+        )
+        capture.start()
+        deadline = time.time() + 5
+        while capture.captured < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        capture.stop(timeout=5)
+
+        self.assertFalse(capture.running)
+        self.assertEqual(capture.stats["written"], 5)
+        self.assertEqual(capture.stats["dropped"], 0)
+        self.assertEqual([int(b[0].real) for b in recorder.batches], list(range(5)))
+        self.assertIsNotNone(recorder.stop_recording_time)
+
+    def test_stop_timeout_and_restart(self):
+        """Test a stuck writer keeps the recorder open and a restart captures again"""
+        recorder = ListRecorder(delay=0.5)
+        capture = ThreadedCapture(
+            FakeAsyncSdr(max_batches=1), recorder, "unused", sample_window=16
+        )
+        capture.start()
+        deadline = time.time() + 5
+        while capture.captured < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        with self.assertRaises(RuntimeError):
+            capture.stop(timeout=0.01)
+        self.assertIsNone(recorder.stop_recording_time)
+        capture.stop(timeout=5)
+        self.assertEqual(capture.stats["written"], 1)
+        self.assertIsNotNone(recorder.stop_recording_time)
+
+        recorder.delay = 0.0
+        capture.start()
+        deadline = time.time() + 5
+        while capture.captured < 1 and time.time() < deadline:
+            time.sleep(0.01)
+        capture.stop(timeout=5)
+        self.assertEqual(capture.stats["written"], 1)
+        self.assertEqual(len(recorder.batches), 2)
+
+    def test_slow_writer_drops(self):
+        """Test a slow recorder causes drops instead of stalling the reader"""
+        recorder = ListRecorder(delay=0.05)
+        capture = ThreadedCapture(
+            FakeAsyncSdr(max_batches=40),
+            recorder,
+            "unused",
+            sample_window=16,
+            num_buffers=2,
+            backpressure="drop-newest",
+        )
+        capture.start()
+        deadline = time.time() + 5
+        while capture.captured < 40 and time.time() < deadline:
+            time.sleep(0.01)
+        capture.stop(timeout=5)
+
+        stats = capture.stats
+        self.assertEqual(stats["captured"], 40)
+        self.assertGreater(stats["dropped"], 0)
+        self.assertEqual(stats["written"] + stats["dropped"], 40)
+
+    def test_byte_conversion(self):
+        """Test complex batches are read as bytes and converted by the writer"""
+        recorder = ListRecorder()
+        sdr = SimulatedRtlSdr(realtime=False)
+        capture = ThreadedCapture(sdr, recorder, "unused", sample_window=256)
+        self.assertTrue(capture.convert)
+        self.assertEqual(capture.ring.buffers.dtype, np.uint8)
+        capture.start()
+        deadline = time.time() + 5
+        while capture.written < 3 and time.time() < deadline:
+            time.sleep(0.01)
+        capture.stop(timeout=5)
+        self.assertEqual(recorder.batches[0].dtype, np.complex64)
+        self.assertEqual(len(recorder.batches[0]), 256)
+        self.assertLess(np.abs(recorder.batches[0]).max(), 1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+""" Collection of tests for the sample-accurate capture clock """
+import unittest
+import os
+import shutil
+import tempfile
+import time
+import h5py
+import numpy as np
+from sdrcap.clock import CaptureClock
+from sdrcap.readers import open_recording
+from sdrcap.recorders.hdf5_recorder import GROUP_NAME, HDF5Recorder
+from sdrcap.recorders.raw_recorder import RawIQRecorder, read_metadata
+from sdrcap.sim_interface import SimulatedSDRInterface
+
+
+def stamp_batches(clock, arrivals, num_samples=100, saved=None):
+    """Captures a batch per arrival time, yields the stamps of saved batches"""
+    for number, arrival in enumerate(arrivals):
+        stamp = clock.capture(num_samples, arrival)
+        if saved is None or number in saved:
+            yield clock.begin_batch(stamp)
+
+
+class TestCaptureClock(unittest.TestCase):
+    """Unit tests for the capture clock and the markers it leaves in recordings"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_gaps_and_drops(self):
+        """Test late batches and unsaved batches become discontinuities"""
+        clock = CaptureClock(1000.0)
+        # 0.1 s batches: on time, on time, 0.3 s late, on time, never saved
+        arrivals = [10.0, 10.1, 10.5, 10.6, 10.7, 10.8]
+        stamps = list(stamp_batches(clock, arrivals, saved={0, 1, 2, 3, 5}))
+        self.assertEqual(clock.start_time, 9.9)
+        self.assertEqual(
+            [stamp["sample_index"] for stamp in stamps], [0, 100, 500, 600, 800]
+        )
+        self.assertAlmostEqual(stamps[2]["time"], 10.4)
+        self.assertEqual(stamps[2]["gap"], 300)
+        self.assertEqual(clock.lost_samples, 300)
+        self.assertEqual(
+            [(batch["sample_index"], batch["lost_samples"]) for batch in
+             clock.discontinuities],
+            [(500, 300), (800, 100)],
+        )
+        self.assertAlmostEqual(clock(), 10.7)
+        with self.assertRaises(ValueError):
+            CaptureClock(0)
+
+    def test_raw_markers(self):
+        """Test cu8 sidecars keep the markers and readers map times across them"""
+        filename = os.path.join(self.temp_dir, "gaps.cu8")
+        recorder = RawIQRecorder(
+            center_freq=100e6, sample_rate=1000.0, freq_correction=0, gain="auto"
+        )
+        recorder.clock = CaptureClock(1000.0)
+        recorder.start_recording(0.0)
+        samples = np.zeros(100, dtype=np.complex64)
+        for _ in stamp_batches(recorder.clock, [10.0, 10.1, 10.5, 10.6]):
+            recorder.save(samples, filename)
+        recorder.stop_recording(11.0)
+
+        metadata = read_metadata(filename)
+        self.assertAlmostEqual(metadata["start_time"], 9.9)
+        self.assertEqual(metadata["sample_index"], 0)
+        self.assertEqual(len(metadata["discontinuities"]), 1)
+        self.assertEqual(metadata["discontinuities"][0]["offset"], 200)
+        self.assertEqual(metadata["discontinuities"][0]["lost_samples"], 300)
+        with open_recording(filename) as reader:
+            np.testing.assert_allclose(
+                reader.sample_time([0, 199, 200, 399]), [9.9, 10.099, 10.4, 10.599]
+            )
+            self.assertEqual(reader.sample_index(10.05), 150)
+            # inside the gap, then after it
+            self.assertEqual(reader.sample_index(10.2), 200)
+            self.assertEqual(reader.sample_index(10.45), 250)
+            self.assertEqual(len(reader.time_slice(10.0, 10.5)), 200)
+
+    def test_hdf5_markers_and_spacing(self):
+        """Test stream sample indexes and markers, and split layout spacing"""
+        filename = os.path.join(self.temp_dir, "gaps.hdf5")
+        recorder = HDF5Recorder(
+            center_freq=100e6, sample_rate=1000.0, freq_correction=0, gain="auto",
+            streaming=True,
+        )
+        recorder.clock = CaptureClock(1000.0)
+        samples = np.zeros(100, dtype=np.complex64)
+        for _ in stamp_batches(recorder.clock, [10.0, 10.1, 10.5]):
+            recorder.save(samples, filename)
+        recorder.stop_recording(11.0)
+        with h5py.File(filename, "r") as f:
+            group = f[GROUP_NAME]
+            np.testing.assert_array_equal(group["batch_sample_index"][:], [0, 100, 500])
+            np.testing.assert_array_equal(group["discontinuities"][:], [[200, 300]])
+            np.testing.assert_allclose(group["batch_start_time"][:], [9.9, 10.0, 10.4])
+        with open_recording(filename) as reader:
+            self.assertEqual(reader.discontinuities[0]["offset"], 200)
+            self.assertAlmostEqual(reader.discontinuities[0]["time"], 10.4)
+
+        split = os.path.join(self.temp_dir, "split.hdf5")
+        recorder = HDF5Recorder(
+            center_freq=100e6, sample_rate=1e6, freq_correction=0, gain="auto"
+        )
+        recorder.clock = lambda: 1000.0
+        recorder.save(samples[:3], split)
+        with h5py.File(split, "r") as f:
+            np.testing.assert_array_equal(
+                f[GROUP_NAME]["timestamps"][:],
+                [
+                    b"1970-01-01 00:16:40.000000",
+                    b"1970-01-01 00:16:40.000001",
+                    b"1970-01-01 00:16:40.000002",
+                ],
+            )
+
+    def test_interface_overflow(self):
+        """Test a paused real time capture records the samples the device lost"""
+        iface = SimulatedSDRInterface(
+            realtime=True, output_dir=self.temp_dir, filetype="cu8",
+            sample_rate=100e3, sample_window=5000, device_buffers=2,
+            clock_tolerance=0.05,
+        )
+        for _ in range(3):
+            iface.record_single_sample("paused")
+        time.sleep(0.5)
+        for _ in range(3):
+            iface.record_single_sample("paused")
+        iface.options["recorder"].stop_recording(time.time())
+
+        dropped = iface.sdr.dropped_samples
+        self.assertGreater(dropped, 0)
+        filename = os.path.join(self.temp_dir, "paused-sample_window5000.cu8")
+        with open_recording(filename) as reader:
+            self.assertEqual(len(reader), 30000)
+            self.assertEqual(len(reader.discontinuities), 1)
+            marker = reader.discontinuities[0]
+            self.assertEqual(marker["offset"], 15000)
+            # arrival times can not see the samples still in the device buffers
+            self.assertGreaterEqual(marker["lost_samples"], dropped)
+            self.assertLessEqual(marker["lost_samples"], dropped + 3 * 5000)
+            jump = reader.sample_time(15000) - reader.sample_time(14999)
+            self.assertGreater(jump, 0.3)
+
+    def test_interface_records_twice(self):
+        """Test a second recording on one interface counts from its own start"""
+        iface = SimulatedSDRInterface(
+            realtime=False, output_dir=self.temp_dir, filetype="cu8",
+            sample_rate=100e3, sample_window=1000,
+        )
+        for name in ("first", "second"):
+            iface.start_recording_threaded(name)
+            deadline = time.time() + 5
+            while iface.capture.written < 3 and time.time() < deadline:
+                time.sleep(0.01)
+            iface.stop_recording_threaded(timeout=5)
+            time.sleep(0.3)
+
+        first, second = (
+            read_metadata(os.path.join(self.temp_dir, f"{name}-sample_window1000.cu8"))
+            for name in ("first", "second")
+        )
+        self.assertEqual(second["sample_index"], 0)
+        self.assertEqual(second["discontinuities"], [])
+        self.assertGreater(second["start_time"], first["start_time"] + 0.3)
+
+
+if __name__ == "__main__":
+    unittest.main()
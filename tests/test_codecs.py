@@ -0,0 +1,217 @@
+""" Collection of tests for the compression codecs and compressed recordings """
+import unittest
+import os
+import shutil
+import tempfile
+import time
+import h5py
+import numpy as np
+from sdrcap.codecs import (
+    CODECS,
+    ChunkCompressor,
+    available_codecs,
+    compare_codecs,
+    decode_samples,
+    encode_samples,
+    get_codec,
+)
+from sdrcap.readers import open_recording
+from sdrcap.recorders.compressed_recorder import CompressedRecorder
+from sdrcap.recorders.hdf5_recorder import HDF5Recorder
+from sdrcap.recorders.raw_recorder import read_metadata
+from sdrcap.sim_interface import SimulatedSDRInterface
+
+
+def noisy_tone(num_samples):
+    """Returns a tone in noise, scaled below full scale"""
+    rng = np.random.default_rng(1)
+    tone = 0.5 * np.exp(2j * np.pi * 0.01 * np.arange(num_samples))
+    noise = 0.05 * (rng.standard_normal(num_samples) + 1j * rng.standard_normal(num_samples))
+    return (tone + noise).astype(np.complex64)
+
+
+class TestCodecs(unittest.TestCase):
+    """Unit tests for codecs, sample formats and the chunk compressor"""
+
+    def test_round_trip(self):
+        """Test every available codec restores the bytes it compressed"""
+        data = encode_samples(noisy_tone(10000), "cu8")[0].tobytes()
+        for name in available_codecs():
+            codec = get_codec(name)
+            self.assertEqual(codec.decompress(codec.compress(data), len(data)), data)
+        self.assertIn("zlib", available_codecs())
+
+    def test_invalid_and_missing_codecs(self):
+        """Test unknown codecs are rejected and missing packages are named"""
+        with self.assertRaises(ValueError):
+            get_codec("rar")
+        for name in set(CODECS) - set(available_codecs()):
+            with self.assertRaisesRegex(ImportError, "pip install"):
+                get_codec(name)
+
+    def test_sample_formats(self):
+        """Test lossless formats restore samples and lossy ones stay within a step"""
+        samples = noisy_tone(4096)
+        data, scale = encode_samples(samples, "complex64")
+        decoded = decode_samples(data, "complex64", scale)
+        np.testing.assert_array_equal(decoded, samples)
+        for sample_format, bits in (("int16", 16), ("int8", 8)):
+            data, scale = encode_samples(samples, sample_format)
+            self.assertEqual(len(data), len(samples) * bits // 4)
+            decoded = decode_samples(data, sample_format, scale)
+            step = np.abs(samples.view(np.float32)).max() / (2 ** (bits - 1) - 1)
+            self.assertLessEqual(np.abs((decoded - samples).view(np.float32)).max(), step)
+        raw = np.arange(256, dtype=np.uint8)
+        data, _ = encode_samples(raw, "cu8")
+        raw[:] = 0
+        self.assertEqual(data[255], 255)
+
+    def test_chunk_compressor_stats(self):
+        """Test the compressor reports ratio and throughput"""
+        compressor = ChunkCompressor(get_codec("zlib"), workers=2)
+        futures = [compressor.submit(bytes(100000)) for _ in range(4)]
+        self.assertTrue(all(len(future.result()) < 1000 for future in futures))
+        compressor.shutdown()
+        stats = compressor.stats
+        self.assertEqual(stats["bytes_in"], 400000)
+        self.assertGreater(stats["ratio"], 100)
+        self.assertGreater(stats["compress_mb_per_sec"], 0)
+
+    def test_compare_codecs(self):
+        """Test the codec comparison measures every requested codec"""
+        results = compare_codecs(noisy_tone(20000), codecs=("none", "zlib"), sample_format="int8")
+        self.assertEqual([r["codec"] for r in results], ["none", "zlib"])
+        self.assertAlmostEqual(results[0]["ratio"], 1.0)
+        self.assertGreater(results[1]["ratio"], 1.0)
+
+
+class TestCompressedRecorder(unittest.TestCase):
+    """Unit tests for .sdrz recordings"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_round_trip(self):
+        """Test chunks compressed in parallel are read back in order"""
+        filename = os.path.join(self.temp_dir, "capture.sdrz")
+        recorder = CompressedRecorder(
+            center_freq=100e6, sample_rate=1e6, freq_correction=0, gain="auto",
+            sample_format="int16", chunk_size=1000, workers=4, max_pending=3,
+        )
+        self.assertFalse(recorder.raw_input)
+        samples = noisy_tone(25000)
+        recorder.start_recording(time.time())
+        for batch in np.split(samples, 5):
+            recorder.save(batch, filename)
+        recorder.stop_recording(time.time())
+
+        metadata = read_metadata(filename)
+        self.assertEqual(metadata["codec"], "zlib")
+        self.assertEqual(metadata["num_samples"], 25000)
+        self.assertEqual(metadata["compression"]["bytes_in"], 25000 * 4)
+        with open_recording(filename) as reader:
+            self.assertEqual(len(reader), 25000)
+            np.testing.assert_allclose(reader[:], samples, atol=1e-4)
+            np.testing.assert_allclose(reader[1500:7321], samples[1500:7321], atol=1e-4)
+            chunks = [chunk for _, chunk in reader.iter_chunks(4096)]
+            np.testing.assert_allclose(np.concatenate(chunks), samples, atol=1e-4)
+
+    def test_truncated_frame(self):
+        """Test a half written last frame is skipped"""
+        filename = os.path.join(self.temp_dir, "crash.sdrz")
+        recorder = CompressedRecorder(
+            center_freq=100e6, sample_rate=1e6, freq_correction=0, gain="auto",
+            chunk_size=1000,
+        )
+        recorder.save(np.arange(4000, dtype=np.uint8), filename)
+        recorder.close()
+        with open(filename, "r+b") as out_file:
+            out_file.truncate(os.path.getsize(filename) - 3)
+        with open_recording(filename) as reader:
+            self.assertEqual(len(reader), 1000)
+
+    def test_append(self):
+        """Test a second recording continues an existing file"""
+        filename = os.path.join(self.temp_dir, "twice.sdrz")
+        samples = noisy_tone(4000)
+        for session, batch in enumerate(np.split(samples, 2)):
+            recorder = CompressedRecorder(
+                center_freq=100e6, sample_rate=1e3, freq_correction=0, gain="auto",
+                sample_format="int16", chunk_size=500,
+            )
+            recorder.clock = lambda session=session: 1000.0 + 10 * session
+            recorder.start_recording(1000.0 + 10 * session)
+            recorder.save(batch, filename)
+            recorder.stop_recording(1005.0 + 10 * session)
+            if session == 0:
+                with open(filename, "ab") as out_file:
+                    out_file.write(b"\0" * 5)  # half written frame header
+
+        metadata = read_metadata(filename)
+        self.assertEqual(metadata["num_samples"], 4000)
+        self.assertEqual(metadata["start_time"], 1000.0)
+        self.assertEqual(len(metadata["discontinuities"]), 1)
+        self.assertEqual(metadata["discontinuities"][0]["offset"], 2000)
+        self.assertEqual(metadata["discontinuities"][0]["lost_samples"], 8000)
+        with open_recording(filename) as reader:
+            self.assertEqual(len(reader), 4000)
+            np.testing.assert_allclose(reader[:], samples, atol=1e-4)
+            self.assertAlmostEqual(float(reader.sample_time(2000)), 1010.0)
+        with self.assertRaises(ValueError):
+            CompressedRecorder(
+                center_freq=100e6, sample_rate=1e3, freq_correction=0, gain="auto",
+            ).save(samples, filename)
+
+    def test_interface_capture(self):
+        """Test a threaded capture records raw bytes through the codec layer"""
+        iface = SimulatedSDRInterface(
+            realtime=False, output_dir=self.temp_dir, filetype="sdrz", sample_window=4096,
+        )
+        self.assertTrue(iface.options["recorder"].raw_input)
+        iface.start_recording_threaded(recording_name="zipped")
+        time.sleep(0.1)
+        stats = iface.stop_recording_threaded(timeout=5)
+        filename = os.path.join(self.temp_dir, "zipped-sample_window4096.sdrz")
+        with open_recording(filename) as reader:
+            self.assertEqual(len(reader), 4096 * stats["written"])
+            self.assertEqual(reader.sample_rate, 2.4e6)
+
+    def test_hdf5_compression(self):
+        """Test both HDF5 layouts apply the compression filter"""
+        filename = os.path.join(self.temp_dir, "capture.hdf5")
+        recorder = HDF5Recorder(
+            center_freq=100e6, sample_rate=1e6, freq_correction=0, gain="auto",
+            streaming=True, compression="gzip",
+        )
+        recorder.save(noisy_tone(4096), filename)
+        recorder.stop_recording(time.time())
+        with h5py.File(filename, "r") as f:
+            self.assertEqual(f["recording_data"]["iq"].compression, "gzip")
+
+        split = os.path.join(self.temp_dir, "split.hdf5")
+        recorder = HDF5Recorder(
+            center_freq=100e6, sample_rate=1e6, freq_correction=0, gain="auto",
+            compression="gzip",
+        )
+        samples = noisy_tone(4096)
+        for _ in range(2):
+            recorder.save(samples, split)
+        with h5py.File(split, "r") as f:
+            for name in ("real", "imag", "timestamps"):
+                self.assertEqual(f["recording_data"][name].compression, "gzip")
+        with open_recording(split) as reader:
+            np.testing.assert_allclose(reader[4096:], samples, atol=1e-6)
+        with self.assertRaises(ValueError):
+            HDF5Recorder(
+                center_freq=100e6, sample_rate=1e6, freq_correction=0, gain="auto",
+                compression="rar",
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
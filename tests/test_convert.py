@@ -0,0 +1,222 @@
+""" Collection of tests for converting recordings between file types """
+import unittest
+import importlib.util
+import io
+import os
+import shutil
+import tempfile
+from contextlib import redirect_stdout
+import numpy as np
+from sdrcap.cli import main
+from sdrcap.clock import CaptureClock
+from sdrcap.convert import convert_file, convert_files
+from sdrcap.readers import CSVReader, open_recording
+from sdrcap.recorders.csv_recorder import CSVRecorder
+from sdrcap.recorders.hdf5_recorder import HDF5Recorder
+from sdrcap.recorders.parquet_recorder import ParquetRecorder
+from sdrcap.recorders.raw_recorder import RawIQRecorder
+from tests.test_readers import make_samples
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+START_TIME = 1_700_000_000.0
+
+
+class TestConvert(unittest.TestCase):
+    """Unit tests for the recording converter"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.raw, self.samples = make_samples(5000)
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def path(self, name):
+        """Returns the path of a file in the temporary directory"""
+        return os.path.join(self.temp_dir, name)
+
+    def record_cu8(self, name="source.cu8"):
+        """Records the samples as cu8 and returns the filename"""
+        filename = self.path(name)
+        recorder = RawIQRecorder(
+            center_freq=462e6, sample_rate=1000.0, freq_correction=60, gain="auto"
+        )
+        recorder.start_recording(START_TIME)
+        for begin in range(0, len(self.raw), 2000):
+            recorder.save(self.raw[begin : begin + 2000], filename)
+        recorder.stop_recording(START_TIME + 5)
+        return filename
+
+    def record_legacy_csv(self, name="legacy.csv"):
+        """Writes a CSV recording the way older releases did: the header
+        before every batch and Python float formatting"""
+        filename = self.path(name)
+        with open(filename, "w", encoding="utf-8") as out_file:
+            for begin in range(0, len(self.samples), 1500):
+                out_file.write("Real Value,Imaginary Value,TimeStamp\n")
+                for index, sample in enumerate(self.samples[begin : begin + 1500]):
+                    second = 20 + (begin + index) // 1000
+                    stamp = f"2023-11-14 22:13:{second:02d}.000000"
+                    out_file.write(
+                        f"{float(sample.real)},{float(sample.imag)},{stamp}\n"
+                    )
+        return filename
+
+    def test_csv_reader(self):
+        """Tests the vectorized parser on recorder output and old recordings"""
+        filename = self.path("current.csv")
+        recorder = CSVRecorder(sample_rate=1000.0)
+        recorder.clock = lambda: START_TIME
+        for begin in range(0, len(self.samples), 2000):
+            recorder.save(self.samples[begin : begin + 2000], filename)
+        with CSVReader(filename, sample_rate=1000.0) as reader:
+            self.assertEqual(reader.num_samples, len(self.samples))
+            self.assertEqual(reader.start_time, START_TIME)
+            np.testing.assert_allclose(
+                reader[1990:2010], self.samples[1990:2010], atol=1e-6
+            )
+
+        with open_recording(self.record_legacy_csv(), sample_rate=1000.0) as reader:
+            self.assertEqual(reader.num_samples, len(self.samples))
+            np.testing.assert_array_equal(reader[:], self.samples)
+        with self.assertRaises(ValueError):
+            CSVReader(filename)
+
+    def test_round_trip(self):
+        """Tests converting a legacy CSV to every built-in file type and back"""
+        source = self.record_legacy_csv()
+        for filetype in ("cu8", "hdf5", "sdrz", "csv"):
+            destination = self.path(f"converted-{filetype}.{filetype}")
+            result = convert_file(
+                source, destination, chunk_size=1024, sample_rate=1000.0
+            )
+            self.assertEqual(result["samples_in"], len(self.samples))
+            self.assertEqual(result["samples_out"], len(self.samples))
+            options = {"sample_rate": 1000.0} if filetype == "csv" else {}
+            with open_recording(destination, **options) as reader:
+                np.testing.assert_allclose(reader[:], self.samples, atol=1e-6)
+                self.assertAlmostEqual(reader.start_time, START_TIME, places=3)
+
+        hdf5 = self.path("split.hdf5")
+        convert_file(
+            source, hdf5, chunk_size=1024, sample_rate=1000.0, hdf5_layout="split"
+        )
+        with open_recording(hdf5) as reader:
+            np.testing.assert_allclose(reader[:], self.samples, atol=1e-6)
+
+    def test_keeps_metadata(self):
+        """Tests that parameters and sample times carry over"""
+        destination = self.path("converted.hdf5")
+        convert_file(self.record_cu8(), destination, chunk_size=1500)
+        with open_recording(destination) as reader:
+            self.assertEqual(reader.center_freq, 462e6)
+            self.assertEqual(reader.sample_rate, 1000.0)
+            self.assertEqual(reader.start_time, START_TIME)
+            self.assertAlmostEqual(
+                float(reader.sample_time(3000)), START_TIME + 3, places=6
+            )
+            np.testing.assert_allclose(reader[:], self.samples, atol=1e-6)
+        with self.assertRaises(FileExistsError):
+            convert_file(self.path("source.cu8"), destination)
+
+    def test_hdf5_sources(self):
+        """Tests converting default and streaming layout HDF5 recordings"""
+        for layout, streaming in (("split", False), ("stream", True)):
+            source = self.path(f"{layout}-source.hdf5")
+            recorder = HDF5Recorder(
+                center_freq=462e6, sample_rate=1000.0, freq_correction=60,
+                gain="auto", streaming=streaming,
+            )
+            for begin in range(0, 4000, 2000):
+                recorder.clock = lambda begin=begin: START_TIME + begin / 1000.0
+                recorder.save(self.samples[begin : begin + 2000], source)
+            recorder.stop_recording(START_TIME + 4)
+            for filetype in ("csv", "hdf5", "cu8", "sdrz"):
+                destination = self.path(f"{layout}-converted.{filetype}")
+                result = convert_file(source, destination, chunk_size=1500)
+                self.assertEqual(result["samples_out"], 4000)
+                options = {"sample_rate": 1000.0} if filetype == "csv" else {}
+                with open_recording(destination, **options) as reader:
+                    np.testing.assert_allclose(
+                        reader[:], self.samples[:4000], atol=1e-2
+                    )
+                    self.assertAlmostEqual(reader.start_time, START_TIME, places=3)
+                    if filetype in ("cu8", "sdrz"):
+                        self.assertEqual(reader.metadata["freq_correction"], 60)
+                        self.assertAlmostEqual(
+                            reader.metadata["stop_time"], START_TIME + 4, places=3
+                        )
+
+    def test_discontinuities(self):
+        """Test the markers of lost samples survive every conversion"""
+        source = self.path("gapped.cu8")
+        recorder = RawIQRecorder(
+            center_freq=462e6, sample_rate=1000.0, freq_correction=60, gain="auto"
+        )
+        recorder.clock = CaptureClock(1000.0)
+        recorder.start_recording(START_TIME)
+        # 1 s batches, the third one 5 s late
+        for number, arrival in enumerate([1001.0, 1002.0, 1008.0, 1009.0, 1010.0]):
+            recorder.clock.begin_batch(recorder.clock.capture(1000, arrival))
+            batch = self.raw[2000 * number : 2000 * (number + 1)]
+            recorder.save(batch, source)
+        recorder.stop_recording(1010.0)
+
+        for filetype in ("cu8", "sdrz", "hdf5"):
+            destination = self.path(f"gapped-out.{filetype}")
+            convert_file(source, destination, chunk_size=700)
+            with open_recording(destination) as reader:
+                self.assertEqual(len(reader.discontinuities), 1, filetype)
+                marker = reader.discontinuities[0]
+                self.assertEqual(marker["offset"], 2000, filetype)
+                self.assertAlmostEqual(marker["time"], 1007.0, msg=filetype)
+                np.testing.assert_allclose(
+                    reader.sample_time([0, 1999, 2000, 4999]),
+                    [1000.0, 1001.999, 1007.0, 1009.999],
+                )
+                self.assertEqual(marker["lost_samples"], 5000, filetype)
+
+    def test_process_pool(self):
+        """Tests converting several files on worker processes"""
+        sources = [self.record_cu8(f"source{index}.cu8") for index in range(3)]
+        output_dir = self.path("out")
+        results = convert_files(sources, "sdrz", output_dir=output_dir, workers=2)
+        self.assertEqual([result["source"] for result in results], sources)
+        for result in results:
+            self.assertTrue(result["destination"].startswith(output_dir))
+            with open_recording(result["destination"]) as reader:
+                np.testing.assert_allclose(reader[:], self.samples, atol=1e-6)
+
+    def test_cli(self):
+        """Tests the convert command"""
+        source = self.record_legacy_csv()
+        with redirect_stdout(io.StringIO()) as output:
+            code = main(["convert", source, "--to", "cu8", "--sample-rate", "1000"])
+        self.assertEqual(code, 0)
+        self.assertIn("5000 samples", output.getvalue())
+        with open_recording(self.path("legacy.cu8")) as reader:
+            np.testing.assert_allclose(reader[:], self.samples, atol=1e-6)
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main(["convert", source, "--to", "cu8"]), 1)
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_parquet(self):
+        """Tests converting to Parquet and back"""
+        destination = self.path("converted.parquet")
+        convert_file(self.record_cu8(), destination, chunk_size=1500)
+        with open_recording(destination) as reader:
+            self.assertEqual(reader.sample_rate, 1000.0)
+            np.testing.assert_allclose(reader[:], self.samples, atol=1e-6)
+        recorder = ParquetRecorder(
+            center_freq=462e6, sample_rate=1000.0, freq_correction=60, gain="auto"
+        )
+        with self.assertRaises(FileExistsError):
+            recorder.save(self.samples, destination)
+        with open_recording(destination) as reader:
+            self.assertEqual(len(reader), len(self.samples))
+
+
+if __name__ == "__main__":
+    unittest.main()
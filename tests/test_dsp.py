@@ -0,0 +1,100 @@
+""" Collection of tests for the streaming DSP pipeline """
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from sdrcap.dsp import DCBlocker, FIRDecimator, FrequencyShift, NarrowDtype, Pipeline
+from sdrcap.iq import complex_to_cu8
+from sdrcap.recorders.raw_recorder import read_metadata
+from sdrcap.rtl_interface import DEFAULT_OPTIONS, create_recorder
+
+SAMPLE_RATE = 2.4e6
+
+
+def tone(freq, count, sample_rate=SAMPLE_RATE):
+    """Returns a complex64 tone at `freq` Hz"""
+    return np.exp(2j * np.pi * freq / sample_rate * np.arange(count)).astype(
+        np.complex64
+    )
+
+
+def run_batches(pipeline, samples, sizes):
+    """Feeds `samples` through `pipeline` in batches of the given sizes"""
+    outputs = []
+    offset = 0
+    for size in sizes:
+        outputs.append(pipeline.process(samples[offset : offset + size]).copy())
+        offset += size
+    return np.concatenate(outputs)
+
+
+class TestDSP(unittest.TestCase):
+    """Unit tests for pipeline stages and their state across batches"""
+
+    def test_batches_match_single_pass(self):
+        """Test batch boundaries leave no trace in the output"""
+        rng = np.random.default_rng(1)
+        samples = (rng.standard_normal(5000) + 1j * rng.standard_normal(5000)).astype(
+            np.complex64
+        )
+
+        def make():
+            return Pipeline(
+                [FrequencyShift(1e5, SAMPLE_RATE), FIRDecimator(7)], SAMPLE_RATE
+            )
+
+        expected = make().process(samples).copy()
+        batched = run_batches(make(), samples, [1000, 333, 7, 1, 2659, 1000])
+        # the zeroed filter history yields an output for every 7th input
+        self.assertEqual(len(expected), 715)
+        np.testing.assert_allclose(batched, expected, rtol=1e-4, atol=1e-5)
+
+    def test_decimator_filters(self):
+        """Test the decimator passes in-band and rejects out-of-band tones"""
+        decimator = Pipeline([FIRDecimator(10)], SAMPLE_RATE)
+        self.assertEqual(decimator.output_rate, SAMPLE_RATE / 10)
+        passed = decimator.process(tone(20e3, 24000))[100:].copy()
+        decimator.reset()
+        rejected = decimator.process(tone(600e3, 24000))[100:]
+        self.assertGreater(np.abs(passed).mean(), 0.95)
+        self.assertLess(np.abs(rejected).mean(), 0.01)
+
+    def test_shift_and_dc(self):
+        """Test shifting moves a tone to DC and the DC blocker removes offsets"""
+        shifted = Pipeline([FrequencyShift(-50e3, SAMPLE_RATE)], SAMPLE_RATE)
+        self.assertEqual(shifted.output_center_freq(100e6), 100.05e6)
+        np.testing.assert_allclose(
+            run_batches(shifted, tone(50e3, 3000), [1000, 1000, 1000]), 1, atol=1e-3
+        )
+        blocker = Pipeline([DCBlocker(1.0)], SAMPLE_RATE)
+        offset = tone(10e3, 2400) + (0.2 + 0.1j)
+        self.assertLess(abs(blocker.process(offset).mean()), 1e-3)
+
+    def test_uint8_in_and_out(self):
+        """Test raw byte input is converted and cu8 narrowing matches the helper"""
+        raw = complex_to_cu8(0.5 * tone(30e3, 1000))
+        pipeline = Pipeline([NarrowDtype("cu8")], SAMPLE_RATE)
+        self.assertEqual(pipeline.output_dtype, np.uint8)
+        np.testing.assert_array_equal(pipeline.process(raw.tobytes()), raw)
+
+    def test_recorder_metadata(self):
+        """Test the recorder of a pipeline records the decimated sample rate"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            pipeline = Pipeline([FIRDecimator(8)], SAMPLE_RATE)
+            recorder = create_recorder(
+                {**DEFAULT_OPTIONS, "filetype": "cu8", "pipeline": pipeline}
+            )
+            filename = os.path.join(temp_dir, "test.cu8")
+            recorder.save(pipeline.process(tone(1e3, 8000)), filename)
+            metadata = read_metadata(filename)
+            self.assertEqual(metadata["sample_rate"], SAMPLE_RATE / 8)
+            self.assertEqual(metadata["input_sample_rate"], SAMPLE_RATE)
+            self.assertIn("FIRDecimator(8", metadata["pipeline"])
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+""" Collection of tests for encrypted recordings """
+import unittest
+import importlib.util
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from sdrcap.encryption import ChunkCipher, generate_key, hkdf_sha256
+from sdrcap.readers import open_recording
+from sdrcap.recorders.compressed_recorder import CompressedRecorder, iter_frames
+from sdrcap.recorders.raw_recorder import metadata_filename, read_metadata
+from sdrcap.sim_interface import SimulatedSDRInterface
+from tests.test_codecs import noisy_tone
+
+HAS_CRYPTOGRAPHY = importlib.util.find_spec("cryptography") is not None
+
+
+class TestEncryption(unittest.TestCase):
+    """Unit tests for chunk encryption and encrypted .sdrz recordings"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, "secret.sdrz")
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def record(self, key, samples):
+        """Records samples in 1000 sample chunks with a key"""
+        recorder = CompressedRecorder(
+            center_freq=100e6, sample_rate=1e6, freq_correction=0, gain="auto",
+            sample_format="int16", chunk_size=1000, workers=4, encryption_key=key,
+        )
+        recorder.start_recording(time.time())
+        for batch in np.split(samples, 4):
+            recorder.save(batch, self.filename)
+        recorder.stop_recording(time.time())
+
+    @unittest.skipUnless(HAS_CRYPTOGRAPHY, "cryptography is not installed")
+    def test_hkdf(self):
+        """Test HKDF-SHA256 against RFC 5869 test case 1"""
+        okm = hkdf_sha256(
+            bytes.fromhex("0b" * 22),
+            bytes.fromhex("000102030405060708090a0b0c"),
+            bytes.fromhex("f0f1f2f3f4f5f6f7f8f9"),
+            42,
+        )
+        self.assertEqual(
+            okm.hex(),
+            "3cb25f25faacd57a90434f64d0362f2a2d2d0a90cf1a5a4c5db02d56ecc4c5bf"
+            "34007208d5b887185865",
+        )
+
+    def test_invalid_key(self):
+        """Test keys of the wrong size are rejected"""
+        with self.assertRaises(ValueError):
+            generate_key(20)
+        with self.assertRaises(ValueError):
+            ChunkCipher(b"short")
+
+    @unittest.skipUnless(HAS_CRYPTOGRAPHY, "cryptography is not installed")
+    def test_round_trip(self):
+        """Test encrypted chunks are read back, also out of order"""
+        key = generate_key()
+        samples = noisy_tone(20000)
+        self.record(key, samples)
+        metadata = read_metadata(self.filename)
+        self.assertEqual(metadata["encryption"]["cipher"], "AES-GCM")
+        with open(metadata_filename(self.filename), encoding="utf-8") as meta_file:
+            self.assertNotIn(key.hex(), meta_file.read())
+        with open_recording(self.filename, key=key.hex()) as reader:
+            np.testing.assert_allclose(
+                reader[12345:17000], samples[12345:17000], atol=1e-4
+            )
+            np.testing.assert_allclose(reader[10:900], samples[10:900], atol=1e-4)
+            np.testing.assert_allclose(reader[:], samples, atol=1e-4)
+
+    @unittest.skipUnless(HAS_CRYPTOGRAPHY, "cryptography is not installed")
+    def test_append(self):
+        """Test a second recording keeps the salt so every frame decrypts"""
+        key = generate_key()
+        samples = noisy_tone(8000)
+        self.record(key, samples[:4000])
+        salt = read_metadata(self.filename)["encryption"]["salt"]
+        self.record(key, samples[4000:])
+        self.assertEqual(read_metadata(self.filename)["encryption"]["salt"], salt)
+        with open_recording(self.filename, key=key) as reader:
+            np.testing.assert_allclose(reader[:], samples, atol=1e-4)
+        for other_key in (None, generate_key()):
+            with self.assertRaises(ValueError):
+                self.record(other_key, samples[:4000])
+        with open_recording(self.filename, key=key) as reader:
+            self.assertEqual(len(reader), 8000)
+
+    @unittest.skipUnless(HAS_CRYPTOGRAPHY, "cryptography is not installed")
+    def test_wrong_key(self):
+        """Test a missing or wrong key is rejected before reading"""
+        self.record(generate_key(), noisy_tone(4000))
+        with self.assertRaises(ValueError):
+            open_recording(self.filename)
+        with self.assertRaises(ValueError):
+            open_recording(self.filename, key=generate_key())
+
+    @unittest.skipUnless(HAS_CRYPTOGRAPHY, "cryptography is not installed")
+    def test_tampering(self):
+        """Test modified and swapped frames fail authentication"""
+        key = generate_key(16)
+        self.record(key, noisy_tone(4000))
+        frames = list(iter_frames(self.filename))
+        with open(self.filename, "rb") as in_file:
+            data = bytearray(in_file.read())
+        first, second = frames[0][0] - 12, frames[1][0] - 12
+        length = frames[1][0] - frames[0][0]
+        swapped = bytearray(data)
+        swapped[first : first + length] = data[second : second + length]
+        swapped[second : second + length] = data[first : first + length]
+        with open(self.filename, "wb") as out_file:
+            out_file.write(swapped)
+        with open_recording(self.filename, key=key) as reader:
+            with self.assertRaisesRegex(ValueError, "Chunk 0"):
+                reader[:10]  # pylint: disable=pointless-statement
+            self.assertEqual(len(reader[2000:2010]), 10)
+
+        data[frames[3][0] + 5] ^= 1
+        with open(self.filename, "wb") as out_file:
+            out_file.write(data)
+        with open_recording(self.filename, key=key) as reader:
+            with self.assertRaisesRegex(ValueError, "Chunk 3"):
+                reader[3500:]  # pylint: disable=pointless-statement
+
+    @unittest.skipUnless(HAS_CRYPTOGRAPHY, "cryptography is not installed")
+    def test_truncation(self):
+        """Test a recording missing its trailing frames is rejected"""
+        key = generate_key()
+        self.record(key, noisy_tone(4000))
+        frames = list(iter_frames(self.filename))
+        with open(self.filename, "r+b") as out_file:
+            out_file.truncate(frames[-1][0] - 12)
+        with self.assertRaisesRegex(ValueError, "trailing frames"):
+            open_recording(self.filename, key=key)
+
+    @unittest.skipUnless(HAS_CRYPTOGRAPHY, "cryptography is not installed")
+    def test_interface_capture(self):
+        """Test the encryption_key option of a capture"""
+        key = generate_key()
+        iface = SimulatedSDRInterface(
+            realtime=False, output_dir=self.temp_dir, filetype="sdrz",
+            sample_window=4096, encryption_key=key,
+        )
+        for _ in range(3):
+            iface.record_single_sample("locked")
+        iface.options["recorder"].stop_recording(time.time())
+        filename = os.path.join(self.temp_dir, "locked-sample_window4096.sdrz")
+        with open_recording(filename, key=key) as reader:
+            self.assertEqual(len(reader), 3 * 4096)
+        with self.assertRaises(ValueError):
+            SimulatedSDRInterface(
+                output_dir=self.temp_dir, filetype="cu8", encryption_key=key
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+""" Collection of tests for the capture session metrics """
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import time
+import urllib.request
+from sdrcap.metrics import CaptureMetrics, Histogram, JSONSnapshotWriter, MetricsServer
+from sdrcap.sim_interface import SimulatedSDRInterface
+from tests.test_capture import ListRecorder
+
+
+class TestCaptureMetrics(unittest.TestCase):
+    """Unit tests for the histograms, exports and capture hooks"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_histogram(self):
+        """Test values land in their buckets and quantiles use bucket bounds"""
+        histogram = Histogram(buckets=(0.001, 0.01, 0.1))
+        for value in (0.0005, 0.005, 0.005, 0.05, 5.0):
+            histogram.observe(value)
+        self.assertEqual(histogram.counts, [1, 2, 1, 1])
+        self.assertEqual(histogram.quantile(0.5), 0.01)
+        self.assertEqual(histogram.snapshot()["p99"], "+Inf")
+        with self.assertRaises(ValueError):
+            Histogram(buckets=(0.1, 0.01))
+
+    def test_prometheus_text(self):
+        """Test counters and cumulative buckets in the exposition format"""
+        metrics = CaptureMetrics(labels={"device": "roof"}, buckets=(0.01, 0.1))
+        metrics.observe_save(0.05, 1000, 2000)
+        metrics.observe_save(0.005, 1000, 2000)
+        text = metrics.to_prometheus()
+        self.assertIn('sdrcap_samples_written_total{device="roof"} 2000', text)
+        self.assertIn('sdrcap_bytes_written_total{device="roof"} 4000', text)
+        self.assertIn('sdrcap_save_latency_seconds_bucket{device="roof",le="0.01"} 1', text)
+        self.assertIn('sdrcap_save_latency_seconds_bucket{device="roof",le="+Inf"} 2', text)
+        self.assertIn('sdrcap_save_latency_seconds_count{device="roof"} 2', text)
+
+    def test_threaded_capture(self):
+        """Test a threaded capture fills the counters and calls the hooks"""
+        metrics = CaptureMetrics()
+        events = []
+        metrics.add_hook(lambda name, value: events.append(name))
+        iface = SimulatedSDRInterface(
+            realtime=False,
+            output_dir=self.temp_dir,
+            filetype="cu8",
+            sample_window=4096,
+            metrics=metrics,
+        )
+        iface.start_recording_threaded(recording_name="metrics")
+        time.sleep(0.1)
+        stats = iface.stop_recording_threaded(timeout=5)
+        snapshot = metrics.snapshot()
+        self.assertEqual(snapshot["samples_written"], 4096 * stats["written"])
+        self.assertEqual(snapshot["bytes_written"], 2 * 4096 * stats["written"])
+        self.assertEqual(snapshot["samples_captured"], 4096 * stats["captured"])
+        self.assertEqual(snapshot["save_latency_seconds"]["count"], stats["written"])
+        self.assertIn("save_latency", events)
+        self.assertIn("queue_depth", events)
+
+    def test_dropped_samples(self):
+        """Test batches lost to backpressure are counted as dropped samples"""
+        metrics = CaptureMetrics()
+        iface = SimulatedSDRInterface(
+            realtime=False,
+            output_dir=self.temp_dir,
+            sample_window=1000,
+            num_buffers=2,
+            backpressure="drop-newest",
+            metrics=metrics,
+        )
+        iface.options["recorder"] = ListRecorder(delay=0.01)
+        iface.start_recording_threaded()
+        time.sleep(0.1)
+        stats = iface.stop_recording_threaded(timeout=5)
+        self.assertGreater(stats["dropped"], 0)
+        self.assertEqual(metrics.counters["samples_dropped"], 1000 * stats["dropped"])
+
+    def test_single_sample(self):
+        """Test the synchronous capture loop records read and save latency"""
+        metrics = CaptureMetrics()
+        iface = SimulatedSDRInterface(
+            realtime=False, output_dir=self.temp_dir, filetype="cu8",
+            sample_window=1024, metrics=metrics,
+        )
+        iface.record_single_sample(recording_name="single")
+        self.assertEqual(metrics.read_latency.count, 1)
+        self.assertEqual(metrics.counters["samples_written"], 1024)
+
+    def test_server_and_snapshot(self):
+        """Test the HTTP endpoints and the periodic JSON snapshot"""
+        metrics = CaptureMetrics()
+        metrics.observe_read(0.002, 512)
+        server = MetricsServer(metrics, port=0).start()
+        try:
+            base = f"http://127.0.0.1:{server.port}"
+            with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+                self.assertIn("sdrcap_samples_captured_total 512", response.read().decode())
+            with urllib.request.urlopen(f"{base}/metrics.json", timeout=5) as response:
+                self.assertEqual(json.load(response)["samples_captured"], 512)
+        finally:
+            server.stop()
+
+        filename = os.path.join(self.temp_dir, "metrics.json")
+        writer = JSONSnapshotWriter(metrics, filename, interval=0.01).start()
+        time.sleep(0.05)
+        metrics.observe_read(0.002, 512)
+        writer.stop()
+        with open(filename, "r", encoding="utf-8") as snapshot_file:
+            self.assertEqual(json.load(snapshot_file)["samples_captured"], 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+""" Collection of tests for the multi device capture manager """
+import unittest
+import shutil
+import tempfile
+import time
+import numpy as np
+from sdrcap.multi_device import CaptureManager
+from sdrcap.readers import open_recording
+from sdrcap.recorders.raw_recorder import read_metadata
+
+
+class CountingSdr:
+    """Stand-in device returning batches of a constant byte value"""
+
+    def __init__(self, value):
+        self.value = value
+
+    def read_bytes(self, num_bytes):
+        """Returns one batch of raw bytes, paced like a slow device"""
+        time.sleep(0.005)
+        return np.full(num_bytes, self.value, dtype=np.uint8)
+
+    def close(self):
+        """Releases the device"""
+
+
+def counting_sdr(options):
+    """Device factory picking the byte value from the device index"""
+    return CountingSdr(options["device_index"])
+
+
+class TestCaptureManager(unittest.TestCase):
+    """Unit tests for per device capture and writer processes"""
+
+    def setUp(self):
+        """Creates the temporary output directory"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_parallel_devices(self):
+        """Test every device records its own stream through shared memory"""
+        manager = CaptureManager(
+            device_factory=counting_sdr,
+            output_dir=self.temp_dir,
+            filetype="cu8",
+            sample_window=64,
+            num_buffers=4,
+            # 64 samples every 5 ms, with room for scheduling jitter
+            sample_rate=12800.0,
+            clock_tolerance=1.0,
+        )
+        manager.add_device("first", device_index=1)
+        manager.add_device("second", device_index=2)
+        with self.assertRaises(ValueError):
+            manager.add_device("first", device_index=3)
+
+        started = time.time()
+        manager.start()
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            status = manager.status()
+            if all(device["written"] >= 3 for device in status.values()):
+                break
+            time.sleep(0.05)
+        manager.stop()
+
+        self.assertFalse(manager.running)
+        for index, (name, device) in enumerate(manager.status().items(), start=1):
+            self.assertEqual(device["errors"], 0, name)
+            self.assertGreaterEqual(device["written"], 3)
+            self.assertEqual(device["captured"], device["written"] + device["dropped"])
+            with open_recording(device["filename"]) as reader:
+                self.assertEqual(len(reader), 64 * device["written"])
+                np.testing.assert_array_equal(reader.raw(0, 4), np.full(8, index))
+            metadata = read_metadata(device["filename"])
+            self.assertEqual(metadata["sample_index"], 0)
+            self.assertGreater(metadata["start_time"], started - 1)
+            if device["dropped"] == 0:
+                self.assertEqual(metadata["discontinuities"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+""" Collection of tests for recording overviews """
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from sdrcap.overview import OverviewBuilder, overview_filename, read_overview
+from sdrcap.readers import open_recording
+from sdrcap.sim_interface import SimulatedSDRInterface, SyntheticSource
+
+
+def tone(count, frequency, sample_rate, amplitude=0.5):
+    """Returns a complex tone with a little noise"""
+    rng = np.random.default_rng(0)
+    index = np.arange(count)
+    samples = amplitude * np.exp(2j * np.pi * frequency / sample_rate * index)
+    samples += 0.01 * (rng.standard_normal(count) + 1j * rng.standard_normal(count))
+    return samples.astype(np.complex64)
+
+
+class TestOverview(unittest.TestCase):
+    """Unit tests for overview building, writing and reading"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_incremental(self):
+        """Tests that uneven batches build the same rows as one batch"""
+        samples = tone(40_000, 1000.0, 10_000.0)
+        options = {"block_size": 256, "levels": 3, "factor": 4, "fft_size": 64}
+        whole = OverviewBuilder(10_000.0, **options).update(samples, 100.0)
+        builder = OverviewBuilder(10_000.0, **options)
+        parts = [[] for _ in range(3)]
+        for begin, end in ((0, 1000), (1000, 1001), (1001, 17_777), (17_777, 40_000)):
+            batch_time = 100.0 + begin / 10_000.0
+            for level, rows in enumerate(builder.update(samples[begin:end], batch_time)):
+                parts[level].append(rows)
+        for level in range(3):
+            rows = np.concatenate(parts[level])
+            self.assertEqual(len(rows), 40_000 // (256 * 4**level))
+            for field in ("time", "min", "max", "mean", "power"):
+                np.testing.assert_allclose(rows[field], whole[level][field], rtol=1e-5)
+        np.testing.assert_allclose(whole[1]["max"][0], whole[0]["max"][:4].max())
+        np.testing.assert_allclose(whole[1]["time"][1], 100.0 + 1024 / 10_000.0)
+
+    def test_spectrum(self):
+        """Tests that a full scale tone peaks near 0 dBFS in its bin"""
+        rows = OverviewBuilder(10_000.0, block_size=1024, fft_size=128).update(
+            tone(4096, 2500.0, 10_000.0, amplitude=1.0), 0.0
+        )[0]
+        power = 10 * np.log10(rows["power"])
+        frequencies = np.fft.fftshift(np.fft.fftfreq(128, 1 / 10_000.0))
+        self.assertTrue(np.all(frequencies[power.argmax(axis=1)] == 2500.0))
+        np.testing.assert_allclose(power.max(axis=1), 0.0, atol=0.5)
+        np.testing.assert_allclose(rows["mean"], 1.0, atol=0.05)
+
+    def test_recording(self):
+        """Tests an overview written alongside a simulated cu8 capture"""
+        interface = SimulatedSDRInterface(
+            source=SyntheticSource(tones=((100.05e6, 0.5),), seed=1),
+            realtime=False,
+            filetype="cu8",
+            sample_rate=1e6,
+            center_freq=100e6,
+            sample_window=10_000,
+            output_dir=self.temp_dir,
+            overview=True,
+            overview_block_size=1024,
+            overview_levels=3,
+            overview_factor=4,
+            overview_fft_size=64,
+        )
+        recorder = interface.options["recorder"]
+        recorder.start_recording(0.0)
+        for _ in range(10):
+            interface.record_single_sample("overview")
+        filename = os.path.join(self.temp_dir, "overview-sample_window10000.cu8")
+        self.assertEqual(len(read_overview(filename, level=0)["time"]), 97)
+        recorder.stop_recording(1.0)
+
+        with open_recording(filename) as reader:
+            self.assertEqual(reader.num_samples, 100_000)
+            overview = reader.overview(max_rows=10)
+            self.assertEqual(overview["level"], 2)
+            self.assertEqual(overview["samples_per_row"], 16 * 1024)
+            self.assertEqual(len(overview["time"]), 6)
+            peak = overview["frequencies"][overview["power"].argmax(axis=1)]
+            np.testing.assert_allclose(peak, 100e6 + 50e3, atol=1e6 / 64)
+            self.assertTrue(np.all(overview["max"] >= overview["mean"]))
+            samples = np.abs(reader[: 16 * 1024])
+            self.assertAlmostEqual(overview["max"][0], samples.max(), places=5)
+        self.assertEqual(
+            os.path.getsize(overview_filename(filename, 0)), 97 * (8 + 12 + 64 * 4)
+        )
+        with self.assertRaises(ValueError):
+            read_overview(filename, level=3)
+
+
+if __name__ == "__main__":
+    unittest.main()
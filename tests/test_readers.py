@@ -0,0 +1,141 @@
+""" Collection of tests for reading recordings back """
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from sdrcap.readers import open_recording, HDF5Reader, RawIQReader
+from sdrcap.recorders.hdf5_recorder import HDF5Recorder
+from sdrcap.recorders.raw_recorder import RawIQRecorder
+
+
+def make_samples(count):
+    """Returns complex64 samples that are exactly representable in cu8"""
+    raw = (np.arange(2 * count) % 256).astype(np.uint8)
+    return raw, (raw.astype(np.float32) / 127.5 - 1).view(np.complex64)
+
+
+class TestReaders(unittest.TestCase):
+    """Unit tests for recording readers"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def record_hdf5(self, batches, **stream_options):
+        """Records batches with the HDF5Recorder and returns the filename"""
+        filename = os.path.join(self.temp_dir, "test.hdf5")
+        recorder = HDF5Recorder(
+            center_freq=462e6,
+            sample_rate=1000.0,
+            freq_correction=60,
+            gain="auto",
+            **stream_options,
+        )
+        for batch in batches:
+            recorder.save(batch, filename)
+        recorder.stop_recording(0.0)
+        return filename
+
+    def test_hdf5_stream_slicing(self):
+        """Test streaming HDF5 slices are memory-mapped and match the input"""
+        _, samples = make_samples(100)
+        filename = self.record_hdf5(
+            [samples[:40], samples[40:]], streaming=True, chunk_size=16
+        )
+        with open_recording(filename) as reader:
+            self.assertIsInstance(reader, HDF5Reader)
+            self.assertEqual(len(reader), 100)
+            self.assertEqual(reader.center_freq, 462e6)
+            np.testing.assert_array_equal(reader[:], samples)
+            np.testing.assert_array_equal(reader[10:70], samples[10:70])
+            np.testing.assert_array_equal(reader[95:5:-3], samples[95:5:-3])
+            self.assertEqual(reader[-1], samples[-1])
+            self.assertIsInstance(reader.stored(16, 32).base, np.memmap)
+
+            chunks = list(reader.iter_chunks(30, start=5))
+            self.assertEqual([offset for offset, _ in chunks], [5, 35, 65, 95])
+            np.testing.assert_array_equal(
+                np.concatenate([chunk for _, chunk in chunks]), samples[5:]
+            )
+
+    def test_hdf5_stream_time_slice(self):
+        """Test wall clock ranges map through the per batch start times"""
+        _, samples = make_samples(100)
+        filename = self.record_hdf5([samples[:40], samples[40:]], streaming=True)
+        with HDF5Reader(filename) as reader:
+            second_batch = float(reader.sample_time(40))
+            np.testing.assert_array_equal(
+                reader.time_slice(second_batch, second_batch + 0.010),
+                samples[40:50],
+            )
+            self.assertEqual(reader.sample_index(reader.start_time - 1), 0)
+
+    def test_hdf5_raw_stream(self):
+        """Test raw uint8 streaming HDF5 recordings convert on read"""
+        raw, samples = make_samples(64)
+        filename = self.record_hdf5([raw], streaming=True, dtype="uint8")
+        with HDF5Reader(filename) as reader:
+            self.assertEqual(len(reader), 64)
+            np.testing.assert_array_equal(reader[8:24], samples[8:24])
+            np.testing.assert_array_equal(reader.stored(8, 24), raw[16:48])
+
+    def test_hdf5_split_layout(self):
+        """Test the split real/imag layout is readable"""
+        _, samples = make_samples(10)
+        filename = self.record_hdf5([samples])
+        with HDF5Reader(filename) as reader:
+            self.assertFalse(reader.streaming)
+            np.testing.assert_allclose(reader[2:6], samples[2:6])
+            self.assertEqual(reader.sample_index(reader.sample_time(3)), 3)
+
+    def test_hdf5_split_layout_times(self):
+        """Test split layout time lookups across batches and past the end"""
+        _, samples = make_samples(2000)
+        filename = os.path.join(self.temp_dir, "split.hdf5")
+        recorder = HDF5Recorder(
+            center_freq=462e6, sample_rate=1000.0, freq_correction=60, gain="auto"
+        )
+        for begin, start_time in ((0, 100.0), (1000, 105.0)):
+            recorder.clock = lambda start_time=start_time: start_time
+            recorder.save(samples[begin : begin + 1000], filename)
+        with HDF5Reader(filename) as reader:
+            np.testing.assert_allclose(
+                reader.sample_time([999, 0, 1000, 1500]), [100.999, 100.0, 105.0, 105.5]
+            )
+            self.assertAlmostEqual(reader.sample_time(2010), 106.01)
+            self.assertEqual(reader.sample_index(100.5), 500)
+            self.assertEqual(reader.sample_index(103.0), 1000)
+            self.assertEqual(reader.sample_index(200.0), 2000)
+            self.assertEqual(len(reader.time_slice(100.5, 105.5)), 1000)
+
+    def test_raw_reader(self):
+        """Test cu8 recordings are memory-mapped and sliced by sample and time"""
+        raw, samples = make_samples(50)
+        filename = os.path.join(self.temp_dir, "test.cu8")
+        recorder = RawIQRecorder(
+            center_freq=462e6, sample_rate=10.0, freq_correction=60, gain="auto"
+        )
+        recorder.start_recording(1000.0)
+        recorder.save(raw, filename)
+        recorder.stop_recording(1005.0)
+
+        with open_recording(filename) as reader:
+            self.assertIsInstance(reader, RawIQReader)
+            self.assertEqual(len(reader), 50)
+            self.assertIsInstance(reader.raw(), np.memmap)
+            np.testing.assert_array_equal(reader[3:9], samples[3:9])
+            np.testing.assert_array_equal(reader.time_slice(1001.0, 1002.0), samples[10:20])
+
+    def test_unknown_extension(self):
+        """Test unsupported recordings are rejected"""
+        with self.assertRaises(ValueError):
+            open_recording(os.path.join(self.temp_dir, "test.csv"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,13 @@
 import unittest
 import os
 import tempfile
+import time
 import numpy as np
 import pandas as pd
 import h5py
 from sdrcap.recorders.csv_recorder import CSVRecorder
 from sdrcap.recorders.hdf5_recorder import HDF5Recorder
+from sdrcap.recorders.raw_recorder import RawIQRecorder, read_cu8, read_metadata
 
 
 class TestRecorderMethods(unittest.TestCase):
@@ -47,6 +49,41 @@ class TestRecorderMethods(unittest.TestCase):
                 self.assertAlmostEqual(real_value, sample.real, places=1)
                 self.assertAlmostEqual(imag_value, sample.imag, places=1)
 
+    def test_csv_batches_and_timestamps(self):
+        """Test CSV appends batches under one header with sample rate spacing"""
+        csv = CSVRecorder(sample_rate=1e6, precision=3)
+        samples = np.array([-0.5 + 0.25j, 1.0 - 1.0j, -0.0001 + 12.5j])
+        filename = os.path.join(self.temp_dir, "test.csv")
+        csv.save(samples, filename)
+        csv.save(samples, filename)
+
+        with open(filename, "r", encoding="UTF-8") as file:
+            lines = file.read().splitlines()
+        self.assertEqual(lines[0], "Real Value,Imaginary Value,TimeStamp")
+        self.assertEqual(len(lines), 1 + 2 * len(samples))
+        self.assertTrue(lines[1].startswith("-0.500,0.250,"))
+        self.assertTrue(lines[3].startswith("0.000,12.500,"))
+
+        df = pd.read_csv(filename)
+        stamps = pd.to_datetime(df["TimeStamp"])
+        self.assertEqual((stamps[1] - stamps[0]).value, 1_000)
+
+    def test_csv_throughput(self):
+        """Test CSV formatting keeps up with the RTL-SDR real time sample rate"""
+        sample_rate = 2.4e6
+        csv = CSVRecorder(sample_rate=sample_rate)
+        raw = np.random.randint(0, 256, 2 * 1024 * 256).astype(np.float32)
+        samples = (raw / 127.5 - 1).view(np.complex64)
+        filename = os.path.join(self.temp_dir, "throughput.csv")
+
+        csv.save(samples[:1024], filename)  # warm up file creation
+        start = time.perf_counter()
+        for _ in range(4):
+            csv.save(samples, filename)
+        elapsed = time.perf_counter() - start
+
+        self.assertGreater(4 * len(samples) / elapsed, sample_rate)
+
     def test_hdf5(self):
         """Test HDF5 creation and format to be correct"""
         hdf5 = HDF5Recorder(
@@ -67,6 +104,78 @@ class TestRecorderMethods(unittest.TestCase):
             self.assertEqual(f.attrs["freq_correction"], 60)
             self.assertEqual(f.attrs["gain"], "auto")
 
+    def test_hdf5_streaming(self):
+        """Test the streaming HDF5 layout appends chunked complex64 batches"""
+        hdf5 = HDF5Recorder(
+            center_freq=100700000.0,
+            sample_rate=2.4e6,
+            freq_correction=60,
+            gain="auto",
+            streaming=True,
+            chunk_size=4,
+        )
+        samples = np.array([1.0 + 0.5j, -0.5 - 1j, 0.25j, 0.0], dtype=np.complex128)
+        filename = os.path.join(self.temp_dir, "stream.hdf5")
+        hdf5.start_recording(time.time())
+        hdf5.save(samples, filename)
+        hdf5.save(samples[:2], filename)
+        hdf5.stop_recording(time.time())
+
+        with h5py.File(filename, "r") as f:
+            group = f["recording_data"]
+            self.assertEqual(group["iq"].dtype, np.complex64)
+            self.assertEqual(group["iq"].chunks, (4,))
+            np.testing.assert_array_equal(group["iq"][4:], samples[:2])
+            np.testing.assert_array_equal(group["batch_offset"][:], [0, 4])
+            self.assertEqual(len(group["batch_start_time"]), 2)
+            self.assertEqual(group.attrs["sample_rate"], 2.4e6)
+            self.assertIn("stop_recording_time", group.attrs)
+
+    def test_hdf5_streaming_uint8(self):
+        """Test the streaming HDF5 layout stores raw interleaved IQ bytes"""
+        hdf5 = HDF5Recorder(
+            center_freq=100700000.0,
+            sample_rate=2.4e6,
+            freq_correction=60,
+            gain="auto",
+            streaming=True,
+            dtype="uint8",
+        )
+        raw = np.arange(8, dtype=np.uint8)
+        filename = os.path.join(self.temp_dir, "stream_u8.hdf5")
+        hdf5.save(raw, filename)
+        hdf5.save(raw, filename)
+        hdf5.stop_recording(time.time())
+
+        with h5py.File(filename, "r") as f:
+            group = f["recording_data"]
+            np.testing.assert_array_equal(group["iq"][:], np.tile(raw, 2))
+            np.testing.assert_array_equal(group["batch_offset"][:], [0, 4])
+
+    def test_cu8(self):
+        """Test raw IQ bytes are stored verbatim with a metadata sidecar"""
+        raw = RawIQRecorder(
+            center_freq=462e6, sample_rate=2.4e6, freq_correction=60, gain=20.7
+        )
+        iq_bytes = np.arange(256, dtype=np.uint8)
+        filename = os.path.join(self.temp_dir, "test.cu8")
+        raw.start_recording(1_700_000_000.0)
+        raw.save(iq_bytes, filename)
+        raw.save(iq_bytes.tobytes(), filename)
+        raw.stop_recording(1_700_000_001.0)
+
+        self.assertEqual(os.path.getsize(filename), 2 * len(iq_bytes))
+        metadata = read_metadata(filename)
+        self.assertEqual(metadata["datatype"], "cu8")
+        self.assertEqual(metadata["center_freq"], 462e6)
+        self.assertEqual(metadata["start_time"], 1_700_000_000.0)
+        self.assertEqual(metadata["num_samples"], len(iq_bytes))
+
+        samples = read_cu8(filename, start=128, count=4)
+        expected = iq_bytes[:8].astype(np.float64).view(np.complex128) / 127.5 - (1 + 1j)
+        np.testing.assert_allclose(samples, expected, rtol=1e-6)
+        self.assertEqual(samples.dtype, np.complex64)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,134 @@
+""" Collection of tests for the backend and recorder registries """
+import unittest
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from contextlib import redirect_stdout
+import numpy as np
+from sdrcap.cli import main
+from sdrcap.readers import open_recording
+from sdrcap.recorders.csv_recorder import CSVRecorder
+from sdrcap.recorders.hdf5_recorder import HDF5Recorder
+from sdrcap.recorders.raw_recorder import RawIQRecorder
+from sdrcap.registry import BACKENDS, RECORDERS, Registry, new_recorder
+from sdrcap.rtl_interface import DEFAULT_OPTIONS
+from sdrcap.sim_interface import SimulatedSDRInterface
+from tests.test_capture import ListRecorder
+
+
+class TestRegistry(unittest.TestCase):
+    """Unit tests for the lazy registries and the record command"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_registry(self):
+        """Tests registering, importing and rejecting entries"""
+        registry = Registry("thing", "sdrcap.tests.unused")
+        registry.register("path", "os.path:join")
+        registry.register("object", len)
+        self.assertEqual(registry.names(), ("path", "object"))
+        self.assertIs(registry.get("path"), os.path.join)
+        self.assertIs(registry.get("object"), len)
+        self.assertIn("path", registry)
+        self.assertNotIn("missing", registry)
+        with self.assertRaises(ValueError):
+            registry.get("missing")
+
+    def test_builtin_recorders(self):
+        """Tests creating the built-in recorders from recording options"""
+        for filetype, recorder_class in (
+            ("csv", CSVRecorder),
+            ("hdf5", HDF5Recorder),
+            ("cu8", RawIQRecorder),
+        ):
+            recorder = new_recorder({**DEFAULT_OPTIONS, "filetype": filetype})
+            self.assertIsInstance(recorder, recorder_class)
+        self.assertIs(BACKENDS.get("sim"), SimulatedSDRInterface)
+
+    def test_plugin_recorder(self):
+        """Tests capturing with a recorder registered at runtime"""
+
+        class PluginRecorder(ListRecorder):
+            """ListRecorder created from recording options"""
+
+            @classmethod
+            def from_options(cls, options):
+                return cls()
+
+        RECORDERS.register("plugin", PluginRecorder)
+        try:
+            interface = SimulatedSDRInterface(
+                realtime=False,
+                filetype="plugin",
+                sample_window=1024,
+                output_dir=self.temp_dir,
+            )
+            interface.record_single_sample()
+            self.assertEqual(len(interface.options["recorder"].batches), 1)
+        finally:
+            RECORDERS._entries.pop("plugin")  # pylint: disable=protected-access
+        with self.assertRaises(ValueError):
+            SimulatedSDRInterface(filetype="plugin", output_dir=self.temp_dir)
+
+    def test_lazy_imports(self):
+        """Tests that the command line and capture path skip unused packages"""
+        code = (
+            "import sys, sdrcap.cli, sdrcap.rtl_interface; "
+            "print(sorted({'h5py', 'rtlsdr', 'asyncio'} & set(sys.modules)))"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        self.assertEqual(result.stdout.strip(), "[]")
+        code = "import sys, sdrcap.cli; print('numpy' in sys.modules)"
+        result = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        self.assertEqual(result.stdout.strip(), "False")
+
+    def test_record_command(self):
+        """Tests the record command on the simulated backend"""
+        arguments = [
+            "record", "--device", "sim", "--filetype", "cu8", "--sample-rate", "1e6",
+            "--sample-window", "4096", "--output-dir", self.temp_dir,
+            "--option", "realtime=false",
+        ]
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(main(arguments + ["--name", "a", "--batches", "3"]), 0)
+        self.assertIn("3 batches", output.getvalue())
+        filename = os.path.join(self.temp_dir, "a-sample_window4096.cu8")
+        with open_recording(filename) as reader:
+            self.assertEqual(reader.num_samples, 3 * 4096)
+            self.assertEqual(reader.sample_rate, 1e6)
+
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(main(arguments + ["--name", "b", "--duration", "0.2"]), 0)
+        self.assertIn("batches written", output.getvalue())
+        data = np.fromfile(
+            os.path.join(self.temp_dir, "b-sample_window4096.cu8"), dtype=np.uint8
+        )
+        self.assertGreater(len(data), 0)
+
+        with redirect_stdout(io.StringIO()):
+            self.assertEqual(main(["record", "--device", "nope", "--batches", "1"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
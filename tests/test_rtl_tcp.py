@@ -0,0 +1,171 @@
+""" Collection of tests for the rtl_tcp client and fan-out server """
+import unittest
+import shutil
+import socket
+import tempfile
+import threading
+import time
+import numpy as np
+from sdrcap.hardware_interface import HardwareInterface
+from sdrcap.rtl_tcp import (
+    COMMAND,
+    CMD_SET_FREQ,
+    CMD_SET_GAIN,
+    CMD_SET_GAIN_MODE,
+    HEADER,
+    RtlTcpClient,
+    RtlTcpInterface,
+    RtlTcpServer,
+)
+
+
+class CounterSdr:
+    """Stand-in device whose byte stream counts up modulo 256"""
+
+    def __init__(self):
+        self.center_freq = 100e6
+        self.sample_rate = 2.4e6
+        self.gain = "auto"
+        self.freq_correction = 0
+        self.position = 0
+        self.buffer = None
+
+    def read_bytes(self, num_bytes):
+        """Returns the next counter bytes in one reused buffer, like pyrtlsdr"""
+        time.sleep(0.001)
+        if self.buffer is None or len(self.buffer) != num_bytes:
+            self.buffer = np.empty(num_bytes, dtype=np.uint8)
+        self.buffer[:] = (self.position + np.arange(num_bytes)) % 256
+        self.position += num_bytes
+        return self.buffer
+
+
+def assert_counting(testcase, data):
+    """Checks a received stream is contiguous counter bytes"""
+    np.testing.assert_array_equal(np.diff(data.astype(np.int16)) % 256, 1)
+    testcase.assertGreater(len(data), 0)
+
+
+class TestRtlTcp(unittest.TestCase):
+    """Unit tests for the rtl_tcp protocol over loopback"""
+
+    def setUp(self):
+        """Starts a fan-out server on a free loopback port"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.sdr = CounterSdr()
+        self.server = RtlTcpServer(
+            self.sdr, port=0, buffer_size=4096, allow_control=True
+        ).start()
+
+    def tearDown(self):
+        """Stops the server and removes the temporary recordings"""
+        self.server.stop(timeout=5)
+        shutil.rmtree(self.temp_dir)
+
+    def test_fan_out(self):
+        """Test every client gets the same contiguous stream"""
+        clients = [RtlTcpClient(port=self.server.port) for _ in range(3)]
+        try:
+            self.assertEqual(clients[0].tuner_type, 5)
+            for client in clients:
+                assert_counting(self, client.read_bytes(20000))
+        finally:
+            for client in clients:
+                client.close()
+
+    def test_commands(self):
+        """Test client tuning commands reach the shared device"""
+        client = RtlTcpClient(port=self.server.port)
+        try:
+            client.center_freq = 462.5625e6
+            client.gain = 19.7
+            deadline = time.monotonic() + 5
+            while self.sdr.gain != 19.7 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(self.sdr.center_freq, 462562500)
+            self.assertEqual(self.sdr.gain, 19.7)
+        finally:
+            client.close()
+
+    def test_slow_client_backpressure(self):
+        """Test a stalled client drops its own batches without stalling others"""
+        server = RtlTcpServer(CounterSdr(), port=0, buffer_size=65536, max_queue=2).start()
+        stalled = socket.create_connection(("127.0.0.1", server.port))
+        stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        client = RtlTcpClient(port=server.port)
+        try:
+            for _ in range(300):
+                assert_counting(self, client.read_bytes(65536))
+            stats = {stat["address"][1]: stat for stat in server.stats}
+            self.assertGreater(stats[stalled.getsockname()[1]]["dropped"], 0)
+        finally:
+            client.close()
+            stalled.close()
+            server.stop(timeout=5)
+
+    def test_sync_read_copies(self):
+        """Test batches of a device reusing its read buffer are published as copies"""
+        server = RtlTcpServer(self.sdr, port=0, buffer_size=100)
+        published = []
+
+        def publish(batch):
+            published.append(batch)
+            if len(published) == 3:
+                server._stopping.set()  # pylint: disable=protected-access
+
+        server.publish = publish
+        server._read_loop()  # pylint: disable=protected-access
+        self.assertEqual(server.errors, [])
+        assert_counting(self, np.frombuffer(b"".join(published), dtype=np.uint8))
+
+    def test_interface_recording(self):
+        """Test a recorder captures from the remote device through the interface"""
+        iface = RtlTcpInterface(
+            port=self.server.port,
+            output_dir=self.temp_dir,
+            filetype="cu8",
+            sample_window=2048,
+        )
+        self.assertIsInstance(iface, HardwareInterface)
+        iface.start_recording_threaded(recording_name="tcp")
+        time.sleep(0.1)
+        stats = iface.stop_recording_threaded(timeout=5)
+        iface.sdr.close()
+        self.assertGreater(stats["written"], 0)
+        raw = np.fromfile(f"{self.temp_dir}/tcp-sample_window2048.cu8", dtype=np.uint8)
+        assert_counting(self, raw)
+
+
+class TestRtlTcpClientProtocol(unittest.TestCase):
+    """Unit tests for the client against a minimal stand-in rtl_tcp server"""
+
+    def test_header_and_commands(self):
+        """Test the client parses the header and sends 5 byte commands"""
+        listener = socket.create_server(("127.0.0.1", 0))
+        received = []
+
+        def serve():
+            conn, _ = listener.accept()
+            conn.sendall(HEADER.pack(b"RTL0", 5, 29) + bytes(range(8)))
+            data = b""
+            while len(data) < 3 * COMMAND.size:
+                data += conn.recv(64)
+            received.extend(COMMAND.iter_unpack(data))
+            conn.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        client = RtlTcpClient(port=listener.getsockname()[1])
+        np.testing.assert_array_equal(client.read_bytes(8), np.arange(8))
+        client.center_freq = 100e6
+        client.gain = 10
+        thread.join(5)
+        client.close()
+        listener.close()
+        self.assertEqual(
+            received, [(CMD_SET_FREQ, 100000000), (CMD_SET_GAIN_MODE, 1), (CMD_SET_GAIN, 100)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
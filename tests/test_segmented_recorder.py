@@ -0,0 +1,158 @@
+""" Collection of tests for segment rotation and retention """
+import unittest
+import gzip
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from sdrcap.recorders.raw_recorder import RawIQRecorder, read_metadata
+from sdrcap.recorders.segmented_recorder import (
+    RetentionWorker,
+    SegmentedRecorder,
+    manifest_filename,
+    read_manifest,
+)
+from sdrcap.rtl_interface import RTLSDRInterface
+from sdrcap.sim_interface import SimulatedSDRInterface
+
+
+def raw_recorder():
+    """Returns a cu8 recorder for a segment"""
+    return RawIQRecorder(center_freq=100e6, sample_rate=1e6, freq_correction=0, gain="auto")
+
+
+class TestSegmentedRecorder(unittest.TestCase):
+    """Unit tests for rotation, atomic finalize and the manifest"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.temp_dir, "capture.cu8")
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_size_rotation(self):
+        """Test segments roll over by size and the stream survives intact"""
+        recorder = SegmentedRecorder(raw_recorder, max_bytes=4000)
+        self.assertTrue(recorder.raw_input)
+        data = np.arange(10 * 2000, dtype=np.int64).astype(np.uint8)
+        recorder.start_recording(time.time())
+        for batch in np.split(data, 10):
+            recorder.save(batch, self.filename)
+            partial = f"capture-seg{len(recorder.segments):05d}.cu8.partial"
+            self.assertTrue(os.path.exists(os.path.join(self.temp_dir, partial)))
+        recorder.stop_recording(time.time())
+
+        segments = read_manifest(manifest_filename(self.filename))
+        self.assertEqual([s["num_samples"] for s in segments], [2000, 2000, 2000, 2000, 2000])
+        joined = np.concatenate(
+            [
+                np.fromfile(os.path.join(self.temp_dir, s["filename"]), dtype=np.uint8)
+                for s in segments
+            ]
+        )
+        np.testing.assert_array_equal(joined, data)
+        self.assertEqual(glob_partials(self.temp_dir), [])
+        metadata = read_metadata(os.path.join(self.temp_dir, "capture-seg00001.cu8"))
+        self.assertEqual(metadata["segment_index"], 1)
+        self.assertEqual(metadata["start_time"], segments[1]["start_time"])
+        self.assertLessEqual(segments[0]["stop_time"], segments[1]["start_time"])
+
+    def test_time_rotation(self):
+        """Test segments roll over by duration"""
+        recorder = SegmentedRecorder(raw_recorder, max_seconds=0.02)
+        recorder.start_recording(time.time())
+        for _ in range(3):
+            recorder.save(np.zeros(100, dtype=np.uint8), self.filename)
+            time.sleep(0.025)
+        recorder.stop_recording(time.time())
+        self.assertEqual(len(recorder.segments), 3)
+
+    def test_invalid_limits(self):
+        """Test a segmented recorder needs a limit"""
+        with self.assertRaises(ValueError):
+            SegmentedRecorder(raw_recorder)
+        with self.assertRaises(ValueError):
+            SegmentedRecorder(raw_recorder, max_bytes=0)
+
+    def test_retention(self):
+        """Test old segments are compressed, then deleted to fit the budget"""
+        recorder = SegmentedRecorder(raw_recorder, max_bytes=10000)
+        recorder.start_recording(time.time())
+        rng = np.random.default_rng(0)
+        for _ in range(4):
+            recorder.save(rng.integers(0, 256, 10000, dtype=np.uint8), self.filename)
+        recorder.stop_recording(time.time())
+        manifest = manifest_filename(self.filename)
+
+        worker = RetentionWorker(manifest, compress_after=0)
+        self.assertLess(worker.run_once(), 40000 * 1.01)
+        compressed = os.path.join(self.temp_dir, "capture-seg00000.cu8.gz")
+        with gzip.open(compressed, "rb") as in_file:
+            self.assertEqual(len(in_file.read()), 10000)
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, "capture-seg00000.cu8")))
+
+        total = RetentionWorker(manifest, disk_budget=25000).run_once()
+        self.assertLessEqual(total, 25000)
+        segments = read_manifest(manifest)
+        self.assertEqual([s["index"] for s in segments], [2, 3])
+        self.assertFalse(os.path.exists(compressed))
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, "capture-seg00000.cu8.json")))
+
+    def test_interface_options(self):
+        """Test the segment options rotate a threaded capture with a budget"""
+        iface = SimulatedSDRInterface(
+            realtime=False,
+            output_dir=self.temp_dir,
+            filetype="hdf5",
+            hdf5_streaming=True,
+            sample_window=4096,
+            segment_bytes=64 * 1024,
+            disk_budget=10**9,
+        )
+        self.assertIsInstance(iface.options["recorder"], SegmentedRecorder)
+        iface.start_recording_threaded(recording_name="rolled")
+        time.sleep(0.2)
+        stats = iface.stop_recording_threaded(timeout=5)
+        manifest = os.path.join(self.temp_dir, "rolled-sample_window4096.manifest.jsonl")
+        segments = read_manifest(manifest)
+        self.assertGreater(len(segments), 1)
+        self.assertEqual(sum(s["num_samples"] for s in segments), 4096 * stats["written"])
+        self.assertEqual(glob_partials(self.temp_dir), [])
+
+    def test_sync_batches(self):
+        """Test batch by batch recording keeps rotating while a segment is open"""
+        iface = SimulatedSDRInterface(
+            realtime=False,
+            output_dir=self.temp_dir,
+            filetype="cu8",
+            sample_window=4096,
+            segment_bytes=20000,
+        )
+        recorder = iface.options["recorder"]
+        recorder.start_recording(time.time())
+        for _ in range(8):
+            iface.record_single_sample("sync")
+        recorder.stop_recording(time.time())
+        manifest = os.path.join(self.temp_dir, "sync-sample_window4096.manifest.jsonl")
+        segments = read_manifest(manifest)
+        self.assertGreater(len(segments), 1)
+        self.assertEqual(sum(s["num_samples"] for s in segments), 4096 * 8)
+        self.assertEqual(glob_partials(self.temp_dir), [])
+
+    def test_no_segmenting_by_default(self):
+        """Test the plain recorder is used without segment options"""
+        iface = RTLSDRInterface(sdr=object(), output_dir=self.temp_dir, filetype="cu8")
+        self.assertIsInstance(iface.options["recorder"], RawIQRecorder)
+
+
+def glob_partials(directory):
+    """Lists leftover partial files"""
+    return [name for name in os.listdir(directory) if name.endswith(".partial")]
+
+
+if __name__ == "__main__":
+    unittest.main()
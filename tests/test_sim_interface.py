@@ -0,0 +1,109 @@
+""" Collection of tests for the simulated and replay SDR backend """
+import unittest
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+from sdrcap.hardware_interface import HardwareInterface
+from sdrcap.recorders.raw_recorder import RawIQRecorder, read_cu8
+from sdrcap.sim_interface import (
+    ReplaySource,
+    SimulatedRtlSdr,
+    SimulatedSDRInterface,
+    SyntheticSource,
+)
+from tests.test_capture import ListRecorder
+
+
+class TestSimulatedSdr(unittest.TestCase):
+    """Unit tests for the simulated device and its sources"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_synthetic_tone(self):
+        """Test a tone shows up at its offset from the tuned frequency"""
+        source = SyntheticSource(tones=((100.3e6, 0.5),), noise_db=-50, seed=0)
+        sdr = SimulatedRtlSdr(
+            source, realtime=False, center_freq=100e6, sample_rate=1e6
+        )
+        samples = sdr.read_samples(1000)
+        self.assertEqual(np.argmax(np.abs(np.fft.fft(samples))), 300)
+        sdr.center_freq = 101e6
+        self.assertLess(np.abs(sdr.read_samples(1000)).max(), 0.05)
+
+    def test_synthetic_bursts(self):
+        """Test bursts are only on for their duration every period"""
+        source = SyntheticSource(bursts=((0.0, 0.5, 0.01, 0.002),), noise_db=None)
+        samples = source.generate(0, 30000, center_freq=0.0, sample_rate=1e6)
+        on = np.abs(samples) > 0.25
+        self.assertEqual(on.sum(), 3 * 2000)
+        self.assertTrue(on[10000:12000].all())
+
+    def test_realtime_pacing(self):
+        """Test paced reads take as long as the samples last"""
+        sdr = SimulatedRtlSdr(sample_rate=100e3)
+        start = time.monotonic()
+        for _ in range(5):
+            sdr.read_bytes(2000)
+        self.assertGreaterEqual(time.monotonic() - start, 0.045)
+        self.assertEqual(sdr.dropped_samples, 0)
+
+    def test_replay(self):
+        """Test a replayed recording comes back sample for sample and loops"""
+        raw = np.random.default_rng(3).integers(0, 256, 2000, dtype=np.uint8)
+        filename = os.path.join(self.temp_dir, "replay.cu8")
+        recorder = RawIQRecorder(
+            center_freq=462e6, sample_rate=1e5, freq_correction=60, gain="auto"
+        )
+        recorder.save(raw, filename)
+        recorder.stop_recording(0.0)
+
+        iface = SimulatedSDRInterface(
+            source=ReplaySource(filename), realtime=False, output_dir=self.temp_dir
+        )
+        self.assertIsInstance(iface, HardwareInterface)
+        self.assertEqual(iface.options["center_freq"], 462e6)
+        replayed = iface.sdr.read_bytes(3000)
+        np.testing.assert_array_equal(replayed[:2000], raw)
+        np.testing.assert_array_equal(replayed[2000:], raw[:1000])
+
+    def test_threaded_recording(self):
+        """Test the full threaded capture path records without hardware"""
+        iface = SimulatedSDRInterface(
+            realtime=False,
+            output_dir=self.temp_dir,
+            filetype="cu8",
+            sample_window=4096,
+        )
+        iface.start_recording_threaded(recording_name="sim")
+        time.sleep(0.1)
+        stats = iface.stop_recording_threaded(timeout=5)
+        self.assertGreater(stats["written"], 0)
+        filename = os.path.join(self.temp_dir, "sim-sample_window4096.cu8")
+        self.assertEqual(len(read_cu8(filename)), 4096 * stats["written"])
+
+    def test_device_overflow(self):
+        """Test a blocked reader makes the paced device lose samples"""
+        iface = SimulatedSDRInterface(
+            output_dir=self.temp_dir,
+            sample_rate=1e6,
+            sample_window=1000,
+            num_buffers=2,
+            device_buffers=2,
+        )
+        iface.options["recorder"] = ListRecorder(delay=0.02)
+        iface.start_recording_threaded()
+        time.sleep(0.2)
+        iface.stop_recording_threaded(timeout=5)
+        self.assertGreater(iface.sdr.dropped_samples, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+""" Collection of tests for the frequency sweep mode """
+import unittest
+import os
+import shutil
+import tempfile
+import numpy as np
+from sdrcap.iq import complex_to_cu8
+from sdrcap.sweep import FrequencySweeper, SweepPlan, welch_psd
+from sdrcap.recorders.spectrum_recorder import SpectrumRecorder, read_spectrum
+
+TONE_FREQ = 103.3e6
+
+
+class ToneSdr:
+    """Stand-in device receiving a single tone at an absolute frequency"""
+
+    def __init__(self, tone_freq=TONE_FREQ):
+        self.tone_freq = tone_freq
+        self.center_freq = 0.0
+        self.sample_rate = 2.4e6
+        self.tuned = []
+        self._rng = np.random.default_rng(0)
+
+    def __setattr__(self, name, value):
+        if name == "center_freq" and hasattr(self, "tuned"):
+            self.tuned.append(value)
+        super().__setattr__(name, value)
+
+    def read_bytes(self, num_bytes):
+        """Returns cu8 bytes of the tone, if in band, plus a little noise"""
+        count = num_bytes // 2
+        offset = self.tone_freq - self.center_freq
+        samples = 0.01 * (
+            self._rng.standard_normal(count) + 1j * self._rng.standard_normal(count)
+        )
+        if abs(offset) < self.sample_rate / 2:
+            samples += 0.5 * np.exp(
+                2j * np.pi * offset / self.sample_rate * np.arange(count)
+            )
+        return complex_to_cu8(samples).tobytes()
+
+
+class TestSweep(unittest.TestCase):
+    """Unit tests for sweep planning, stitching and spectrum recording"""
+
+    def setUp(self):
+        """Creates the temporary directory recordings are written to"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.plan = SweepPlan(
+            100e6, 110e6, sample_rate=2.4e6, fft_size=256, overlap=0.25, settle_time=0
+        )
+
+    def tearDown(self):
+        """Removes the temporary recordings"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_plan_tiles_band(self):
+        """Test the kept bins of consecutive hops tile the band evenly"""
+        plan = self.plan
+        self.assertEqual(plan.keep_bins, 192)
+        self.assertEqual(plan.trim_bins, 32)
+        self.assertEqual(plan.num_hops, 6)
+        frequencies = plan.frequencies()
+        self.assertEqual(frequencies[0], 100e6)
+        self.assertGreaterEqual(frequencies[-1] + plan.bin_width, 110e6)
+        np.testing.assert_allclose(np.diff(frequencies), plan.bin_width)
+        hop_low = plan.centers - plan.keep_bins / 2 * plan.bin_width
+        np.testing.assert_allclose(hop_low, frequencies[:: plan.keep_bins])
+
+    def test_welch_psd(self):
+        """Test the vectorized Welch PSD peaks at the tone bin"""
+        tone = np.exp(2j * np.pi * 0.25 * np.arange(4096)).astype(np.complex64)
+        psd = welch_psd(tone, 64, 1.0)
+        self.assertEqual(psd.dtype, np.float32)
+        self.assertEqual(int(np.argmax(psd)), 32 + 16)
+
+    def test_sweep_finds_tone(self):
+        """Test the stitched spectrum peaks at the tone frequency"""
+        sdr = ToneSdr()
+        sweeper = FrequencySweeper(sdr, self.plan)
+        spectrum = sweeper.sweep()
+        np.testing.assert_allclose(sdr.tuned, self.plan.centers)
+        peak = self.plan.frequencies()[np.argmax(spectrum)]
+        self.assertLessEqual(abs(peak - TONE_FREQ), self.plan.bin_width)
+        self.assertEqual(sweeper.stats["hops"], self.plan.num_hops)
+        self.assertGreater(sweeper.stats["hops_per_second"], 0)
+
+    def test_record_formats(self):
+        """Test both spectrum formats record one row per sweep"""
+        for spectrum_format in ("hdf5", "bin"):
+            filename = os.path.join(self.temp_dir, f"sweep.{spectrum_format}")
+            recorder = SpectrumRecorder(
+                self.plan, gain="auto", freq_correction=60, spectrum_format=spectrum_format
+            )
+            sweeper = FrequencySweeper(ToneSdr(), self.plan)
+            stats = sweeper.run(recorder, filename, num_sweeps=3)
+            self.assertEqual(stats["sweeps"], 3)
+
+            frequencies, times, power = read_spectrum(filename)
+            np.testing.assert_allclose(frequencies, self.plan.frequencies())
+            self.assertEqual(power.shape, (3, self.plan.num_bins))
+            self.assertTrue(np.all(np.diff(times) >= 0))
+            self.assertLessEqual(
+                abs(frequencies[np.argmax(power[-1])] - TONE_FREQ), self.plan.bin_width
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+""" Collection of tests for energy triggered burst recording """
+import unittest
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+from sdrcap.readers import open_recording
+from sdrcap.recorders.raw_recorder import RawIQRecorder
+from sdrcap.recorders.recorder import Recorder
+from sdrcap.trigger import BurstRecorder, EnergyTrigger
+
+
+class SegmentRecorder(Recorder):
+    """Recorder keeping saved samples and attributes per filename in memory"""
+
+    def __init__(self):
+        super().__init__()
+        self.segments = {}
+        self.segment_attributes = {}
+        self.segment_times = {}
+
+    def start_recording(self, start_recording_time):
+        self.start_recording_time = start_recording_time
+
+    def stop_recording(self, stop_recording_time):
+        self.stop_recording_time = stop_recording_time
+
+    def save(self, samples, filename):
+        self.segments.setdefault(filename, []).append(np.array(samples))
+        self.segment_attributes.setdefault(filename, dict(self.attributes))
+        self.segment_times.setdefault(filename, []).append(self.clock())
+
+
+class TestTrigger(unittest.TestCase):
+    """Unit tests for the energy trigger and burst segmentation"""
+
+    def test_hysteresis(self):
+        """Test the trigger stays on between the on and off thresholds"""
+        trigger = EnergyTrigger(threshold_db=-10, hysteresis_db=5)
+        power = np.array([-20, -9, -12, -14, -16, -12, -9, -12], dtype=np.float32)
+        np.testing.assert_array_equal(
+            trigger.detect(power), [0, 1, 1, 1, 0, 0, 1, 1]
+        )
+        self.assertTrue(trigger.active)
+        np.testing.assert_array_equal(trigger.detect(power[2:4]), [1, 1])
+
+    def test_block_power(self):
+        """Test block and band power of a tone"""
+        tone = 0.5 * np.exp(2j * np.pi * 0.25 * np.arange(1000))
+        np.testing.assert_allclose(
+            EnergyTrigger(-10, block_size=256).block_power(tone)[:3], -6.02, atol=0.01
+        )
+        in_band = EnergyTrigger(-10, block_size=256, band=(0.2, 0.3))
+        out_band = EnergyTrigger(-10, block_size=256, band=(-0.3, -0.2))
+        self.assertGreater(in_band.block_power(tone)[0], -7)
+        self.assertLess(out_band.block_power(tone)[0], -40)
+
+    def test_bursts(self):
+        """Test only padded bursts are saved, one segment each, across batches"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            rng = np.random.default_rng(2)
+            signal = (1e-3 * rng.standard_normal(5000)).astype(np.complex64)
+            signal[1020:1200] += 0.5
+            signal[1300:1480] += 0.5
+            signal[2820:3100] += 0.5
+
+            inner = SegmentRecorder()
+            recorder = BurstRecorder(
+                inner,
+                EnergyTrigger(threshold_db=-20, block_size=50),
+                sample_rate=10000,
+                pre_trigger=0.01,
+                post_trigger=0.02,
+            )
+            filename = os.path.join(temp_dir, "capture.cu8")
+            offset = 0
+            recorder.clock = lambda: 100.0 + offset / 10000
+            recorder.start_recording(100.0)
+            for offset in range(0, len(signal), 700):
+                recorder.save(signal[offset : offset + 700], filename)
+            recorder.stop_recording(101.0)
+
+            first = recorder.segment_filename(filename, 0)
+            second = recorder.segment_filename(filename, 1)
+            self.assertEqual(sorted(inner.segments), [first, second])
+            np.testing.assert_array_equal(
+                np.concatenate(inner.segments[first]), signal[900:1700]
+            )
+            np.testing.assert_array_equal(
+                np.concatenate(inner.segments[second]), signal[2700:3300]
+            )
+            self.assertEqual(inner.segment_attributes[second]["burst_index"], 1)
+            self.assertEqual(
+                inner.segment_attributes[second]["trigger_threshold_db"], -20
+            )
+
+            index_filename = recorder.index_filename(filename)
+            with open(index_filename, encoding="utf-8") as index_file:
+                bursts = json.load(index_file)["bursts"]
+            self.assertEqual(
+                [(burst["start_sample"], burst["num_samples"]) for burst in bursts],
+                [(900, 800), (2700, 600)],
+            )
+            self.assertEqual(bursts[1]["trigger_sample"], 2800)
+            # every part is stamped with the time of its own first sample
+            for segment, start_time in ((first, 100.09), (second, 100.27)):
+                lengths = [len(part) for part in inner.segments[segment]]
+                np.testing.assert_allclose(
+                    inner.segment_times[segment],
+                    start_time + np.cumsum([0] + lengths[:-1]) / 10000,
+                )
+            self.assertAlmostEqual(bursts[1]["start_time"], 100.27)
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_burst_file_times(self):
+        """Test burst files open at their burst's start time"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            signal = np.zeros(4000, dtype=np.complex64)
+            signal[1000:1200] = 0.5
+            signal[3000:3200] = 0.5
+            recorder = BurstRecorder(
+                RawIQRecorder(
+                    center_freq=100e6, sample_rate=10000, freq_correction=0, gain="auto"
+                ),
+                EnergyTrigger(threshold_db=-20, block_size=50),
+                sample_rate=10000,
+            )
+            filename = os.path.join(temp_dir, "capture.cu8")
+            offset = 0
+            recorder.clock = lambda: 1000.0 + offset / 10000
+            recorder.start_recording(1000.0)
+            for offset in range(0, len(signal), 500):
+                recorder.save(signal[offset : offset + 500], filename)
+            recorder.stop_recording(1000.4)
+            for index, start_time in enumerate([1000.0, 1000.2]):
+                burst_file = recorder.segment_filename(filename, index)
+                with open_recording(burst_file) as reader:
+                    self.assertAlmostEqual(reader.start_time, start_time + 0.09)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+if __name__ == "__main__":
+    unittest.main()